@@ -7,7 +7,8 @@ and identify missed selling opportunities, incorporating house consumption
 patterns for predictability checks.
 
 Primary data source: dashboard API at http://192.168.33.10:8080/
-Fallbacks: out/daily_snapshots/ and out/energy_data/
+Fallbacks: the SQLite database (columnar energy readings), out/daily_snapshots/
+and out/energy_data/
 
 Outputs (written to out/):
 - charge_deferral_findings.csv
@@ -25,11 +26,13 @@ Optional args:
   --sell-soc-threshold 0.5         SOC threshold for selling (default 0.5)
   --p25 0.25                       Low-price percentile (default 0.25)
   --p80 0.8                        High-price percentile (default 0.8)
+  --db data/goodwe_energy.db       SQLite database used when the API is not reachable
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
 import datetime as dt
 import json
 import os
@@ -76,6 +79,7 @@ class Config:
     sell_soc_threshold: float
     p_low: float
     p_high: float
+    db_path: str
 
 
 def parse_args() -> Config:
@@ -87,6 +91,7 @@ def parse_args() -> Config:
     parser.add_argument("--sell-soc-threshold", type=float, default=0.50)
     parser.add_argument("--p25", type=float, default=0.25)
     parser.add_argument("--p80", type=float, default=0.80)
+    parser.add_argument("--db", default=str(PROJECT_ROOT / "data" / "goodwe_energy.db"))
     args = parser.parse_args()
     return Config(
         base_url=args.base_url.rstrip("/"),
@@ -96,6 +101,7 @@ def parse_args() -> Config:
         sell_soc_threshold=args.sell_soc_threshold,
         p_low=args.p25,
         p_high=args.p80,
+        db_path=args.db,
     )
 
 
@@ -126,6 +132,42 @@ def load_decisions(base_url: str, days: int) -> Optional[List[Dict[str, Any]]]:
     return None
 
 
+def load_historical_from_storage(db_path: str, days: int) -> pd.DataFrame:
+    """Fallback: hourly frame straight from the energy readings' column arrays."""
+    if not os.path.exists(db_path):
+        return pd.DataFrame()
+    try:
+        from database.sqlite_storage import SQLiteStorage  # type: ignore
+        from database.storage_interface import StorageConfig  # type: ignore
+    except Exception:
+        return pd.DataFrame()
+
+    async def _load() -> Dict[str, Any]:
+        storage = SQLiteStorage(StorageConfig(db_path=db_path, connection_pool_size=0))
+        if not await storage.connect():
+            return {}
+        try:
+            end = dt.datetime.now()
+            return await storage.get_energy_columns(
+                end - dt.timedelta(days=days), end,
+                columns=("battery_soc", "pv_power", "grid_power", "house_consumption", "price_pln"),
+            )
+        finally:
+            await storage.disconnect()
+
+    columns = asyncio.run(_load())
+    if not columns or not len(columns["ts_ms"]):
+        return pd.DataFrame()
+    # Epoch ms -> naive local time, matching the API payload timestamps
+    local_tz = dt.datetime.now().astimezone().tzinfo
+    index = pd.to_datetime(columns.pop("ts_ms"), unit="ms", utc=True).tz_convert(local_tz).tz_localize(None)
+    df = pd.DataFrame(columns, index=index).rename(
+        columns={"battery_soc": "soc", "pv_power": "pv", "house_consumption": "load", "price_pln": "price"}
+    )
+    df.index.name = "timestamp"
+    return df.resample("H").mean()
+
+
 def load_price_series_from_files(days: int) -> pd.Series:
     """Fallback: build hourly price series from recent files in out/energy_data/.
     Accepts common fields: timestamp/time, price/price_pln/energy_price.
@@ -632,6 +674,8 @@ def main() -> int:
 
     df_hist = df_from_historical_payload(historical_payload) if historical_payload else pd.DataFrame()
     df_dec = df_from_decisions(decisions_payload) if decisions_payload else pd.DataFrame()
+    if df_hist.empty:
+        df_hist = load_historical_from_storage(cfg.db_path, cfg.days)
 
     # Restrict to last N days
     if not df_hist.empty:
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark charging window search
+
+Compares the legacy quadratic sliding-window search (re-pricing every window
+and the whole day inside the loop) with the prefix-sum implementation in
+AutomatedPriceCharger on:
+1. D+1 data (96 x 15-minute slots)
+2. Two-day data (192 x 15-minute slots)
+
+Usage:
+  python3 scripts/benchmark_charging_windows.py [--repeat 20]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from automated_price_charging import AutomatedPriceCharger
+from price_curve import clear_price_curve_cache
+
+
+def build_config():
+    """Minimal G12w configuration"""
+    return {
+        'data_storage': {
+            'database_storage': {'enabled': True, 'db_path': ':memory:'}
+        },
+        'electricity_tariff': {
+            'tariff_type': 'g12w',
+            'sc_component_pln_kwh': 0.0892,
+            'distribution_pricing': {
+                'g12w': {
+                    'type': 'time_based',
+                    'peak_hours': {'start': 6, 'end': 22},
+                    'prices': {'peak': 0.3566, 'off_peak': 0.0749}
+                }
+            }
+        }
+    }
+
+
+def build_price_data(slots: int):
+    """Synthetic CSDAC data with a daily price shape"""
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    values = []
+    for i in range(slots):
+        hour = (i // 4) % 24
+        price = 350.0 + 200.0 * (1 if 17 <= hour < 21 else 0) - 150.0 * (1 if 10 <= hour < 15 else 0) + (i % 7)
+        values.append({
+            'dtime': (start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M'),
+            'csdac_pln': price
+        })
+    return {'value': values}
+
+
+def legacy_analyze_charging_windows(charger, price_data, target_hours):
+    """Legacy implementation: re-prices each window and the whole day per candidate"""
+    def final(item):
+        return charger.calculate_final_price(
+            float(item['csdac_pln']), datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
+        )
+
+    final_prices = [final(item) for item in price_data['value']]
+    threshold = sorted(final_prices)[int(len(final_prices) * charger.charging_threshold_percentile)]
+    window_size = int(target_hours * 60) // 15
+
+    windows = []
+    for i in range(len(price_data['value']) - window_size + 1):
+        window_prices = [final(item) for item in price_data['value'][i:i + window_size]]
+        avg_price = sum(window_prices) / len(window_prices)
+        if avg_price <= threshold:
+            all_prices = [final(item) for item in price_data['value']]
+            overall_avg = sum(all_prices) / len(all_prices)
+            windows.append({'avg_price': avg_price, 'savings': overall_avg - avg_price})
+    windows.sort(key=lambda x: x['savings'], reverse=True)
+    return windows
+
+
+def time_call(fn, repeat):
+    """Average wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark charging window search')
+    parser.add_argument('--repeat', type=int, default=20, help='Repetitions per measurement')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    charger = AutomatedPriceCharger(build_config())
+
+    print(f"{'dataset':<22}{'legacy ms':>12}{'prefix ms':>12}{'multi ms':>12}{'speedup':>10}")
+    for label, slots in (('D+1 (96 slots)', 96), ('2-day (192 slots)', 192)):
+        price_data = build_price_data(slots)
+
+        legacy_ms = time_call(lambda: legacy_analyze_charging_windows(charger, price_data, 4.0), max(1, args.repeat // 10))
+
+        def fresh_prefix():
+            # Include curve parsing in every run so the comparison is end-to-end
+            clear_price_curve_cache()
+            charger.analyze_charging_windows(price_data, target_hours=4.0)
+
+        def fresh_multi():
+            clear_price_curve_cache()
+            charger.find_best_charging_windows(price_data, durations_hours=[1.0, 2.0, 4.0])
+
+        prefix_ms = time_call(fresh_prefix, args.repeat)
+        multi_ms = time_call(fresh_multi, args.repeat)
+        print(f"{label:<22}{legacy_ms:>12.2f}{prefix_ms:>12.2f}{multi_ms:>12.2f}{legacy_ms / prefix_ms:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
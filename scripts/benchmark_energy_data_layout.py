@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark the energy_data storage layouts on a synthetic year of readings
+
+Compares the pre-v7 layout (ISO TEXT primary key, created_at column and the
+idx_energy_* secondary indexes) with the v7 energy_readings layout (WITHOUT
+ROWID table keyed by epoch milliseconds, no secondary indexes):
+1. Insert rate, committing every --batch rows like SQLiteStorage
+2. Range-scan latency for 1-day and 30-day windows, using the same SELECT
+   the storage layer issues (v7 renders ISO timestamps in SQL), plus a v7
+   scan returning raw ts_ms keys to separate B-tree cost from formatting
+3. Database file size after a WAL checkpoint
+
+Usage:
+  python3 scripts/benchmark_energy_data_layout.py [--days 365] [--interval 20] [--batch 100] [--scans 20]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.epoch import iso_timestamp_sql, to_epoch_ms
+from database.schema import (
+    CREATE_ENERGY_DATA_TABLE, CREATE_ENERGY_READINGS_TABLE, CREATE_INDEXES, ENERGY_READING_COLUMNS, MIGRATIONS
+)
+
+START = datetime(2025, 1, 1)
+PRAGMAS = ("PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL", "PRAGMA cache_size=-64000")
+
+
+def reading(i: int, interval: int):
+    """Synthetic reading values in ENERGY_READING_COLUMNS order"""
+    return (
+        20.0 + (i % 80),                 # battery_soc
+        (i * 37) % 6000,                 # pv_power
+        (i * 13) % 3000 - 1500,          # grid_power
+        800 + (i % 400),                 # house_consumption
+        (i * 7) % 5000 - 2500,           # battery_power
+        230.0 + (i % 10) / 10,           # grid_voltage
+        50.0,                            # grid_frequency
+        400.0 + (i % 50) / 10,           # battery_voltage
+        (i % 200) / 10 - 10,             # battery_current
+        25.0 + (i % 10) / 10,            # battery_temperature
+        0.5 + (i % 96) / 100,            # price_pln
+        1000 + i * interval / 3600 * 0.4,  # grid_import_total_kwh
+        500 + i * interval / 3600 * 0.3,   # grid_export_total_kwh
+        2000 + i * interval / 3600 * 0.9,  # house_consumption_total_kwh
+        3000 + i * interval / 3600 * 0.8,  # pv_generation_total_kwh
+        'T1' if 6 <= (i * interval // 3600) % 24 < 22 else 'T2'  # tariff_zone
+    )
+
+
+def legacy_layout():
+    """pre-v7 energy_data DDL, v4 columns and indexes"""
+    ddl = [CREATE_ENERGY_DATA_TABLE]
+    ddl += [sql for version, _, statements in MIGRATIONS if version == 4 for sql in statements]
+    ddl += [sql for sql in CREATE_INDEXES if 'ON energy_data(' in sql]
+    columns = ', '.join(ENERGY_READING_COLUMNS)
+    return {
+        'ddl': ddl,
+        'insert': f"INSERT OR REPLACE INTO energy_data (timestamp, {columns}) "
+                  f"VALUES ({', '.join('?' * (len(ENERGY_READING_COLUMNS) + 1))})",
+        'selects': [('TEXT key + indexes', "SELECT * FROM energy_data WHERE timestamp BETWEEN ? AND ? "
+                                           "ORDER BY timestamp ASC")],
+        'key': lambda ts: ts.isoformat()
+    }
+
+
+def epoch_layout():
+    """v7 energy_readings DDL, the storage layer's insert and select"""
+    columns = ', '.join(ENERGY_READING_COLUMNS)
+    return {
+        'ddl': [CREATE_ENERGY_READINGS_TABLE],
+        'insert': f"INSERT OR REPLACE INTO energy_readings (ts_ms, {columns}) "
+                  f"VALUES ({', '.join('?' * (len(ENERGY_READING_COLUMNS) + 1))})",
+        'selects': [
+            ('epoch ms WITHOUT ROWID', f"SELECT {iso_timestamp_sql()} AS timestamp, {columns} FROM energy_readings "
+                                       f"WHERE ts_ms BETWEEN ? AND ? ORDER BY ts_ms ASC"),
+            ('  same, raw ts_ms keys', f"SELECT ts_ms, {columns} FROM energy_readings "
+                                       f"WHERE ts_ms BETWEEN ? AND ? ORDER BY ts_ms ASC")
+        ],
+        'key': to_epoch_ms
+    }
+
+
+def run(layout, db_path: str, rows: int, interval: int, batch: int, scans: int, days: int):
+    conn = sqlite3.connect(db_path)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    for sql in layout['ddl']:
+        conn.execute(sql)
+    conn.commit()
+
+    key = layout['key']
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        conn.executemany(layout['insert'], [
+            (key(START + timedelta(seconds=i * interval)), *reading(i, interval))
+            for i in range(offset, min(offset + batch, rows))
+        ])
+        conn.commit()
+    insert_seconds = time.perf_counter() - started
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_mb = os.path.getsize(db_path) / (1024 * 1024)
+
+    scans_ms = {}
+    for label, select in layout['selects']:
+        rng = random.Random(42)  # Same windows for every query
+        latencies = {}
+        for window_days in (1, 30):
+            if window_days > days:
+                continue
+            samples = []
+            for _ in range(scans):
+                window_start = START + timedelta(days=rng.randrange(0, days - window_days + 1))
+                window_end = window_start + timedelta(days=window_days)
+                t0 = time.perf_counter()
+                result = conn.execute(select, (key(window_start), key(window_end))).fetchall()
+                samples.append((time.perf_counter() - t0) * 1000)
+                assert result
+            latencies[window_days] = statistics.median(samples)
+        scans_ms[label] = (latencies.get(1, 0.0), latencies.get(30, 0.0))
+    conn.close()
+
+    return {
+        'rows_per_s': rows / insert_seconds,
+        'size_mb': size_mb,
+        'scans_ms': scans_ms
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark energy_data storage layouts')
+    parser.add_argument('--days', type=int, default=365, help='Days of synthetic readings')
+    parser.add_argument('--interval', type=int, default=20, help='Seconds between readings')
+    parser.add_argument('--batch', type=int, default=100, help='Rows per committed insert batch')
+    parser.add_argument('--scans', type=int, default=20, help='Range scans per window size')
+    args = parser.parse_args()
+
+    rows = args.days * 86400 // args.interval
+    print(f"{rows} readings ({args.days} days every {args.interval}s), batches of {args.batch}\n")
+    print(f"{'layout':<26}{'insert rows/s':>15}{'1-day scan ms':>15}{'30-day scan ms':>16}{'size MB':>10}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in (legacy_layout(), epoch_layout()):
+            result = run(layout, str(Path(tmp) / f"{len(results)}.db"), rows, args.interval,
+                         args.batch, args.scans, args.days)
+            results.append(result)
+            for n, (label, (scan_1d, scan_30d)) in enumerate(result['scans_ms'].items()):
+                insert_rate = f"{result['rows_per_s']:.0f}" if n == 0 else ''
+                size = f"{result['size_mb']:.1f}" if n == 0 else ''
+                print(f"{label:<26}{insert_rate:>15}{scan_1d:>15.2f}{scan_30d:>16.2f}{size:>10}")
+
+    legacy, epoch = results
+    print(f"\nInsert rate {epoch['rows_per_s'] / legacy['rows_per_s']:.2f}x, "
+          f"file size {epoch['size_mb'] / legacy['size_mb']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQLiteStorage read throughput under a concurrent write load
+
+Runs the same workload twice against a temporary WAL database:
+1. Reads served by the writer connection (connection_pool_size=0)
+2. Reads served by the read-only connection pool
+
+The workload is a writer saving one energy_data row at a fixed rate (the
+coordinator pattern) while several dashboard-style readers repeatedly fetch
+a 24-hour range. Read throughput scales with the available cores (row
+decoding is CPU bound); writes gain on any machine because they no longer
+queue behind range reads on the shared connection.
+
+Usage:
+  python3 scripts/benchmark_sqlite_read_pool.py [--seconds 5] [--readers 4] [--rows 20000]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+
+START = datetime(2025, 1, 1)
+
+
+def energy_row(i: int):
+    """Synthetic 1-minute energy reading"""
+    return {
+        'timestamp': START + timedelta(minutes=i),
+        'battery_soc': 20.0 + (i % 80),
+        'pv_power': float((i * 37) % 6000),
+        'grid_power': float((i * 13) % 3000 - 1500),
+        'house_consumption': 800.0 + (i % 400)
+    }
+
+
+async def seed(db_path: str, rows: int):
+    """Create the schema and preload history"""
+    storage = SQLiteStorage(StorageConfig(db_path=db_path, batch_size=1000, connection_pool_size=0))
+    await storage.connect()
+    await storage.save_energy_data([energy_row(i) for i in range(rows)])
+    await storage.disconnect()
+
+
+async def run_workload(db_path: str, pool_size: int, seconds: float, readers: int, rows: int, write_interval: float):
+    """Reads/s, read latency and writes completed for one configuration"""
+    storage = SQLiteStorage(StorageConfig(db_path=db_path, connection_pool_size=pool_size))
+    await storage.connect()
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    write_latencies = []
+
+    async def writer():
+        i = rows
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await storage.save_energy_data([energy_row(i)])
+            write_latencies.append((time.perf_counter() - started) * 1000)
+            i += 1
+            await asyncio.sleep(write_interval)
+
+    async def reader(offset: int):
+        window_start = START + timedelta(hours=offset)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await storage.get_energy_data(window_start, window_start + timedelta(hours=24))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(writer(), *(reader(n * 24) for n in range(readers)))
+    await storage.disconnect()
+
+    latencies.sort()
+    write_latencies.sort()
+    return {
+        'reads_per_s': len(latencies) / seconds,
+        'p50_ms': statistics.median(latencies) if latencies else 0.0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+        'writes': len(write_latencies),
+        'write_p95_ms': write_latencies[int(len(write_latencies) * 0.95)] if write_latencies else 0.0
+    }
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'benchmark.db')
+        await seed(db_path, args.rows)
+
+        print(f"{'reads served by':<22}{'reads/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'writes':>10}{'write p95':>11}")
+        results = {}
+        for label, pool_size in (('writer connection', 0), (f'pool of {args.readers}', args.readers)):
+            result = await run_workload(db_path, pool_size, args.seconds, args.readers, args.rows,
+                                        args.write_interval)
+            results[label] = result
+            print(f"{label:<22}{result['reads_per_s']:>10.1f}{result['p50_ms']:>10.2f}"
+                  f"{result['p95_ms']:>10.2f}{result['writes']:>10}{result['write_p95_ms']:>11.2f}")
+
+        baseline, pooled = results.values()
+        if baseline['reads_per_s'] and baseline['writes']:
+            print(f"\nRead throughput: {pooled['reads_per_s'] / baseline['reads_per_s']:.1f}x, "
+                  f"write throughput: {pooled['writes'] / baseline['writes']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite read pool under write load')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent readers (and pool size)')
+    parser.add_argument('--rows', type=int, default=20000, help='Preloaded energy_data rows')
+    parser.add_argument('--write-interval', type=float, default=0.005, help='Seconds between writes')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
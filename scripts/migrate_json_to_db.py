@@ -29,13 +29,18 @@ logger = logging.getLogger(__name__)
 async def migrate_energy_data(storage: SQLiteStorage, data_dir: str):
     """Migrate energy data files."""
     logger.info(f"Scanning for energy data in {data_dir}...")
-    files = glob.glob(os.path.join(data_dir, "energy_data_*.json"))
+    files = glob.glob(os.path.join(data_dir, "energy_data_*.json")) + \
+        glob.glob(os.path.join(data_dir, "energy_data_*.jsonl"))
     
     total_records = 0
     for file_path in files:
         try:
             with open(file_path, 'r') as f:
-                data = json.load(f)
+                if file_path.endswith('.jsonl'):
+                    # Append-only FileStorage files: one reading per line
+                    data = [json.loads(line) for line in f if line.strip().endswith('}')]
+                else:
+                    data = json.load(f)
                 if not isinstance(data, list):
                     continue
                 
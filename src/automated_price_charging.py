@@ -14,6 +14,8 @@ from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple, Any, Union
 from pathlib import Path
 
+import numpy as np
+
 try:
     import aiohttp
     AIOHTTP_AVAILABLE = True
@@ -32,6 +34,8 @@ sys.path.insert(0, str(current_dir))
 from fast_charge import GoodWeFastCharger
 from enhanced_data_collector import EnhancedDataCollector
 from tariff_pricing import TariffPricingCalculator, PriceComponents
+from price_curve import PriceCurve, get_price_curve
+from price_data_service import get_price_data_service
 from price_history_manager import PriceHistoryManager
 from adaptive_threshold_calculator import AdaptiveThresholdCalculator
 
@@ -41,8 +45,13 @@ logger = logging.getLogger(__name__)
 class AutomatedPriceCharger:
     """Enhanced automated charging system with smart strategy"""
     
-    def __init__(self, config_path: str = None):
-        """Initialize the automated charger"""
+    def __init__(self, config_path: str = None, http_client: Optional[Any] = None):
+        """Initialize the automated charger
+        
+        Args:
+            config_path: Config file path or config dict
+            http_client: Optional shared HttpClient for price API requests
+        """
         # Support both dict config and file path
         if isinstance(config_path, dict):
             # Direct config dict provided (used in tests)
@@ -70,6 +79,13 @@ class AutomatedPriceCharger:
         self.data_collector = EnhancedDataCollector(config_for_deps)
         # Get price API URL from config with fallback
         self.price_api_url = self.config.get('price_analysis', {}).get('api_url', 'https://api.raporty.pse.pl/api/csdac-pln')
+        # Shared day cache: published days are fetched once per process
+        self.price_data_service = get_price_data_service(
+            self.price_api_url, self.config.get('price_analysis', {}).get('price_cache', {})
+        )
+        self.http_client = http_client
+        if http_client is not None:
+            self.price_data_service.set_http_client(http_client)
         self.current_schedule = None
         self.is_charging = False
         self.charging_start_time = None
@@ -211,6 +227,9 @@ class AutomatedPriceCharger:
         
         # Tariff configuration for `TariffPricingCalculator` is already passed via `self.config`
         
+        # Percentile of the day's final prices used as default charging window threshold
+        self.charging_threshold_percentile = 0.25
+        
         # Initialize adaptive price thresholds
         adaptive_config = self.config.get('timing_awareness', {}).get('smart_critical_charging', {}).get('adaptive_thresholds', {})
         self.adaptive_enabled = adaptive_config.get('enabled', False)
@@ -335,6 +354,45 @@ class AutomatedPriceCharger:
             final_price = market_price + (self.sc_component_net * 1000)
             return final_price
     
+    def calculate_final_prices_batch(self, market_prices: List[float], timestamps: List[datetime],
+                                     kompas_status: Optional[str] = None) -> np.ndarray:
+        """
+        Calculate final prices for a whole price series using tariff-aware pricing.
+
+        Args:
+            market_prices: Market prices in PLN/MWh
+            timestamps: Start time of each price period
+            kompas_status: Kompas status for G14dynamic
+
+        Returns:
+            NumPy array of final prices in PLN/MWh (for consistency with existing code)
+        """
+        market = np.asarray(market_prices, dtype=np.float64)
+
+        if self.tariff_calculator:
+            final_kwh = self.tariff_calculator.calculate_final_prices_batch(market / 1000, timestamps, kompas_status)
+            return final_kwh * 1000
+        else:
+            # Fallback to legacy pricing (SC component only)
+            logger.warning("Tariff calculator not available, using legacy SC-only pricing")
+            return market + (self.sc_component_net * 1000)
+
+    def get_price_curve(self, price_data: Union[Dict, PriceCurve]) -> PriceCurve:
+        """
+        Get parse-once price curve for raw price data (memoized per business date and tariff).
+
+        Args:
+            price_data: Raw CSDAC price data or an existing PriceCurve
+
+        Returns:
+            PriceCurve with market and final prices in PLN/MWh
+        """
+        if self.tariff_calculator:
+            tariff_key = self.tariff_calculator.config_hash
+        else:
+            tariff_key = ('sc-only', self.sc_component_net)
+        return get_price_curve(price_data, self.calculate_final_prices_batch, tariff_key)
+
     def apply_minimum_price_floor(self, price: float) -> float:
         """Apply minimum price floor as per Polish regulations"""
         return max(price, self.minimum_price_floor)
@@ -360,8 +418,10 @@ class AutomatedPriceCharger:
             
             logger.info(f"Fetching CSDAC price data for {today}")
             
-            # Use aiohttp if available, otherwise fallback to requests
-            if AIOHTTP_AVAILABLE:
+            # Use shared HTTP client if injected, else aiohttp, else requests
+            if self.http_client is not None:
+                data = await self.http_client.get_json(url, endpoint='csdac')
+            elif AIOHTTP_AVAILABLE:
                 async with aiohttp.ClientSession() as session:
                     async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
                         response.raise_for_status()
@@ -467,7 +527,25 @@ class AutomatedPriceCharger:
             return self.adaptive_critical_price
         return self.max_critical_price
     
-    def analyze_charging_windows(self, price_data: Dict, 
+    @staticmethod
+    def _window_averages(prefix_sums: np.ndarray, window_size: int) -> np.ndarray:
+        """Average price of every window of `window_size` slots from prefix sums (O(n))"""
+        return (prefix_sums[window_size:] - prefix_sums[:-window_size]) / window_size
+    
+    def _window_dict(self, timestamps: Tuple[datetime, ...], index: int, window_size: int,
+                     avg_price: float, overall_avg: float) -> Dict:
+        """Build charging window dict for a window starting at slot `index`"""
+        savings = overall_avg - avg_price
+        return {
+            'start_time': timestamps[index],
+            'end_time': timestamps[index + window_size - 1] + timedelta(minutes=15),
+            'duration_minutes': window_size * 15,
+            'avg_price': avg_price,
+            'savings': savings,
+            'savings_percent': (savings / overall_avg) * 100
+        }
+    
+    def analyze_charging_windows(self, price_data: Union[Dict, PriceCurve], 
                                target_hours: float = 4.0,
                                max_price_threshold: Optional[float] = None) -> List[Dict]:
         """Analyze price data and find optimal charging windows"""
@@ -475,106 +553,139 @@ class AutomatedPriceCharger:
         if not price_data or 'value' not in price_data:
             return []
         
-        # Calculate price threshold if not provided
-        if max_price_threshold is None:
-            # Calculate final prices (market price + SC component + distribution) for threshold calculation
-            final_prices = [
-                self.calculate_final_price(
-                    float(item['csdac_pln']), 
-                    datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
-                ) 
-                for item in price_data['value']
-            ]
-            max_price_threshold = sorted(final_prices)[int(len(final_prices) * self.charging_threshold_percentile)]
-        
+        curve = self.get_price_curve(price_data)
         target_minutes = int(target_hours * 60)
         window_size = target_minutes // 15  # Number of 15-minute periods
+        if not len(curve) or window_size < 1:
+            return []
+        
+        # Final prices (market price + SC component + distribution) for the whole series, computed once
+        all_final_prices = curve.final_prices
+        overall_avg = float(all_final_prices.mean())
+        
+        # Calculate price threshold if not provided
+        if max_price_threshold is None:
+            max_price_threshold = curve.percentile_threshold(self.charging_threshold_percentile)
         
         logger.info(f"Finding charging windows of {target_hours}h at max price {max_price_threshold:.2f} PLN/MWh (including tariff pricing)")
         
-        charging_windows = []
-        
-        # Slide through all possible windows
-        for i in range(len(price_data['value']) - window_size + 1):
-            window_data = price_data['value'][i:i + window_size]
-            # Calculate final prices (market price + SC component + distribution) for each window
-            window_final_prices = [
-                self.calculate_final_price(
-                    float(item['csdac_pln']), 
-                    datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
-                ) 
-                for item in window_data
-            ]
-            avg_price = sum(window_final_prices) / len(window_final_prices)
-            
-            # Check if window meets criteria
-            if avg_price <= max_price_threshold:
-                start_time = datetime.strptime(window_data[0]['dtime'], '%Y-%m-%d %H:%M')
-                end_time = datetime.strptime(window_data[-1]['dtime'], '%Y-%m-%d %H:%M') + timedelta(minutes=15)
-                
-                # Calculate savings using final prices (market price + SC component + distribution)
-                all_final_prices = [
-                    self.calculate_final_price(
-                        float(item['csdac_pln']), 
-                        datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
-                    ) 
-                    for item in price_data['value']
-                ]
-                overall_avg = sum(all_final_prices) / len(all_final_prices)
-                savings = overall_avg - avg_price
-                
-                window = {
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'duration_minutes': target_minutes,
-                    'avg_price': avg_price,
-                    'savings': savings,
-                    'savings_percent': (savings / overall_avg) * 100
-                }
-                charging_windows.append(window)
+        # Slide through all possible windows using prefix sums
+        prefix_sums = np.concatenate(([0.0], np.cumsum(all_final_prices)))
+        window_avgs = self._window_averages(prefix_sums, window_size)
         
-        # Sort by savings (highest first)
-        charging_windows.sort(key=lambda x: x['savings'], reverse=True)
+        # Check which windows meet criteria, highest savings (lowest average) first
+        candidates = np.nonzero(window_avgs <= max_price_threshold)[0]
+        candidates = candidates[np.argsort(window_avgs[candidates], kind='stable')]
+        
+        charging_windows = [
+            self._window_dict(curve.timestamps, i, window_size, avg_price, overall_avg)
+            for i, avg_price in zip(candidates.tolist(), window_avgs[candidates].tolist())
+        ]
         
         logger.info(f"Found {len(charging_windows)} optimal charging windows")
         return charging_windows
     
-    def get_current_price(self, price_data: Dict, kompas_status: Optional[str] = None) -> Optional[float]:
+    def find_best_charging_windows(self, price_data: Union[Dict, PriceCurve],
+                                   durations_hours: Optional[List[float]] = None,
+                                   max_windows: Optional[int] = None,
+                                   max_price_threshold: Optional[float] = None) -> Dict[float, List[Dict]]:
+        """
+        Find the best non-overlapping charging windows for several durations in one pass.
+        
+        Prefix sums of the final price curve are computed once and shared by all
+        durations, so each duration costs O(n log n) for ranking instead of
+        re-pricing every window.
+        
+        Args:
+            price_data: Raw CSDAC price data or PriceCurve
+            durations_hours: Window durations to search in hours, multiples of 15 minutes
+                (default: 1h, 2h and 4h)
+            max_windows: Maximum number of windows returned per duration (None = all)
+            max_price_threshold: Maximum average window price in PLN/MWh
+                (None = charging threshold percentile of the curve)
+        
+        Returns:
+            Dict mapping duration (hours) to windows sorted by savings (highest first);
+            windows of one duration never overlap each other
+        """
+        if durations_hours is None:
+            durations_hours = [1.0, 2.0, 4.0]
+        results: Dict[float, List[Dict]] = {duration: [] for duration in durations_hours}
+        if not price_data or 'value' not in price_data:
+            return results
+        
+        curve = self.get_price_curve(price_data)
+        n = len(curve)
+        if not n:
+            return results
+        
+        all_final_prices = curve.final_prices
+        overall_avg = float(all_final_prices.mean())
+        if max_price_threshold is None:
+            max_price_threshold = curve.percentile_threshold(self.charging_threshold_percentile)
+        
+        prefix_sums = np.concatenate(([0.0], np.cumsum(all_final_prices)))
+        
+        for duration in durations_hours:
+            window_size = int(duration * 60) // 15
+            if window_size < 1 or window_size > n:
+                continue
+            
+            window_avgs = self._window_averages(prefix_sums, window_size)
+            candidates = np.nonzero(window_avgs <= max_price_threshold)[0]
+            candidates = candidates[np.argsort(window_avgs[candidates], kind='stable')]
+            
+            # Greedy selection of the cheapest windows that do not overlap already chosen ones
+            occupied = np.zeros(n, dtype=bool)
+            windows = results[duration]
+            for i in candidates.tolist():
+                if occupied[i] or occupied[i + window_size - 1]:
+                    continue
+                occupied[i:i + window_size] = True
+                windows.append(self._window_dict(curve.timestamps, i, window_size, float(window_avgs[i]), overall_avg))
+                if max_windows is not None and len(windows) >= max_windows:
+                    break
+        
+        logger.info(
+            "Best charging windows: " +
+            ", ".join(f"{duration}h={len(windows)}" for duration, windows in results.items())
+        )
+        return results
+    
+    def get_current_price(self, price_data: Union[Dict, PriceCurve], kompas_status: Optional[str] = None) -> Optional[float]:
         """Get current electricity price including SC component and distribution"""
         if not price_data or 'value' not in price_data:
             return None
         
+        curve = self.get_price_curve(price_data)
         now = datetime.now()
         current_time = now.replace(second=0, microsecond=0)
         
         logger.info(f"get_current_price: Looking for period matching {current_time.strftime('%Y-%m-%d %H:%M')}")
         
         # 1. Try to find the exact 15-minute period match
-        for item in price_data['value']:
-            item_time = datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
-            period_end = item_time + timedelta(minutes=15)
-            if item_time <= current_time < period_end:
-                market_price_pln_mwh = float(item['csdac_pln'])
-                final_price_pln_mwh = self.calculate_final_price(market_price_pln_mwh, item_time, kompas_status)
-                logger.info(f"get_current_price: EXACT MATCH {item['dtime']} -> Final: {final_price_pln_mwh:.2f} PLN/MWh")
-                return final_price_pln_mwh
+        index = curve.index_at(current_time)
+        if index is not None:
+            item_time = curve.timestamps[index]
+            final_price_pln_mwh = self.calculate_final_price(float(curve.market_prices[index]), item_time, kompas_status)
+            logger.info(f"get_current_price: EXACT MATCH {item_time.strftime('%Y-%m-%d %H:%M')} -> Final: {final_price_pln_mwh:.2f} PLN/MWh")
+            return final_price_pln_mwh
                 
         # 2. Fallback: Try to find any price for the same hour if 15-minute match failed
         # This is vital for hourly data where only 00:00, 01:00, etc. records exist
         current_hour = now.hour
         current_date = now.date()
-        for item in price_data['value']:
-            item_time = datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
+        for index, item_time in enumerate(curve.timestamps):
             if item_time.hour == current_hour and item_time.date() == current_date:
-                market_price_pln_mwh = float(item['csdac_pln'])
+                market_price_pln_mwh = float(curve.market_prices[index])
                 final_price_pln_mwh = self.calculate_final_price(market_price_pln_mwh, item_time, kompas_status)
-                logger.info(f"get_current_price: HOURLY FALLBACK MATCH {item['dtime']} for hour {current_hour} -> Final: {final_price_pln_mwh:.2f} PLN/MWh")
+                logger.info(f"get_current_price: HOURLY FALLBACK MATCH {item_time.strftime('%Y-%m-%d %H:%M')} for hour {current_hour} -> Final: {final_price_pln_mwh:.2f} PLN/MWh")
                 return final_price_pln_mwh
         
         logger.warning(f"get_current_price: No matching period found for {current_time}")
         return None
     
-    def should_start_charging(self, price_data: Dict, 
+    def should_start_charging(self, price_data: Union[Dict, PriceCurve], 
                             max_price_threshold: Optional[float] = None,
                             kompas_status: Optional[str] = None) -> bool:
         """Determine if charging should start based on current price"""
@@ -587,15 +698,12 @@ class AutomatedPriceCharger:
         # Calculate price threshold if not provided
         if max_price_threshold is None:
             # Calculate final prices (market price + SC component + distribution) for threshold calculation
-            final_prices = [
-                self.calculate_final_price(
-                    float(item['csdac_pln']), 
-                    datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M'),
-                    kompas_status
-                ) 
-                for item in price_data['value']
-            ]
-            max_price_threshold = sorted(final_prices)[int(len(final_prices) * self.charging_threshold_percentile)]
+            curve = self.get_price_curve(price_data)
+            if kompas_status is None:
+                final_prices = curve.final_prices
+            else:
+                final_prices = self.calculate_final_prices_batch(curve.market_prices, curve.timestamps, kompas_status)
+            max_price_threshold = float(np.sort(final_prices)[int(len(final_prices) * self.charging_threshold_percentile)])
         
         should_charge = current_price <= max_price_threshold
         
@@ -665,33 +773,17 @@ class AutomatedPriceCharger:
                 'confidence': 0.0
             }
     
-    def _analyze_prices(self, price_data: Dict) -> Tuple[Optional[float], Optional[float], Optional[int]]:
+    def _analyze_prices(self, price_data: Union[Dict, PriceCurve]) -> Tuple[Optional[float], Optional[float], Optional[int]]:
         """Analyze current and future prices"""
         try:
             if not price_data or 'value' not in price_data:
                 return None, None, None
             
             current_hour = datetime.now().hour
-            prices_raw = price_data['value']
-            
-            # Convert to hourly averages with tariff-aware pricing
-            hourly_prices = {}
-            for entry in prices_raw:
-                hour = int(entry['dtime'].split(' ')[1].split(':')[0])
-                market_price_pln_mwh = entry['csdac_pln']  # Already in PLN/MWh
-                entry_time = datetime.strptime(entry['dtime'], '%Y-%m-%d %H:%M')
-                # Use tariff-aware pricing
-                final_price_pln_mwh = self.calculate_final_price(market_price_pln_mwh, entry_time)
-                price_pln_kwh = final_price_pln_mwh / 1000  # Convert to PLN/kWh for display
-                
-                if hour not in hourly_prices:
-                    hourly_prices[hour] = []
-                hourly_prices[hour].append(price_pln_kwh)
             
-            # Calculate average price per hour
-            hourly_avg = {}
-            for hour, prices in hourly_prices.items():
-                hourly_avg[hour] = sum(prices) / len(prices)
+            # Average price per hour with tariff-aware pricing (PLN/kWh for display)
+            curve = self.get_price_curve(price_data)
+            hourly_avg = {hour: price / 1000 for hour, price in curve.hourly_average().items()}
             
             # Get current price
             current_price = hourly_avg.get(current_hour)
@@ -1921,6 +2013,12 @@ class AutomatedPriceCharger:
             logger.error(f"❌ Failed to start charging at SOC {battery_soc}%")
             return False
     
+    def shutdown(self) -> None:
+        """Persist state kept in memory before exit (price points are saved on a debounce interval)"""
+        price_history = getattr(self, 'price_history', None)
+        if price_history:
+            price_history.flush()
+    
     async def stop_price_based_charging(self) -> bool:
         """Stop price-based charging"""
         
@@ -2077,24 +2175,13 @@ class AutomatedPriceCharger:
         return True
     
     async def fetch_price_data_for_date(self, date_str: str) -> Dict:
-        """Fetch price data for a specific date (async)"""
-        try:
-            url = f"{self.price_api_url}?$filter=business_date%20eq%20'{date_str}'"
-            
-            # Use aiohttp if available, otherwise fallback to requests
-            if AIOHTTP_AVAILABLE:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                        response.raise_for_status()
-                        return await response.json()
-            else:
-                import requests
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                return response.json()
-        except Exception as e:
-            logger.error(f"Failed to fetch price data for {date_str}: {e}")
-            return None
+        """Fetch price data for a specific date (async)
+        
+        Served from the shared PriceDataService: complete days are cached and
+        concurrent callers for the same day share one request. The returned
+        dict is shared and must not be modified.
+        """
+        return await self.price_data_service.get_price_data(date_str)
     
     def print_daily_schedule(self, price_data: Dict):
         """Print today's charging schedule"""
@@ -2251,6 +2338,15 @@ async def main():
         print("Failed to initialize automated charger")
         return
     
+    try:
+        await _run_cli(charger, args)
+    finally:
+        charger.shutdown()
+
+
+async def _run_cli(charger: AutomatedPriceCharger, args) -> None:
+    """Show today's schedule and run the command-line action selected by args"""
+    
     # Get today's price data and show schedule
     print("Fetching today's electricity prices...")
     price_data = charger.fetch_today_prices()
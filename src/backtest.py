@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""
+Backtest - Offline replay of stored history through the real decision code.
+
+Each business day is replayed independently: the day's ``energy_data`` rows
+(PV production and house consumption) and the archived CSDAC prices from the
+price cache (``data/price_cache/csdac_YYYY-MM-DD.json``) are fed to
+AutomatedPriceCharger.make_smart_charging_decision, BatterySellingEngine and
+MultiSessionManager exactly as MasterCoordinator calls them, while a
+``SimulatedClock`` stands in for ``datetime.now()`` and a ``SimulatedBattery``
+stands in for the inverter. Grid import/export is priced per 15-minute slot and
+aggregated per configuration variant.
+
+Days are independent, so every (variant, day) pair runs in its own process-pool
+worker and a months-long parameter sweep scales with the number of CPU cores.
+
+Usage:
+  python src/backtest.py --start 2025-10-01 --end 2025-12-31 --variants variants.yaml
+
+The variants file maps a variant name to config overrides deep-merged onto the
+base config, e.g.::
+
+  baseline: {}
+  wider_window:
+    timing_awareness:
+      smart_critical_charging:
+        max_critical_price_pln: 0.45
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import yaml
+
+# Add current directory to path for imports
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from automated_price_charging import AutomatedPriceCharger
+from multi_session_manager import MultiSessionManager
+from price_data_service import PriceDataService, is_day_complete
+from inverter.adapters.simulated_adapter import BatteryModel
+from database.sqlite_storage import SQLiteStorage
+from database.storage_interface import StorageConfig
+
+try:
+    from battery_selling_engine import BatterySellingEngine, SellingDecision
+    SELLING_AVAILABLE = True
+except ImportError:
+    SELLING_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_REAL_DATETIME = datetime
+
+# Modules whose module-level ``datetime`` name follows the simulated clock
+CLOCK_MODULES = (
+    'automated_price_charging',
+    'adaptive_threshold_calculator',
+    'battery_selling_engine',
+    'battery_selling_timing',
+    'price_spike_detector',
+    'multi_session_manager',
+    'price_history_manager',
+    'pv_consumption_analyzer',
+    'hybrid_charging_logic',
+)
+
+# Never contacted: every replayed day is served from the price archive
+OFFLINE_API_URL = 'http://127.0.0.1:9/backtest-offline'
+
+DEFAULT_STEP_MINUTES = 5
+
+
+class SimulatedClock:
+    """Injectable wall clock for replaying history"""
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, when: datetime) -> None:
+        self._now = when
+
+    def advance(self, delta: timedelta) -> None:
+        self._now += delta
+
+
+class _ClockDateTimeMeta(type):
+    """Keeps ``isinstance(x, datetime)`` working for real datetimes while patched"""
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, _REAL_DATETIME)
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, _REAL_DATETIME)
+
+
+def _clock_datetime(clock: SimulatedClock) -> type:
+    """datetime subclass whose now()/today() read the simulated clock"""
+
+    class ClockDateTime(_REAL_DATETIME, metaclass=_ClockDateTimeMeta):
+        @classmethod
+        def now(cls, tz=None):
+            current = clock.now()
+            return current if tz is None else current.astimezone(tz)
+
+        @classmethod
+        def today(cls):
+            return clock.now()
+
+    return ClockDateTime
+
+
+@contextmanager
+def patched_clock(clock: SimulatedClock, module_names: Sequence[str] = CLOCK_MODULES) -> Iterator[SimulatedClock]:
+    """
+    Route ``datetime.now()`` in the decision modules to a simulated clock.
+
+    Args:
+        clock: Clock to install
+        module_names: Modules whose ``datetime`` global is replaced
+
+    Yields:
+        The installed clock
+    """
+    replacement = _clock_datetime(clock)
+    patched = []
+    for name in module_names:
+        module = sys.modules.get(name)
+        if module is not None and getattr(module, 'datetime', None) is _REAL_DATETIME:
+            module.datetime = replacement
+            patched.append(module)
+    try:
+        yield clock
+    finally:
+        for module in patched:
+            module.datetime = _REAL_DATETIME
+
+
+class SimulatedBattery(BatteryModel):
+    """Battery model configured from the system config for replays.
+
+    Stands in for GoodWeFastCharger (start/stop fast charging) and for the
+    goodwe Inverter used by BatterySellingEngine (operation mode, export limit,
+    DOD). Fast charging is only controlled through start/stop_fast_charging;
+    the GENERAL operation mode just ends eco discharge.
+    """
+
+    def __init__(self, config: Dict[str, Any], soc_percent: float):
+        """
+        Initialize simulated battery.
+
+        Args:
+            config: Full system configuration
+            soc_percent: Initial state of charge
+        """
+        battery_config = config.get('battery_management', {})
+        super().__init__(
+            capacity_kwh=battery_config.get('capacity_kwh', 20.0),
+            max_power_w=config.get('charging', {}).get('max_power', 10000),
+            soc_percent=soc_percent,
+            min_soc=battery_config.get('soc_thresholds', {}).get('critical', 10)
+        )
+        self.charge_target_soc = config.get('fast_charging', {}).get('target_soc', 100)
+
+    # GoodWeFastCharger interface
+
+    async def get_battery_data(self) -> Dict[str, Any]:
+        return {'soc_percent': round(self.soc_percent, 1)}
+
+    async def start_fast_charging(self) -> bool:
+        self.mode = 'fast_charge'
+        return True
+
+    async def stop_fast_charging(self) -> bool:
+        if self.mode == 'fast_charge':
+            self.mode = 'general'
+        return True
+
+    # goodwe Inverter interface (battery selling)
+
+    async def get_battery_soc(self) -> float:
+        return round(self.soc_percent, 1)
+
+    async def set_operation_mode(self, operation_mode: Any, eco_mode_power: int = 100, eco_mode_soc: int = 100) -> None:
+        if getattr(operation_mode, 'name', operation_mode) == 'ECO_DISCHARGE':
+            self.mode = 'eco_discharge'
+            self.discharge_floor_soc = eco_mode_soc
+        elif self.mode == 'eco_discharge':
+            self.mode = 'general'
+
+    async def set_grid_export_limit(self, export_limit: int) -> None:
+        self.export_limit_w = export_limit
+
+    async def set_ongrid_battery_dod(self, dod: int) -> None:
+        self.min_soc = 100 - dod
+
+
+@dataclass
+class ReplayStep:
+    """Resampled inverter state at the start of one step"""
+    time: datetime
+    battery_soc: float
+    pv_power_w: float
+    house_consumption_w: float
+
+
+@dataclass
+class BacktestTask:
+    """One (variant, day) replay; must stay picklable for the process pool"""
+    variant: str
+    config: Dict[str, Any]
+    day: str
+    db_path: str
+    price_cache_dir: str
+    step_minutes: int = DEFAULT_STEP_MINUTES
+
+
+@dataclass
+class DayResult:
+    """Outcome of replaying one day"""
+    variant: str
+    day: str
+    steps: int = 0
+    start_soc: float = 0.0
+    end_soc: float = 0.0
+    grid_import_kwh: float = 0.0
+    grid_export_kwh: float = 0.0
+    grid_charge_kwh: float = 0.0
+    battery_export_kwh: float = 0.0
+    import_cost_pln: float = 0.0
+    export_revenue_pln: float = 0.0
+    net_cost_pln: float = 0.0
+    charging_starts: int = 0
+    selling_sessions: int = 0
+    error: Optional[str] = None
+
+
+# DayResult fields summed per variant
+_SUMMED_FIELDS = [
+    f.name for f in fields(DayResult)
+    if f.name not in ('variant', 'day', 'start_soc', 'end_soc', 'error')
+]
+
+
+def deep_merge(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of base with overrides merged in recursively"""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_archived_prices(price_cache_dir: str, day: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a complete archived CSDAC day written by PriceDataService.
+
+    Args:
+        price_cache_dir: Price cache directory
+        day: Business date (YYYY-MM-DD)
+
+    Returns:
+        Raw CSDAC response, or None if missing or incomplete
+    """
+    path = Path(price_cache_dir) / f"csdac_{day}.json"
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable price archive {path}: {e}")
+        return None
+    return data if is_day_complete(data, date.fromisoformat(day)) else None
+
+
+def resample_energy_rows(rows: List[Dict[str, Any]], step_minutes: int) -> List[ReplayStep]:
+    """
+    Average energy_data rows into fixed steps.
+
+    Args:
+        rows: energy_data rows ordered by timestamp
+        step_minutes: Step length
+
+    Returns:
+        One step per interval that has at least one reading
+    """
+    buckets: Dict[datetime, List[Dict[str, Any]]] = {}
+    for row in rows:
+        try:
+            timestamp = datetime.fromisoformat(str(row['timestamp']))
+        except (KeyError, ValueError):
+            continue
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=None)
+        minute = (timestamp.hour * 60 + timestamp.minute) // step_minutes * step_minutes
+        slot = datetime.combine(timestamp.date(), time.min) + timedelta(minutes=minute)
+        buckets.setdefault(slot, []).append(row)
+
+    steps = []
+    for slot in sorted(buckets):
+        readings = buckets[slot]
+        soc = next((r['battery_soc'] for r in readings if r.get('battery_soc') is not None), None)
+        if soc is None:
+            continue
+        pv = [float(r['pv_power']) for r in readings if r.get('pv_power') is not None]
+        load = [float(r['house_consumption']) for r in readings if r.get('house_consumption') is not None]
+        steps.append(ReplayStep(
+            time=slot,
+            battery_soc=float(soc),
+            pv_power_w=sum(pv) / len(pv) if pv else 0.0,
+            house_consumption_w=sum(load) / len(load) if load else 0.0
+        ))
+    return steps
+
+
+def offline_config(config: Dict[str, Any], sandbox: Path) -> Dict[str, Any]:
+    """Variant config with every side effect redirected into a sandbox directory"""
+    config = copy.deepcopy(config)
+    config['data_storage'] = {'database_storage': {'enabled': True, 'sqlite': {'path': ':memory:'}}}
+    config.setdefault('price_analysis', {})['api_url'] = OFFLINE_API_URL
+    config.setdefault('battery_selling', {})['daily_tracking_file'] = str(sandbox / 'daily_soc_drops.json')
+    config.setdefault('coordinator', {}).setdefault('multi_session_charging', {})['data_dir'] = str(sandbox / 'multi_session')
+
+    adaptive = config.setdefault('timing_awareness', {}).setdefault('smart_critical_charging', {}).setdefault(
+        'adaptive_thresholds', {})
+    adaptive['cache_dir'] = str(sandbox / 'price_history')
+    adaptive['energy_data_dir'] = str(sandbox / 'energy_data')
+    adaptive['persist_interval_seconds'] = float('inf')
+    return config
+
+
+def _seed_price_history(charger: AutomatedPriceCharger, price_cache_dir: str, day: date) -> None:
+    """Feed archived prices up to the replayed day into the adaptive thresholds"""
+    if not getattr(charger, 'adaptive_enabled', False) or not charger.price_history:
+        return
+    for offset in range(charger.price_history.lookback_days, -1, -1):
+        history_day = (day - timedelta(days=offset)).isoformat()
+        data = load_archived_prices(price_cache_dir, history_day)
+        for item in (data or {}).get('value', []):
+            try:
+                timestamp = datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
+                charger.price_history.add_price_point(timestamp, float(item['csdac_pln']) / 1000)
+            except (KeyError, TypeError, ValueError):
+                continue
+    charger._update_adaptive_thresholds(force=True)
+
+
+def _tariff_zone(charger: AutomatedPriceCharger, when: datetime) -> str:
+    """T1/T2 zone as reported by EnhancedDataCollector"""
+    try:
+        dist_price = charger.tariff_calculator._get_distribution_price(when)
+        g12_config = charger.config.get('electricity_tariff', {}).get('distribution_pricing', {}).get('g12', {})
+        peak_price = g12_config.get('prices', {}).get('peak', 0.3566)
+        return 'T1' if dist_price == peak_price else 'T2'
+    except Exception:
+        return 'T1'
+
+
+def _current_data(battery: SimulatedBattery, step: ReplayStep, tariff_zone: str) -> Dict[str, Any]:
+    """Inverter snapshot in EnhancedDataCollector format"""
+    grid_power = round(battery.grid_power_w)
+    return {
+        'timestamp': step.time.isoformat(),
+        'battery': {'soc_percent': round(battery.soc_percent, 1), 'temperature': 25},
+        'photovoltaic': {'current_power_w': step.pv_power_w},
+        'house_consumption': {'current_power_w': step.house_consumption_w},
+        'grid': {
+            'power_w': grid_power,
+            'flow_direction': 'Export' if grid_power > 0 else 'Import' if grid_power < 0 else 'Neutral'
+        },
+        'tariff_zone': tariff_zone
+    }
+
+
+def _selling_data(current_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Current data mapped to the BatterySellingEngine format (as MasterCoordinator does)"""
+    return {
+        'battery': {'soc_percent': current_data['battery']['soc_percent'], 'temperature': 25},
+        'pv': {'power_w': current_data['photovoltaic']['current_power_w']},
+        'consumption': {'power_w': current_data['house_consumption']['current_power_w']},
+        'grid': {'power': current_data['grid']['power_w'], 'voltage': 0}
+    }
+
+
+async def _load_energy_rows(db_path: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Read one day of energy_data through the storage layer"""
+    storage = SQLiteStorage(StorageConfig(db_path=db_path))
+    if not await storage.connect():
+        raise RuntimeError(f"Cannot open energy database {db_path}")
+    try:
+        rows = await storage.get_energy_data(start, end)
+    finally:
+        await storage.disconnect()
+    return [row for row in rows if str(row.get('timestamp', '')) < end.isoformat()]
+
+
+async def _handle_multi_session(manager: MultiSessionManager, charger: AutomatedPriceCharger,
+                                price_data: Dict[str, Any], now: datetime) -> None:
+    """Session start/completion as in MasterCoordinator._handle_multi_session_logic"""
+    if manager.active_session and now >= manager.active_session.end_time:
+        await manager.complete_session(manager.active_session)
+        if charger.is_charging:
+            await charger.stop_price_based_charging()
+
+    if manager.optimal_schedule is not None:
+        next_session = manager.get_session_for_time(now)
+        if next_session and next_session.status != 'planned':
+            next_session = None
+    else:
+        next_session = await manager.get_next_session()
+    if next_session and now >= next_session.start_time:
+        await manager.start_session(next_session)
+        if not charger.is_charging:
+            await charger.start_price_based_charging(price_data)
+
+
+async def _replay_day(task: BacktestTask) -> DayResult:
+    """Replay one day of history for one variant"""
+    result = DayResult(variant=task.variant, day=task.day)
+    day = date.fromisoformat(task.day)
+    start = datetime.combine(day, time.min)
+
+    steps = resample_energy_rows(
+        await _load_energy_rows(task.db_path, start, start + timedelta(days=1)), task.step_minutes
+    )
+    if not steps:
+        result.error = 'no energy data'
+        return result
+    price_data = load_archived_prices(task.price_cache_dir, task.day)
+    if not price_data:
+        result.error = 'no archived prices'
+        return result
+
+    hours = task.step_minutes / 60
+    with tempfile.TemporaryDirectory(prefix='backtest_') as sandbox:
+        config = offline_config(task.config, Path(sandbox))
+        clock = SimulatedClock(steps[0].time)
+
+        with patched_clock(clock):
+            charger = AutomatedPriceCharger(config)
+            # Serve the replayed day from the archive (disk hit, never fetched)
+            charger.price_data_service = PriceDataService(OFFLINE_API_URL, {'cache_dir': task.price_cache_dir})
+            battery = SimulatedBattery(config, steps[0].battery_soc)
+            charger.goodwe_charger = battery
+            _seed_price_history(charger, task.price_cache_dir, day)
+
+            engine = None
+            if SELLING_AVAILABLE and config.get('battery_selling', {}).get('enabled', False):
+                engine = BatterySellingEngine(config)
+                engine.forecast_collector = None  # Offline: no PSE forecast requests
+
+            manager = None
+            manager_config = config.get('coordinator', {}).get('multi_session_charging', {})
+            if manager_config.get('enabled', False):
+                manager = MultiSessionManager(config, price_analyzer=charger)
+
+            curve = charger.get_price_curve(price_data)
+            revenue_factor = config.get('battery_selling', {}).get('revenue_factor', 1.0)
+            result.start_soc = battery.soc_percent
+
+            for step in steps:
+                clock.set(step.time)
+
+                if manager is not None:
+                    # Same trigger as live: the archived days are published on the simulated clock
+                    await manager.update_plans(current_soc=battery.soc_percent)
+                    await _handle_multi_session(manager, charger, price_data, step.time)
+
+                current_data = _current_data(battery, step, _tariff_zone(charger, step.time))
+
+                if engine is not None:
+                    current_price = charger.get_current_price(price_data)
+                    selling_price_data = {
+                        'current_price_pln': current_price / 1000 if current_price else 0,
+                        'price_data': price_data
+                    }
+                    selling_data = _selling_data(current_data)
+                    await engine.update_active_sessions(battery, selling_data)
+                    opportunity = await engine.analyze_selling_opportunity(selling_data, selling_price_data)
+                    if opportunity.decision == SellingDecision.START_SELLING and opportunity.safety_checks_passed:
+                        if await engine.start_selling_session(battery, opportunity):
+                            result.selling_sessions += 1
+                    if not engine.active_sessions:
+                        await engine.ensure_safe_state(battery)
+
+                decision = charger.make_smart_charging_decision(current_data, price_data)
+                session_active = manager is not None and manager.active_session is not None
+                if decision.get('should_charge') and battery.mode != 'eco_discharge':
+                    if not charger.is_charging:
+                        await charger.start_price_based_charging(price_data, force_start=True)
+                        result.charging_starts += 1
+                elif charger.is_charging and not session_active:
+                    await charger.stop_price_based_charging()
+
+                flows = battery.step(step.pv_power_w, step.house_consumption_w, hours)
+                index = curve.index_at(step.time)
+                if index is None:
+                    index = 0 if step.time < curve.timestamps[0] else len(curve.timestamps) - 1
+                import_price = float(curve.final_prices[index]) / 1000  # PLN/kWh
+                export_price = float(curve.market_prices[index]) / 1000 * revenue_factor
+
+                result.steps += 1
+                result.grid_import_kwh += flows.grid_import_kwh
+                result.grid_export_kwh += flows.grid_export_kwh
+                result.grid_charge_kwh += flows.grid_charge_kwh
+                result.battery_export_kwh += flows.battery_export_kwh
+                result.import_cost_pln += flows.grid_import_kwh * import_price
+                result.export_revenue_pln += flows.grid_export_kwh * export_price
+
+    result.end_soc = battery.soc_percent
+    result.net_cost_pln = result.import_cost_pln - result.export_revenue_pln
+    return result
+
+
+def run_backtest_day(task: BacktestTask) -> DayResult:
+    """
+    Replay one (variant, day) pair. Process-pool entry point.
+
+    Args:
+        task: Replay task
+
+    Returns:
+        Day result (with ``error`` set if the day could not be replayed)
+    """
+    try:
+        return asyncio.run(_replay_day(task))
+    except Exception as e:
+        logger.error(f"Backtest of {task.variant} on {task.day} failed: {e}")
+        return DayResult(variant=task.variant, day=task.day, error=str(e))
+
+
+def aggregate_results(results: List[DayResult]) -> Dict[str, Dict[str, Any]]:
+    """
+    Sum day results per variant.
+
+    Args:
+        results: Day results
+
+    Returns:
+        Dict mapping variant name to totals, replayed and failed day counts
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        totals = summary.setdefault(result.variant, dict(
+            {name: 0 for name in _SUMMED_FIELDS}, days=0, failed_days=0
+        ))
+        if result.error:
+            totals['failed_days'] += 1
+            continue
+        totals['days'] += 1
+        for name in _SUMMED_FIELDS:
+            totals[name] += getattr(result, name)
+    for totals in summary.values():
+        for name, value in totals.items():
+            if isinstance(value, float):
+                totals[name] = round(value, 3)
+    return summary
+
+
+def _init_worker(log_level: int) -> None:
+    """Quiet the decision modules in pool workers"""
+    logging.basicConfig(level=log_level)
+    logging.disable(log_level - 1)
+
+
+def run_backtest(base_config: Dict[str, Any], variants: Dict[str, Dict[str, Any]],
+                 start_date: date, end_date: date, db_path: str, price_cache_dir: str,
+                 step_minutes: int = DEFAULT_STEP_MINUTES, workers: Optional[int] = None,
+                 log_level: int = logging.WARNING) -> Dict[str, Any]:
+    """
+    Replay every day in a date range for every config variant.
+
+    Args:
+        base_config: Base system configuration
+        variants: Variant name -> config overrides
+        start_date: First day (inclusive)
+        end_date: Last day (inclusive)
+        db_path: SQLite database with energy_data
+        price_cache_dir: Directory with archived CSDAC days
+        step_minutes: Decision/simulation step
+        workers: Process-pool size (1 runs in-process, None = CPU count)
+        log_level: Log level inside pool workers
+
+    Returns:
+        Dict with per-variant totals, per-day results and days skipped for missing prices
+    """
+    days, skipped = [], []
+    current = start_date
+    while current <= end_date:
+        day = current.isoformat()
+        (days if load_archived_prices(price_cache_dir, day) else skipped).append(day)
+        current += timedelta(days=1)
+
+    tasks = [
+        BacktestTask(variant=name, config=deep_merge(base_config, overrides), day=day,
+                     db_path=db_path, price_cache_dir=price_cache_dir, step_minutes=step_minutes)
+        for name, overrides in variants.items()
+        for day in days
+    ]
+    logger.info(f"Backtesting {len(variants)} variant(s) over {len(days)} day(s), {len(skipped)} skipped")
+
+    if workers == 1:
+        results = [run_backtest_day(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_level,)) as pool:
+            results = list(pool.map(run_backtest_day, tasks))
+
+    return {
+        'variants': aggregate_results(results),
+        'days': [asdict(result) for result in results],
+        'skipped_days': skipped
+    }
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Replay stored history through the charging and selling logic')
+    parser.add_argument('--config', default=str(current_dir.parent / 'config' / 'master_coordinator_config.yaml'),
+                        help='Base configuration file')
+    parser.add_argument('--variants', help='YAML file mapping variant names to config overrides')
+    parser.add_argument('--start', required=True, help='First day (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last day (YYYY-MM-DD, default: start)')
+    parser.add_argument('--db', help='Energy database (default: data_storage sqlite path)')
+    parser.add_argument('--prices', help='Archived price directory (default: price_cache cache_dir)')
+    parser.add_argument('--step-minutes', type=int, default=DEFAULT_STEP_MINUTES, help='Simulation step')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', default='out/backtest/backtest_results.json', help='Results JSON file')
+    return parser.parse_args()
+
+
+def main():
+    """Run a backtest from the command line and print per-variant totals"""
+    args = parse_arguments()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    with open(args.config, 'r') as f:
+        base_config = yaml.safe_load(f)
+    variants = {'baseline': {}}
+    if args.variants:
+        with open(args.variants, 'r') as f:
+            variants = yaml.safe_load(f) or variants
+
+    db_path = args.db or base_config.get('data_storage', {}).get('database_storage', {}).get(
+        'sqlite', {}).get('path', 'data/goodwe_energy.db')
+    price_cache_dir = args.prices or base_config.get('price_analysis', {}).get('price_cache', {}).get(
+        'cache_dir', 'data/price_cache')
+    start_date = date.fromisoformat(args.start)
+    end_date = date.fromisoformat(args.end) if args.end else start_date
+
+    report = run_backtest(base_config, variants, start_date, end_date, db_path, price_cache_dir,
+                          step_minutes=args.step_minutes, workers=args.workers)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Variant':<24} {'Days':>5} {'Import kWh':>11} {'Export kWh':>11} {'Cost PLN':>10} {'Revenue PLN':>12} {'Net PLN':>10}")
+    for name, totals in report['variants'].items():
+        print(f"{name:<24} {totals['days']:>5} {totals['grid_import_kwh']:>11.1f} {totals['grid_export_kwh']:>11.1f} "
+              f"{totals['import_cost_pln']:>10.2f} {totals['export_revenue_pln']:>12.2f} {totals['net_cost_pln']:>10.2f}")
+    if report['skipped_days']:
+        print(f"\nSkipped {len(report['skipped_days'])} day(s) without archived prices")
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -68,6 +68,8 @@ except ImportError:
     TARIFF_PRICING_AVAILABLE = False
     logging.warning("Tariff pricing module not available - using SC-only pricing")
 
+from price_curve import get_tariff_price_curve
+
 
 class SellingDecision(Enum):
     """Battery selling decision types"""
@@ -1230,34 +1232,21 @@ class BatterySellingEngine:
                 return price_data['current_price_pln']
             
             if 'value' in price_data:
-                # CSDAC format - find current time period
+                # CSDAC format - find current time period (parsed once into a price curve)
+                curve = get_tariff_price_curve(price_data, self.tariff_calculator)
                 current_time = datetime.now()
-                for item in price_data['value']:
-                    item_time_str = item.get('dtime', '')
-                    if not item_time_str:
-                        continue
-                    
-                    try:
-                        if ':' in item_time_str and item_time_str.count(':') == 2:
-                            item_time = datetime.strptime(item_time_str, '%Y-%m-%d %H:%M:%S')
-                        else:
-                            item_time = datetime.strptime(item_time_str, '%Y-%m-%d %H:%M')
-                    except ValueError:
-                        continue
+                index = curve.index_at(current_time)
+                
+                if index is not None and current_time < curve.timestamps[index] + timedelta(minutes=15):
+                    if kompas_status is None or not self.tariff_calculator:
+                        return float(curve.final_prices[index]) / 1000  # Convert to PLN/kWh
                     
-                    if item_time <= current_time < item_time + timedelta(minutes=15):
-                        market_price = float(item.get('csdac_pln', 0))
-                        
-                        if self.tariff_calculator:
-                            # Use tariff-aware pricing
-                            market_price_kwh = market_price / 1000
-                            components = self.tariff_calculator.calculate_final_price(
-                                market_price_kwh, item_time, kompas_status
-                            )
-                            return components.final_price
-                        else:
-                            # Fallback: SC component only
-                            return (market_price + 89.2) / 1000  # Convert to PLN/kWh
+                    # Kompas status only affects this single period
+                    market_price_kwh = float(curve.market_prices[index]) / 1000
+                    components = self.tariff_calculator.calculate_final_price(
+                        market_price_kwh, curve.timestamps[index], kompas_status
+                    )
+                    return components.final_price
             
             # Default fallback
             return self.min_selling_price_pln
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+GoodWe Dynamic Price Optimiser - Optimal Charging Schedule Solver
+Exact dynamic-programming planner for multi-session grid charging
+
+The day is split into price slots (15 minutes for CSDAC data) and battery
+SOC is discretized into the energy one slot of charging at max power adds.
+The solver returns the minimum-cost set of charging sessions that reaches the
+target SOC while honouring:
+- max sessions per day
+- min/max session duration
+- minimum gap between sessions
+
+Sessions are computed once per published price curve; the resulting plan is
+indexed per slot so the coordinator can look up "should I be charging now"
+in O(1) on every tick.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from price_curve import PriceCurve
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlannedSession:
+    """Single charging session selected by the solver"""
+    start_index: int
+    slot_count: int
+    start_time: datetime
+    end_time: datetime
+    energy_kwh: float
+    cost_pln: float
+    avg_price_pln_mwh: float
+
+
+@dataclass
+class OptimalSchedule:
+    """Minimum-cost charging schedule for one price curve"""
+    sessions: List[PlannedSession]
+    total_energy_kwh: float
+    total_cost_pln: float
+    target_energy_kwh: float
+    feasible: bool  # False when constraints only allow a partial charge
+    solve_time_ms: float
+    curve: PriceCurve = field(repr=False)
+    slot_session: np.ndarray = field(repr=False)  # Session index per slot, -1 = not charging
+
+    def session_index_at(self, when: datetime) -> int:
+        """Get index of the session covering the given time, -1 if none (O(1))"""
+        index = self.curve.index_at(when)
+        if index is None:
+            return -1
+        return int(self.slot_session[index])
+
+    def session_at(self, when: datetime) -> Optional[PlannedSession]:
+        """Get the session covering the given time (O(1))"""
+        session_index = self.session_index_at(when)
+        return self.sessions[session_index] if session_index >= 0 else None
+
+    def should_charge_at(self, when: datetime) -> bool:
+        """Check whether the plan charges at the given time (O(1))"""
+        return self.session_at(when) is not None
+
+
+class ChargingScheduleOptimizer:
+    """Exact DP solver over (slot, sessions left, remaining SOC steps)"""
+
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize the solver from system configuration
+
+        Args:
+            config: Full system configuration dict
+        """
+        multi_session_config = config.get('coordinator', {}).get('multi_session_charging', {})
+
+        self.battery_capacity_kwh = config.get('battery_management', {}).get('capacity_kwh', 20.0)
+        self.max_charge_power_kw = config.get('charging', {}).get('max_power', 10000) / 1000.0
+        self.max_sessions_per_day = multi_session_config.get('max_sessions_per_day', 3)
+        self.min_session_duration_hours = multi_session_config.get('min_session_duration_hours', 1.0)
+        self.max_session_duration_hours = multi_session_config.get('max_session_duration_hours', 4.0)
+        self.session_gap_minutes = multi_session_config.get('session_gap_minutes', 30)
+
+    def solve(self, curve: PriceCurve, current_soc: float, target_soc: float = 100.0,
+              start_time: Optional[datetime] = None) -> Optional[OptimalSchedule]:
+        """Compute the minimum-cost session set for a price curve
+
+        Args:
+            curve: Final price curve (PLN/MWh)
+            current_soc: Battery SOC at the start of the plan (%)
+            target_soc: SOC to reach (%)
+            start_time: Ignore slots starting before this time (default: whole curve)
+
+        Returns:
+            OptimalSchedule, or None if the curve has no usable slots
+        """
+        started = datetime.now()
+
+        if start_time is not None:
+            curve = curve.slice(start_time, None)
+        n = len(curve)
+        if n == 0:
+            return None
+
+        slot_hours = curve.slot_seconds / 3600.0
+        slot_energy_kwh = self.max_charge_power_kw * slot_hours
+        target_energy_kwh = max(0.0, self.battery_capacity_kwh * (target_soc - current_soc) / 100.0)
+
+        # SOC discretized into slot-sized energy steps
+        steps_needed = math.ceil(round(target_energy_kwh / slot_energy_kwh, 6)) if slot_energy_kwh > 0 else 0
+        min_len = max(1, math.ceil(round(self.min_session_duration_hours / slot_hours, 6)))
+        max_len = max(min_len, int(self.max_session_duration_hours / slot_hours + 1e-9))
+        gap = math.ceil(round(self.session_gap_minutes * 60 / curve.slot_seconds, 6))
+        sessions_allowed = self.max_sessions_per_day
+
+        # Slot costs in PLN for one slot of charging at max power
+        slot_costs = curve.final_prices / 1000.0 * slot_energy_kwh
+        prefix = np.concatenate(([0.0], np.cumsum(slot_costs)))
+
+        # cost[t][s][r]: minimum cost to charge r more steps from slot t with s sessions left
+        cost = np.full((n + 1, sessions_allowed + 1, steps_needed + 1), np.inf)
+        cost[:, :, 0] = 0.0
+        choice = np.zeros((n + 1, sessions_allowed + 1, steps_needed + 1), dtype=np.int16)
+
+        remaining = np.arange(steps_needed + 1)
+        for t in range(n - 1, -1, -1):
+            # Option 1: do not start a session at slot t
+            cost[t] = cost[t + 1]
+            if steps_needed == 0:
+                continue
+            for length in range(min_len, min(max_len, n - t) + 1):
+                session_cost = prefix[t + length] - prefix[t]
+                resume = min(n, t + length + gap)
+                after = np.maximum(remaining - length, 0)
+                # Option 2: start a session of `length` slots at t (uses one session)
+                candidate = session_cost + cost[resume, :-1, :][:, after]
+                better = candidate < cost[t, 1:, :]
+                better[:, 0] = False
+                if better.any():
+                    cost[t, 1:, :] = np.where(better, candidate, cost[t, 1:, :])
+                    choice[t, 1:, :] = np.where(better, length, choice[t, 1:, :])
+
+        # Charge as much of the target as constraints allow
+        reachable = np.nonzero(np.isfinite(cost[0, sessions_allowed, :]))[0]
+        steps = int(reachable.max()) if len(reachable) else 0
+        feasible = steps == steps_needed
+
+        sessions: List[PlannedSession] = []
+        slot_session = np.full(n, -1, dtype=np.int32)
+        remaining_energy_kwh = target_energy_kwh
+        t, s, r = 0, sessions_allowed, steps
+        while t < n and r > 0:
+            length = int(choice[t, s, r])
+            if length == 0:
+                t += 1
+                continue
+            # Battery stops accepting energy once the target is reached
+            energy_kwh = min(length * slot_energy_kwh, remaining_energy_kwh)
+            remaining_energy_kwh -= energy_kwh
+            session_cost = float(prefix[t + length] - prefix[t])
+            slot_session[t:t + length] = len(sessions)
+            sessions.append(PlannedSession(
+                start_index=t,
+                slot_count=length,
+                start_time=curve.timestamps[t],
+                end_time=curve.timestamps[t + length - 1] + timedelta(seconds=curve.slot_seconds),
+                energy_kwh=energy_kwh,
+                cost_pln=session_cost,
+                avg_price_pln_mwh=float(curve.final_prices[t:t + length].mean()),
+            ))
+            r = max(r - length, 0)
+            s -= 1
+            t = min(n, t + length + gap)
+
+        solve_time_ms = (datetime.now() - started).total_seconds() * 1000
+        schedule = OptimalSchedule(
+            sessions=sessions,
+            total_energy_kwh=sum(p.energy_kwh for p in sessions),
+            total_cost_pln=sum(p.cost_pln for p in sessions),
+            target_energy_kwh=target_energy_kwh,
+            feasible=feasible,
+            solve_time_ms=solve_time_ms,
+            curve=curve,
+            slot_session=slot_session
+        )
+
+        logger.info(
+            f"Optimal schedule: {len(sessions)} sessions, {schedule.total_energy_kwh:.1f}/{target_energy_kwh:.1f} kWh, "
+            f"cost {schedule.total_cost_pln:.2f} PLN ({'feasible' if feasible else 'partial'}, {solve_time_ms:.1f} ms)"
+        )
+        return schedule
@@ -13,6 +13,7 @@ from datetime import datetime, date, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from database.storage_factory import StorageFactory
+from database.energy_rollups import RollupBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -97,30 +98,37 @@ class DailySnapshotManager:
         logger.info(f"Creating daily snapshot for {target_date}")
         
         decisions = []
-        energy_data_list = []
+        daily_rollup = None
         
         # Try to fetch from storage first (only if we can safely run async)
         if self.storage:
             try:
                 async def _fetch_data():
                     if not await self.storage.connect():
-                        return [], []
+                        return [], None
                     
                     start_time = datetime.combine(target_date, datetime.min.time())
                     end_time = datetime.combine(target_date, datetime.max.time())
                     
                     decisions = await self.storage.get_decisions(start_time, end_time)
-                    energy_data = await self.storage.get_energy_data(start_time, end_time)
+                    # The daily rollup already holds the meter totals; raw rows only without it
+                    rollups = await self.storage.get_energy_rollups('daily', start_time, start_time)
+                    if not rollups:
+                        # Roll the raw readings up chunk by chunk instead of loading the whole day
+                        builder = RollupBuilder(window_start=start_time, window_end=start_time + timedelta(days=1))
+                        async for chunk in self.storage.iter_energy_data(start_time, end_time):
+                            builder.add_all(chunk)
+                        rollups = [row for row in builder.rows('daily') if row['sample_count']]
+                        if rollups:
+                            logger.info(f"Rolled up {rollups[0]['sample_count']} energy records from storage "
+                                        f"for {target_date}")
                     await self.storage.disconnect()
-                    return decisions, energy_data
+                    return decisions, (rollups[0] if rollups else None)
                 
-                res_decisions, res_energy = self._run_async(_fetch_data())
+                res_decisions, daily_rollup = self._run_async(_fetch_data()) or ([], None)
                 if res_decisions:
                     decisions = res_decisions
                     logger.info(f"Retrieved {len(decisions)} decisions from storage for {target_date}")
-                if res_energy:
-                    energy_data_list = res_energy
-                    logger.info(f"Retrieved {len(energy_data_list)} energy records from storage for {target_date}")
             except Exception as e:
                 logger.error(f"Failed to fetch data from storage: {e}")
         
@@ -147,7 +155,7 @@ class DailySnapshotManager:
                     continue
         
         # Calculate daily summary
-        snapshot = self._calculate_daily_summary(decisions, target_date, energy_data_list)
+        snapshot = self._calculate_daily_summary(decisions, target_date, daily_rollup=daily_rollup)
         
         # Save snapshot to file
         snapshot_path = self.get_snapshot_path(target_date)
@@ -160,7 +168,8 @@ class DailySnapshotManager:
         
         return snapshot
     
-    def _calculate_daily_summary(self, decisions: List[Dict[str, Any]], target_date: date, energy_data: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _calculate_daily_summary(self, decisions: List[Dict[str, Any]], target_date: date, energy_data: List[Dict[str, Any]] = None,
+                                 daily_rollup: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Calculate summary metrics for a day's decisions"""
         
         # Categorize decisions
@@ -245,8 +254,17 @@ class DailySnapshotManager:
             'energy_charged_t2_kwh': round(sum(d.get('energy_kwh', 0) for d in charging_decisions if d.get('tariff_zone', 'T1') == 'T2'), 2)
         }
         
-        # Calculate real meter import if energy data available
-        if energy_data and len(energy_data) > 1:
+        # Real meter import from the daily energy rollup (sum of meter increments)
+        if daily_rollup:
+            t1_import = daily_rollup.get('meter_import_t1_kwh') or 0.0
+            t2_import = daily_rollup.get('meter_import_t2_kwh') or 0.0
+            snapshot['real_grid_import_kwh'] = round(daily_rollup.get('meter_import_kwh') or 0.0, 3)
+            snapshot['grid_import_t1_kwh'] = round(t1_import, 3)
+            snapshot['grid_import_t2_kwh'] = round(t2_import, 3)
+            snapshot['grid_import_total_kwh'] = round(t1_import + t2_import, 3)
+        
+        # Otherwise calculate real meter import if energy data available
+        elif energy_data and len(energy_data) > 1:
             # Sort by timestamp just in case
             sorted_energy = sorted(energy_data, key=lambda x: x['timestamp'])
             
@@ -0,0 +1,60 @@
+"""
+Columnar energy data for NumPy/pandas consumers
+
+get_energy_data returns one dict per reading, which analytics code then
+turns back into lists of floats. get_energy_columns returns one contiguous
+array per column instead: ``ts_ms`` (int64 epoch milliseconds) plus a
+float64 array for every requested column, with NaN for missing values.
+``pandas.DataFrame(columns)`` builds a frame without copying per row.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .epoch import to_epoch_ms
+from .schema import ENERGY_READING_COLUMNS
+
+# tariff_zone is the only non-numeric reading column
+NUMERIC_ENERGY_COLUMNS = tuple(column for column in ENERGY_READING_COLUMNS if column != 'tariff_zone')
+
+DEFAULT_ENERGY_COLUMNS = ('battery_soc', 'pv_power', 'grid_power', 'house_consumption', 'battery_power')
+
+
+def validate_energy_columns(columns: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Requested columns as a tuple.
+
+    Raises:
+        ValueError: for unknown or non-numeric columns (names are interpolated into SQL)
+    """
+    columns = tuple(columns)
+    unknown = [column for column in columns if column not in NUMERIC_ENERGY_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown energy columns: {', '.join(unknown)} (expected {NUMERIC_ENERGY_COLUMNS})")
+    return columns
+
+
+def columns_from_rows(rows: Sequence[Sequence[Any]], columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Column arrays from (ts_ms, *columns) tuples already in time order."""
+    if not rows:
+        result = {'ts_ms': np.empty(0, dtype=np.int64)}
+        result.update((column, np.empty(0, dtype=np.float64)) for column in columns)
+        return result
+    # One 2-D conversion; None becomes NaN. Epoch ms fit a float64 exactly.
+    table = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns) + 1)
+    result = {'ts_ms': table[:, 0].astype(np.int64)}
+    for i, column in enumerate(columns, start=1):
+        result[column] = np.ascontiguousarray(table[:, i])
+    return result
+
+
+def columns_from_records(records: Iterable[Dict[str, Any]], columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Column arrays from get_energy_data-style dicts, sorted by timestamp."""
+    rows: List[Tuple[Any, ...]] = []
+    for record in records:
+        ts_ms = to_epoch_ms(record.get('timestamp'))
+        if ts_ms is not None:
+            rows.append((ts_ms,) + tuple(record.get(column) for column in columns))
+    rows.sort(key=lambda row: row[0])
+    return columns_from_rows(rows, columns)
@@ -1,13 +1,21 @@
 import asyncio
 import logging
 from datetime import datetime
-from typing import List, Dict, Any
-from .storage_interface import DataStorageInterface, StorageConfig
+from typing import List, Dict, Any, Optional, AsyncIterator, Sequence
+
+import numpy as np
+
+from .storage_interface import DataStorageInterface, StorageConfig, DEFAULT_CHUNK_SIZE
+from .columnar import DEFAULT_ENERGY_COLUMNS, columns_from_rows, validate_energy_columns
+from .replication import ReplicaWriter
 
 class CompositeStorage(DataStorageInterface):
     """
     Composite storage implementation that writes to multiple backends
     and reads from the primary backend with fallback.
+    
+    Writes return once the primary has committed; secondaries are fed
+    asynchronously through one ReplicaWriter queue each.
     """
 
     def __init__(self, primary: DataStorageInterface, secondaries: List[DataStorageInterface], config: StorageConfig):
@@ -15,6 +23,18 @@ class CompositeStorage(DataStorageInterface):
         self.secondaries = secondaries
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self._drain_timeout = getattr(config, 'replication_drain_timeout', 10.0)
+        self.replicas = [
+            ReplicaWriter(
+                f"{type(secondary).__name__}#{i}", secondary, primary,
+                queue_size=getattr(config, 'replication_queue_size', 1000),
+                overflow=getattr(config, 'replication_overflow', 'drop_oldest'),
+                max_retries=getattr(config, 'max_retries', 3),
+                retry_delay=getattr(config, 'retry_delay', 0.1),
+                probe_interval=getattr(config, 'replication_probe_interval', 5.0)
+            )
+            for i, secondary in enumerate(secondaries)
+        ]
 
     async def connect(self) -> bool:
         """Connect to all backends."""
@@ -28,12 +48,17 @@ class CompositeStorage(DataStorageInterface):
         primary_ok = isinstance(results[0], bool) and results[0]
         if not primary_ok:
             self.logger.error("Primary storage connection failed")
+        
+        # A secondary that failed to connect is marked down by its first write
+        for replica in self.replicas:
+            replica.start()
             
         # We consider it connected if at least one storage is working
         return any(r is True for r in results)
 
     async def disconnect(self) -> None:
-        """Disconnect from all backends."""
+        """Drain the replication queues, then disconnect from all backends."""
+        await asyncio.gather(*[replica.stop(self._drain_timeout) for replica in self.replicas])
         await asyncio.gather(
             self.primary.disconnect(),
             *[s.disconnect() for s in self.secondaries],
@@ -44,32 +69,74 @@ class CompositeStorage(DataStorageInterface):
         """Check if primary storage is healthy."""
         return await self.primary.health_check()
 
-    async def _write_to_all(self, method_name: str, *args, **kwargs) -> bool:
-        """Helper to write to all backends concurrently."""
-        tasks = []
+    async def _write_to_all(self, method_name: str, *args) -> bool:
+        """
+        Helper to write to the primary and replicate to the secondaries.
         
-        # Primary task
-        tasks.append(getattr(self.primary, method_name)(*args, **kwargs))
+        Secondaries are queued once the primary commits. If the primary
+        fails and fallback is enabled they are written directly instead,
+        so the caller learns whether any backend holds the data.
+        """
+        try:
+            primary_result = await getattr(self.primary, method_name)(*args)
+        except Exception as e:
+            self.logger.error(f"Primary storage write failed for {method_name}: {e}")
+            primary_result = False
+        primary_ok = isinstance(primary_result, bool) and primary_result
         
-        # Secondary tasks
-        for secondary in self.secondaries:
-            tasks.append(getattr(secondary, method_name)(*args, **kwargs))
-            
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        if primary_ok or not self.config.enable_fallback:
+            for replica in self.replicas:
+                await replica.submit(method_name, args)
+            return primary_ok
         
-        # Return True if primary succeeded (or if primary failed but fallback is enabled and secondary succeeded)
-        primary_result = results[0]
-        if isinstance(primary_result, bool) and primary_result:
+        results = await asyncio.gather(
+            *[getattr(secondary, method_name)(*args) for secondary in self.secondaries],
+            return_exceptions=True
+        )
+        if any(isinstance(r, bool) and r for r in results):
+            self.logger.warning(f"Primary storage failed for {method_name}, but secondary succeeded.")
             return True
-            
-        if self.config.enable_fallback:
-            # Check if any secondary succeeded
-            if any(isinstance(r, bool) and r for r in results[1:]):
-                self.logger.warning(f"Primary storage failed for {method_name}, but secondary succeeded.")
-                return True
                 
         return False
 
+    async def flush(self) -> bool:
+        """
+        Wait until every queued secondary write has been applied or recorded for catch-up.
+        
+        Returns:
+            True once the replication queues are empty
+        """
+        await asyncio.gather(*[replica.join() for replica in self.replicas])
+        return True
+
+    async def replay_secondaries(self, start_time: datetime, end_time: datetime) -> Dict[str, int]:
+        """
+        Copy a time range from the primary to every secondary.
+        
+        Used to catch up a secondary that missed writes while the process
+        was not running; ranges missed at runtime are replayed automatically.
+        
+        Returns:
+            Dictionary with rows replayed per secondary (-1 if the replay failed)
+        """
+        results = {}
+        for replica in self.replicas:
+            try:
+                results[replica.name] = await replica.replay(start_time, end_time)
+            except Exception as e:
+                self.logger.error(f"Replay to {replica.name} failed: {e}")
+                results[replica.name] = -1
+        return results
+
+    def get_replication_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-secondary replication queue depth, lag and error counters.
+        
+        Returns:
+            Dictionary of replication statistics keyed by secondary name
+        """
+        return {replica.name: replica.get_stats() for replica in self.replicas}
+
     async def _read_with_fallback(self, method_name: str, *args, **kwargs) -> Any:
         """Helper to read from primary with fallback to secondaries."""
         try:
@@ -91,12 +158,58 @@ class CompositeStorage(DataStorageInterface):
                     
         return []  # Return empty list/dict if all failed
 
+    async def _iter_with_fallback(self, method_name: str, *args) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Helper to stream from primary with fallback to secondaries.
+        
+        A backend is only abandoned before it has yielded anything; once chunks
+        were handed out, switching backends would repeat or skip rows.
+        """
+        backends = [self.primary] + (self.secondaries if self.config.enable_fallback else [])
+        for backend in backends:
+            yielded = False
+            try:
+                async for chunk in getattr(backend, method_name)(*args):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                if yielded:
+                    self.logger.error(f"Storage stream failed part-way for {method_name}: {e}")
+                    return
+                self.logger.warning(f"Storage stream failed for {method_name}: {e}")
+            if yielded:
+                if backend is not self.primary:
+                    self.logger.info(f"Fallback stream successful from secondary for {method_name}")
+                return
+
     async def save_energy_data(self, data: List[Dict[str, Any]]) -> bool:
         return await self._write_to_all('save_energy_data', data)
 
     async def get_energy_data(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         return await self._read_with_fallback('get_energy_data', start_time, end_time)
 
+    async def iter_energy_data(self, start_time: datetime, end_time: datetime,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        async for chunk in self._iter_with_fallback('iter_energy_data', start_time, end_time, chunk_size):
+            yield chunk
+
+    async def get_energy_columns(self, start_time: datetime, end_time: datetime,
+                                 columns: Sequence[str] = DEFAULT_ENERGY_COLUMNS) -> Dict[str, np.ndarray]:
+        """Columnar energy data from the primary, falling back while a backend returns no rows."""
+        backends = [self.primary] + (self.secondaries if self.config.enable_fallback else [])
+        result = None
+        for backend in backends:
+            try:
+                result = await backend.get_energy_columns(start_time, end_time, columns)
+            except ValueError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Storage read failed for get_energy_columns: {e}")
+                continue
+            if len(result['ts_ms']):
+                return result
+        return result if result is not None else columns_from_rows([], validate_energy_columns(columns))
+
     async def save_system_state(self, state: Dict[str, Any]) -> bool:
         return await self._write_to_all('save_system_state', state)
 
@@ -106,12 +219,35 @@ class CompositeStorage(DataStorageInterface):
     async def get_system_state_range(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         return await self._read_with_fallback('get_system_state_range', start_time, end_time)
 
+    async def iter_system_state_range(self, start_time: datetime, end_time: datetime,
+                                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        async for chunk in self._iter_with_fallback('iter_system_state_range', start_time, end_time, chunk_size):
+            yield chunk
+
+    async def get_energy_rollups(self, resolution: str, start_time: datetime,
+                                 end_time: datetime) -> List[Dict[str, Any]]:
+        return await self._read_with_fallback('get_energy_rollups', resolution, start_time, end_time)
+
+    async def save_coordinator_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        return await self._write_to_all('save_coordinator_snapshot', snapshot)
+
+    async def get_coordinator_snapshots(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+        return await self._read_with_fallback('get_coordinator_snapshots', start_time, end_time)
+
+    async def get_latest_coordinator_snapshot(self) -> Optional[Dict[str, Any]]:
+        return await self._read_with_fallback('get_latest_coordinator_snapshot') or None
+
     async def save_decision(self, decision: Dict[str, Any]) -> bool:
         return await self._write_to_all('save_decision', decision)
 
     async def get_decisions(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         return await self._read_with_fallback('get_decisions', start_time, end_time)
 
+    async def iter_decisions(self, start_time: datetime, end_time: datetime,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        async for chunk in self._iter_with_fallback('iter_decisions', start_time, end_time, chunk_size):
+            yield chunk
+
     async def save_charging_session(self, session: Dict[str, Any]) -> bool:
         return await self._write_to_all('save_charging_session', session)
 
@@ -175,7 +311,10 @@ class CompositeStorage(DataStorageInterface):
             Dictionary with database statistics
         """
         try:
-            return await self.primary.get_database_stats()
+            stats = await self.primary.get_database_stats()
+            if self.replicas:
+                stats['replication'] = self.get_replication_stats()
+            return stats
         except Exception as e:
             self.logger.error(f"Failed to get database stats: {e}")
             return {}
@@ -1,25 +1,30 @@
-"""Lightweight Connection Manager stub for tests.
-Provides minimal async pool behavior without external dependencies.
+"""Read-only aiosqlite connection pool for WAL databases.
+
+SQLiteStorage keeps a single writer connection; reads are served from this
+pool so that dashboard range queries do not queue behind coordinator writes.
+In WAL mode readers see the last committed snapshot and never block the writer.
 """
 import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-
-class FakeConnection:
-    """Simple fake connection with async execute/close for tests."""
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-    def __init__(self):
-        self.closed = False
+import aiosqlite
 
-    async def execute(self, *args, **kwargs):
-        await asyncio.sleep(0)
-        return None
+logger = logging.getLogger(__name__)
 
-    async def close(self):
-        self.closed = True
-        await asyncio.sleep(0)
+# Pragmas applied to every pooled reader connection
+READER_PRAGMAS: Tuple[str, ...] = (
+    "PRAGMA query_only=ON",
+    "PRAGMA mmap_size=268435456",  # 256MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",    # 16MB cache per reader
+    "PRAGMA busy_timeout=5000",
+)
 
 
 @dataclass
@@ -28,75 +33,120 @@ class ConnectionStats:
     active_connections: int = 0
     failed_connections: int = 0
     connection_errors: int = 0
+    acquisitions: int = 0
+    waits: int = 0
+    max_wait_ms: float = 0.0
     last_connection_time: Optional[datetime] = None
     last_error_time: Optional[datetime] = None
 
 
 class ConnectionPool:
-    def __init__(self, db_path: str, max_connections: int = 10, min_connections: int = 2):
+    """
+    Pool of read-only connections created on demand up to max_connections.
+
+    Connections are opened with ``mode=ro`` so a pooled reader can never
+    write, and min_connections readers are opened eagerly on start().
+    """
+
+    def __init__(self, db_path: str, max_connections: int = 10, min_connections: int = 2,
+                 pragmas: Tuple[str, ...] = READER_PRAGMAS):
         self.db_path = db_path
-        self.max_connections = max_connections
-        self.min_connections = min_connections
-        self.connections: List[FakeConnection] = []
-        self.active_connections: List[FakeConnection] = []
+        self.max_connections = max(1, max_connections)
+        self.min_connections = min(min_connections, self.max_connections)
+        self.pragmas = pragmas
+        self.connections: List[aiosqlite.Connection] = []
+        self.active_connections: List[aiosqlite.Connection] = []
         self.stats = ConnectionStats()
-        self._lock = asyncio.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
         self._is_running = False
 
+    @property
+    def is_running(self) -> bool:
+        return self._is_running
+
+    async def _open(self) -> aiosqlite.Connection:
+        """Open one read-only connection with reader pragmas."""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        try:
+            conn = await aiosqlite.connect(uri, uri=True)
+            conn.row_factory = aiosqlite.Row
+            for pragma in self.pragmas:
+                await conn.execute(pragma)
+        except Exception:
+            self.stats.failed_connections += 1
+            self.stats.connection_errors += 1
+            self.stats.last_error_time = datetime.now()
+            raise
+        self.stats.total_connections += 1
+        self.stats.last_connection_time = datetime.now()
+        return conn
+
     async def start(self):
         if self._is_running:
             return
+        self._slots = asyncio.Semaphore(self.max_connections)
         self._is_running = True
         for _ in range(self.min_connections):
-            conn = FakeConnection()
-            self.connections.append(conn)
-            self.stats.total_connections += 1
+            self.connections.append(await self._open())
 
     async def stop(self):
         if not self._is_running:
             return
         self._is_running = False
-        async with self._lock:
-            for conn in self.connections + self.active_connections:
-                try:
-                    await conn.close()
-                except Exception:
-                    pass
-            self.connections.clear()
-            self.active_connections.clear()
-
-    async def get_connection(self) -> FakeConnection:
-        while self._is_running:
-            async with self._lock:
-                if self.connections:
-                    conn = self.connections.pop()
-                    self.active_connections.append(conn)
-                    self.stats.active_connections = len(self.active_connections)
-                    return conn
-
-                if len(self.active_connections) < self.max_connections:
-                    conn = FakeConnection()
-                    self.active_connections.append(conn)
-                    self.stats.total_connections += 1
-                    self.stats.active_connections = len(self.active_connections)
-                    return conn
-
-            # wait briefly for a connection outside the lock
-            await asyncio.sleep(0.01)
-            
-        raise Exception("Connection pool stopped or not running")
-
-    async def return_connection(self, conn: FakeConnection):
-        async with self._lock:
-            if conn in self.active_connections:
-                self.active_connections.remove(conn)
-                self.connections.append(conn)
-                self.stats.active_connections = len(self.active_connections)
-            else:
-                try:
-                    await conn.close()
-                except Exception:
-                    pass
+        for conn in self.connections + self.active_connections:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+        self.connections.clear()
+        self.active_connections.clear()
+        self.stats.active_connections = 0
+
+    async def get_connection(self) -> aiosqlite.Connection:
+        """Check out a reader, waiting while all max_connections are in use."""
+        if not self._is_running:
+            raise Exception("Connection pool stopped or not running")
+
+        started = time.perf_counter()
+        if self._slots.locked():
+            self.stats.waits += 1
+        await self._slots.acquire()
+        try:
+            if not self._is_running:
+                raise Exception("Connection pool stopped or not running")
+            conn = self.connections.pop() if self.connections else await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self.active_connections.append(conn)
+        self.stats.acquisitions += 1
+        self.stats.active_connections = len(self.active_connections)
+        self.stats.max_wait_ms = max(self.stats.max_wait_ms, (time.perf_counter() - started) * 1000)
+        return conn
+
+    async def return_connection(self, conn: aiosqlite.Connection):
+        if conn not in self.active_connections:
+            return
+        self.active_connections.remove(conn)
+        self.stats.active_connections = len(self.active_connections)
+        if self._is_running:
+            self.connections.append(conn)
+        else:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+        self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a reader for the duration of the block."""
+        conn = await self.get_connection()
+        try:
+            yield conn
+        finally:
+            await self.return_connection(conn)
 
     def get_stats(self) -> Dict[str, Any]:
         return {
@@ -105,6 +155,9 @@ class ConnectionPool:
             'available_connections': len(self.connections),
             'failed_connections': self.stats.failed_connections,
             'connection_errors': self.stats.connection_errors,
+            'acquisitions': self.stats.acquisitions,
+            'waits': self.stats.waits,
+            'max_wait_ms': round(self.stats.max_wait_ms, 3),
             'last_connection_time': self.stats.last_connection_time,
             'last_error_time': self.stats.last_error_time,
             'pool_size': len(self.connections),
@@ -118,9 +171,6 @@ class ConnectionManager:
         self.db_path = db_path
         self.pool = ConnectionPool(db_path, max_connections, min_connections)
         self.is_initialized = False
-        self.health_check_interval = 60
-        self._health_check_task = None
-        self._monitoring_task = None
 
     async def initialize(self):
         if self.is_initialized:
@@ -149,15 +199,14 @@ class ConnectionManager:
             return {}
         return {
             'is_initialized': self.is_initialized,
-            'pool_stats': self.pool.get_stats(),
-            'health_check_interval': self.health_check_interval
+            'pool_stats': self.pool.get_stats()
         }
 
     async def test_connection(self) -> bool:
         try:
-            conn = await self.get_connection()
-            await conn.execute("SELECT 1")
-            await self.return_connection(conn)
-            return True
+            async with self.pool.connection() as conn:
+                async with conn.execute("SELECT 1") as cursor:
+                    row = await cursor.fetchone()
+            return row[0] == 1
         except Exception:
             return False
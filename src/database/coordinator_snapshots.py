@@ -0,0 +1,151 @@
+"""
+Typed coordinator snapshots
+
+MasterCoordinator used to serialize its whole nested ``current_data`` into the
+``metrics`` JSON of every system_state row. Snapshots keep only the fields the
+dashboard and PV forecaster actually read, as typed columns of the
+``coordinator_snapshots`` table.
+
+SNAPSHOT_FIELDS is the single source of truth for the mapping. It drives
+the Python conversion in both directions and the SQL backfill of the v5
+migration.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# (column, kind, source paths in current_data as (dotted path, scale))
+# The first source with a usable value wins; unscaled sources are also the
+# keys restored by current_data_from_snapshot().
+SNAPSHOT_FIELDS: Tuple[Tuple[str, str, Tuple[Tuple[str, float], ...]], ...] = (
+    ('battery_soc', 'number', (('battery.soc_percent', 1),)),
+    ('battery_power_w', 'number', (('battery.power_w', 1),)),
+    ('battery_temperature', 'number', (('battery.temperature', 1),)),
+    ('battery_charging', 'bool', (('battery.charging_status', 1),)),
+    ('pv_power_w', 'number', (('photovoltaic.current_power_w', 1), ('photovoltaic.current_power_kw', 1000))),
+    ('pv_daily_kwh', 'number', (('photovoltaic.daily_production_kwh', 1), ('photovoltaic.daily_generation_kwh', 1))),
+    ('pv_efficiency_percent', 'number', (('photovoltaic.efficiency_percent', 1),)),
+    ('house_power_w', 'number', (('house_consumption.current_power_w', 1),)),
+    ('house_daily_kwh', 'number', (('house_consumption.daily_total_kwh', 1),
+                                   ('house_consumption.daily_consumption_kwh', 1))),
+    ('grid_power_w', 'number', (('grid.power_w', 1),)),
+    ('grid_flow_direction', 'text', (('grid.flow_direction', 1),)),
+    ('grid_import_today_kwh', 'number', (('grid.today_imported_kwh', 1),)),
+    ('grid_export_today_kwh', 'number', (('grid.today_exported_kwh', 1),)),
+    ('grid_l1_current_a', 'number', (('grid.l1_current_a', 1),)),
+    ('grid_l2_current_a', 'number', (('grid.l2_current_a', 1),)),
+    ('grid_l3_current_a', 'number', (('grid.l3_current_a', 1),)),
+)
+
+SNAPSHOT_COLUMNS = ('timestamp', 'state') + tuple(field[0] for field in SNAPSHOT_FIELDS)
+
+# Columns describing what the coordinator is doing; the others are live
+# readings that change on almost every read
+STATE_COLUMNS = ('state', 'battery_charging')
+
+
+def _lookup(data: Dict[str, Any], dotted: str) -> Any:
+    value = data
+    for key in dotted.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _coerce(kind: str, value: Any, scale: float) -> Any:
+    """Typed value or None for placeholders such as 'Unknown'"""
+    if kind == 'bool':
+        return int(value) if isinstance(value, bool) else None
+    if kind == 'text':
+        return value if isinstance(value, str) else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return round(float(value) * scale, 2)
+
+
+def snapshot_from_current_data(current_data: Dict[str, Any], state: Optional[str] = None,
+                               timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Extract the typed snapshot row from MasterCoordinator.current_data.
+
+    Args:
+        current_data: Nested coordinator data (battery, photovoltaic, grid, ...)
+        state: Coordinator state value
+        timestamp: Snapshot time, defaults to now
+
+    Returns:
+        Dictionary keyed by SNAPSHOT_COLUMNS
+    """
+    snapshot = {
+        'timestamp': (timestamp or datetime.now()).isoformat(),
+        'state': state
+    }
+    for column, kind, sources in SNAPSHOT_FIELDS:
+        value = None
+        for path, scale in sources:
+            value = _coerce(kind, _lookup(current_data, path), scale)
+            if value is not None:
+                break
+        snapshot[column] = value
+    return snapshot
+
+
+def current_data_from_snapshot(snapshot: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Rebuild the nested current_data shape readers expect from a snapshot row.
+
+    Args:
+        snapshot: Row of coordinator_snapshots
+
+    Returns:
+        Nested dictionary with battery/photovoltaic/house_consumption/grid sections
+    """
+    if not snapshot:
+        return {}
+    data: Dict[str, Any] = {'timestamp': snapshot.get('timestamp')}
+    for column, kind, sources in SNAPSHOT_FIELDS:
+        value = snapshot.get(column)
+        if value is None:
+            continue
+        if kind == 'bool':
+            value = bool(value)
+        for path, scale in sources:
+            if scale != 1:
+                continue
+            section, key = path.split('.', 1)
+            data.setdefault(section, {})[key] = value
+    pv_power = snapshot.get('pv_power_w')
+    if pv_power is not None:
+        data['photovoltaic']['current_power_kw'] = pv_power / 1000.0
+    return data
+
+
+def snapshot_changed(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> bool:
+    """True if the coordinator state or the charging flag differs (readings are ignored)"""
+    if previous is None:
+        return True
+    return any(previous.get(column) != current.get(column) for column in STATE_COLUMNS)
+
+
+def _sql_value(kind: str, dotted: str, scale: float) -> str:
+    path = f"'$.current_data.{dotted}'"
+    if kind == 'bool':
+        return f"CASE json_type(metrics, {path}) WHEN 'true' THEN 1 WHEN 'false' THEN 0 END"
+    if kind == 'text':
+        return f"CASE json_type(metrics, {path}) WHEN 'text' THEN json_extract(metrics, {path}) END"
+    scaled = f"json_extract(metrics, {path})" + (f" * {scale}" if scale != 1 else "")
+    return f"CASE WHEN json_type(metrics, {path}) IN ('integer', 'real') THEN round({scaled}, 2) END"
+
+
+def backfill_sql() -> str:
+    """INSERT ... SELECT that copies snapshots out of legacy system_state metrics blobs"""
+    expressions = []
+    for _, kind, sources in SNAPSHOT_FIELDS:
+        values = [_sql_value(kind, path, scale) for path, scale in sources]
+        expressions.append(values[0] if len(values) == 1 else f"COALESCE({', '.join(values)})")
+    return (
+        f"INSERT OR IGNORE INTO coordinator_snapshots ({', '.join(SNAPSHOT_COLUMNS)}) "
+        f"SELECT timestamp, state, {', '.join(expressions)} FROM system_state "
+        f"WHERE json_valid(metrics) AND json_type(metrics, '$.current_data') = 'object';"
+    )
@@ -0,0 +1,260 @@
+"""
+Energy rollups
+
+energy_data holds one row per collector reading, so daily averages used to
+mean fetching and summing tens of thousands of rows in Python. The rollup
+tables keep the same information pre-aggregated into 15-minute, hourly and
+daily buckets and are updated in the same transaction as the raw rows.
+
+Energies are time-weighted integrals: the power of each reading is held
+until the next reading (sample-and-hold) and the interval is split across
+bucket boundaries. Intervals longer than MAX_SAMPLE_GAP are treated as
+missing data and only show up as a lower ``covered_seconds``.
+
+Sign conventions follow the inverter: grid_power > 0 is export and
+< 0 is import, battery_power > 0 is discharge and < 0 is charge.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .epoch import from_epoch_ms
+
+# resolution -> (table, bucket size); every size divides a day evenly so a
+# rebuild of whole days never touches a bucket outside those days
+ROLLUP_TABLES: Dict[str, Tuple[str, timedelta]] = {
+    '15min': ('energy_rollup_15min', timedelta(minutes=15)),
+    'hourly': ('energy_rollup_hourly', timedelta(hours=1)),
+    'daily': ('energy_rollup_daily', timedelta(days=1)),
+}
+
+MAX_SAMPLE_GAP = timedelta(minutes=15)
+
+# Columns combined by addition, MIN() and MAX() when a bucket is updated
+SUM_COLUMNS = (
+    'sample_count', 'covered_seconds',
+    'pv_kwh', 'house_kwh', 'grid_import_kwh', 'grid_export_kwh',
+    'battery_charge_kwh', 'battery_discharge_kwh',
+    'meter_import_kwh', 'meter_export_kwh', 'meter_import_t1_kwh', 'meter_import_t2_kwh',
+)
+MIN_COLUMNS = ('min_soc', 'first_timestamp')
+MAX_COLUMNS = ('max_soc', 'peak_pv_w', 'peak_house_w', 'peak_import_w', 'peak_export_w', 'last_timestamp')
+
+ROLLUP_COLUMNS = ('bucket_start',) + SUM_COLUMNS + MIN_COLUMNS + MAX_COLUMNS
+
+# energy_readings columns the rollups are computed from
+SAMPLE_COLUMNS = (
+    'ts_ms', 'battery_soc', 'pv_power', 'grid_power', 'house_consumption', 'battery_power',
+    'grid_import_total_kwh', 'grid_export_total_kwh', 'tariff_zone',
+)
+
+
+def create_table_sql(table: str) -> str:
+    """CREATE TABLE statement shared by all rollup resolutions"""
+    sums = ',\n'.join(
+        f"    {column} {'INTEGER' if column == 'sample_count' else 'REAL'} NOT NULL DEFAULT 0"
+        for column in SUM_COLUMNS
+    )
+    extremes = ',\n'.join(
+        f"    {column} {'TEXT' if column.endswith('timestamp') else 'REAL'}"
+        for column in MIN_COLUMNS + MAX_COLUMNS
+    )
+    return f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    bucket_start TEXT PRIMARY KEY,
+{sums},
+{extremes}
+);
+"""
+
+
+def upsert_sql(table: str) -> str:
+    """INSERT that merges a partial bucket into an existing row"""
+    updates = [f"{column} = {column} + excluded.{column}" for column in SUM_COLUMNS]
+    # Scalar MIN()/MAX() return NULL if either side is NULL
+    updates += [f"{column} = COALESCE(MIN({column}, excluded.{column}), {column}, excluded.{column})"
+                for column in MIN_COLUMNS]
+    updates += [f"{column} = COALESCE(MAX({column}, excluded.{column}), {column}, excluded.{column})"
+                for column in MAX_COLUMNS]
+    return (
+        f"INSERT INTO {table} ({', '.join(ROLLUP_COLUMNS)}) "
+        f"VALUES ({', '.join(':' + column for column in ROLLUP_COLUMNS)}) "
+        f"ON CONFLICT(bucket_start) DO UPDATE SET {', '.join(updates)}"
+    )
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Naive local datetime from an ISO string, datetime or epoch milliseconds"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return from_epoch_ms(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def bucket_start(ts: datetime, size: timedelta) -> datetime:
+    """Start of the bucket of the given size containing ts"""
+    midnight = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    step = int(size.total_seconds())
+    offset = int((ts - midnight).total_seconds()) // step * step
+    return midnight + timedelta(seconds=offset)
+
+
+def _sample_time(sample: Dict[str, Any]) -> Optional[datetime]:
+    """Reading time from energy_readings 'ts_ms' or an energy_data 'timestamp'"""
+    ts_ms = sample.get('ts_ms')
+    return parse_timestamp(ts_ms if ts_ms is not None else sample.get('timestamp'))
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _energy_rates(sample: Dict[str, Any]) -> Dict[str, float]:
+    """Watts held by a reading, keyed by the kWh column they integrate into"""
+    rates = {}
+    pv = _number(sample.get('pv_power'))
+    if pv is not None:
+        rates['pv_kwh'] = max(pv, 0.0)
+    house = _number(sample.get('house_consumption'))
+    if house is not None:
+        rates['house_kwh'] = max(house, 0.0)
+    grid = _number(sample.get('grid_power'))
+    if grid is not None:
+        rates['grid_import_kwh' if grid < 0 else 'grid_export_kwh'] = abs(grid)
+    battery = _number(sample.get('battery_power'))
+    if battery is not None:
+        rates['battery_charge_kwh' if battery < 0 else 'battery_discharge_kwh'] = abs(battery)
+    return rates
+
+
+class RollupBuilder:
+    """
+    Accumulates partial buckets for a run of readings in timestamp order.
+
+    ``previous`` is the reading just before the run; its interval up to the
+    first new reading belongs to the run. With a window only the parts of
+    intervals and readings inside [window_start, window_end) are counted,
+    which is how whole days are rebuilt without touching their neighbours.
+    """
+
+    def __init__(self, previous: Optional[Dict[str, Any]] = None,
+                 window_start: Optional[datetime] = None, window_end: Optional[datetime] = None):
+        self.window_start = window_start
+        self.window_end = window_end
+        self._buckets: Dict[str, Dict[datetime, Dict[str, Any]]] = {name: {} for name in ROLLUP_TABLES}
+        self._previous: Optional[Tuple[datetime, Dict[str, Any]]] = None
+        if previous:
+            ts = _sample_time(previous)
+            if ts is not None:
+                self._previous = (ts, previous)
+
+    def _in_window(self, ts: datetime) -> bool:
+        return ((self.window_start is None or ts >= self.window_start) and
+                (self.window_end is None or ts < self.window_end))
+
+    def _bucket(self, resolution: str, start: datetime) -> Dict[str, Any]:
+        buckets = self._buckets[resolution]
+        if start not in buckets:
+            buckets[start] = dict.fromkeys(ROLLUP_COLUMNS)
+            buckets[start].update(dict.fromkeys(SUM_COLUMNS, 0))
+            buckets[start]['bucket_start'] = start.isoformat()
+        return buckets[start]
+
+    def add(self, sample: Dict[str, Any]) -> None:
+        """Add the next reading (an energy_data row, keyed by 'timestamp' or 'ts_ms')"""
+        ts = _sample_time(sample)
+        if ts is None:
+            return
+        if self._previous is not None:
+            prev_ts, prev = self._previous
+            if ts <= prev_ts:
+                return
+            if ts - prev_ts <= MAX_SAMPLE_GAP:
+                self._integrate(prev, prev_ts, ts)
+            if self._in_window(ts):
+                self._add_meter_deltas(prev, sample, ts)
+        if self._in_window(ts):
+            self._add_reading(sample, ts)
+        self._previous = (ts, sample)
+
+    def add_all(self, samples: Iterable[Dict[str, Any]]) -> 'RollupBuilder':
+        for sample in samples:
+            self.add(sample)
+        return self
+
+    def _integrate(self, prev: Dict[str, Any], start: datetime, end: datetime) -> None:
+        """Spread the held power of prev over [start, end) across buckets"""
+        if self.window_start is not None:
+            start = max(start, self.window_start)
+        if self.window_end is not None:
+            end = min(end, self.window_end)
+        rates = _energy_rates(prev)
+        for resolution, (_, size) in ROLLUP_TABLES.items():
+            cursor = start
+            while cursor < end:
+                bucket_from = bucket_start(cursor, size)
+                segment_end = min(end, bucket_from + size)
+                seconds = (segment_end - cursor).total_seconds()
+                row = self._bucket(resolution, bucket_from)
+                row['covered_seconds'] += seconds
+                for column, watts in rates.items():
+                    row[column] += watts * seconds / 3_600_000
+                cursor = segment_end
+
+    def _add_meter_deltas(self, prev: Dict[str, Any], sample: Dict[str, Any], ts: datetime) -> None:
+        """Cumulative meter increase since prev, booked at the new reading"""
+        deltas = {}
+        for counter, column in (('grid_import_total_kwh', 'meter_import_kwh'),
+                                ('grid_export_total_kwh', 'meter_export_kwh')):
+            before, after = _number(prev.get(counter)), _number(sample.get(counter))
+            if before is not None and after is not None and after >= before:
+                deltas[column] = after - before
+        if 'meter_import_kwh' in deltas:
+            zone = sample.get('tariff_zone') or 'T1'
+            deltas['meter_import_t1_kwh' if zone == 'T1' else 'meter_import_t2_kwh'] = deltas['meter_import_kwh']
+        if not deltas:
+            return
+        for resolution, (_, size) in ROLLUP_TABLES.items():
+            row = self._bucket(resolution, bucket_start(ts, size))
+            for column, delta in deltas.items():
+                row[column] += delta
+
+    def _add_reading(self, sample: Dict[str, Any], ts: datetime) -> None:
+        """Per-reading count, SOC range and power peaks"""
+        soc = _number(sample.get('battery_soc'))
+        pv = _number(sample.get('pv_power'))
+        house = _number(sample.get('house_consumption'))
+        grid = _number(sample.get('grid_power'))
+        peaks = {
+            'peak_pv_w': pv,
+            'peak_house_w': house,
+            'peak_import_w': -grid if grid is not None and grid < 0 else None,
+            'peak_export_w': grid if grid is not None and grid > 0 else None,
+        }
+        stamp = ts.isoformat()
+        for resolution, (_, size) in ROLLUP_TABLES.items():
+            row = self._bucket(resolution, bucket_start(ts, size))
+            row['sample_count'] += 1
+            if soc is not None:
+                row['min_soc'] = soc if row['min_soc'] is None else min(row['min_soc'], soc)
+                row['max_soc'] = soc if row['max_soc'] is None else max(row['max_soc'], soc)
+            for column, value in peaks.items():
+                if value is not None and (row[column] is None or value > row[column]):
+                    row[column] = value
+            if row['first_timestamp'] is None:
+                row['first_timestamp'] = stamp
+            row['last_timestamp'] = stamp
+
+    def rows(self, resolution: str) -> List[Dict[str, Any]]:
+        """Partial bucket rows for one resolution, ready for upsert_sql()"""
+        return [self._buckets[resolution][start] for start in sorted(self._buckets[resolution])]
@@ -0,0 +1,42 @@
+"""
+Epoch-millisecond keys for the energy_readings table
+
+energy_readings is keyed by integer epoch milliseconds so range scans are
+integer comparisons and readings stored with different timezone suffixes
+still sort correctly. The storage API keeps returning the naive local ISO
+strings it always did; iso_timestamp_sql() renders them inside SQLite for
+both the energy_data view and SQLiteStorage queries.
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+
+
+def to_epoch_ms(value: Any) -> Optional[int]:
+    """
+    Epoch milliseconds for a datetime or ISO string.
+
+    Naive values are local time (as written by the collectors), aware values
+    are converted exactly. Returns None for anything unparseable.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return round(value.timestamp() * 1000)
+
+
+def from_epoch_ms(ms: int) -> datetime:
+    """Naive local datetime for epoch milliseconds"""
+    return datetime.fromtimestamp(ms // 1000).replace(microsecond=(ms % 1000) * 1000)
+
+
+def iso_timestamp_sql(column: str = 'ts_ms') -> str:
+    """SQL expression rendering an epoch-ms column like datetime.isoformat() of local time"""
+    return (
+        f"strftime('%Y-%m-%dT%H:%M:%S', {column} / 1000, 'unixepoch', 'localtime') || "
+        f"CASE WHEN {column} % 1000 THEN printf('.%03d000', {column} % 1000) ELSE '' END"
+    )
@@ -1,10 +1,19 @@
+import asyncio
 import json
 import os
+import re
 import logging
+import time
 import aiofiles
 from datetime import datetime
-from typing import List, Dict, Any
-from .storage_interface import DataStorageInterface, StorageConfig
+from typing import List, Dict, Any, Optional, AsyncIterator, Sequence, Set, Tuple
+
+import numpy as np
+
+import json_utils
+from .storage_interface import DataStorageInterface, StorageConfig, DEFAULT_CHUNK_SIZE
+from .columnar import DEFAULT_ENERGY_COLUMNS, columns_from_records, columns_from_rows, validate_energy_columns
+from .energy_rollups import MAX_SAMPLE_GAP, ROLLUP_TABLES, RollupBuilder, bucket_start, parse_timestamp
 
 def _convert_datetimes_to_iso(obj):
     """
@@ -29,35 +38,244 @@ class FileStorage(DataStorageInterface):
     """
     Legacy file-based storage implementation.
     Maintains backward compatibility with existing JSON file structure.
+    
+    Energy readings are appended to daily newline-delimited JSON files
+    (energy_data_YYYY-MM-DD.jsonl) with a sidecar index of byte offsets
+    per hour, so range reads seek straight to the requested hours.
+    
+    Appends skip rows whose timestamp the file already holds, so replaying
+    a range (replication catch-up) does not duplicate readings, states or
+    decisions.
     """
 
+    # Energy readings are fsynced once this many rows or seconds have been
+    # appended since the last fsync (and always on disconnect)
+    FSYNC_ROWS = 100
+    FSYNC_INTERVAL = 5.0
+
+    LEGACY_ENERGY_FILE = re.compile(r'^energy_data_(\d{4}-\d{2}-\d{2})\.json$')
+
+    # Append-only files whose written timestamps are kept in memory
+    TIMESTAMP_CACHE_FILES = 8
+
     def __init__(self, config: StorageConfig):
         self.config = config
         # Default paths matching existing structure
         self.base_dir = "out"
         self.energy_data_dir = os.path.join(self.base_dir, "energy_data")
         self.logger = logging.getLogger(__name__)
+        # Hourly byte-offset index per day: {'size': indexed bytes, 'hours': {hour: [start, end]}}
+        self._energy_indexes: Dict[str, Dict[str, Any]] = {}
+        self._unsynced_files: Set[str] = set()
+        self._unsynced_rows = 0
+        self._last_fsync = time.monotonic()
+        self._write_lock: Optional[asyncio.Lock] = None
+        # Per append-only file: {'size': scanned bytes, 'timestamps': set of row timestamps}
+        self._written_timestamps: Dict[str, Dict[str, Any]] = {}
 
     async def connect(self) -> bool:
-        """Ensure directories exist."""
+        """Ensure directories exist and convert legacy JSON array energy files."""
         try:
             os.makedirs(self.base_dir, exist_ok=True)
             os.makedirs(self.energy_data_dir, exist_ok=True)
+            await self.convert_legacy_energy_files()
             return True
         except Exception as e:
             self.logger.error(f"Failed to create directories: {e}")
             return False
 
     async def disconnect(self) -> None:
-        """No-op for file storage."""
-        pass
+        """Fsync energy files appended since the last fsync."""
+        await asyncio.to_thread(self._fsync_pending)
 
     async def health_check(self) -> bool:
         """Check if directories are writable."""
         return os.access(self.base_dir, os.W_OK)
 
+    def _energy_file(self, date_str: str) -> str:
+        """Path of a day's newline-delimited energy file."""
+        return os.path.join(self.energy_data_dir, f"energy_data_{date_str}.jsonl")
+
+    def _index_file(self, date_str: str) -> str:
+        """Path of a day's hourly offset index (not .json: out/energy_data/*.json holds decision files)."""
+        return os.path.join(self.energy_data_dir, f"energy_data_{date_str}.idx")
+
+    @staticmethod
+    def _add_to_index(index: Dict[str, Any], hour: int, start: int, end: int) -> None:
+        """Widen an hour's byte span to cover a line."""
+        span = index['hours'].setdefault(hour, [start, end])
+        span[0] = min(span[0], start)
+        span[1] = max(span[1], end)
+
+    def _scan_energy_file(self, path: str, index: Dict[str, Any]) -> None:
+        """
+        Index the lines appended after index['size'].
+        
+        Unparseable complete lines (a torn write followed by later appends)
+        are skipped; a torn last line is left out until it is terminated.
+        """
+        with open(path, 'rb') as f:
+            f.seek(index['size'])
+            offset = index['size']
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    hour = datetime.fromisoformat(json_utils.loads(line)['timestamp']).hour
+                    self._add_to_index(index, hour, offset, offset + len(line))
+                except Exception:
+                    self.logger.warning(f"Skipping unreadable line at byte {offset} of {path}")
+                offset += len(line)
+            index['size'] = offset
+
+    def _day_index(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """
+        Hourly offset index for a day, brought up to date with the file.
+        
+        The sidecar is a cache: it is rebuilt when missing or ahead of the
+        file (data lost before an fsync) and extended when the file has
+        lines it does not cover yet (crash between data and index writes).
+        
+        Returns:
+            The index, or None when the day has no energy file
+        """
+        path = self._energy_file(date_str)
+        if not os.path.exists(path):
+            self._energy_indexes.pop(date_str, None)
+            return None
+        size = os.path.getsize(path)
+        
+        index = self._energy_indexes.get(date_str)
+        if index is None:
+            try:
+                with open(self._index_file(date_str), 'rb') as f:
+                    stored = json_utils.loads(f.read())
+                index = {'size': stored['size'], 'hours': {int(h): span for h, span in stored['hours'].items()}}
+            except (OSError, ValueError, KeyError, TypeError):
+                index = {'size': 0, 'hours': {}}
+        
+        if index['size'] > size:
+            index = {'size': 0, 'hours': {}}
+        if index['size'] < size:
+            self._scan_energy_file(path, index)
+            self._write_index(date_str, index)
+        self._energy_indexes[date_str] = index
+        return index
+
+    def _write_index(self, date_str: str, index: Dict[str, Any]) -> None:
+        """Replace the sidecar index atomically."""
+        path = self._index_file(date_str)
+        with open(path + '.tmp', 'w') as f:
+            f.write(json_utils.dumps({'size': index['size'], 'hours': {str(h): span for h, span in index['hours'].items()}}))
+        os.replace(path + '.tmp', path)
+
+    def _lock(self) -> asyncio.Lock:
+        """Lock serializing appends (created on first use, inside the event loop)."""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        return self._write_lock
+
+    def _file_timestamps(self, path: str) -> Set[str]:
+        """
+        Timestamps of the rows already in an append-only JSON-lines file.
+        
+        Cached for the most recently written files and extended with the
+        lines appended since the last call; rebuilt if the file shrank.
+        """
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        entry = self._written_timestamps.pop(path, None)
+        if entry is None or entry['size'] > size:
+            entry = {'size': 0, 'timestamps': set()}
+        if entry['size'] < size:
+            with open(path, 'rb') as f:
+                f.seek(entry['size'])
+                offset = entry['size']
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    offset += len(line)
+                    try:
+                        entry['timestamps'].add(json_utils.loads(line)['timestamp'])
+                    except Exception:
+                        continue
+                entry['size'] = offset
+        self._written_timestamps[path] = entry
+        while len(self._written_timestamps) > self.TIMESTAMP_CACHE_FILES:
+            self._written_timestamps.pop(next(iter(self._written_timestamps)))
+        return entry['timestamps']
+
+    async def _append_line(self, path: str, row: Dict[str, Any]) -> None:
+        """Append one JSON row unless the file already holds a row with its timestamp."""
+        timestamp = row.get('timestamp')
+        async with self._lock():
+            if timestamp is not None:
+                written = await asyncio.to_thread(self._file_timestamps, path)
+                if timestamp in written:
+                    self.logger.debug(f"Skipping row already in {path}: {timestamp}")
+                    return
+            async with aiofiles.open(path, 'a') as f:
+                await f.write(json.dumps(row) + "\n")
+
+    def _fsync_pending(self) -> None:
+        """Fsync every energy file appended since the last fsync."""
+        for path in self._unsynced_files:
+            try:
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+            except OSError as e:
+                self.logger.error(f"Error syncing {path}: {e}")
+        self._unsynced_files.clear()
+        self._unsynced_rows = 0
+        self._last_fsync = time.monotonic()
+
+    def _append_energy_day(self, date_str: str, items: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Append (hour, reading) lines to a day's file and update its index."""
+        path = self._energy_file(date_str)
+        written = self._file_timestamps(path)
+        fresh, batch = [], set()
+        for hour, item in items:
+            if item['timestamp'] not in written and item['timestamp'] not in batch:
+                batch.add(item['timestamp'])
+                fresh.append((hour, item))
+        if len(fresh) < len(items):
+            self.logger.debug(f"Skipping {len(items) - len(fresh)} readings already in {path}")
+        if not fresh:
+            return
+        items = fresh
+        index = self._day_index(date_str) or {'size': 0, 'hours': {}}
+        
+        prefix = b''
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # Terminate a torn last line so it cannot swallow the next reading
+                    prefix = b'\n'
+        
+        with open(path, 'ab') as f:
+            offset = f.tell() + len(prefix)
+            lines = [prefix]
+            for hour, item in items:
+                line = json_utils.dumps(item).encode('utf-8') + b'\n'
+                self._add_to_index(index, hour, offset, offset + len(line))
+                offset += len(line)
+                lines.append(line)
+            f.write(b''.join(lines))
+            f.flush()
+        written.update(batch)
+        self._written_timestamps[path]['size'] = offset
+        index['size'] = offset
+        self._energy_indexes[date_str] = index
+        self._write_index(date_str, index)
+        
+        self._unsynced_files.add(path)
+        self._unsynced_rows += len(items)
+        if (self._unsynced_rows >= self.FSYNC_ROWS
+                or time.monotonic() - self._last_fsync >= self.FSYNC_INTERVAL):
+            self._fsync_pending()
+
     async def save_energy_data(self, data: List[Dict[str, Any]]) -> bool:
-        """Save energy readings to daily JSON files."""
+        """Append energy readings to daily newline-delimited JSON files."""
         if not data:
             return True
             
@@ -75,60 +293,162 @@ class FileStorage(DataStorageInterface):
                 # Convert datetime back to string for JSON
                 item_copy = item.copy()
                 item_copy['timestamp'] = ts.isoformat()
-                by_date[date_str].append(item_copy)
+                by_date[date_str].append((ts.hour, item_copy))
 
-            for date_str, items in by_date.items():
-                filename = os.path.join(self.energy_data_dir, f"energy_data_{date_str}.json")
-                
-                # Read existing
-                existing = []
-                if os.path.exists(filename):
-                    async with aiofiles.open(filename, 'r') as f:
-                        content = await f.read()
-                        if content:
-                            existing = json.loads(content)
-                
-                # Append new
-                existing.extend(items)
-                
-                # Write back
-                async with aiofiles.open(filename, 'w') as f:
-                    await f.write(json.dumps(existing, indent=2))
+            async with self._lock():
+                for date_str, items in by_date.items():
+                    await asyncio.to_thread(self._append_energy_day, date_str, items)
                     
             return True
         except Exception as e:
             self.logger.error(f"Error saving energy data to file: {e}")
             return False
 
+    def _read_energy_day(self, date_str: str, first_hour: int, last_hour: int) -> List[Dict[str, Any]]:
+        """Read only the byte range covering the requested hours of a day."""
+        index = self._day_index(date_str)
+        spans = [span for hour, span in index['hours'].items() if first_hour <= hour <= last_hour] if index else []
+        if not spans:
+            return []
+        start = min(span[0] for span in spans)
+        end = max(span[1] for span in spans)
+        with open(self._energy_file(date_str), 'rb') as f:
+            f.seek(start)
+            content = f.read(end - start)
+        items = []
+        for line in content.splitlines():
+            try:
+                items.append(json_utils.loads(line))
+            except ValueError:
+                continue
+        return items
+
+    async def _energy_days(self, start_time: datetime, end_time: datetime) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the readings within the range, one daily file at a time."""
+        # Iterate through days in range
+        current = start_time
+        while current <= end_time:
+            date_str = current.strftime('%Y-%m-%d')
+            first_hour = start_time.hour if current.date() == start_time.date() else 0
+            last_hour = end_time.hour if current.date() == end_time.date() else 23
+            
+            day_data = await asyncio.to_thread(self._read_energy_day, date_str, first_hour, last_hour)
+            if day_data:
+                # Filter by exact timestamp range
+                yield [item for item in day_data
+                       if start_time <= datetime.fromisoformat(item['timestamp']) <= end_time]
+            
+            # Move to next day
+            current = datetime.fromordinal(current.toordinal() + 1)
+
     async def get_energy_data(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         """Retrieve historical energy data from files."""
         results = []
         try:
-            # Iterate through days in range
-            current = start_time
-            while current <= end_time:
-                date_str = current.strftime('%Y-%m-%d')
-                filename = os.path.join(self.energy_data_dir, f"energy_data_{date_str}.json")
-                
-                if os.path.exists(filename):
-                    async with aiofiles.open(filename, 'r') as f:
-                        content = await f.read()
-                        if content:
-                            day_data = json.loads(content)
-                            # Filter by exact timestamp range
-                            for item in day_data:
-                                ts = datetime.fromisoformat(item['timestamp'])
-                                if start_time <= ts <= end_time:
-                                    results.append(item)
-                
-                # Move to next day
-                current = datetime.fromordinal(current.toordinal() + 1)
-                
+            async for day_data in self._energy_days(start_time, end_time):
+                results.extend(day_data)
             return results
         except Exception as e:
             self.logger.error(f"Error reading energy data from file: {e}")
             return []
 
+    async def get_energy_columns(self, start_time: datetime, end_time: datetime,
+                                 columns: Sequence[str] = DEFAULT_ENERGY_COLUMNS) -> Dict[str, np.ndarray]:
+        """
+        Retrieve energy data as one contiguous array per column.
+        
+        Each daily file is converted as soon as it is read, so only one
+        day's parsed lines are held at a time.
+        
+        Raises:
+            ValueError: for unknown or non-numeric columns
+        """
+        columns = validate_energy_columns(columns)
+        days = []
+        try:
+            async for day_data in self._energy_days(start_time, end_time):
+                days.append(columns_from_records(day_data, columns))
+        except Exception as e:
+            self.logger.error(f"Error reading energy columns from file: {e}")
+            days = []
+        if not days:
+            return columns_from_rows([], columns)
+        # Days are read in date order and sorted within each day
+        return {key: np.concatenate([day[key] for day in days]) for key in days[0]}
+
+    def _convert_legacy_energy_file(self, date_str: str, legacy_path: str) -> int:
+        """Move one JSON array file into the day's JSONL file, then remove it."""
+        with open(legacy_path, 'rb') as f:
+            content = f.read()
+        rows = json_utils.loads(content) if content.strip() else []
+        items = [(datetime.fromisoformat(row['timestamp']).hour, row) for row in rows]
+        if items:
+            self._append_energy_day(date_str, items)
+            self._fsync_pending()
+        os.remove(legacy_path)
+        return len(items)
+
+    async def convert_legacy_energy_files(self) -> Dict[str, int]:
+        """
+        One-time conversion of energy_data_YYYY-MM-DD.json arrays to JSONL.
+        
+        Readings are appended to the day's .jsonl file (created if needed)
+        and the legacy file is removed once they are synced. Files that
+        fail to convert are left in place and retried on the next connect().
+        
+        Returns:
+            Dictionary with count of converted readings per day
+        """
+        if not os.path.isdir(self.energy_data_dir):
+            return {}
+        
+        converted = {}
+        for name in sorted(os.listdir(self.energy_data_dir)):
+            match = self.LEGACY_ENERGY_FILE.match(name)
+            if not match:
+                continue
+            date_str = match.group(1)
+            try:
+                converted[date_str] = await asyncio.to_thread(
+                    self._convert_legacy_energy_file, date_str, os.path.join(self.energy_data_dir, name)
+                )
+                self.logger.info(f"Converted {converted[date_str]} readings from {name} to JSONL")
+            except Exception as e:
+                self.logger.error(f"Error converting {name}: {e}")
+        return converted
+
+    async def iter_energy_data(self, start_time: datetime, end_time: datetime,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream energy data in time order; at most one daily file is held in memory."""
+        try:
+            async for day_data in self._energy_days(start_time, end_time):
+                # Files are appended in arrival order, which may not be time order
+                day_data.sort(key=lambda item: datetime.fromisoformat(item['timestamp']))
+                for i in range(0, len(day_data), chunk_size):
+                    yield day_data[i:i + chunk_size]
+        except Exception as e:
+            self.logger.error(f"Error streaming energy data from file: {e}")
+
+    async def get_energy_rollups(self, resolution: str, start_time: datetime,
+                                 end_time: datetime) -> List[Dict[str, Any]]:
+        """Compute energy rollups on the fly from the daily energy files."""
+        if resolution not in ROLLUP_TABLES:
+            self.logger.error(f"Unknown energy rollup resolution: {resolution}")
+            return []
+        try:
+            _, size = ROLLUP_TABLES[resolution]
+            window_start = bucket_start(start_time, size)
+            window_end = bucket_start(end_time, size) + size
+            # The reading before the window carries power into its first bucket
+            builder = RollupBuilder(window_start=window_start, window_end=window_end)
+            async for samples in self.iter_energy_data(window_start - MAX_SAMPLE_GAP, window_end):
+                builder.add_all(samples)
+            return [row for row in builder.rows(resolution)
+                    if start_time <= parse_timestamp(row['bucket_start']) <= end_time]
+        except Exception as e:
+            self.logger.error(f"Error computing energy rollups from files: {e}")
+            return []
+
     async def save_system_state(self, state: Dict[str, Any]) -> bool:
         """Save system state to coordinator_state_*.json."""
         try:
@@ -144,9 +464,7 @@ class FileStorage(DataStorageInterface):
             
             # Deep copy and convert all datetime objects to ISO format strings
             state_serializable = _convert_datetimes_to_iso(state)
-                
-            async with aiofiles.open(filename, 'a') as f:
-                await f.write(json.dumps(state_serializable) + "\n")
+            await self._append_line(filename, state_serializable)
                 
             return True
         except Exception as e:
@@ -164,6 +482,19 @@ class FileStorage(DataStorageInterface):
         # Not implemented for files
         return []
 
+    async def save_coordinator_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """Snapshots are not saved to files - stub implementation."""
+        # Legacy file mode keeps full coordinator_state_*.json files instead
+        return True
+
+    async def get_coordinator_snapshots(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+        """Not implemented for files - returns empty."""
+        return []
+
+    async def get_latest_coordinator_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Not implemented for files - returns None."""
+        return None
+
     async def save_decision(self, decision: Dict[str, Any]) -> bool:
         """Save decision to charging_decision_*.json."""
         try:
@@ -176,9 +507,7 @@ class FileStorage(DataStorageInterface):
             decision_copy = decision.copy()
             if isinstance(decision_copy.get('timestamp'), datetime):
                 decision_copy['timestamp'] = decision_copy['timestamp'].isoformat()
-                
-            async with aiofiles.open(filename, 'a') as f:
-                await f.write(json.dumps(decision_copy) + "\n")
+            await self._append_line(filename, decision_copy)
                 
             return True
         except Exception as e:
@@ -293,7 +622,7 @@ class FileStorage(DataStorageInterface):
             
             # Count files in energy_data directory
             if os.path.exists(self.energy_data_dir):
-                files = [f for f in os.listdir(self.energy_data_dir) if f.endswith('.json')]
+                files = [f for f in os.listdir(self.energy_data_dir) if f.endswith('.jsonl')]
                 stats['energy_data_files'] = len(files)
                 
                 # Calculate total size
@@ -0,0 +1,377 @@
+"""Asynchronous replication from CompositeStorage to its secondaries.
+
+CompositeStorage used to await every secondary on each write, so the slowest
+backend set the latency of every coordinator save. Each secondary now gets a
+ReplicaWriter: a bounded queue drained by one worker task, so the composite
+returns as soon as the primary has committed.
+
+Writes that still fail after the retries, or that the overflow policy drops,
+are remembered as a missed time range per table (writer method). Once the
+secondary is healthy again and its queue is empty, each table's missed range
+is replayed from the primary (catch-up); tables whose writes all replicated
+are not replayed.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+# Catch-up replay: (primary reader, secondary writer, how the reader is called).
+# 'stream' readers are iter_* async iterators, 'range' readers take
+# (start, end) and 'daily' readers take a YYYY-MM-DD date string.
+REPLAY_METHODS: Tuple[Tuple[str, str, str], ...] = (
+    ('iter_energy_data', 'save_energy_data', 'stream'),
+    ('iter_system_state_range', 'save_system_state', 'stream'),
+    ('iter_decisions', 'save_decision', 'stream'),
+    ('get_coordinator_snapshots', 'save_coordinator_snapshot', 'range'),
+    ('get_charging_sessions', 'save_charging_session', 'range'),
+    ('get_selling_sessions', 'save_selling_session', 'range'),
+    ('get_weather_data', 'save_weather_data', 'range'),
+    ('get_price_forecasts', 'save_price_forecast', 'daily'),
+    ('get_pv_forecasts', 'save_pv_forecast', 'daily'),
+)
+
+# Writers that take a list of rows rather than a single row
+BATCH_WRITERS = {'save_energy_data', 'save_weather_data', 'save_price_forecast', 'save_pv_forecast'}
+
+# Writers whose SQLite tables have no unique key; replay skips rows whose
+# timestamp the secondary already holds instead of inserting them again
+UNKEYED_WRITERS = {'save_system_state', 'save_decision'}
+
+
+def _as_local(value: Any) -> Optional[datetime]:
+    """Naive local datetime for a datetime or ISO string, None otherwise."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+def write_range(args: tuple) -> Tuple[datetime, datetime]:
+    """
+    Data time range covered by a replicated write.
+
+    Uses the rows' timestamp (or start_time for sessions) and falls back to
+    the current time for rows without one.
+    """
+    payload = args[0] if args else None
+    rows = payload if isinstance(payload, list) else [payload]
+    times = []
+    for row in rows:
+        if isinstance(row, dict):
+            value = _as_local(row.get('timestamp') or row.get('start_time'))
+            if value:
+                times.append(value)
+    if not times:
+        now = datetime.now()
+        return now, now
+    return min(times), max(times)
+
+
+class ReplicaWriter:
+    """
+    Bounded write queue and worker task for one secondary backend.
+
+    Overflow policies when the queue is full: 'block' makes the caller wait
+    for space, 'drop_oldest' and 'drop_newest' discard a write and add its
+    range to the missed range replayed by catch-up.
+    """
+
+    def __init__(self, name: str, backend: Any, primary: Any, queue_size: int = 1000,
+                 overflow: str = 'drop_oldest', max_retries: int = 3, retry_delay: float = 0.1,
+                 probe_interval: float = 5.0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown replication overflow policy: {overflow} (expected one of {OVERFLOW_POLICIES})")
+        self.name = name
+        self.backend = backend
+        self.primary = primary
+        self.queue_size = max(1, queue_size)
+        self.overflow = overflow
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.probe_interval = probe_interval
+        self.healthy = True
+        # (method, args, enqueued at) in arrival order; the in-flight write is popped first
+        self._queue: Deque[Tuple[str, tuple, float]] = deque()
+        self._inflight: Optional[Tuple[str, tuple, float]] = None
+        # Writer method -> data time range of its dropped writes
+        self._missed: Dict[str, Tuple[datetime, datetime]] = {}
+        self._next_probe = 0.0
+        self._has_items: Optional[asyncio.Event] = None
+        self._has_space: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._stats = {
+            'enqueued': 0,
+            'replicated': 0,
+            'failed': 0,
+            'dropped': 0,
+            'blocked': 0,
+            'catch_ups': 0,
+            'replayed_rows': 0,
+            'last_write_ms': 0.0,
+            'max_write_ms': 0.0,
+            'last_replication_lag_ms': 0.0
+        }
+
+    def start(self) -> None:
+        """Start the worker task."""
+        if self._task and not self._task.done():
+            return
+        if self._has_items is None:
+            self._has_items = asyncio.Event()
+            self._has_space = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Let the worker drain the queue for up to drain_timeout seconds, then stop it."""
+        if not self._task:
+            return
+        self._stopping = True
+        self._has_items.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        for method, args, _ in list(self._queue) + ([self._inflight] if self._inflight else []):
+            self._mark_missed(method, *write_range(args))
+        self._queue.clear()
+        self._inflight = None
+        for method, (start, end) in self._missed.items():
+            logger.warning(
+                f"Replica {self.name} stopped with {method} writes missing between {start.isoformat()} and "
+                f"{end.isoformat()}; replay them with CompositeStorage.replay_secondaries()"
+            )
+
+    async def submit(self, method: str, args: tuple) -> None:
+        """Queue a write, applying the overflow policy when the queue is full."""
+        if not self._task:
+            self.start()
+        if len(self._queue) >= self.queue_size:
+            if self.overflow == 'block':
+                self._stats['blocked'] += 1
+                while len(self._queue) >= self.queue_size:
+                    self._has_space.clear()
+                    await self._has_space.wait()
+            elif self.overflow == 'drop_oldest':
+                dropped_method, dropped_args, _ = self._queue.popleft()
+                self._drop(dropped_method, dropped_args)
+            else:
+                self._drop(method, args)
+                return
+        self._queue.append((method, args, time.monotonic()))
+        self._stats['enqueued'] += 1
+        self._idle.clear()
+        self._has_items.set()
+
+    async def join(self) -> None:
+        """Wait until every queued write has been applied (or dropped)."""
+        if self._idle is not None and self._task:
+            await self._idle.wait()
+
+    def _drop(self, method: str, args: tuple) -> None:
+        self._stats['dropped'] += 1
+        self._mark_missed(method, *write_range(args))
+
+    def _mark_missed(self, method: str, start: datetime, end: datetime) -> None:
+        """Widen a table's missed range replayed by the next catch-up."""
+        missed = self._missed.get(method)
+        if missed:
+            start, end = min(start, missed[0]), max(end, missed[1])
+        self._missed[method] = (start, end)
+
+    async def _probe(self) -> bool:
+        """Health-check a failed secondary at most once per probe_interval."""
+        now = time.monotonic()
+        if now < self._next_probe:
+            return False
+        self._next_probe = now + self.probe_interval
+        try:
+            self.healthy = bool(await self.backend.health_check())
+        except Exception:
+            self.healthy = False
+        if self.healthy:
+            logger.info(f"Replica {self.name} is healthy again")
+        return self.healthy
+
+    async def _apply(self, method: str, args: tuple) -> bool:
+        """Apply one write to the secondary with exponential-backoff retries."""
+        for attempt in range(self.max_retries):
+            started = time.perf_counter()
+            try:
+                result = await getattr(self.backend, method)(*args)
+                if result is not False:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    self._stats['last_write_ms'] = elapsed_ms
+                    self._stats['max_write_ms'] = max(self._stats['max_write_ms'], elapsed_ms)
+                    return True
+            except Exception as e:
+                logger.warning(f"Replica {self.name} {method} failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+            if attempt < self.max_retries - 1 and not self._stopping:
+                await asyncio.sleep(self.retry_delay * (2 ** attempt))
+        return False
+
+    async def _run(self) -> None:
+        """Apply queued writes in order; catch up on missed ranges when idle and healthy."""
+        while True:
+            if not self._queue:
+                if self._missed and not self._stopping and (self.healthy or await self._probe()):
+                    await self._catch_up()
+                    continue
+                if self._stopping:
+                    self._idle.set()
+                    return
+                self._idle.set()
+                self._has_items.clear()
+                try:
+                    # Wake up periodically to probe a failed secondary
+                    await asyncio.wait_for(self._has_items.wait(),
+                                           timeout=self.probe_interval if self._missed else None)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._inflight = self._queue.popleft()
+            self._has_space.set()
+            method, args, enqueued = self._inflight
+
+            if not self.healthy and not await self._probe():
+                # Still down: record the write for catch-up instead of retrying it
+                self._drop(method, args)
+            elif await self._apply(method, args):
+                self._stats['replicated'] += 1
+                self._stats['last_replication_lag_ms'] = (time.monotonic() - enqueued) * 1000
+            else:
+                self._stats['failed'] += 1
+                self.healthy = False
+                self._next_probe = time.monotonic() + self.probe_interval
+                self._drop(method, args)
+                logger.error(f"Replica {self.name} marked down after {method} failed; writes will be caught up")
+            self._inflight = None
+
+    async def _catch_up(self) -> None:
+        """Replay each table's missed range from the primary."""
+        missed, self._missed = self._missed, {}
+        self._stats['catch_ups'] += 1
+        rows = 0
+        for reader, writer, kind in REPLAY_METHODS:
+            if writer not in missed:
+                continue
+            start, end = missed.pop(writer)
+            logger.info(f"Replica {self.name} catching up {writer} {start.isoformat()} - {end.isoformat()}")
+            try:
+                rows += await self._replay_table(reader, writer, kind, start, end)
+            except Exception as e:
+                logger.error(f"Replica {self.name} catch-up of {writer} failed, will retry: {e}")
+                self.healthy = False
+                self._next_probe = time.monotonic() + self.probe_interval
+                # Keep this and the remaining tables (plus anything dropped meanwhile)
+                missed[writer] = (start, end)
+                for method, (first, last) in missed.items():
+                    self._mark_missed(method, first, last)
+                return
+        for writer in missed:
+            logger.warning(f"Replica {self.name} cannot replay {writer}; its missed writes are lost")
+        logger.info(f"Replica {self.name} caught up ({rows} rows replayed)")
+
+    @staticmethod
+    async def _chunks(source: Any, reader: str, kind: str, start: datetime,
+                      end: datetime) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Rows of one replayed table read from a storage backend."""
+        if kind == 'stream':
+            async for chunk in getattr(source, reader)(start, end):
+                yield chunk
+        elif kind == 'range':
+            yield await getattr(source, reader)(start, end) or []
+        else:
+            day = start.date()
+            while day <= end.date():
+                yield await getattr(source, reader)(day.isoformat()) or []
+                day += timedelta(days=1)
+
+    async def _held_timestamps(self, reader: str, kind: str, start: datetime, end: datetime) -> Optional[set]:
+        """Timestamps of an unkeyed table the secondary already holds (None if it cannot be read)."""
+        if not hasattr(self.backend, reader):
+            return None
+        held = set()
+        async for chunk in self._chunks(self.backend, reader, kind, start, end):
+            held.update(_as_local(row.get('timestamp')) for row in chunk)
+        held.discard(None)
+        return held
+
+    async def _replay_table(self, reader: str, writer: str, kind: str, start: datetime, end: datetime) -> int:
+        """Copy one table's rows between start and end from the primary to the secondary."""
+        held = await self._held_timestamps(reader, kind, start, end) if writer in UNKEYED_WRITERS else None
+        rows = 0
+        async for chunk in self._chunks(self.primary, reader, kind, start, end):
+            if held:
+                chunk = [row for row in chunk if _as_local(row.get('timestamp')) not in held]
+            if not chunk:
+                continue
+            batches = [(chunk,)] if writer in BATCH_WRITERS else [(row,) for row in chunk]
+            for args in batches:
+                if not await self._apply(writer, args):
+                    raise RuntimeError(f"{writer} failed during replay")
+            rows += len(chunk)
+        self._stats['replayed_rows'] += rows
+        return rows
+
+    async def replay(self, start: datetime, end: datetime) -> int:
+        """
+        Copy every row the primary holds between start and end to the secondary.
+
+        Replaying rows the secondary already holds does not duplicate them:
+        SQLite upserts its keyed tables, system states and decisions are
+        skipped when the secondary holds their timestamp, and FileStorage
+        skips rows whose timestamp it already holds.
+
+        Returns:
+            Number of rows replayed
+
+        Raises:
+            RuntimeError: if a write still fails after the retries
+        """
+        rows = 0
+        for reader, writer, kind in REPLAY_METHODS:
+            rows += await self._replay_table(reader, writer, kind, start, end)
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth, lag and error counters.
+
+        Returns:
+            Dictionary with replication statistics for this secondary
+        """
+        now = time.monotonic()
+        oldest = [item[2] for item in ([self._inflight] if self._inflight else []) + list(self._queue)[:1]]
+        stats = {
+            'healthy': self.healthy,
+            'pending': len(self._queue) + (1 if self._inflight else 0),
+            'queue_size': self.queue_size,
+            'overflow': self.overflow,
+            'lag_seconds': round(now - min(oldest), 3) if oldest else 0.0,
+            'missed_ranges': {method: [t.isoformat() for t in missed] for method, missed in self._missed.items()}
+        }
+        stats.update({key: round(value, 3) if isinstance(value, float) else value
+                      for key, value in self._stats.items()})
+        return stats
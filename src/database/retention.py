@@ -0,0 +1,51 @@
+"""
+Data retention
+
+Time-series tables and the column their age is measured by. Expired rows
+are deleted table by table in bounded chunks (SQLiteStorage.purge_old_data)
+instead of one DELETE per table followed by a full VACUUM, so the writer
+connection is only ever held for one short chunk.
+
+Retention is configured as a default number of days plus per-table
+overrides; 0 keeps a table forever.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .epoch import to_epoch_ms
+
+# reported name -> (table, time column, True when the column holds epoch ms)
+RETENTION_TABLES: Dict[str, Tuple[str, str, bool]] = {
+    'energy_data': ('energy_readings', 'ts_ms', True),
+    'system_state': ('system_state', 'timestamp', False),
+    'coordinator_decisions': ('coordinator_decisions', 'timestamp', False),
+    'charging_sessions': ('charging_sessions', 'start_time', False),
+    'battery_selling_sessions': ('battery_selling_sessions', 'start_time', False),
+    'weather_data': ('weather_data', 'timestamp', False),
+    'price_forecasts': ('price_forecasts', 'timestamp', False),
+    'pv_forecasts': ('pv_forecasts', 'timestamp', False),
+    'coordinator_snapshots': ('coordinator_snapshots', 'timestamp', False),
+}
+
+
+def retention_periods(default_days: int, overrides: Optional[Mapping[str, int]] = None) -> Dict[str, int]:
+    """
+    Days to keep per table, in RETENTION_TABLES order.
+
+    Tables without an override use default_days. Tables kept forever
+    (0 or less) and unknown override names are left out.
+    """
+    overrides = overrides or {}
+    periods = {}
+    for name in RETENTION_TABLES:
+        days = overrides.get(name, default_days)
+        if days and days > 0:
+            periods[name] = int(days)
+    return periods
+
+
+def retention_cutoff(name: str, days: int, now: Optional[datetime] = None) -> Any:
+    """Cutoff in the table's time column format; rows strictly older are expired"""
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    return to_epoch_ms(cutoff) if RETENTION_TABLES[name][2] else cutoff.isoformat()
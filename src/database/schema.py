@@ -1,7 +1,11 @@
 
 # SQL Schema Definitions for GoodWe Dynamic Price Optimiser
 
-SCHEMA_VERSION = 4  # Increment when schema changes
+from .coordinator_snapshots import backfill_sql
+from .energy_rollups import ROLLUP_TABLES, create_table_sql
+from .epoch import iso_timestamp_sql
+
+SCHEMA_VERSION = 7  # Increment when schema changes
 
 # CRITICAL RULES FOR SCHEMA UPDATES:
 # 1. DO NOT modify CREATE_TABLE strings for existing tables. They must remain 
@@ -150,6 +154,76 @@ CREATE TABLE IF NOT EXISTS pv_forecasts (
 );
 """
 
+# Table: coordinator_snapshots
+# Typed coordinator readings (written on change or at a fixed cadence),
+# replacing the current_data JSON previously stored in system_state.metrics
+CREATE_COORDINATOR_SNAPSHOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS coordinator_snapshots (
+    timestamp TEXT PRIMARY KEY,
+    state TEXT,
+    battery_soc REAL,
+    battery_power_w REAL,
+    battery_temperature REAL,
+    battery_charging INTEGER,
+    pv_power_w REAL,
+    pv_daily_kwh REAL,
+    pv_efficiency_percent REAL,
+    house_power_w REAL,
+    house_daily_kwh REAL,
+    grid_power_w REAL,
+    grid_flow_direction TEXT,
+    grid_import_today_kwh REAL,
+    grid_export_today_kwh REAL,
+    grid_l1_current_a REAL,
+    grid_l2_current_a REAL,
+    grid_l3_current_a REAL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Tables: energy_rollup_15min, energy_rollup_hourly, energy_rollup_daily
+# Time-weighted energy_data aggregates maintained on every energy_data write
+CREATE_ENERGY_ROLLUP_TABLES = [create_table_sql(table) for table, _ in ROLLUP_TABLES.values()]
+
+# Table: energy_readings
+# Clustered energy_data layout: one b-tree keyed by epoch milliseconds
+# (WITHOUT ROWID, no secondary indexes). Replaces the energy_data table in v7.
+ENERGY_READING_COLUMNS = (
+    'battery_soc', 'pv_power', 'grid_power', 'house_consumption', 'battery_power',
+    'grid_voltage', 'grid_frequency', 'battery_voltage', 'battery_current', 'battery_temperature',
+    'price_pln', 'grid_import_total_kwh', 'grid_export_total_kwh',
+    'house_consumption_total_kwh', 'pv_generation_total_kwh', 'tariff_zone'
+)
+
+CREATE_ENERGY_READINGS_TABLE = """
+CREATE TABLE IF NOT EXISTS energy_readings (
+    ts_ms INTEGER PRIMARY KEY,
+    battery_soc REAL,
+    pv_power INTEGER,
+    grid_power INTEGER,
+    house_consumption INTEGER,
+    battery_power INTEGER,
+    grid_voltage REAL,
+    grid_frequency REAL,
+    battery_voltage REAL,
+    battery_current REAL,
+    battery_temperature REAL,
+    price_pln REAL,
+    grid_import_total_kwh REAL,
+    grid_export_total_kwh REAL,
+    house_consumption_total_kwh REAL,
+    pv_generation_total_kwh REAL,
+    tariff_zone TEXT
+) WITHOUT ROWID;
+"""
+
+# View: energy_data
+# Read-only energy_data with ISO timestamps for ad-hoc SQL and tools
+CREATE_ENERGY_DATA_VIEW = (
+    f"CREATE VIEW IF NOT EXISTS energy_data AS "
+    f"SELECT {iso_timestamp_sql()} AS timestamp, {', '.join(ENERGY_READING_COLUMNS)} FROM energy_readings;"
+)
+
 # Indexes for performance
 CREATE_INDEXES = [
     # Single-column indexes for timestamp-based queries
@@ -190,7 +264,10 @@ ALL_TABLES = [
     CREATE_SELLING_SESSIONS_TABLE,
     CREATE_WEATHER_DATA_TABLE,
     CREATE_PRICE_FORECASTS_TABLE,
-    CREATE_PV_FORECASTS_TABLE
+    CREATE_PV_FORECASTS_TABLE,
+    CREATE_COORDINATOR_SNAPSHOTS_TABLE,
+    *CREATE_ENERGY_ROLLUP_TABLES,
+    CREATE_ENERGY_READINGS_TABLE
 ]
 
 # Migration definitions
@@ -226,4 +303,27 @@ MIGRATIONS = [
         "ALTER TABLE energy_data ADD COLUMN tariff_zone TEXT;",
         "CREATE INDEX IF NOT EXISTS idx_energy_tariff_zone ON energy_data(tariff_zone);"
     ]),
+    
+    # Version 5: Typed coordinator snapshots; backfill them from the current_data
+    # blobs in system_state.metrics, then drop those blobs from the old rows
+    (5, "Add coordinator_snapshots table, backfill from system_state and compact metrics", [
+        CREATE_COORDINATOR_SNAPSHOTS_TABLE,
+        backfill_sql(),
+        "UPDATE system_state SET metrics = json_remove(metrics, '$.current_data') "
+        "WHERE json_valid(metrics) AND json_type(metrics, '$.current_data') IS NOT NULL;"
+    ]),
+    
+    # Version 6: Energy rollups; SQLiteStorage backfills them from energy_data
+    # in Python right after this migration (the integrals are not plain SQL)
+    (6, "Add 15-minute, hourly and daily energy rollup tables", [
+        *CREATE_ENERGY_ROLLUP_TABLES
+    ]),
+    
+    # Version 7: energy_data moves to the epoch-keyed energy_readings table.
+    # SQLiteStorage copies the rows in Python (timestamps may carry mixed
+    # timezone suffixes), drops the old table and its indexes and creates the
+    # energy_data view in its place.
+    (7, "Move energy_data to WITHOUT ROWID energy_readings keyed by epoch milliseconds", [
+        CREATE_ENERGY_READINGS_TABLE
+    ]),
 ]
@@ -3,12 +3,16 @@ import logging
 import asyncio
 import shutil
 import os
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Sequence
 from pathlib import Path
 import aiosqlite
+import numpy as np
 
-from .storage_interface import DataStorageInterface, StorageConfig, ConnectionError
+from .storage_interface import DataStorageInterface, StorageConfig, ConnectionError, DEFAULT_CHUNK_SIZE
+from .connection_manager import ConnectionPool
 from .schema import (
     CREATE_ENERGY_DATA_TABLE,
     CREATE_SYSTEM_STATE_TABLE,
@@ -19,8 +23,15 @@ from .schema import (
     ALL_TABLES,
     CREATE_INDEXES,
     SCHEMA_VERSION,
-    MIGRATIONS
+    MIGRATIONS,
+    ENERGY_READING_COLUMNS,
+    CREATE_ENERGY_DATA_VIEW
 )
+from .columnar import DEFAULT_ENERGY_COLUMNS, columns_from_rows, validate_energy_columns
+from .coordinator_snapshots import SNAPSHOT_COLUMNS
+from .energy_rollups import ROLLUP_TABLES, SAMPLE_COLUMNS, RollupBuilder, parse_timestamp, upsert_sql
+from .epoch import iso_timestamp_sql, to_epoch_ms
+from .retention import RETENTION_TABLES, retention_cutoff, retention_periods
 
 
 class SQLiteStorage(DataStorageInterface):
@@ -28,24 +39,138 @@ class SQLiteStorage(DataStorageInterface):
     Production-ready SQLite storage implementation using aiosqlite.
     
     Features:
-    - Connection pooling with semaphore-based concurrency control
+    - One writer connection plus a pool of read-only connections (WAL readers
+      never block the writer, so range reads do not queue behind writes)
     - Retry logic for transient failures
     - WAL mode for better concurrent read/write performance
+    - energy_data stored clustered by epoch milliseconds (energy_readings,
+      WITHOUT ROWID); the API keeps returning ISO timestamps
+    - Energy rollups (15-minute, hourly, daily) updated in the same
+      transaction as every energy_data write
+    - Optional write-behind batching: energy data, system state and decision
+      writes are queued and committed together in one transaction every
+      ``write_behind_flush_interval`` seconds or ``batch_size`` queued rows
+    - Chunked retention with per-table periods and incremental vacuum,
+      optionally run as a background task (``enable_auto_cleanup``)
     """
 
+    ENERGY_DATA_INSERT = (
+        f"INSERT OR REPLACE INTO energy_readings (ts_ms, {', '.join(ENERGY_READING_COLUMNS)}) "
+        f"VALUES (:ts_ms, {', '.join(':' + column for column in ENERGY_READING_COLUMNS)})"
+    )
+
+    ENERGY_DATA_SELECT = (
+        f"SELECT {iso_timestamp_sql()} AS timestamp, {', '.join(ENERGY_READING_COLUMNS)} FROM energy_readings"
+    )
+
+    # Keyset pages for the iter_* streaming queries: (lower key, upper bound, limit)
+    ENERGY_DATA_PAGE = (
+        f"SELECT {iso_timestamp_sql()} AS timestamp, {', '.join(ENERGY_READING_COLUMNS)}, ts_ms "
+        f"FROM energy_readings WHERE ts_ms > ? AND ts_ms <= ? ORDER BY ts_ms ASC LIMIT ?"
+    )
+    SYSTEM_STATE_PAGE = (
+        "SELECT * FROM system_state WHERE (timestamp, id) > (?, ?) AND timestamp <= ? "
+        "ORDER BY timestamp ASC, id ASC LIMIT ?"
+    )
+    DECISION_PAGE = (
+        "SELECT * FROM coordinator_decisions WHERE (timestamp, id) > (?, ?) AND timestamp <= ? "
+        "ORDER BY timestamp ASC, id ASC LIMIT ?"
+    )
+
+    SYSTEM_STATE_INSERT = """
+    INSERT INTO system_state (
+        timestamp, state, uptime, active_modules, last_error, metrics
+    ) VALUES (?, ?, ?, ?, ?, ?)
+    """
+
+    SNAPSHOT_INSERT = (
+        f"INSERT OR REPLACE INTO coordinator_snapshots ({', '.join(SNAPSHOT_COLUMNS)}) "
+        f"VALUES ({', '.join(':' + column for column in SNAPSHOT_COLUMNS)})"
+    )
+
+    ROLLUP_UPSERTS = {resolution: upsert_sql(table) for resolution, (table, _) in ROLLUP_TABLES.items()}
+
+    ROLLUP_SAMPLE_SELECT = f"SELECT {', '.join(SAMPLE_COLUMNS)} FROM energy_readings"
+
+    DECISION_INSERT = """
+    INSERT INTO coordinator_decisions (
+        timestamp, decision_type, action, reason, parameters, source_module
+    ) VALUES (?, ?, ?, ?, ?, ?)
+    """
+
+    # Python steps run inside a migration's transaction, before it is recorded
+    MIGRATION_STEPS = {7: '_convert_legacy_energy_data'}
+
+    # Seconds after connect() before the first background retention pass
+    RETENTION_START_DELAY = 600.0
+
     def __init__(self, config: StorageConfig):
         self.config = config
         self.db_path = config.db_path
         self._connection: Optional[aiosqlite.Connection] = None
         self.logger = logging.getLogger(__name__)
         
-        # Connection pooling settings
+        # Connection pooling settings: connection_pool_size read-only connections
+        # next to the writer (0 disables the pool)
         self._pool_size = getattr(config, 'connection_pool_size', 5)
-        self._connection_semaphore = asyncio.Semaphore(self._pool_size)
+        self._read_pool: Optional[ConnectionPool] = None
+        # One transaction at a time on the single writer connection: a COMMIT or
+        # ROLLBACK must not cover another coroutine's statements, and an energy
+        # save's previous-reading lookup, insert and rollup upsert run together
+        self._write_lock = asyncio.Lock()
         
         # Retry settings
         self._max_retries = getattr(config, 'max_retries', 3)
         self._retry_delay = getattr(config, 'retry_delay', 0.1)
+        
+        # Write-behind settings (queue, event and lock are created in connect())
+        self._write_behind = getattr(config, 'write_behind_enabled', False)
+        self._flush_interval = getattr(config, 'write_behind_flush_interval', 5.0)
+        self._flush_rows = max(1, getattr(config, 'batch_size', 100))
+        self._max_queue = max(self._flush_rows, getattr(config, 'write_behind_max_queue', 5000))
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._retry_items: List[Any] = []  # Rows of a failed flush, committed first on the next one
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_stats = {
+            'flushes': 0,
+            'rows_flushed': 0,
+            'failed_flushes': 0,
+            'rows_dropped': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+        
+        # Retention settings (stop event and lock are created on first use)
+        self._auto_cleanup = getattr(config, 'enable_auto_cleanup', False)
+        self._retention_days = getattr(config, 'retention_days', 30)
+        self._table_retention = dict(getattr(config, 'table_retention_days', None) or {})
+        self._retention_interval = getattr(config, 'retention_interval_hours', 24.0) * 3600
+        self._retention_chunk_rows = max(1, getattr(config, 'retention_chunk_rows', 5000))
+        self._retention_vacuum_pages = max(1, getattr(config, 'retention_vacuum_pages', 1000))
+        self._retention_pause = getattr(config, 'retention_chunk_pause', 0.05)
+        self._incremental_vacuum = False
+        self._retention_stop: Optional[asyncio.Event] = None
+        self._retention_lock: Optional[asyncio.Lock] = None
+        self._retention_task: Optional[asyncio.Task] = None
+        self._retention_stats = {
+            'running': False,
+            'table': None,
+            'table_rows_deleted': 0,
+            'runs': 0,
+            'chunks': 0,
+            'rows_deleted': 0,
+            'pages_freed': 0,
+            'last_run_started': None,
+            'last_run_seconds': 0.0,
+            'last_results': {}
+        }
+        unknown = sorted(set(self._table_retention) - set(RETENTION_TABLES))
+        if unknown:
+            self.logger.warning(f"Ignoring retention for unknown tables: {', '.join(unknown)}")
 
     @property
     def is_connected(self) -> bool:
@@ -90,14 +215,29 @@ class SQLiteStorage(DataStorageInterface):
                 self._connection = await aiosqlite.connect(self.db_path)
                 self._connection.row_factory = aiosqlite.Row
                 
+                # Only takes effect on new databases; existing ones switch on the next VACUUM
+                await self._connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                
                 # Enable WAL mode for better concurrent access
                 await self._connection.execute("PRAGMA journal_mode=WAL")
                 await self._connection.execute("PRAGMA synchronous=NORMAL")
                 await self._connection.execute("PRAGMA cache_size=-64000")  # 64MB cache
                 await self._connection.execute("PRAGMA busy_timeout=5000")  # 5 second timeout
+                await self._connection.execute("PRAGMA temp_store=MEMORY")
+                await self._connection.execute("PRAGMA mmap_size=268435456")  # 256MB memory-mapped I/O
                 
                 # Initialize schema
                 await self._init_schema()
+                await self._check_auto_vacuum()
+                
+                # Readers are opened after the schema exists
+                await self._start_read_pool()
+                
+                if self._write_behind:
+                    self._start_write_behind()
+                
+                if self._auto_cleanup:
+                    self._start_retention()
                 
                 self.logger.info(f"Connected to SQLite database at {self.db_path} (pool_size={self._pool_size})")
                 return True
@@ -190,6 +330,10 @@ class SQLiteStorage(DataStorageInterface):
                                 else:
                                     raise
                     
+                    step = self.MIGRATION_STEPS.get(version)
+                    if step:
+                        await getattr(self, step)()
+                    
                     # Record the migration
                     await cursor.execute(
                         "INSERT INTO schema_version (version, description) VALUES (?, ?)",
@@ -204,11 +348,198 @@ class SQLiteStorage(DataStorageInterface):
                 # Don't continue with further migrations if one fails
                 raise
         
+        # Rollups of readings stored before v6 are computed in Python
+        if current_version < 6 <= target_version:
+            await self._rebuild_energy_rollups()
+            await self._connection.commit()
+        
         final_version = await self._get_current_schema_version()
         self.logger.info(f"Database schema updated to version {final_version}")
 
+    async def _start_read_pool(self) -> None:
+        """Open the read-only connection pool (file databases only)."""
+        if self._read_pool or self._pool_size <= 0 or self.db_path == ':memory:':
+            return
+        pool = ConnectionPool(self.db_path, max_connections=self._pool_size, min_connections=1)
+        try:
+            await pool.start()
+            self._read_pool = pool
+        except Exception as e:
+            await pool.stop()
+            self.logger.warning(f"Read pool unavailable, reads will use the writer connection: {e}")
+
+    @asynccontextmanager
+    async def _reader(self):
+        """Yield a pooled read-only connection, or the writer when no pool is available."""
+        conn = None
+        if self._read_pool:
+            try:
+                conn = await self._read_pool.get_connection()
+            except Exception as e:
+                self.logger.warning(f"Read pool checkout failed, using writer connection: {e}")
+        
+        if conn is None:
+            async with self._write_lock:
+                yield self._connection
+            return
+        
+        try:
+            yield conn
+        finally:
+            await self._read_pool.return_connection(conn)
+
+    def get_read_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get read pool usage statistics.
+        
+        Returns:
+            Dictionary with pool statistics, empty when reads use the writer
+        """
+        return self._read_pool.get_stats() if self._read_pool else {}
+
+    def _start_write_behind(self) -> None:
+        """Create the bounded write queue and start the background flusher."""
+        if self._flush_task and not self._flush_task.done():
+            return
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue(maxsize=self._max_queue)
+            self._flush_event = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._flush_task = asyncio.create_task(self._write_behind_loop())
+        self.logger.info(
+            f"Write-behind enabled (flush every {self._flush_interval}s or {self._flush_rows} rows, "
+            f"max queue {self._max_queue})"
+        )
+
+    async def _write_behind_loop(self) -> None:
+        """Flush queued writes on every interval tick or when the row threshold is reached."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+
+    async def _stop_write_behind(self) -> None:
+        """Stop the background flusher and commit everything still queued."""
+        if self._flush_task:
+            self._stopping = True
+            self._flush_event.set()
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+
+    async def _enqueue_writes(self, query: str, rows: List[Any]) -> bool:
+        """Queue rows for the next write-behind flush."""
+        for params in rows:
+            if self._write_queue.full():
+                # Bounded memory: drain inline instead of letting the queue grow
+                await self.flush()
+            self._write_queue.put_nowait((query, params))
+        if self._write_queue.qsize() >= self._flush_rows:
+            self._flush_event.set()
+        return True
+
+    async def flush(self) -> bool:
+        """
+        Commit all queued write-behind rows in a single transaction.
+        
+        Waits for a flush already in progress, so rows saved before the call are
+        committed when it returns. Rows of a failed flush are kept and retried by
+        the next flush (up to max queue rows; older rows beyond that are dropped).
+        
+        Returns:
+            True if nothing was pending or the flush committed, False otherwise
+        """
+        if self._write_queue is None or not self._connection:
+            return True
+        if self._write_queue.empty() and not self._retry_items and not self._flush_lock.locked():
+            return True
+        
+        async with self._flush_lock:
+            items, self._retry_items = self._retry_items, []
+            while not self._write_queue.empty():
+                items.append(self._write_queue.get_nowait())
+            if not items:
+                return True
+            
+            # One executemany per statement, table order follows first arrival
+            grouped: Dict[str, List[Any]] = {}
+            for query, params in items:
+                grouped.setdefault(query, []).append(params)
+            
+            started = time.perf_counter()
+            success = False
+            async with self._write_lock:
+                try:
+                    async def _do_flush():
+                        try:
+                            energy_rows = grouped.get(self.ENERGY_DATA_INSERT)
+                            latest = await self._latest_energy_ms() if energy_rows else None
+                            for query, rows in grouped.items():
+                                await self._connection.executemany(query, rows)
+                            if energy_rows:
+                                await self._apply_energy_rollups(energy_rows, latest)
+                            await self._connection.commit()
+                        except Exception:
+                            await self._connection.rollback()
+                            raise
+                        return True
+                    
+                    success = await self._execute_with_retry(_do_flush)
+                except Exception as e:
+                    self.logger.error(f"Write-behind flush of {len(items)} rows failed, will retry: {e}")
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats = self._flush_stats
+            stats['flushes'] += 1
+            stats['last_flush_ms'] = elapsed_ms
+            stats['max_flush_ms'] = max(stats['max_flush_ms'], elapsed_ms)
+            stats['total_flush_ms'] += elapsed_ms
+            if success:
+                stats['rows_flushed'] += len(items)
+            else:
+                stats['failed_flushes'] += 1
+                overflow = max(0, len(items) - self._max_queue)
+                if overflow:
+                    self.logger.error(f"Write-behind retry buffer full, {overflow} oldest rows dropped")
+                    stats['rows_dropped'] += overflow
+                self._retry_items = items[overflow:]
+            return success
+
+    def get_write_behind_stats(self) -> Dict[str, Any]:
+        """
+        Get write-behind queue depth and per-flush latency metrics.
+        
+        Returns:
+            Dictionary with queue and flush statistics
+        """
+        stats = self._flush_stats
+        flushes = stats['flushes']
+        return {
+            'enabled': self._write_behind,
+            'pending_rows': (self._write_queue.qsize() if self._write_queue else 0) + len(self._retry_items),
+            'max_queue_rows': self._max_queue,
+            'flush_rows': self._flush_rows,
+            'flush_interval_seconds': self._flush_interval,
+            'flushes': flushes,
+            'rows_flushed': stats['rows_flushed'],
+            'failed_flushes': stats['failed_flushes'],
+            'rows_dropped': stats['rows_dropped'],
+            'last_flush_ms': round(stats['last_flush_ms'], 3),
+            'avg_flush_ms': round(stats['total_flush_ms'] / flushes, 3) if flushes else 0.0,
+            'max_flush_ms': round(stats['max_flush_ms'], 3)
+        }
+
     async def disconnect(self) -> None:
-        """Close connection."""
+        """Close connection, flushing any queued write-behind rows first."""
+        await self._stop_retention()
+        await self._stop_write_behind()
+        if self._read_pool:
+            await self._read_pool.stop()
+            self._read_pool = None
         if self._connection:
             await self._connection.close()
             self._connection = None
@@ -230,6 +561,9 @@ class SQLiteStorage(DataStorageInterface):
         if not self._connection or not data:
             return False
         
+        if self._write_behind:
+            return await self._enqueue_writes(self.ENERGY_DATA_INSERT, self._energy_data_rows(data))
+        
         # Use configured batch size for very large datasets
         batch_size = getattr(self.config, 'batch_size', 100)
         
@@ -250,63 +584,32 @@ class SQLiteStorage(DataStorageInterface):
         
         return True
     
+    def _energy_data_rows(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill missing energy_data columns and key each reading by epoch milliseconds."""
+        processed_data = []
+        for item in data:
+            item_copy = dict.fromkeys(ENERGY_READING_COLUMNS)
+            item_copy.update(item)
+            
+            ts = item_copy.get('timestamp')
+            item_copy['ts_ms'] = to_epoch_ms(datetime.now() if ts is None else ts)
+            if item_copy['ts_ms'] is None:
+                self.logger.warning(f"Skipping energy reading with invalid timestamp: {ts!r}")
+                continue
+                
+            processed_data.append(item_copy)
+        return processed_data
+
     async def _save_energy_data_batch(self, data: List[Dict[str, Any]]) -> bool:
         """Internal method to save a single batch of energy data."""
-        async with self._connection_semaphore:  # Connection pooling
+        async with self._write_lock:
             try:
                 async def _do_save():
-                    query = """
-                    INSERT OR REPLACE INTO energy_data (
-                        timestamp, battery_soc, pv_power, grid_power, house_consumption,
-                        battery_power, grid_voltage, grid_frequency, battery_voltage,
-                        battery_current, battery_temperature, price_pln,
-                        grid_import_total_kwh, grid_export_total_kwh,
-                        house_consumption_total_kwh, pv_generation_total_kwh, tariff_zone
-                    ) VALUES (
-                        :timestamp, :battery_soc, :pv_power, :grid_power, :house_consumption,
-                        :battery_power, :grid_voltage, :grid_frequency, :battery_voltage,
-                        :battery_current, :battery_temperature, :price_pln,
-                        :grid_import_total_kwh, :grid_export_total_kwh,
-                        :house_consumption_total_kwh, :pv_generation_total_kwh, :tariff_zone
-                    )
-                    """
-                    
-                    # Define expected fields with defaults
-                    expected_fields = {
-                        'battery_soc': None,
-                        'pv_power': None,
-                        'grid_power': None,
-                        'house_consumption': None,
-                        'battery_power': None,
-                        'grid_voltage': None,
-                        'grid_frequency': None,
-                        'battery_voltage': None,
-                        'battery_current': None,
-                        'battery_temperature': None,
-                        'price_pln': None,
-                        'grid_import_total_kwh': None,
-                        'grid_export_total_kwh': None,
-                        'house_consumption_total_kwh': None,
-                        'pv_generation_total_kwh': None,
-                        'tariff_zone': None
-                    }
-                    
-                    # Process data and ensure all required fields exist
-                    processed_data = []
-                    for item in data:
-                        item_copy = expected_fields.copy()
-                        item_copy.update(item)
-                        
-                        # Ensure timestamp is a string
-                        if isinstance(item_copy.get('timestamp'), datetime):
-                            item_copy['timestamp'] = item_copy['timestamp'].isoformat()
-                        elif 'timestamp' not in item_copy:
-                            item_copy['timestamp'] = datetime.now().isoformat()
-                            
-                        processed_data.append(item_copy)
-                    
-                    # Use a transaction for batch insert
-                    await self._connection.executemany(query, processed_data)
+                    # Use a transaction for batch insert; rollups commit with the rows
+                    rows = self._energy_data_rows(data)
+                    latest = await self._latest_energy_ms()
+                    await self._connection.executemany(self.ENERGY_DATA_INSERT, rows)
+                    await self._apply_energy_rollups(rows, latest)
                     await self._connection.commit()
                     return True
                 
@@ -320,17 +623,16 @@ class SQLiteStorage(DataStorageInterface):
         """Retrieve historical energy data."""
         if not self._connection:
             return []
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
             
-        async with self._connection_semaphore:  # Connection pooling
+        async with self._reader() as conn:
             try:
                 async def _do_query():
-                    query = """
-                    SELECT * FROM energy_data 
-                    WHERE timestamp BETWEEN ? AND ?
-                    ORDER BY timestamp ASC
-                    """
+                    query = f"{self.ENERGY_DATA_SELECT} WHERE ts_ms BETWEEN ? AND ? ORDER BY ts_ms ASC"
                     
-                    async with self._connection.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                    async with conn.execute(query, (to_epoch_ms(start_time), to_epoch_ms(end_time))) as cursor:
                         rows = await cursor.fetchall()
                         return [dict(row) for row in rows]
                 
@@ -339,47 +641,303 @@ class SQLiteStorage(DataStorageInterface):
                 self.logger.error(f"Error retrieving energy data: {e}")
                 return []
 
+    async def get_energy_columns(self, start_time: datetime, end_time: datetime,
+                                 columns: Sequence[str] = DEFAULT_ENERGY_COLUMNS) -> Dict[str, np.ndarray]:
+        """
+        Retrieve historical energy data as one contiguous array per column.
+        
+        Reads raw ts_ms keys and the requested columns as plain tuples (no
+        ISO rendering, no Row objects or dicts) and converts them in one
+        NumPy call.
+        
+        Raises:
+            ValueError: for unknown or non-numeric columns
+        """
+        columns = validate_energy_columns(columns)
+        start_ms, end_ms = to_epoch_ms(start_time), to_epoch_ms(end_time)
+        if not self._connection or start_ms is None or end_ms is None:
+            return columns_from_rows([], columns)
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
+        
+        async with self._reader() as conn:
+            try:
+                async def _do_query():
+                    query = (
+                        f"SELECT {', '.join(('ts_ms',) + columns)} FROM energy_readings "
+                        f"WHERE ts_ms BETWEEN ? AND ? ORDER BY ts_ms ASC"
+                    )
+                    async with conn.execute(query, (start_ms, end_ms)) as cursor:
+                        cursor.row_factory = None
+                        return await cursor.fetchall()
+                
+                rows = await self._execute_with_retry(_do_query)
+            except Exception as e:
+                self.logger.error(f"Error retrieving energy columns: {e}")
+                rows = []
+        return columns_from_rows(rows, columns)
+
+    async def _iter_pages(self, query: str, bounds: tuple, next_bounds: Callable[[Any, tuple], tuple],
+                          convert: Callable[[Any], Dict[str, Any]], chunk_size: int,
+                          description: str) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield query results chunk_size rows at a time using keyset pagination.
+        
+        ``query`` takes ``bounds`` followed by the LIMIT; ``next_bounds`` maps the
+        last row of a page and the current bounds to the bounds of the next page.
+        Every page checks a connection out of the pool and returns it before the
+        chunk is yielded, so a slow consumer never holds a reader or the writer.
+        """
+        if not self._connection or chunk_size <= 0:
+            return
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
+        
+        while True:
+            async with self._reader() as conn:
+                try:
+                    async def _do_query():
+                        async with conn.execute(query, (*bounds, chunk_size)) as cursor:
+                            return await cursor.fetchall()
+                    
+                    rows = await self._execute_with_retry(_do_query)
+                except Exception as e:
+                    self.logger.error(f"Error streaming {description}: {e}")
+                    return
+            
+            if not rows:
+                return
+            bounds = next_bounds(rows[-1], bounds)
+            yield [convert(row) for row in rows]
+            if len(rows) < chunk_size:
+                return
+
+    @staticmethod
+    def _energy_page_row(row) -> Dict[str, Any]:
+        d = dict(row)
+        del d['ts_ms']
+        return d
+
+    async def iter_energy_data(self, start_time: datetime, end_time: datetime,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream historical energy data in time order, chunk_size rows at a time."""
+        start_ms, end_ms = to_epoch_ms(start_time), to_epoch_ms(end_time)
+        if start_ms is None or end_ms is None:
+            return
+        async for chunk in self._iter_pages(
+            self.ENERGY_DATA_PAGE, (start_ms - 1, end_ms),
+            lambda row, bounds: (row['ts_ms'], bounds[1]),
+            self._energy_page_row, chunk_size, 'energy data'
+        ):
+            yield chunk
+
+    async def _convert_legacy_energy_data(self) -> None:
+        """Copy a pre-v7 energy_data table into energy_readings and replace it with the view."""
+        async with self._connection.execute("SELECT type FROM sqlite_master WHERE name = 'energy_data'") as cursor:
+            row = await cursor.fetchone()
+        
+        if row and row[0] == 'table':
+            async with self._connection.execute("PRAGMA table_info(energy_data)") as cursor:
+                legacy_columns = {info[1] for info in await cursor.fetchall()}
+            columns = [column for column in ENERGY_READING_COLUMNS if column in legacy_columns]
+            insert = (
+                f"INSERT OR REPLACE INTO energy_readings (ts_ms, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * (len(columns) + 1))})"
+            )
+            copied = skipped = 0
+            async with self._connection.execute(
+                f"SELECT timestamp, {', '.join(columns)} FROM energy_data"
+            ) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    batch = []
+                    for legacy in rows:
+                        ts_ms = to_epoch_ms(legacy[0])
+                        if ts_ms is None:
+                            skipped += 1
+                            continue
+                        batch.append((ts_ms, *legacy[1:]))
+                    await self._connection.executemany(insert, batch)
+                    copied += len(batch)
+            
+            # Dropping the table also drops its redundant timestamp indexes
+            await self._connection.execute("DROP TABLE energy_data")
+            self.logger.info(f"Moved {copied} energy_data rows to energy_readings"
+                             + (f", skipped {skipped} with invalid timestamps" if skipped else ""))
+        
+        await self._connection.execute(CREATE_ENERGY_DATA_VIEW)
+
+    async def _latest_energy_ms(self) -> Optional[int]:
+        """Epoch milliseconds of the newest energy reading."""
+        async with self._connection.execute("SELECT MAX(ts_ms) FROM energy_readings") as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+    async def _fetch_energy_sample(self, where: str, params: tuple) -> Optional[Dict[str, Any]]:
+        """Single energy_data reading (rollup columns only) matching a WHERE ... ORDER BY ... clause."""
+        async with self._connection.execute(f"{self.ROLLUP_SAMPLE_SELECT} {where} LIMIT 1", params) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+    async def _upsert_rollups(self, builder: RollupBuilder) -> None:
+        for resolution, query in self.ROLLUP_UPSERTS.items():
+            rows = builder.rows(resolution)
+            if rows:
+                await self._connection.executemany(query, rows)
+
+    async def _apply_energy_rollups(self, rows: List[Dict[str, Any]], latest_before: Optional[int]) -> None:
+        """
+        Fold just-inserted energy_data rows into the rollups (caller commits).
+        
+        Readings newer than everything stored are merged incrementally. Late
+        or replaced readings change the intervals around them, so the days
+        they touch are rebuilt from energy_data instead. A rollup failure
+        never loses the raw rows; rebuild_energy_rollups() repairs it.
+        
+        Args:
+            rows: Inserted rows as built by _energy_data_rows()
+            latest_before: Newest energy_readings ts_ms before the insert
+        """
+        if not rows:
+            return
+        samples = sorted({row['ts_ms']: row for row in rows}.values(), key=lambda row: row['ts_ms'])
+        await self._connection.execute("SAVEPOINT energy_rollups")
+        try:
+            if latest_before is None or samples[0]['ts_ms'] > latest_before:
+                previous = None
+                if latest_before is not None:
+                    previous = await self._fetch_energy_sample("WHERE ts_ms = ?", (latest_before,))
+                await self._upsert_rollups(RollupBuilder(previous).add_all(samples))
+            else:
+                first = parse_timestamp(samples[0]['ts_ms'])
+                following = await self._fetch_energy_sample(
+                    "WHERE ts_ms > ? ORDER BY ts_ms ASC", (samples[-1]['ts_ms'],))
+                last = parse_timestamp((following or samples[-1])['ts_ms'])
+                await self._rebuild_energy_rollups(first, last)
+            await self._connection.execute("RELEASE energy_rollups")
+        except Exception as e:
+            await self._connection.execute("ROLLBACK TO energy_rollups")
+            await self._connection.execute("RELEASE energy_rollups")
+            self.logger.warning(f"Energy rollup update failed, raw readings kept: {e}")
+
+    async def _rebuild_energy_rollups(self, start_time: Optional[datetime] = None,
+                                      end_time: Optional[datetime] = None) -> int:
+        """Recompute the rollups of whole days from energy_data (caller commits)."""
+        if start_time is None or end_time is None:
+            async with self._connection.execute("SELECT MIN(ts_ms), MAX(ts_ms) FROM energy_readings") as cursor:
+                row = await cursor.fetchone()
+            if not row or row[0] is None:
+                return 0
+            start_time = start_time or parse_timestamp(row[0])
+            end_time = end_time or parse_timestamp(row[1])
+        
+        window_start = datetime.combine(start_time.date(), datetime.min.time())
+        window_end = datetime.combine(end_time.date(), datetime.min.time()) + timedelta(days=1)
+        for table, _ in ROLLUP_TABLES.values():
+            await self._connection.execute(f"DELETE FROM {table} WHERE bucket_start >= ? AND bucket_start < ?",
+                                           (window_start.isoformat(), window_end.isoformat()))
+        
+        bounds = (to_epoch_ms(window_start), to_epoch_ms(window_end))
+        previous = await self._fetch_energy_sample("WHERE ts_ms < ? ORDER BY ts_ms DESC", bounds[:1])
+        builder = RollupBuilder(previous, window_start, window_end)
+        async with self._connection.execute(
+            f"{self.ROLLUP_SAMPLE_SELECT} WHERE ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms ASC", bounds
+        ) as cursor:
+            async for row in cursor:
+                builder.add(dict(row))
+        # The first reading after the window closes the interval of the last one inside it
+        following = await self._fetch_energy_sample("WHERE ts_ms >= ? ORDER BY ts_ms ASC", bounds[1:])
+        if following:
+            builder.add(following)
+        await self._upsert_rollups(builder)
+        return len(builder.rows('daily'))
+
+    async def rebuild_energy_rollups(self, start_time: Optional[datetime] = None,
+                                     end_time: Optional[datetime] = None) -> bool:
+        """
+        Recompute energy rollups from energy_data.
+        
+        Args:
+            start_time: First day to rebuild, defaults to the oldest reading
+            end_time: Last day to rebuild, defaults to the newest reading
+            
+        Returns:
+            True if the rollups were rebuilt
+        """
+        if not self._connection:
+            return False
+        
+        await self.flush()
+        
+        async with self._write_lock:
+            try:
+                async def _do_rebuild():
+                    days = await self._rebuild_energy_rollups(start_time, end_time)
+                    await self._connection.commit()
+                    self.logger.info(f"Rebuilt energy rollups for {days} day(s)")
+                    return True
+                
+                return await self._execute_with_retry(_do_rebuild)
+            except Exception as e:
+                self.logger.error(f"Error rebuilding energy rollups: {e}")
+                return False
+
+    async def get_energy_rollups(self, resolution: str, start_time: datetime,
+                                 end_time: datetime) -> List[Dict[str, Any]]:
+        """
+        Retrieve energy rollups whose bucket starts within a time range.
+        
+        Args:
+            resolution: '15min', 'hourly' or 'daily'
+            start_time: Earliest bucket start
+            end_time: Latest bucket start
+            
+        Returns:
+            Rollup rows ordered by bucket_start
+        """
+        if resolution not in ROLLUP_TABLES:
+            self.logger.error(f"Unknown energy rollup resolution: {resolution}")
+            return []
+        if not self._connection:
+            return []
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
+        
+        table, _ = ROLLUP_TABLES[resolution]
+        async with self._reader() as conn:
+            try:
+                async def _do_query():
+                    query = f"""
+                    SELECT * FROM {table}
+                    WHERE bucket_start BETWEEN ? AND ?
+                    ORDER BY bucket_start ASC
+                    """
+                    async with conn.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                        rows = await cursor.fetchall()
+                        return [dict(row) for row in rows]
+                
+                return await self._execute_with_retry(_do_query)
+            except Exception as e:
+                self.logger.error(f"Error retrieving energy rollups: {e}")
+                return []
+
     async def save_system_state(self, state: Dict[str, Any]) -> bool:
         """Save MasterCoordinator state."""
         if not self._connection:
             return False
+        
+        if self._write_behind:
+            return await self._enqueue_writes(self.SYSTEM_STATE_INSERT, [self._system_state_params(state)])
             
-        async with self._connection_semaphore:  # Connection pooling
+        async with self._write_lock:
             try:
                 async def _do_save():
-                    query = """
-                    INSERT INTO system_state (
-                        timestamp, state, uptime, active_modules, last_error, metrics
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                    """
-                    
-                    ts = state.get('timestamp')
-                    if isinstance(ts, datetime):
-                        ts = ts.isoformat()
-                    
-                    # Handle uptime - could be 'uptime' or 'uptime_seconds'
-                    uptime = state.get('uptime') or state.get('uptime_seconds')
-                    
-                    # Build metrics JSON including extra fields
-                    metrics = state.get('metrics', state.get('performance_metrics', {}))
-                    if state.get('current_data'):
-                        metrics['current_data'] = state.get('current_data')
-                    if state.get('decision_count'):
-                        metrics['decision_count'] = state.get('decision_count')
-                    if uptime:
-                        metrics['uptime_seconds'] = uptime
-                    metrics_json = json.dumps(metrics, default=str)
-                    
-                    active_modules = ",".join(state.get('active_modules', []))
-                    
-                    await self._connection.execute(query, (
-                        ts,
-                        state.get('state'),
-                        uptime,
-                        active_modules,
-                        state.get('last_error'),
-                        metrics_json
-                    ))
+                    await self._connection.execute(self.SYSTEM_STATE_INSERT, self._system_state_params(state))
                     await self._connection.commit()
                     return True
                 
@@ -388,12 +946,45 @@ class SQLiteStorage(DataStorageInterface):
                 self.logger.error(f"Error saving system state: {e}")
                 return False
 
+    def _system_state_params(self, state: Dict[str, Any]) -> tuple:
+        """Build system_state insert parameters."""
+        ts = state.get('timestamp')
+        if isinstance(ts, datetime):
+            ts = ts.isoformat()
+        
+        # Handle uptime - could be 'uptime' or 'uptime_seconds'
+        uptime = state.get('uptime') or state.get('uptime_seconds')
+        
+        # Build metrics JSON including extra fields
+        metrics = dict(state.get('metrics', state.get('performance_metrics', {})))
+        if state.get('current_data'):
+            metrics['current_data'] = state.get('current_data')
+        if state.get('decision_count'):
+            metrics['decision_count'] = state.get('decision_count')
+        if uptime:
+            metrics['uptime_seconds'] = uptime
+        metrics_json = json.dumps(metrics, default=str)
+        
+        active_modules = ",".join(state.get('active_modules', []))
+        
+        return (
+            ts,
+            state.get('state'),
+            uptime,
+            active_modules,
+            state.get('last_error'),
+            metrics_json
+        )
+
     async def get_system_state(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Retrieve recent system states."""
         if not self._connection:
             return []
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
             
-        async with self._connection_semaphore:  # Connection pooling
+        async with self._reader() as conn:
             try:
                 async def _do_query():
                     query = """
@@ -402,7 +993,7 @@ class SQLiteStorage(DataStorageInterface):
                     LIMIT ?
                     """
                     
-                    async with self._connection.execute(query, (limit,)) as cursor:
+                    async with conn.execute(query, (limit,)) as cursor:
                         rows = await cursor.fetchall()
                         
                     results = []
@@ -434,69 +1025,126 @@ class SQLiteStorage(DataStorageInterface):
         """Retrieve system states within a time range."""
         if not self._connection:
             return []
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
             
-        try:
-            query = """
-            SELECT * FROM system_state 
-            WHERE timestamp BETWEEN ? AND ?
-            ORDER BY timestamp ASC
-            """
+        async with self._reader() as conn:
+            try:
+                query = """
+                SELECT * FROM system_state 
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp ASC
+                """
             
-            async with self._connection.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
-                rows = await cursor.fetchall()
+                async with conn.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                    rows = await cursor.fetchall()
                 
-            results = []
-            for row in rows:
-                d = dict(row)
-                if d.get('metrics'):
-                    try:
-                        d['metrics'] = json.loads(d['metrics'])
-                    except:
-                        pass
-                results.append(d)
+                return [self._system_state_range_row(row) for row in rows]
+            except Exception as e:
+                self.logger.error(f"Error retrieving system state range: {e}")
+                return []
+
+    @staticmethod
+    def _system_state_range_row(row) -> Dict[str, Any]:
+        d = dict(row)
+        if d.get('metrics'):
+            try:
+                d['metrics'] = json.loads(d['metrics'])
+            except:
+                pass
+        return d
+
+    async def iter_system_state_range(self, start_time: datetime, end_time: datetime,
+                                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream system states within a time range, chunk_size rows at a time."""
+        async for chunk in self._iter_pages(
+            self.SYSTEM_STATE_PAGE, (start_time.isoformat(), -1, end_time.isoformat()),
+            lambda row, bounds: (row['timestamp'], row['id'], bounds[2]),
+            self._system_state_range_row, chunk_size, 'system state range'
+        ):
+            yield chunk
+
+    async def save_coordinator_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """Save a typed coordinator snapshot (see database.coordinator_snapshots)."""
+        if not self._connection:
+            return False
+        
+        row = {column: snapshot.get(column) for column in SNAPSHOT_COLUMNS}
+        if isinstance(row['timestamp'], datetime):
+            row['timestamp'] = row['timestamp'].isoformat()
+        elif not row['timestamp']:
+            row['timestamp'] = datetime.now().isoformat()
+        
+        if self._write_behind:
+            return await self._enqueue_writes(self.SNAPSHOT_INSERT, [row])
+        
+        async with self._write_lock:
+            try:
+                async def _do_save():
+                    await self._connection.execute(self.SNAPSHOT_INSERT, row)
+                    await self._connection.commit()
+                    return True
                 
-            return results
-        except Exception as e:
-            self.logger.error(f"Error retrieving system state range: {e}")
+                return await self._execute_with_retry(_do_save)
+            except Exception as e:
+                self.logger.error(f"Error saving coordinator snapshot: {e}")
+                return False
+
+    async def get_coordinator_snapshots(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+        """Retrieve coordinator snapshots within a time range."""
+        if not self._connection:
             return []
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
+        
+        async with self._reader() as conn:
+            try:
+                query = """
+                SELECT * FROM coordinator_snapshots 
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp ASC
+                """
+                async with conn.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
+            except Exception as e:
+                self.logger.error(f"Error retrieving coordinator snapshots: {e}")
+                return []
+
+    async def get_latest_coordinator_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Retrieve the most recent coordinator snapshot."""
+        if not self._connection:
+            return None
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
+        
+        async with self._reader() as conn:
+            try:
+                query = "SELECT * FROM coordinator_snapshots ORDER BY timestamp DESC LIMIT 1"
+                async with conn.execute(query) as cursor:
+                    row = await cursor.fetchone()
+                    return dict(row) if row else None
+            except Exception as e:
+                self.logger.error(f"Error retrieving latest coordinator snapshot: {e}")
+                return None
 
     async def save_decision(self, decision: Dict[str, Any]) -> bool:
         """Save charging/discharging decisions."""
         if not self._connection:
             return False
+        
+        if self._write_behind:
+            return await self._enqueue_writes(self.DECISION_INSERT, [self._decision_params(decision)])
             
-        async with self._connection_semaphore:  # Connection pooling
+        async with self._write_lock:
             try:
                 async def _do_save():
-                    query = """
-                    INSERT INTO coordinator_decisions (
-                        timestamp, decision_type, action, reason, parameters, source_module
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                    """
-                    
-                    ts = decision.get('timestamp')
-                    if isinstance(ts, datetime):
-                        ts = ts.isoformat()
-                    
-                    # Store all extra fields in parameters JSON
-                    params = decision.get('parameters', {})
-                    extra_fields = ['should_charge', 'confidence', 'current_price', 'current_price_pln', 'cheapest_price', 
-                                   'cheapest_hour', 'battery_soc', 'pv_power', 'consumption', 'decision_score',
-                                   'energy_kwh', 'estimated_cost_pln', 'estimated_savings_pln', 'expected_revenue_pln', 'tariff_zone']
-                    for field in extra_fields:
-                        if field in decision:
-                            params[field] = decision[field]
-                    params_json = json.dumps(params, default=str)
-                    
-                    self.logger.info(f"📝 Executing INSERT: ts={ts}, type={decision.get('decision_type')}, action={decision.get('action')}")
-                    await self._connection.execute(query, (
-                        ts,
-                        decision.get('decision_type'),
-                        decision.get('action'),
-                        decision.get('reason'),
-                        params_json,
-                        decision.get('source_module')
-                    ))
+                    params = self._decision_params(decision)
+                    self.logger.info(f"📝 Executing INSERT: ts={params[0]}, type={decision.get('decision_type')}, action={decision.get('action')}")
+                    await self._connection.execute(self.DECISION_INSERT, params)
                     self.logger.info(f"💾 Committing transaction...")
                     await self._connection.commit()
                     self.logger.info(f"✅ Commit successful!")
@@ -507,12 +1155,40 @@ class SQLiteStorage(DataStorageInterface):
                 self.logger.error(f"Error saving decision: {e}")
                 return False
 
+    def _decision_params(self, decision: Dict[str, Any]) -> tuple:
+        """Build coordinator_decisions insert parameters."""
+        ts = decision.get('timestamp')
+        if isinstance(ts, datetime):
+            ts = ts.isoformat()
+        
+        # Store all extra fields in parameters JSON
+        params = decision.get('parameters', {})
+        extra_fields = ['should_charge', 'confidence', 'current_price', 'current_price_pln', 'cheapest_price', 
+                       'cheapest_hour', 'battery_soc', 'pv_power', 'consumption', 'decision_score',
+                       'energy_kwh', 'estimated_cost_pln', 'estimated_savings_pln', 'expected_revenue_pln', 'tariff_zone']
+        for field in extra_fields:
+            if field in decision:
+                params[field] = decision[field]
+        params_json = json.dumps(params, default=str)
+        
+        return (
+            ts,
+            decision.get('decision_type'),
+            decision.get('action'),
+            decision.get('reason'),
+            params_json,
+            decision.get('source_module')
+        )
+
     async def get_decisions(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         """Retrieve historical decisions."""
         if not self._connection:
             return []
+        
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
             
-        async with self._connection_semaphore:  # Connection pooling
+        async with self._reader() as conn:
             try:
                 async def _do_query():
                     query = """
@@ -521,93 +1197,106 @@ class SQLiteStorage(DataStorageInterface):
                     ORDER BY timestamp ASC
                     """
                     
-                    async with self._connection.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                    async with conn.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
                         rows = await cursor.fetchall()
-                        results = []
-                        for row in rows:
-                            d = dict(row)
-                            if d.get('parameters'):
-                                try:
-                                    params = json.loads(d['parameters'])
-                                    d['parameters'] = params
-                                    # Flatten parameter fields to top level for compatibility
-                                    for key in ['should_charge', 'confidence', 'current_price', 'current_price_pln', 'cheapest_price',
-                                                'cheapest_hour', 'battery_soc', 'pv_power', 'consumption', 'decision_score',
-                                                'energy_kwh', 'estimated_cost_pln', 'estimated_savings_pln', 'expected_revenue_pln', 'tariff_zone']:
-                                        if key in params:
-                                            d[key] = params[key]
-                                except:
-                                    pass
-                            results.append(d)
-                        return results
+                        return [self._decision_row(row) for row in rows]
                 
                 return await self._execute_with_retry(_do_query)
             except Exception as e:
                 self.logger.error(f"Error retrieving decisions: {e}")
                 return []
 
+    @staticmethod
+    def _decision_row(row) -> Dict[str, Any]:
+        d = dict(row)
+        if d.get('parameters'):
+            try:
+                params = json.loads(d['parameters'])
+                d['parameters'] = params
+                # Flatten parameter fields to top level for compatibility
+                for key in ['should_charge', 'confidence', 'current_price', 'current_price_pln', 'cheapest_price',
+                            'cheapest_hour', 'battery_soc', 'pv_power', 'consumption', 'decision_score',
+                            'energy_kwh', 'estimated_cost_pln', 'estimated_savings_pln', 'expected_revenue_pln', 'tariff_zone']:
+                    if key in params:
+                        d[key] = params[key]
+            except:
+                pass
+        return d
+
+    async def iter_decisions(self, start_time: datetime, end_time: datetime,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream historical decisions in time order, chunk_size rows at a time."""
+        async for chunk in self._iter_pages(
+            self.DECISION_PAGE, (start_time.isoformat(), -1, end_time.isoformat()),
+            lambda row, bounds: (row['timestamp'], row['id'], bounds[2]),
+            self._decision_row, chunk_size, 'decisions'
+        ):
+            yield chunk
+
     async def save_charging_session(self, session: Dict[str, Any]) -> bool:
         """Save or update a charging session."""
         if not self._connection:
             return False
             
-        try:
-            query = """
-            INSERT OR REPLACE INTO charging_sessions (
-                session_id, start_time, end_time, target_soc, 
-                energy_kwh, cost_pln, status, avg_price
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """
+        async with self._write_lock:
+            try:
+                query = """
+                INSERT OR REPLACE INTO charging_sessions (
+                    session_id, start_time, end_time, target_soc, 
+                    energy_kwh, cost_pln, status, avg_price
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """
             
-            start_ts = session.get('start_time')
-            if isinstance(start_ts, datetime):
-                start_ts = start_ts.isoformat()
+                start_ts = session.get('start_time')
+                if isinstance(start_ts, datetime):
+                    start_ts = start_ts.isoformat()
                 
-            end_ts = session.get('end_time')
-            if isinstance(end_ts, datetime):
-                end_ts = end_ts.isoformat()
+                end_ts = session.get('end_time')
+                if isinstance(end_ts, datetime):
+                    end_ts = end_ts.isoformat()
             
-            await self._connection.execute(query, (
-                session.get('session_id'),
-                start_ts,
-                end_ts,
-                session.get('target_soc'),
-                session.get('energy_kwh'),
-                session.get('cost_pln'),
-                session.get('status'),
-                session.get('avg_price')
-            ))
-            await self._connection.commit()
-            return True
-        except Exception as e:
-            self.logger.error(f"Error saving charging session: {e}")
-            return False
+                await self._connection.execute(query, (
+                    session.get('session_id'),
+                    start_ts,
+                    end_ts,
+                    session.get('target_soc'),
+                    session.get('energy_kwh'),
+                    session.get('cost_pln'),
+                    session.get('status'),
+                    session.get('avg_price')
+                ))
+                await self._connection.commit()
+                return True
+            except Exception as e:
+                self.logger.error(f"Error saving charging session: {e}")
+                return False
 
     async def get_charging_sessions(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         """Retrieve charging sessions."""
         if not self._connection:
             return []
             
-        try:
-            query = """
-            SELECT * FROM charging_sessions 
-            WHERE start_time BETWEEN ? AND ?
-            ORDER BY start_time ASC
-            """
+        async with self._reader() as conn:
+            try:
+                query = """
+                SELECT * FROM charging_sessions 
+                WHERE start_time BETWEEN ? AND ?
+                ORDER BY start_time ASC
+                """
             
-            async with self._connection.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        except Exception as e:
-            self.logger.error(f"Error retrieving charging sessions: {e}")
-            return []
+                async with conn.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
+            except Exception as e:
+                self.logger.error(f"Error retrieving charging sessions: {e}")
+                return []
 
     async def save_selling_session(self, session: Dict[str, Any]) -> bool:
         """Save or update a battery selling session."""
         if not self._connection:
             return False
             
-        async with self._connection_semaphore:
+        async with self._write_lock:
             try:
                 async def _do_save():
                     query = """
@@ -647,7 +1336,7 @@ class SQLiteStorage(DataStorageInterface):
         if not self._connection:
             return []
             
-        async with self._connection_semaphore:
+        async with self._reader() as conn:
             try:
                 async def _do_query():
                     query = """
@@ -656,7 +1345,7 @@ class SQLiteStorage(DataStorageInterface):
                     ORDER BY start_time ASC
                     """
                     
-                    async with self._connection.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                    async with conn.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
                         rows = await cursor.fetchall()
                         return [dict(row) for row in rows]
                 
@@ -669,149 +1358,156 @@ class SQLiteStorage(DataStorageInterface):
         """Save weather data."""
         if not self._connection or not data:
             return False
-        try:
-            query = """
-            INSERT OR REPLACE INTO weather_data (
-                timestamp, source, temperature, humidity, pressure, 
-                wind_speed, wind_direction, cloud_cover, solar_irradiance, precipitation
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            for rec in data:
-                ts = rec.get('timestamp')
-                if isinstance(ts, datetime):
-                    ts = ts.isoformat()
-                await self._connection.execute(query, (
-                    ts,
-                    rec.get('source'),
-                    rec.get('temperature'),
-                    rec.get('humidity'),
-                    rec.get('pressure'),
-                    rec.get('wind_speed'),
-                    rec.get('wind_direction'),
-                    rec.get('cloud_cover'),
-                    rec.get('solar_irradiance'),
-                    rec.get('precipitation')
-                ))
-            await self._connection.commit()
-            return True
-        except Exception as e:
-            self.logger.error(f"Error saving weather data: {e}")
-            return False
+        async with self._write_lock:
+            try:
+                query = """
+                INSERT OR REPLACE INTO weather_data (
+                    timestamp, source, temperature, humidity, pressure, 
+                    wind_speed, wind_direction, cloud_cover, solar_irradiance, precipitation
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                for rec in data:
+                    ts = rec.get('timestamp')
+                    if isinstance(ts, datetime):
+                        ts = ts.isoformat()
+                    await self._connection.execute(query, (
+                        ts,
+                        rec.get('source'),
+                        rec.get('temperature'),
+                        rec.get('humidity'),
+                        rec.get('pressure'),
+                        rec.get('wind_speed'),
+                        rec.get('wind_direction'),
+                        rec.get('cloud_cover'),
+                        rec.get('solar_irradiance'),
+                        rec.get('precipitation')
+                    ))
+                await self._connection.commit()
+                return True
+            except Exception as e:
+                self.logger.error(f"Error saving weather data: {e}")
+                return False
 
     async def get_weather_data(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         """Retrieve weather data."""
         if not self._connection:
             return []
-        try:
-            query = """
-            SELECT * FROM weather_data 
-            WHERE timestamp BETWEEN ? AND ?
-            ORDER BY timestamp ASC
-            """
-            async with self._connection.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        except Exception as e:
-            self.logger.error(f"Error retrieving weather data: {e}")
-            return []
+        async with self._reader() as conn:
+            try:
+                query = """
+                SELECT * FROM weather_data 
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp ASC
+                """
+                async with conn.execute(query, (start_time.isoformat(), end_time.isoformat())) as cursor:
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
+            except Exception as e:
+                self.logger.error(f"Error retrieving weather data: {e}")
+                return []
 
     async def save_price_forecast(self, forecast_list: List[Dict[str, Any]]) -> bool:
         """Save price forecast data."""
         if not self._connection or not forecast_list:
             return False
-        try:
-            query = """
-            INSERT OR REPLACE INTO price_forecasts (
-                timestamp, forecast_date, hour, price_pln, source, confidence
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            """
-            for rec in forecast_list:
-                ts = rec.get('timestamp')
-                if isinstance(ts, datetime):
-                    ts = ts.isoformat()
-                # Handle price field which might be price_pln or price
-                price = rec.get('price_pln') or rec.get('price')
-                await self._connection.execute(query, (
-                    ts,
-                    rec.get('forecast_date'),
-                    rec.get('hour'),
-                    price,
-                    rec.get('source'),
-                    rec.get('confidence')
-                ))
-            await self._connection.commit()
-            return True
-        except Exception as e:
-            self.logger.error(f"Error saving price forecast: {e}")
-            return False
+        async with self._write_lock:
+            try:
+                query = """
+                INSERT OR REPLACE INTO price_forecasts (
+                    timestamp, forecast_date, hour, price_pln, source, confidence
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                """
+                for rec in forecast_list:
+                    ts = rec.get('timestamp')
+                    if isinstance(ts, datetime):
+                        ts = ts.isoformat()
+                    # Handle price field which might be price_pln or price
+                    price = rec.get('price_pln') or rec.get('price')
+                    await self._connection.execute(query, (
+                        ts,
+                        rec.get('forecast_date'),
+                        rec.get('hour'),
+                        price,
+                        rec.get('source'),
+                        rec.get('confidence')
+                    ))
+                await self._connection.commit()
+                return True
+            except Exception as e:
+                self.logger.error(f"Error saving price forecast: {e}")
+                return False
 
     async def get_price_forecasts(self, date_str: str) -> List[Dict[str, Any]]:
         """Retrieve price forecasts for a date."""
         if not self._connection:
             return []
-        try:
-            query = """
-            SELECT * FROM price_forecasts 
-            WHERE forecast_date = ?
-            ORDER BY hour ASC
-            """
-            async with self._connection.execute(query, (date_str,)) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        except Exception as e:
-            self.logger.error(f"Error retrieving price forecasts: {e}")
-            return []
+        async with self._reader() as conn:
+            try:
+                query = """
+                SELECT * FROM price_forecasts 
+                WHERE forecast_date = ?
+                ORDER BY hour ASC
+                """
+                async with conn.execute(query, (date_str,)) as cursor:
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
+            except Exception as e:
+                self.logger.error(f"Error retrieving price forecasts: {e}")
+                return []
 
     async def save_pv_forecast(self, forecast_list: List[Dict[str, Any]]) -> bool:
         """Save PV forecast data."""
         if not self._connection or not forecast_list:
             return False
-        try:
-            query = """
-            INSERT OR REPLACE INTO pv_forecasts (
-                timestamp, forecast_date, hour, predicted_power_w, source, confidence, weather_conditions
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
-            for rec in forecast_list:
-                ts = rec.get('timestamp')
-                if isinstance(ts, datetime):
-                    ts = ts.isoformat()
-                # Handle power field which might be power_w or predicted_power_w
-                power = rec.get('predicted_power_w') or rec.get('power_w')
-                await self._connection.execute(query, (
-                    ts,
-                    rec.get('forecast_date'),
-                    rec.get('hour'),
-                    power,
-                    rec.get('source'),
-                    rec.get('confidence'),
-                    rec.get('weather_conditions')
-                ))
-            await self._connection.commit()
-            return True
-        except Exception as e:
-            self.logger.error(f"Error saving PV forecast: {e}")
-            return False
+        async with self._write_lock:
+            try:
+                query = """
+                INSERT OR REPLACE INTO pv_forecasts (
+                    timestamp, forecast_date, hour, predicted_power_w, source, confidence, weather_conditions
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """
+                for rec in forecast_list:
+                    ts = rec.get('timestamp')
+                    if isinstance(ts, datetime):
+                        ts = ts.isoformat()
+                    # Handle power field which might be power_w or predicted_power_w
+                    power = rec.get('predicted_power_w') or rec.get('power_w')
+                    await self._connection.execute(query, (
+                        ts,
+                        rec.get('forecast_date'),
+                        rec.get('hour'),
+                        power,
+                        rec.get('source'),
+                        rec.get('confidence'),
+                        rec.get('weather_conditions')
+                    ))
+                await self._connection.commit()
+                return True
+            except Exception as e:
+                self.logger.error(f"Error saving PV forecast: {e}")
+                return False
 
     async def get_pv_forecasts(self, date_str: str) -> List[Dict[str, Any]]:
         """Retrieve PV forecasts for a date."""
         if not self._connection:
             return []
-        try:
-            query = """
-            SELECT * FROM pv_forecasts 
-            WHERE forecast_date = ?
-            ORDER BY hour ASC
-            """
-            async with self._connection.execute(query, (date_str,)) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        except Exception as e:
-            self.logger.error(f"Error retrieving PV forecasts: {e}")
-            return []
+        async with self._reader() as conn:
+            try:
+                query = """
+                SELECT * FROM pv_forecasts 
+                WHERE forecast_date = ?
+                ORDER BY hour ASC
+                """
+                async with conn.execute(query, (date_str,)) as cursor:
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
+            except Exception as e:
+                self.logger.error(f"Error retrieving PV forecasts: {e}")
+                return []
 
     async def backup_data(self, backup_path: str) -> bool:
         """Create a backup of the database."""
+        await self.flush()
         try:
             db_path = getattr(self.config, 'db_path', None)
             if db_path and os.path.exists(db_path):
@@ -822,69 +1518,211 @@ class SQLiteStorage(DataStorageInterface):
             self.logger.error(f"Error creating backup: {e}")
             return False
 
-    async def cleanup_old_data(self, retention_days: int) -> Dict[str, int]:
+    async def _check_auto_vacuum(self) -> None:
+        """Record whether free pages can be released with PRAGMA incremental_vacuum."""
+        async with self._connection.execute("PRAGMA auto_vacuum") as cursor:
+            row = await cursor.fetchone()
+        self._incremental_vacuum = bool(row and row[0] == 2)
+        if not self._incremental_vacuum and self.db_path != ':memory:':
+            self.logger.info(
+                "Database was created without auto_vacuum=INCREMENTAL; run optimize_database() once "
+                "so retention can release free pages between chunks"
+            )
+
+    def _start_retention(self) -> None:
+        """Start the background retention task."""
+        if self._retention_task and not self._retention_task.done():
+            return
+        self._retention_stop = asyncio.Event()
+        self._retention_task = asyncio.create_task(self._retention_loop())
+        self.logger.info(
+            f"Background retention enabled (every {self._retention_interval / 3600:g}h, "
+            f"{self._retention_chunk_rows} rows per chunk)"
+        )
+
+    async def _retention_loop(self) -> None:
+        """Run purge_old_data() shortly after connecting and then every retention interval."""
+        delay = min(self.RETENTION_START_DELAY, self._retention_interval)
+        while not self._retention_stop.is_set():
+            try:
+                await asyncio.wait_for(self._retention_stop.wait(), timeout=delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+            delay = self._retention_interval
+            try:
+                await self.purge_old_data()
+            except Exception as e:
+                self.logger.error(f"Background retention failed: {e}")
+
+    async def _stop_retention(self) -> None:
+        """Stop the background retention task after its current chunk."""
+        if self._retention_task:
+            self._retention_stop.set()
+            await self._retention_task
+            self._retention_task = None
+
+    async def _freelist_count(self) -> int:
+        """Number of unused pages in the database file."""
+        async with self._connection.execute("PRAGMA freelist_count") as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+
+    async def _delete_retention_chunk(self, table: str, column: str, cutoff: Any) -> int:
         """
-        Remove data older than retention_days from all time-series tables.
+        Delete the oldest chunk of expired rows in its own transaction.
+        
+        The chunk is the time range from the oldest row up to the
+        retention_chunk_rows-th expired row. Free pages are released
+        afterwards when the database uses incremental auto-vacuum.
+        
+        Returns:
+            Number of rows deleted
+        """
+        async with self._write_lock:
+            async def _do_delete():
+                try:
+                    async with self._connection.execute(
+                        f"SELECT {column} FROM {table} WHERE {column} < ? ORDER BY {column} LIMIT 1 OFFSET ?",
+                        (cutoff, self._retention_chunk_rows - 1)
+                    ) as cursor:
+                        row = await cursor.fetchone()
+                    if row:
+                        query, bound = f"DELETE FROM {table} WHERE {column} <= ?", row[0]
+                    else:
+                        query, bound = f"DELETE FROM {table} WHERE {column} < ?", cutoff
+                    cursor = await self._connection.execute(query, (bound,))
+                    await self._connection.commit()
+                    return cursor.rowcount
+                except Exception:
+                    await self._connection.rollback()
+                    raise
+            
+            removed = await self._execute_with_retry(_do_delete)
+            
+            if removed and self._incremental_vacuum:
+                before = await self._freelist_count()
+                async with self._connection.execute(
+                    f"PRAGMA incremental_vacuum({self._retention_vacuum_pages})"
+                ) as cursor:
+                    await cursor.fetchall()
+                self._retention_stats['pages_freed'] += max(0, before - await self._freelist_count())
+        return removed
+
+    async def purge_old_data(self, retention_days: Optional[int] = None,
+                             table_retention_days: Optional[Dict[str, int]] = None,
+                             on_progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+        """
+        Delete expired rows table by table in bounded chunks.
+        
+        Every chunk is a short transaction of at most about
+        retention_chunk_rows rows followed by an incremental vacuum, and the
+        task sleeps between chunks, so the coordinator's writes interleave
+        with a long purge. Progress is published in get_retention_stats().
         
         Args:
-            retention_days: Number of days to retain data
+            retention_days: Days to keep by default (config.retention_days when None)
+            table_retention_days: Per-table overrides, 0 keeps a table forever
+                (config.table_retention_days when None)
+            on_progress: Called with (table, rows deleted from it so far) after each chunk
             
         Returns:
             Dictionary with count of deleted rows per table
         """
-        if not self._connection or retention_days <= 0:
+        if not self._connection:
+            return {}
+        
+        periods = retention_periods(
+            self._retention_days if retention_days is None else retention_days,
+            self._table_retention if table_retention_days is None else table_retention_days
+        )
+        if not periods:
             return {}
         
-        async with self._connection_semaphore:
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
+        
+        if self._retention_lock is None:
+            self._retention_lock = asyncio.Lock()
+        
+        async with self._retention_lock:
+            stats = self._retention_stats
+            stats['running'] = True
+            stats['last_run_started'] = datetime.now().isoformat()
+            started = time.perf_counter()
+            results = {}
             try:
-                from datetime import timedelta
-                cutoff_time = (datetime.now() - timedelta(days=retention_days)).isoformat()
-                
-                results = {}
-                
-                # Define tables and their timestamp columns
-                tables_to_clean = [
-                    ('energy_data', 'timestamp'),
-                    ('system_state', 'timestamp'),
-                    ('coordinator_decisions', 'timestamp'),
-                    ('charging_sessions', 'start_time'),
-                    ('battery_selling_sessions', 'start_time'),
-                    ('weather_data', 'timestamp'),
-                    ('price_forecasts', 'timestamp'),
-                    ('pv_forecasts', 'timestamp')
-                ]
-                
-                for table_name, time_column in tables_to_clean:
-                    try:
-                        # Count rows to be deleted
-                        count_query = f"SELECT COUNT(*) FROM {table_name} WHERE {time_column} < ?"
-                        async with self._connection.execute(count_query, (cutoff_time,)) as cursor:
-                            row = await cursor.fetchone()
-                            count = row[0] if row else 0
-                        
-                        if count > 0:
-                            # Delete old rows
-                            delete_query = f"DELETE FROM {table_name} WHERE {time_column} < ?"
-                            await self._connection.execute(delete_query, (cutoff_time,))
-                            results[table_name] = count
-                            self.logger.info(f"Cleaned {count} rows from {table_name} (older than {retention_days} days)")
-                    except Exception as e:
-                        self.logger.error(f"Error cleaning {table_name}: {e}")
-                        results[table_name] = 0
-                
-                await self._connection.commit()
-                
-                # Run VACUUM to reclaim space (can be slow, run periodically)
-                if sum(results.values()) > 0:
-                    self.logger.info("Running VACUUM to reclaim space...")
-                    await self._connection.execute("VACUUM")
-                    self.logger.info("VACUUM completed")
-                
-                return results
-                
-            except Exception as e:
-                self.logger.error(f"Error during cleanup: {e}")
-                return {}
+                for name, days in periods.items():
+                    table, column, _ = RETENTION_TABLES[name]
+                    cutoff = retention_cutoff(name, days)
+                    stats['table'] = name
+                    stats['table_rows_deleted'] = 0
+                    deleted = 0
+                    while True:
+                        try:
+                            removed = await self._delete_retention_chunk(table, column, cutoff)
+                        except Exception as e:
+                            self.logger.error(f"Error cleaning {table}: {e}")
+                            break
+                        if not removed:
+                            break
+                        deleted += removed
+                        stats['chunks'] += 1
+                        stats['rows_deleted'] += removed
+                        stats['table_rows_deleted'] = deleted
+                        if on_progress:
+                            on_progress(name, deleted)
+                        # A short chunk means nothing older than the cutoff is left
+                        if removed < self._retention_chunk_rows or self._retention_stopping():
+                            break
+                        await asyncio.sleep(self._retention_pause)
+                    
+                    if deleted:
+                        results[name] = deleted
+                        self.logger.info(f"Cleaned {deleted} rows from {table} (older than {days} days)")
+                    if self._retention_stopping():
+                        self.logger.info("Retention interrupted by shutdown, remaining rows are purged on the next run")
+                        break
+            finally:
+                stats['running'] = False
+                stats['table'] = None
+                stats['runs'] += 1
+                stats['last_run_seconds'] = round(time.perf_counter() - started, 3)
+                stats['last_results'] = results
+            return results
+
+    def _retention_stopping(self) -> bool:
+        """True once disconnect() has asked the background retention task to stop."""
+        return self._retention_stop is not None and self._retention_stop.is_set()
+
+    def get_retention_stats(self) -> Dict[str, Any]:
+        """
+        Get retention progress and totals.
+        
+        Returns:
+            Dictionary with the running table, chunk/row/page totals and the last run's results
+        """
+        stats = dict(self._retention_stats)
+        stats['last_results'] = dict(stats['last_results'])
+        stats['auto_cleanup'] = self._auto_cleanup
+        stats['incremental_vacuum'] = self._incremental_vacuum
+        stats['periods'] = retention_periods(self._retention_days, self._table_retention)
+        return stats
+
+    async def cleanup_old_data(self, retention_days: int) -> Dict[str, int]:
+        """
+        Remove data older than retention_days from all time-series tables.
+        
+        Per-table overrides from config.table_retention_days still apply.
+        Rows are deleted in chunks, see purge_old_data().
+        
+        Args:
+            retention_days: Number of days to retain data (0 = keep forever)
+            
+        Returns:
+            Dictionary with count of deleted rows per table
+        """
+        return await self.purge_old_data(max(0, retention_days))
 
     async def get_database_stats(self) -> Dict[str, Any]:
         """
@@ -896,6 +1734,9 @@ class SQLiteStorage(DataStorageInterface):
         if not self._connection:
             return {}
         
+        # Pending write-behind rows must be visible to readers
+        await self.flush()
+        
         try:
             stats = {}
             
@@ -903,8 +1744,9 @@ class SQLiteStorage(DataStorageInterface):
             tables = [
                 'energy_data', 'system_state', 'coordinator_decisions',
                 'charging_sessions', 'battery_selling_sessions',
-                'weather_data', 'price_forecasts', 'pv_forecasts'
-            ]
+                'weather_data', 'price_forecasts', 'pv_forecasts',
+                'coordinator_snapshots'
+            ] + [table for table, _ in ROLLUP_TABLES.values()]
             
             for table in tables:
                 try:
@@ -938,6 +1780,12 @@ class SQLiteStorage(DataStorageInterface):
             except Exception:
                 stats['schema_version'] = 0
             
+            if self._write_behind:
+                stats['write_behind'] = self.get_write_behind_stats()
+            
+            if self._auto_cleanup:
+                stats['retention'] = self.get_retention_stats()
+            
             return stats
             
         except Exception as e:
@@ -1001,16 +1849,20 @@ class SQLiteStorage(DataStorageInterface):
         try:
             results = {}
             
-            # Run ANALYZE to update query optimizer statistics
-            self.logger.info("Running ANALYZE to update statistics...")
-            await self._connection.execute("ANALYZE")
-            results['analyze'] = 'completed'
-            
-            # Run VACUUM to reclaim space and defragment
-            # Note: VACUUM can be slow on large databases
-            self.logger.info("Running VACUUM to optimize database...")
-            await self._connection.execute("VACUUM")
-            results['vacuum'] = 'completed'
+            async with self._write_lock:
+                # Run ANALYZE to update query optimizer statistics
+                self.logger.info("Running ANALYZE to update statistics...")
+                await self._connection.execute("ANALYZE")
+                results['analyze'] = 'completed'
+                
+                # Run VACUUM to reclaim space and defragment
+                # Note: VACUUM can be slow on large databases
+                self.logger.info("Running VACUUM to optimize database...")
+                await self._connection.execute("VACUUM")
+                results['vacuum'] = 'completed'
+                
+                # VACUUM applies the auto_vacuum=INCREMENTAL set in connect() to older databases
+                await self._check_auto_vacuum()
             
             # Get updated stats
             stats = await self.get_database_stats()
@@ -19,17 +19,45 @@ class StorageFactory:
             enabled: bool
             sqlite:
               path: str
+              connection_pool_size: int
+              batch_size: int
+              write_behind:
+                enabled: bool
+                flush_interval_seconds: float
+                max_queue_rows: int
+              retention:
+                enabled: bool             # background retention task
+                default_days: int         # 0 = keep forever
+                tables: {name: days}      # per-table overrides
+                interval_hours: float
+                chunk_rows: int
+                vacuum_pages: int
         """
         
         # Parse config
         db_config = config_dict.get('database_storage', {})
         db_enabled = db_config.get('enabled', False)
         
+        sqlite_config = db_config.get('sqlite', {})
+        write_behind = sqlite_config.get('write_behind', {})
+        retention = sqlite_config.get('retention', {})
+        
         # Create config object
         storage_config = StorageConfig(
-            db_path=db_config.get('sqlite', {}).get('path', 'data/goodwe_energy.db'),
+            db_path=sqlite_config.get('path', 'data/goodwe_energy.db'),
+            connection_pool_size=sqlite_config.get('connection_pool_size', 5),
+            batch_size=sqlite_config.get('batch_size', 100),
             enable_fallback=False,
-            fallback_to_file=False
+            fallback_to_file=False,
+            write_behind_enabled=write_behind.get('enabled', False),
+            write_behind_flush_interval=write_behind.get('flush_interval_seconds', 5.0),
+            write_behind_max_queue=write_behind.get('max_queue_rows', 5000),
+            retention_days=retention.get('default_days', 30),
+            enable_auto_cleanup=retention.get('enabled', False),
+            table_retention_days=retention.get('tables') or {},
+            retention_interval_hours=retention.get('interval_hours', 24.0),
+            retention_chunk_rows=retention.get('chunk_rows', 5000),
+            retention_vacuum_pages=retention.get('vacuum_pages', 1000)
         )
         
         # Use database storage only
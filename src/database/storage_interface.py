@@ -1,8 +1,15 @@
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, AsyncIterator, Sequence
 from abc import ABC, abstractmethod
 from datetime import datetime
 
+import numpy as np
+
+from .columnar import DEFAULT_ENERGY_COLUMNS, columns_from_records, validate_energy_columns
+
+# Rows per chunk yielded by the iter_* streaming queries
+DEFAULT_CHUNK_SIZE = 1000
+
 class ConnectionError(Exception):
     pass
 
@@ -18,6 +25,30 @@ class StorageConfig:
     # Data retention settings (in days, 0 = no retention/keep forever)
     retention_days: int = 30
     enable_auto_cleanup: bool = False
+    # Per-table overrides of retention_days (0 = keep forever), e.g.
+    # {'coordinator_decisions': 0, 'energy_data': 90}
+    table_retention_days: Dict[str, int] = field(default_factory=dict)
+    # Background retention (enable_auto_cleanup): runs every interval, deletes
+    # retention_chunk_rows rows per transaction, releases up to
+    # retention_vacuum_pages free pages and sleeps retention_chunk_pause
+    # seconds between chunks
+    retention_interval_hours: float = 24.0
+    retention_chunk_rows: int = 5000
+    retention_vacuum_pages: int = 1000
+    retention_chunk_pause: float = 0.05
+    # CompositeStorage replication: bounded queue per secondary, overflow
+    # policy ('block', 'drop_oldest' or 'drop_newest'; dropped writes are
+    # replayed from the primary by catch-up), health probe interval while a
+    # secondary is down, and how long disconnect() waits for queues to drain
+    replication_queue_size: int = 1000
+    replication_overflow: str = 'drop_oldest'
+    replication_probe_interval: float = 5.0
+    replication_drain_timeout: float = 10.0
+    # Write-behind batching (opt-in): queue energy/state/decision writes and
+    # commit them together every flush interval or every batch_size rows
+    write_behind_enabled: bool = False
+    write_behind_flush_interval: float = 5.0
+    write_behind_max_queue: int = 5000
 
 class DataStorageInterface(ABC):
     """Abstract base class for data storage implementations."""
@@ -47,6 +78,40 @@ class DataStorageInterface(ABC):
         """Retrieve historical energy data."""
         pass
 
+    async def iter_energy_data(self, start_time: datetime, end_time: datetime,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream historical energy data in time order, chunk_size rows at a time.
+        
+        The default slices get_energy_data(); backends override it to keep
+        memory constant over long ranges.
+        """
+        rows = await self.get_energy_data(start_time, end_time)
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+
+    async def get_energy_columns(self, start_time: datetime, end_time: datetime,
+                                 columns: Sequence[str] = DEFAULT_ENERGY_COLUMNS) -> Dict[str, np.ndarray]:
+        """
+        Retrieve historical energy data as one contiguous array per column.
+        
+        Returns ``ts_ms`` (int64 epoch milliseconds, ascending) plus a float64
+        array for each requested column, NaN where a value is missing. The
+        default converts get_energy_data(); backends override it to build the
+        arrays without per-row dicts.
+        
+        Raises:
+            ValueError: for unknown or non-numeric columns
+        """
+        columns = validate_energy_columns(columns)
+        return columns_from_records(await self.get_energy_data(start_time, end_time), columns)
+
+    @abstractmethod
+    async def get_energy_rollups(self, resolution: str, start_time: datetime,
+                                 end_time: datetime) -> List[Dict[str, Any]]:
+        """Retrieve energy rollups ('15min', 'hourly' or 'daily') whose bucket starts within a time range."""
+        pass
+
     @abstractmethod
     async def save_system_state(self, state: Dict[str, Any]) -> bool:
         """Save MasterCoordinator state."""
@@ -62,6 +127,28 @@ class DataStorageInterface(ABC):
         """Retrieve system states within a time range."""
         pass
 
+    async def iter_system_state_range(self, start_time: datetime, end_time: datetime,
+                                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream system states within a time range, chunk_size rows at a time."""
+        rows = await self.get_system_state_range(start_time, end_time)
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+
+    @abstractmethod
+    async def save_coordinator_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """Save a typed coordinator snapshot."""
+        pass
+
+    @abstractmethod
+    async def get_coordinator_snapshots(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+        """Retrieve coordinator snapshots within a time range."""
+        pass
+
+    @abstractmethod
+    async def get_latest_coordinator_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Retrieve the most recent coordinator snapshot."""
+        pass
+
     @abstractmethod
     async def save_decision(self, decision: Dict[str, Any]) -> bool:
         """Save charging/discharging decisions."""
@@ -72,6 +159,13 @@ class DataStorageInterface(ABC):
         """Retrieve historical decisions."""
         pass
         
+    async def iter_decisions(self, start_time: datetime, end_time: datetime,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream historical decisions in time order, chunk_size rows at a time."""
+        rows = await self.get_decisions(start_time, end_time)
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+
     @abstractmethod
     async def save_charging_session(self, session: Dict[str, Any]) -> bool:
         """Save or update a charging session."""
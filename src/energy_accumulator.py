@@ -0,0 +1,260 @@
+"""
+Energy Accumulator - Streaming time-weighted daily energy totals.
+
+Each sample adds the energy of the interval since the previous sample by
+trapezoidal integration over the real sample timestamps, so the totals are
+right whatever the sampling cadence (5-20 s sampler, 60 s loop, missed
+reads). The work per sample is constant: no history is kept or rescanned.
+
+- Columns and sign conventions match the daily energy rollups
+  (``database.energy_rollups``): grid_power > 0 is export, < 0 import;
+  battery_power > 0 is discharge, < 0 charge. An interval whose power
+  changes sign is split at the zero crossing.
+- Intervals longer than ``max_gap`` (default MAX_SAMPLE_GAP) are treated as
+  missing data, as in the rollups, and only lower ``covered_seconds``.
+- The day rolls over at local midnight (Europe/Warsaw by default); an
+  interval spanning midnight is split between the two days.
+- With a state file the totals, the recent completed days and the last
+  sample are saved as JSON, so a restart continues the same day and the
+  first interval after a short restart is still integrated.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pytz
+
+from database.energy_rollups import MAX_SAMPLE_GAP
+from sample_buffer import Sample
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = 'Europe/Warsaw'
+DEFAULT_RETENTION_DAYS = 14
+
+ENERGY_COLUMNS = ('pv_kwh', 'house_kwh', 'grid_import_kwh', 'grid_export_kwh',
+                  'battery_charge_kwh', 'battery_discharge_kwh')
+
+# Sample fields -> (column for positive power, column for negative power)
+_CHANNELS = (
+    ('pv_power_w', 'pv_kwh', None),
+    ('house_consumption_w', 'house_kwh', None),
+    ('grid_power_w', 'grid_export_kwh', 'grid_import_kwh'),
+    ('battery_power_w', 'battery_discharge_kwh', 'battery_charge_kwh'),
+)
+
+_STATE_VERSION = 1
+
+
+def split_trapezoid(start_w: float, end_w: float, seconds: float) -> Tuple[float, float]:
+    """
+    Energy of a linear power ramp, split by sign.
+
+    Args:
+        start_w: Power at the start of the interval (W)
+        end_w: Power at the end of the interval (W)
+        seconds: Interval length
+
+    Returns:
+        (positive kWh, negative kWh as a positive number)
+    """
+    if start_w >= 0 and end_w >= 0:
+        return (start_w + end_w) * seconds / 7_200_000, 0.0
+    if start_w <= 0 and end_w <= 0:
+        return 0.0, -(start_w + end_w) * seconds / 7_200_000
+    # Sign change: two triangles meeting at the zero crossing
+    scale = seconds / (7_200_000 * abs(start_w - end_w))
+    positive = max(start_w, end_w)
+    negative = min(start_w, end_w)
+    return positive * positive * scale, negative * negative * scale
+
+
+def _empty_day(day: str) -> Dict[str, Any]:
+    row = {'date': day, 'sample_count': 0, 'covered_seconds': 0.0}
+    row.update(dict.fromkeys(ENERGY_COLUMNS, 0.0))
+    row.update(dict.fromkeys(('min_soc', 'max_soc', 'peak_pv_w', 'peak_house_w',
+                              'peak_import_w', 'peak_export_w',
+                              'first_timestamp', 'last_timestamp')))
+    return row
+
+
+class EnergyAccumulator:
+    """Daily energy totals integrated sample by sample"""
+
+    def __init__(self, state_file: Optional[Path] = None, timezone: str = DEFAULT_TIMEZONE,
+                 max_gap: timedelta = MAX_SAMPLE_GAP, retention_days: Optional[int] = DEFAULT_RETENTION_DAYS):
+        """
+        Initialize energy accumulator.
+
+        Args:
+            state_file: JSON file the state is loaded from and saved to (None: in memory only)
+            timezone: Timezone whose midnight ends a day
+            max_gap: Longest interval that is integrated
+            retention_days: Completed days kept (None keeps all)
+        """
+        self.state_file = Path(state_file) if state_file else None
+        self.tz = pytz.timezone(timezone)
+        self.max_gap = max_gap.total_seconds()
+        self.retention_days = retention_days
+
+        self.day: Optional[str] = None
+        self.totals: Optional[Dict[str, Any]] = None
+        self.days: Dict[str, Dict[str, Any]] = {}  # Completed days by date
+        self._last: Optional[Sample] = None
+        self._day_end = float('-inf')  # Epoch seconds of the next midnight
+
+        self.dropped_out_of_order = 0
+
+        if self.state_file:
+            self.load()
+
+    def _start_day(self, ts: float) -> None:
+        """Open the day containing ts"""
+        local = datetime.fromtimestamp(ts, self.tz)
+        next_day = local.date() + timedelta(days=1)
+        self.day = local.date().isoformat()
+        self.totals = _empty_day(self.day)
+        self._day_end = self.tz.localize(datetime(next_day.year, next_day.month, next_day.day)).timestamp()
+
+    def _close_day(self) -> None:
+        """Move the current day to the completed days"""
+        if self.totals is not None and self.totals['sample_count']:
+            self.days[self.day] = self.totals
+            if self.retention_days is not None:
+                cutoff = (datetime.strptime(self.day, '%Y-%m-%d').date()
+                          - timedelta(days=self.retention_days)).isoformat()
+                for day in [day for day in self.days if day <= cutoff]:
+                    del self.days[day]
+        self.totals = None
+
+    def _integrate(self, prev: Sample, curr: Sample, start: float, end: float) -> None:
+        """Add the energy of prev->curr (linear) over [start, end] to the current day"""
+        span = curr.ts - prev.ts
+        seconds = end - start
+        totals = self.totals
+        totals['covered_seconds'] += seconds
+        for field, positive_column, negative_column in _CHANNELS:
+            a, b = getattr(prev, field), getattr(curr, field)
+            if a is None or b is None:
+                continue
+            # Power at the segment ends (the segment is a part of the interval at midnight)
+            a, b = a + (b - a) * (start - prev.ts) / span, a + (b - a) * (end - prev.ts) / span
+            positive, negative = split_trapezoid(a, b, seconds)
+            totals[positive_column] += positive
+            if negative_column:
+                totals[negative_column] += negative
+
+    def _record(self, sample: Sample) -> None:
+        """Per-sample count, SOC range and peaks"""
+        totals = self.totals
+        totals['sample_count'] += 1
+        soc = sample.battery_soc
+        if soc is not None:
+            totals['min_soc'] = soc if totals['min_soc'] is None else min(totals['min_soc'], soc)
+            totals['max_soc'] = soc if totals['max_soc'] is None else max(totals['max_soc'], soc)
+        grid = sample.grid_power_w
+        for column, value in (('peak_pv_w', sample.pv_power_w),
+                              ('peak_house_w', sample.house_consumption_w),
+                              ('peak_import_w', -grid if grid is not None and grid < 0 else None),
+                              ('peak_export_w', grid if grid is not None and grid > 0 else None)):
+            if value is not None and (totals[column] is None or value > totals[column]):
+                totals[column] = value
+        stamp = datetime.fromtimestamp(sample.ts, self.tz).isoformat()
+        if totals['first_timestamp'] is None:
+            totals['first_timestamp'] = stamp
+        totals['last_timestamp'] = stamp
+
+    def add(self, sample: Sample) -> bool:
+        """
+        Integrate the interval since the previous sample and record this one.
+
+        Returns:
+            False (and ignores the sample) if it is not newer than the previous one
+        """
+        prev = self._last
+        if prev is not None and sample.ts <= prev.ts:
+            self.dropped_out_of_order += 1
+            return False
+
+        integrate = prev is not None and sample.ts - prev.ts <= self.max_gap
+        start = prev.ts if prev is not None else sample.ts
+        if self.totals is None:
+            self._start_day(start)
+        while sample.ts >= self._day_end:
+            # Book the part before midnight, then open the next day
+            midnight = self._day_end
+            if integrate and start < midnight:
+                self._integrate(prev, sample, start, midnight)
+                start = midnight
+            self._close_day()
+            self._start_day(midnight)
+            self.save()
+        if integrate:
+            self._integrate(prev, sample, start, sample.ts)
+        self._record(sample)
+        self._last = sample
+        return True
+
+    def add_data(self, data: Dict[str, Any]) -> bool:
+        """Add EnhancedDataCollector comprehensive data"""
+        return self.add(Sample.from_current_data(data))
+
+    def today(self) -> Dict[str, Any]:
+        """Totals of the current day (empty if no sample arrived yet)"""
+        return dict(self.totals) if self.totals is not None else _empty_day(
+            datetime.now(self.tz).date().isoformat())
+
+    def daily_totals(self) -> Dict[str, Dict[str, Any]]:
+        """Completed days and the current day, by date"""
+        result = dict(self.days)
+        if self.totals is not None and self.totals['sample_count']:
+            result[self.day] = self.totals
+        return result
+
+    def load(self) -> bool:
+        """Restore the saved state (a missing or unreadable file starts fresh)"""
+        if not self.state_file or not self.state_file.exists():
+            return False
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            if state.get('version') != _STATE_VERSION:
+                raise ValueError(f"unsupported state version {state.get('version')}")
+            self.days = state.get('days', {})
+            last = state.get('last')
+            self._last = Sample(**last) if last else None
+            if state.get('totals') and self._last is not None:
+                self._start_day(self._last.ts)
+                if self.day == state['totals'].get('date'):
+                    self.totals = state['totals']
+            logger.info(f"Energy totals restored for {self.day or 'no day'} "
+                        f"({len(self.days)} completed day(s))")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load energy accumulator state: {e}, starting fresh")
+            self.days, self.totals, self._last = {}, None, None
+            return False
+
+    def save(self) -> bool:
+        """Atomically save the state to the state file"""
+        if not self.state_file or self._last is None:
+            return False
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            state = {
+                'version': _STATE_VERSION,
+                'totals': self.totals,
+                'days': self.days,
+                'last': {name: getattr(self._last, name) for name in Sample.__slots__},
+            }
+            temp_file = self.state_file.with_suffix('.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(state, f, indent=2)
+            temp_file.replace(self.state_file)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save energy accumulator state: {e}")
+            return False
@@ -15,7 +15,6 @@ import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional
-from collections import deque
 import statistics
 import yaml
 
@@ -29,6 +28,9 @@ sys.path.insert(0, str(current_dir))
 
 from fast_charge import GoodWeFastCharger
 from database.storage_factory import StorageFactory
+from energy_accumulator import DEFAULT_TIMEZONE, EnergyAccumulator
+from inverter import InverterConfig, InverterFactory
+from sample_buffer import Sample
 from tariff_pricing import TariffPricingCalculator
 
 # Setup logging
@@ -62,7 +64,15 @@ class EnhancedDataCollector:
                 logger.error(f"Failed to load config: {e}")
                 self.config = {}
         
-        self.goodwe_charger = GoodWeFastCharger(config_path if not isinstance(config_path, dict) else self.config)
+        # Multi-inverter site: all units are collected through an inverter
+        # group, which the fast charger shares to command every unit
+        inverter_section = self.config.get('inverter') or {}
+        self.inverter_group = None
+        if InverterConfig.is_multi_config(inverter_section):
+            self.inverter_group = InverterFactory.create_group_from_yaml_config(inverter_section)
+        
+        self.goodwe_charger = GoodWeFastCharger(config_path if not isinstance(config_path, dict) else self.config,
+                                                inverter_group=self.inverter_group)
 
         # Initialize storage via factory
         self.storage = StorageFactory.create_storage(self.config.get('data_storage', {}))
@@ -70,11 +80,15 @@ class EnhancedDataCollector:
         # Initialize tariff pricing calculator
         self.tariff_calculator = TariffPricingCalculator(self.config)
         
-        # Data storage with deque for efficient O(1) operations
-        # 30240 data points = 7 days at 20-second intervals
+        # Latest collected data; sample history is kept by the coordinator's
+        # SampleRing and the storage backend, not as nested dicts here
         self.current_data: Dict[str, Any] = {}
-        self.historical_data: deque = deque(maxlen=30240)
-        self.daily_stats: Dict[str, Any] = {}
+        
+        # Today's energy totals, integrated sample by sample (persisted if configured)
+        self.energy = EnergyAccumulator(
+            state_file=self.config.get('data_storage', {}).get('energy_state_file'),
+            timezone=self.config.get('system', {}).get('timezone', DEFAULT_TIMEZONE)
+        )
         
         # Monitoring intervals
         self.monitoring_interval = 20  # seconds
@@ -89,54 +103,57 @@ class EnhancedDataCollector:
             logger.error("Failed to connect to data storage")
             # We continue even if storage fails, as we might have fallback or just in-memory
         
-        # Connect to GoodWe inverter
+        # Connect to GoodWe inverter (a group connects its units concurrently)
         if not await self.goodwe_charger.connect_inverter():
             logger.error("Failed to connect to GoodWe inverter")
             return False
         
         logger.info("Successfully connected to GoodWe inverter")
         
-        # Initialize daily stats
-        self._initialize_daily_stats()
-        
         return True
     
-    def _initialize_daily_stats(self):
-        """Initialize daily statistics tracking"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        self.daily_stats = {
-            'date': today,
+    @property
+    def daily_stats(self) -> Dict[str, Any]:
+        """Today's statistics from the energy accumulator (peaks in kW)"""
+        today = self.energy.today()
+        
+        def kw(watts):
+            return (watts or 0.0) / 1000.0
+        
+        return {
+            'date': today['date'],
             'pv_production': {
-                'total_kwh': 0.0,
-                'peak_power': 0.0,
-                'peak_time': None,
-                'hours_above_1kw': 0,
-                'hours_above_5kw': 0
+                'total_kwh': today['pv_kwh'],
+                'peak_power': kw(today['peak_pv_w'])
             },
             'battery': {
-                'total_charge_kwh': 0.0,
-                'total_discharge_kwh': 0.0,
-                'min_soc': 100.0,
-                'max_soc': 0.0,
-                'charge_cycles': 0
+                'total_charge_kwh': today['battery_charge_kwh'],
+                'total_discharge_kwh': today['battery_discharge_kwh'],
+                'min_soc': today['min_soc'] if today['min_soc'] is not None else 100.0,
+                'max_soc': today['max_soc'] if today['max_soc'] is not None else 0.0
             },
             'grid': {
-                'total_import_kwh': 0.0,
-                'total_export_kwh': 0.0,
-                'peak_import': 0.0,
-                'peak_export': 0.0,
-                'net_consumption': 0.0
+                'total_import_kwh': today['grid_import_kwh'],
+                'total_export_kwh': today['grid_export_kwh'],
+                'peak_import': kw(today['peak_import_w']),
+                'peak_export': kw(today['peak_export_w']),
+                'net_consumption': today['grid_import_kwh'] - today['grid_export_kwh']
             },
             'house_consumption': {
-                'total_kwh': 0.0,
-                'peak_power': 0.0,
-                'peak_time': None
+                'total_kwh': today['house_kwh'],
+                'peak_power': kw(today['peak_house_w'])
             }
         }
     
     async def collect_comprehensive_data(self) -> Dict[str, Any]:
         """Collect comprehensive data from the GoodWe inverter"""
+        if self.inverter_group:
+            return await self._collect_group_data()
+        
         try:
+            # New cycle: the status and sensor reads below share one inverter read
+            self.goodwe_charger.begin_cycle()
+            
             # Get basic inverter status
             status = await self.goodwe_charger.get_charging_status()
             
@@ -215,15 +232,7 @@ class EnhancedDataCollector:
             }
             
             # Determine current tariff zone (T1/T2) for real-time decisions
-            try:
-                ts = datetime.fromisoformat(comprehensive_data['timestamp'])
-                dist_price = self.tariff_calculator._get_distribution_price(ts)
-                g12_config = self.config.get('electricity_tariff', {}).get('distribution_pricing', {}).get('g12', {})
-                peak_price = g12_config.get('prices', {}).get('peak', 0.3566)
-                comprehensive_data['tariff_zone'] = 'T1' if dist_price == peak_price else 'T2'
-            except Exception as e:
-                logger.warning(f"Failed to determine real-time tariff zone: {e}")
-                comprehensive_data['tariff_zone'] = 'T1'
+            comprehensive_data['tariff_zone'] = self._get_tariff_zone(comprehensive_data['timestamp'])
             
             # Add compatibility aliases for backward compatibility
             # Map 'system' to 'inverter' for battery_selling_monitor
@@ -249,16 +258,103 @@ class EnhancedDataCollector:
                     'current_power_w': comprehensive_data['house_consumption'].get('current_power_w', 0)
                 }
             
-            # Store current data
-            self.current_data = comprehensive_data
+            self._store_collected(comprehensive_data)
             
-            # Add to historical data (deque automatically removes oldest when maxlen exceeded)
-            self.historical_data.append(comprehensive_data)
+            logger.info(f"Data collected successfully at {comprehensive_data['time']}")
+            return comprehensive_data
             
-            # Update daily statistics
-            self._update_daily_stats(comprehensive_data)
+        except Exception as e:
+            logger.error(f"Failed to collect comprehensive data: {e}")
+            return {}
+    
+    def _get_tariff_zone(self, timestamp: str) -> str:
+        """Tariff zone (T1 peak / T2 off-peak) at an ISO timestamp"""
+        try:
+            ts = datetime.fromisoformat(timestamp)
+            dist_price = self.tariff_calculator._get_distribution_price(ts)
+            g12_config = self.config.get('electricity_tariff', {}).get('distribution_pricing', {}).get('g12', {})
+            peak_price = g12_config.get('prices', {}).get('peak', 0.3566)
+            return 'T1' if dist_price == peak_price else 'T2'
+        except Exception as e:
+            logger.warning(f"Failed to determine real-time tariff zone: {e}")
+            return 'T1'
+    
+    def _store_collected(self, comprehensive_data: Dict[str, Any]) -> None:
+        """Make collected data current and add it to today's totals"""
+        # Store current data
+        self.current_data = comprehensive_data
+        
+        # Integrate the interval since the previous sample into today's totals
+        self.energy.add_data(comprehensive_data)
+    
+    async def _collect_group_data(self) -> Dict[str, Any]:
+        """Collect all inverters of a multi-inverter site concurrently (site totals + per-device data)"""
+        try:
+            site = await self.inverter_group.collect_comprehensive_data()
+            battery, pv = site.battery, site.photovoltaic
+            house = site.house_consumption
+            # Adapters report grid power with import positive; this collector uses export positive
+            grid_power = -site.grid.get('current_power_w', 0.0)
+            online = site.inverter['online_devices']
             
-            logger.info(f"Data collected successfully at {comprehensive_data['time']}")
+            comprehensive_data = {
+                'timestamp': site.timestamp,
+                'date': site.date,
+                'time': site.time,
+                'battery': {
+                    'soc_percent': round(battery.get('soc_percent', 0.0), 1),
+                    'voltage': battery.get('voltage', 'Unknown'),
+                    'current': battery.get('current', 'Unknown'),
+                    'power_w': battery.get('power_w', 'Unknown'),
+                    'power_kw': self._convert_to_kw(battery.get('power_w', 0)),
+                    'temperature': battery.get('temperature', 'Unknown'),
+                    'charging_status': battery.get('charging_status', False),
+                    'fast_charging_enabled': battery.get('fast_charging_enabled', False)
+                },
+                'photovoltaic': {
+                    'current_power_w': pv.get('current_power_w', 'Unknown'),
+                    'current_power_kw': self._convert_to_kw(pv.get('current_power_w', 0)),
+                    'daily_production_kwh': pv.get('daily_generation_kwh', 'Unknown'),
+                    'efficiency_percent': pv.get('efficiency_percent', 0.0)
+                },
+                'grid': {
+                    'power_w': grid_power,
+                    'power_kw': self._convert_to_kw(grid_power),
+                    'voltage': site.grid.get('voltage', 'Unknown'),
+                    'flow_direction': self._determine_grid_flow(grid_power),
+                    'import_rate': self._get_import_rate(grid_power),
+                    'export_rate': self._get_export_rate(grid_power)
+                },
+                'house_consumption': {
+                    'current_power_w': house.get('current_power_w', 'Unknown'),
+                    'current_power_kw': self._convert_to_kw(house.get('current_power_w', 0)),
+                    'daily_total_kwh': house.get('daily_consumption_kwh', 'Unknown')
+                },
+                'system': {
+                    'inverter_model': site.inverter['model'],
+                    'inverter_serial': site.inverter['serial'],
+                    'connection_status': ('Connected' if online == site.inverter['total_devices']
+                                          else f"Degraded ({online}/{site.inverter['total_devices']} online)"),
+                    'last_update': site.timestamp
+                },
+                'devices': site.devices,
+                'tariff_zone': self._get_tariff_zone(site.timestamp)
+            }
+            comprehensive_data['inverter'] = {**comprehensive_data['system'], 'error_codes': []}
+            comprehensive_data['pv'] = {
+                'power': pv.get('current_power_w', 0),
+                'power_w': pv.get('current_power_w', 0),
+                'total_power': pv.get('current_power_w', 0)
+            }
+            comprehensive_data['consumption'] = {
+                'house_consumption': house.get('current_power_w', 0),
+                'power_w': house.get('current_power_w', 0),
+                'current_power_w': house.get('current_power_w', 0)
+            }
+            
+            self._store_collected(comprehensive_data)
+            
+            logger.info(f"Data collected from {online} inverter(s) at {comprehensive_data['time']}")
             return comprehensive_data
             
         except Exception as e:
@@ -275,23 +371,8 @@ class EnhancedDataCollector:
             return 0.0
     
     def _get_daily_pv_production(self) -> float:
-        """Get daily PV production from historical data (fallback method)"""
-        try:
-            # Fallback to historical calculation
-            today = datetime.now().strftime('%Y-%m-%d')
-            daily_data = [d for d in self.historical_data if d.get('date') == today]
-            
-            total_production = 0.0
-            for data in daily_data:
-                pv_power = data.get('photovoltaic', {}).get('current_power_kw', 0.0)
-                if isinstance(pv_power, (int, float)) and pv_power > 0:
-                    # Convert power to energy (assuming 20-second intervals)
-                    total_production += pv_power / 180.0  # kWh per 20-second interval
-            
-            return round(total_production, 3)
-        except Exception as e:
-            logger.error(f"Failed to get daily PV production: {e}")
-            return 0.0
+        """Get today's PV production (kWh) from the energy accumulator"""
+        return round(self.energy.today()['pv_kwh'], 3)
     
     def _calculate_pv_efficiency(self, sensor_data: Dict) -> float:
         """Calculate PV system efficiency (placeholder for now)"""
@@ -364,84 +445,14 @@ class EnhancedDataCollector:
             return 0.0
     
     def _get_daily_house_consumption(self) -> float:
-        """Get daily house consumption from historical data (fallback method)"""
-        try:
-            # Fallback to historical calculation
-            today = datetime.now().strftime('%Y-%m-%d')
-            daily_data = [d for d in self.historical_data if d.get('date') == today]
-            
-            total_consumption = 0.0
-            for data in daily_data:
-                consumption = data.get('house_consumption', {}).get('calculated_power_kw', 0.0)
-                if isinstance(consumption, (int, float)) and consumption > 0:
-                    # Convert power to energy (assuming 20-second intervals)
-                    total_consumption += consumption / 180.0  # kWh per 20-second interval
-            
-            return round(total_consumption, 3)
-        except Exception as e:
-            logger.error(f"Failed to get daily house consumption: {e}")
-            return 0.0
-    
-    def _update_daily_stats(self, data: Dict[str, Any]):
-        """Update daily statistics with new data"""
-        try:
-            # PV Production stats
-            pv_power = data.get('photovoltaic', {}).get('current_power_kw', 0.0)
-            if isinstance(pv_power, (int, float)) and pv_power > 0:
-                self.daily_stats['pv_production']['total_kwh'] += pv_power / 180.0  # kWh per 20-second interval
-                if pv_power > self.daily_stats['pv_production']['peak_power']:
-                    self.daily_stats['pv_production']['peak_power'] = pv_power
-                    self.daily_stats['pv_production']['peak_time'] = data.get('time')
-                
-                if pv_power > 1.0:
-                    self.daily_stats['pv_production']['hours_above_1kw'] += 1/180
-                if pv_power > 5.0:
-                    self.daily_stats['pv_production']['hours_above_5kw'] += 1/180
-            
-            # Battery stats
-            battery_soc = data.get('battery', {}).get('soc_percent', 0)
-            if isinstance(battery_soc, (int, float)):
-                if battery_soc < self.daily_stats['battery']['min_soc']:
-                    self.daily_stats['battery']['min_soc'] = battery_soc
-                if battery_soc > self.daily_stats['battery']['max_soc']:
-                    self.daily_stats['battery']['max_soc'] = battery_soc
-            
-            # Track battery charging/discharging
-            battery_power = data.get('battery', {}).get('power_kw', 0.0)
-            if isinstance(battery_power, (int, float)):
-                if battery_power > 0:  # Charging
-                    self.daily_stats['battery']['total_charge_kwh'] += battery_power / 180.0
-                elif battery_power < 0:  # Discharging
-                    self.daily_stats['battery']['total_discharge_kwh'] += abs(battery_power) / 180.0
-            
-            # Grid stats
-            grid_power = data.get('grid', {}).get('power_kw', 0.0)
-            if isinstance(grid_power, (int, float)):
-                if grid_power > 0:  # Import
-                    self.daily_stats['grid']['total_import_kwh'] += grid_power / 180.0
-                    if grid_power > self.daily_stats['grid']['peak_import']:
-                        self.daily_stats['grid']['peak_import'] = grid_power
-                elif grid_power < 0:  # Export
-                    self.daily_stats['grid']['total_export_kwh'] += abs(grid_power) / 180.0
-                    if abs(grid_power) > self.daily_stats['grid']['peak_export']:
-                        self.daily_stats['grid']['peak_export'] = abs(grid_power)
-                
-                # Calculate net grid consumption (import - export)
-                self.daily_stats['grid']['net_consumption'] = self.daily_stats['grid']['total_import_kwh'] - self.daily_stats['grid']['total_export_kwh']
-            
-            # House consumption stats
-            house_power = data.get('house_consumption', {}).get('current_power_kw', 0.0)
-            if isinstance(house_power, (int, float)) and house_power > 0:
-                self.daily_stats['house_consumption']['total_kwh'] += house_power / 180.0
-                if house_power > self.daily_stats['house_consumption']['peak_power']:
-                    self.daily_stats['house_consumption']['peak_power'] = house_power
-                    self.daily_stats['house_consumption']['peak_time'] = data.get('time')
-                    
-        except Exception as e:
-            logger.error(f"Failed to update daily stats: {e}")
+        """Get today's house consumption (kWh) from the energy accumulator"""
+        return round(self.energy.today()['house_kwh'], 3)
     
     async def save_data_to_file(self):
         """Save collected data to storage (file or database)"""
+        # Today's energy totals survive a restart even if storage is down
+        self.energy.save()
+        
         try:
             # Prepare data for storage
             if self.current_data:
@@ -511,6 +522,47 @@ class EnhancedDataCollector:
         """Get current system data"""
         return self.current_data.copy() if self.current_data else {}
     
+    def _accumulate_consumption(self, energy_data: List[Dict[str, Any]],
+                                accumulator: Optional[EnergyAccumulator] = None) -> EnergyAccumulator:
+        """Integrate house consumption of stored readings per day over their real timestamps.
+        
+        Pass the result of a previous call as accumulator to continue with the
+        next chunk of a streamed query.
+        """
+        if accumulator is None:
+            accumulator = EnergyAccumulator(timezone=self.energy.tz.zone, retention_days=None)
+        
+        for entry in energy_data:
+            try:
+                # Get timestamp
+                ts = entry.get('timestamp')
+                if isinstance(ts, str):
+                    ts = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+                elif not isinstance(ts, datetime):
+                    continue
+                
+                # Get consumption value (check multiple possible field names)
+                consumption_w = (
+                    entry.get('house_consumption') or  # From flattened storage
+                    entry.get('house_consumption', {}).get('current_power_w') or  # From nested structure
+                    entry.get('consumption', {}).get('power_w') or  # Alternative field
+                    0
+                )
+                
+                if isinstance(consumption_w, dict):
+                    consumption_w = consumption_w.get('current_power_w', 0)
+                
+                if consumption_w is None or consumption_w == 'Unknown':
+                    consumption_w = 0
+                
+                accumulator.add(Sample(ts.timestamp(), house_consumption_w=float(consumption_w)))
+                
+            except Exception as e:
+                logger.debug(f"Error processing energy entry: {e}")
+                continue
+        
+        return accumulator
+    
     async def get_average_daily_consumption(self, days: int = 7) -> Dict[str, Any]:
         """
         Get average daily house consumption over the specified number of days.
@@ -545,57 +597,39 @@ class EnhancedDataCollector:
             end_time = datetime.now()
             start_time = end_time - timedelta(days=days)
             
-            # Query energy data from storage
-            energy_data = await self.storage.get_energy_data(start_time, end_time)
-            
-            if not energy_data:
-                # Fallback to in-memory historical data
-                energy_data = list(self.historical_data)
-                if not energy_data:
-                    result['reason'] = f"No historical consumption data available for the last {days} days"
-                    return result
-            
-            # Group data by day and calculate daily consumption
+            # Daily rollups: one time-weighted row per day instead of every reading
+            day_start = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
             daily_consumption: Dict[str, float] = {}
-            
-            for entry in energy_data:
-                try:
-                    # Get timestamp
-                    ts = entry.get('timestamp')
-                    if isinstance(ts, str):
-                        ts = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-                    elif not isinstance(ts, datetime):
-                        continue
-                    
-                    date_str = ts.strftime('%Y-%m-%d')
-                    
-                    # Get consumption value (check multiple possible field names)
-                    consumption_w = (
-                        entry.get('house_consumption') or  # From flattened storage
-                        entry.get('house_consumption', {}).get('current_power_w') or  # From nested structure
-                        entry.get('consumption', {}).get('power_w') or  # Alternative field
-                        0
-                    )
-                    
-                    if isinstance(consumption_w, dict):
-                        consumption_w = consumption_w.get('current_power_w', 0)
-                    
-                    if consumption_w is None or consumption_w == 'Unknown':
-                        consumption_w = 0
-                    
-                    consumption_w = float(consumption_w)
-                    
-                    # Accumulate energy (convert power to energy based on interval)
-                    # Assume 20-second intervals (3 measurements per minute)
-                    energy_kwh = consumption_w / 1000.0 / 180.0  # kWh per 20-second interval
-                    
-                    if date_str not in daily_consumption:
-                        daily_consumption[date_str] = 0.0
-                    daily_consumption[date_str] += energy_kwh
-                    
-                except Exception as e:
-                    logger.debug(f"Error processing energy entry: {e}")
-                    continue
+            covered_seconds: Dict[str, float] = {}
+            for row in await self.storage.get_energy_rollups('daily', day_start, end_time) or []:
+                if row.get('sample_count') and row.get('house_kwh') is not None:
+                    day = row['bucket_start'][:10]
+                    daily_consumption[day] = float(row['house_kwh'])
+                    covered_seconds[day] = row.get('covered_seconds') or 0.0
+            
+            has_samples = bool(daily_consumption)
+            if not daily_consumption:
+                # Storage without rollups: integrate the raw readings chunk by chunk
+                accumulator = None
+                async for chunk in self.storage.iter_energy_data(start_time, end_time):
+                    has_samples = has_samples or bool(chunk)
+                    accumulator = self._accumulate_consumption(chunk, accumulator)
+                
+                for day, totals in (accumulator.daily_totals() if accumulator else {}).items():
+                    if totals['covered_seconds']:
+                        daily_consumption[day] = totals['house_kwh']
+                        covered_seconds[day] = totals['covered_seconds']
+            
+            # Days integrated live from every sample replace stored days covering less time
+            for day, totals in self.energy.daily_totals().items():
+                if (day >= day_start.date().isoformat() and totals['covered_seconds'] and
+                        totals['covered_seconds'] >= covered_seconds.get(day, 0.0)):
+                    has_samples = True
+                    daily_consumption[day] = totals['house_kwh']
+            
+            if not has_samples:
+                result['reason'] = f"No historical consumption data available for the last {days} days"
+                return result
             
             if not daily_consumption:
                 result['reason'] = "Failed to extract consumption data from historical records"
@@ -32,12 +32,22 @@ except ImportError:
     print("Error: goodwe library not found. Install with: pip install goodwe==0.4.8")
     sys.exit(1)
 
+from inverter.adapters.runtime_snapshot import RuntimeSnapshot, snapshot_for
+from inverter.models.inverter_config import InverterConfig
+from inverter.models.inverter_data import SensorIndex
+
 
 class GoodWeFastCharger:
     """GoodWe Inverter Fast Charging Controller"""
     
-    def __init__(self, config_path: str):
-        """Initialize the fast charger with configuration"""
+    def __init__(self, config_path: str, inverter_group: Optional[Any] = None):
+        """Initialize the fast charger with configuration
+        
+        Args:
+            config_path: Config file path or config dict
+            inverter_group: InverterGroup to share on a multi-inverter site
+                (one is created from the config's device list if None)
+        """
         # Support both dict config and file path
         if isinstance(config_path, dict):
             self.config_path = None
@@ -47,6 +57,9 @@ class GoodWeFastCharger:
             self.config = self._load_config()
         
         self.inverter: Optional[Inverter] = None
+        self.inverter_group = inverter_group
+        self._sensor_index: Optional[SensorIndex] = None
+        self._sensor_index_device: Optional[Inverter] = None
         self.charging_start_time: Optional[datetime] = None
         self.is_charging = False
         
@@ -109,6 +122,12 @@ class GoodWeFastCharger:
         """Connect to the GoodWe inverter with retry logic and delays"""
         inverter_config = self.config['inverter']
         
+        if InverterConfig.is_multi_config(inverter_config):
+            return await self._connect_inverter_group(inverter_config)
+        
+        if inverter_config.get('vendor') == 'simulated':
+            return self._connect_simulated_inverter(inverter_config)
+        
         # Use configuration values or defaults
         max_retries = max_retries or inverter_config.get('max_retries', 3)
         retry_delay = retry_delay or inverter_config.get('retry_delay', 2.0)
@@ -142,29 +161,77 @@ class GoodWeFastCharger:
         
         return False
     
+    async def _connect_inverter_group(self, inverter_config: Dict[str, Any]) -> bool:
+        """Drive every unit of a multi-inverter site through one group device"""
+        from inverter.adapters.inverter_group import GroupDevice
+        from inverter.factory.inverter_factory import InverterFactory
+        
+        if self.inverter_group is None:
+            self.inverter_group = InverterFactory.create_group_from_yaml_config(inverter_config)
+        if not self.inverter_group.is_connected() and not await self.inverter_group.connect():
+            self.logger.error("Failed to connect to any inverter")
+            return False
+        
+        self.inverter = GroupDevice(self.inverter_group)
+        self.logger.info(f"Connected to inverter group: {', '.join(self.inverter_group.names)}")
+        return True
+    
+    def _connect_simulated_inverter(self, inverter_config: Dict[str, Any]) -> bool:
+        """Attach to the shared simulated inverter described by the config's scenario"""
+        from inverter.models.inverter_config import InverterConfig
+        from inverter.adapters.simulated_adapter import get_simulated_inverter
+        
+        try:
+            vendor_config = InverterConfig.from_yaml_config(inverter_config).vendor_config
+            self.inverter = get_simulated_inverter(vendor_config)
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.error(f"Failed to load simulation scenario: {e}")
+            return False
+        
+        self.logger.info(f"Connected to simulated inverter {self.inverter.serial_number}")
+        return True
+    
     def is_connected(self) -> bool:
         """Check if inverter is connected"""
         return self.inverter is not None
     
+    @property
+    def runtime_snapshot(self) -> Optional[RuntimeSnapshot]:
+        """Runtime data snapshot shared with every other consumer of the inverter"""
+        if not self.inverter:
+            return None
+        return snapshot_for(self.inverter, self.config.get('inverter', {}).get('runtime_max_age'))
+    
+    @property
+    def sensor_index(self) -> Optional[SensorIndex]:
+        """Sensor table of the connected inverter, built on the first read from a device"""
+        if not self.inverter:
+            return None
+        if self._sensor_index is None or self._sensor_index_device is not self.inverter:
+            self._sensor_index = SensorIndex.from_sensors(self.inverter.sensors())
+            self._sensor_index_device = self.inverter
+        return self._sensor_index
+    
+    def begin_cycle(self):
+        """Start a collection cycle: the next runtime read goes to the inverter"""
+        if self.inverter:
+            self.runtime_snapshot.begin_cycle()
+    
     async def get_inverter_status(self) -> Dict[str, Any]:
-        """Get current inverter status and sensor data"""
+        """
+        Get current inverter status and sensor data
+        
+        Returns a RuntimeReading: ``status['ppv']['value']`` and
+        ``status.get('ppv', {})`` work as with the old dict, ``status.value('ppv')``
+        skips building the per-sensor dict.
+        """
         if not self.inverter:
             raise RuntimeError("Inverter not connected")
         
         try:
-            runtime_data = await self.inverter.read_runtime_data()
-            status = {}
-            
-            # Extract key sensor values
-            for sensor in self.inverter.sensors():
-                if sensor.id_ in runtime_data:
-                    status[sensor.id_] = {
-                        'name': sensor.name,
-                        'value': runtime_data[sensor.id_],
-                        'unit': sensor.unit
-                    }
-            
-            return status
+            # Shared with the other readers of this cycle (one UDP round trip)
+            runtime_data = await self.runtime_snapshot.read()
+            return self.sensor_index.reading(runtime_data)
             
         except Exception as e:
             self.logger.error(f"Failed to read inverter status: {e}")
@@ -240,6 +307,7 @@ class GoodWeFastCharger:
             
             self.is_charging = True
             self.charging_start_time = datetime.now()
+            self.runtime_snapshot.invalidate()
             
             self.logger.info("Fast charging started successfully")
             await self._send_notification("Fast charging started")
@@ -268,6 +336,7 @@ class GoodWeFastCharger:
             await self.inverter.write_setting('fast_charging', 0)
             
             self.is_charging = False
+            self.runtime_snapshot.invalidate()
             charging_duration = None
             if self.charging_start_time:
                 charging_duration = datetime.now() - self.charging_start_time
@@ -0,0 +1,177 @@
+"""
+HTTP Client - Shared, pooled async HTTP client for external APIs.
+
+One ``HttpClient`` is created by MasterCoordinator and injected into every
+collector (CSDAC prices, PSE forecasts, PSE peak hours, weather). It keeps a
+single ``aiohttp.ClientSession`` with keep-alive connection pooling and
+per-host connection limits, retries transient failures, and tracks latency and
+error counters per endpoint.
+
+The session is bound to the event loop it was created on. Requests issued from
+another loop (e.g. LogWebServer helper threads) use a short-lived session so
+they never touch the pooled connector from the wrong loop.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying (rate limiting and transient server errors)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HttpClient:
+    """Process-wide async HTTP client with pooling, retries and metrics"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize HTTP client.
+
+        Args:
+            config: ``http_client`` configuration section
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("aiohttp is required for HttpClient")
+
+        config = config or {}
+        self.timeout_seconds = config.get('timeout_seconds', 30)
+        self.connect_timeout_seconds = config.get('connect_timeout_seconds', 10)
+        self.max_connections = config.get('max_connections', 20)
+        self.max_connections_per_host = config.get('max_connections_per_host', 4)
+        self.keepalive_timeout_seconds = config.get('keepalive_timeout_seconds', 60)
+        self.retry_attempts = config.get('retry_attempts', 3)
+        self.retry_backoff_seconds = config.get('retry_backoff_seconds', 1.0)
+        self.user_agent = config.get('user_agent', 'goodwe-dynamic-price-optimiser')
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                       endpoint: Optional[str] = None, timeout_seconds: Optional[float] = None,
+                       retry_attempts: Optional[int] = None) -> Any:
+        """
+        GET a URL and decode the JSON response.
+
+        Transient failures (connection errors, timeouts, 429/5xx) are retried
+        with exponential backoff. Other HTTP errors raise immediately.
+
+        Args:
+            url: Request URL
+            params: Optional query parameters
+            endpoint: Name used for metrics (default: host + path)
+            timeout_seconds: Total timeout override for this request
+            retry_attempts: Retry attempts override for this request
+
+        Returns:
+            Decoded JSON payload
+
+        Raises:
+            aiohttp.ClientResponseError: Non-retryable HTTP error or retries exhausted
+            aiohttp.ClientError / asyncio.TimeoutError: Network error after retries
+        """
+        endpoint = endpoint or self._endpoint_name(url)
+        attempts = max(1, retry_attempts if retry_attempts is not None else self.retry_attempts)
+        timeout = aiohttp.ClientTimeout(
+            total=timeout_seconds or self.timeout_seconds,
+            connect=self.connect_timeout_seconds
+        )
+
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                payload = await self._request_json(url, params, timeout)
+                self._record(endpoint, started, error=False, retried=attempt > 0)
+                return payload
+            except aiohttp.ClientResponseError as e:
+                self._record(endpoint, started, error=True, retried=attempt > 0)
+                if e.status not in RETRY_STATUSES or attempt == attempts - 1:
+                    raise
+                logger.debug(f"{endpoint} returned {e.status}, retrying ({attempt + 1}/{attempts})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record(endpoint, started, error=True, retried=attempt > 0)
+                if attempt == attempts - 1:
+                    raise
+                logger.debug(f"{endpoint} request failed ({e!r}), retrying ({attempt + 1}/{attempts})")
+            await asyncio.sleep(self.retry_backoff_seconds * (2 ** attempt))
+
+    async def _request_json(self, url: str, params: Optional[Dict[str, Any]], timeout: 'aiohttp.ClientTimeout') -> Any:
+        """Perform one GET on the pooled session (or a one-off session off-loop)"""
+        session = self._get_session()
+        if session is None:
+            async with aiohttp.ClientSession(headers={'User-Agent': self.user_agent}) as one_off:
+                async with one_off.get(url, params=params, timeout=timeout) as response:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+
+        async with session.get(url, params=params, timeout=timeout) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    def _get_session(self) -> Optional['aiohttp.ClientSession']:
+        """Get the pooled session for the running loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed:
+            return self._session if self._session_loop is loop else None
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            keepalive_timeout=self.keepalive_timeout_seconds,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(connector=connector, headers={'User-Agent': self.user_agent})
+        self._session_loop = loop
+        logger.debug(f"HTTP session created (limit={self.max_connections}, per_host={self.max_connections_per_host})")
+        return self._session
+
+    def _record(self, endpoint: str, started: float, error: bool, retried: bool) -> None:
+        """Update per-endpoint counters"""
+        latency_ms = (time.perf_counter() - started) * 1000
+        stats = self._stats.setdefault(endpoint, {
+            'requests': 0, 'errors': 0, 'retries': 0,
+            'total_latency_ms': 0.0, 'max_latency_ms': 0.0
+        })
+        stats['requests'] += 1
+        stats['errors'] += int(error)
+        stats['retries'] += int(retried)
+        stats['total_latency_ms'] += latency_ms
+        stats['max_latency_ms'] = max(stats['max_latency_ms'], latency_ms)
+
+    @staticmethod
+    def _endpoint_name(url: str) -> str:
+        """Metrics key for a URL (host + path, without query)"""
+        parts = urlsplit(url)
+        return f"{parts.netloc}{parts.path}"
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-endpoint request metrics.
+
+        Returns:
+            Dict mapping endpoint to requests, errors, retries and latency (ms)
+        """
+        result = {}
+        for endpoint, stats in self._stats.items():
+            entry = dict(stats)
+            entry['avg_latency_ms'] = stats['total_latency_ms'] / stats['requests'] if stats['requests'] else 0.0
+            result[endpoint] = entry
+        return result
+
+    async def close(self) -> None:
+        """Close the pooled session and its connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP client closed")
+        self._session = None
+        self._session_loop = None
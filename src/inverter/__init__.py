@@ -8,6 +8,7 @@ The abstraction enables support for multiple inverter brands (GoodWe, Fronius, S
 while maintaining a consistent interface for the energy management algorithm.
 """
 
+from .adapters.inverter_group import InverterGroup
 from .factory.inverter_factory import InverterFactory
 from .models.operation_mode import OperationMode
 from .models.inverter_config import InverterConfig, SafetyConfig
@@ -15,6 +16,7 @@ from .ports.inverter_port import InverterPort
 
 __all__ = [
     'InverterFactory',
+    'InverterGroup',
     'InverterPort',
     'OperationMode',
     'InverterConfig',
@@ -7,8 +7,16 @@ vendor-specific inverter libraries/APIs.
 """
 
 from .goodwe_adapter import GoodWeInverterAdapter
+from .inverter_group import GroupDevice, InverterGroup
+from .runtime_snapshot import RuntimeSnapshot, snapshot_for
+from .simulated_adapter import SimulatedInverterAdapter
 
 __all__ = [
     'GoodWeInverterAdapter',
+    'SimulatedInverterAdapter',
+    'InverterGroup',
+    'GroupDevice',
+    'RuntimeSnapshot',
+    'snapshot_for',
 ]
 
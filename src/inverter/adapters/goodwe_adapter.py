@@ -21,9 +21,12 @@ except ImportError:
 from ..ports.inverter_port import InverterPort
 from ..models.operation_mode import OperationMode
 from ..models.inverter_config import InverterConfig, SafetyConfig
-from ..models.inverter_data import InverterStatus, InverterState, SensorReading, InverterCapabilities
+from ..models.inverter_data import (
+    InverterStatus, InverterState, InverterCapabilities, SensorIndex, RuntimeReading
+)
 from ..models.battery_status import BatteryStatus, BatteryData, BatteryCapabilities
 from ..ports.data_collector_port import PVData, GridData, ConsumptionData, ComprehensiveData
+from .runtime_snapshot import RuntimeSnapshot, snapshot_for
 
 
 class GoodWeInverterAdapter(InverterPort):
@@ -54,6 +57,9 @@ class GoodWeInverterAdapter(InverterPort):
         self._config: Optional[InverterConfig] = None
         self._is_charging = False
         self._charging_start_time: Optional[datetime] = None
+        self._sensor_index: Optional[SensorIndex] = None
+        self._last_runtime_data: Optional[Dict[str, Any]] = None
+        self._last_reading: Optional[RuntimeReading] = None
     
     @property
     def vendor_name(self) -> str:
@@ -74,6 +80,56 @@ class GoodWeInverterAdapter(InverterPort):
             return self._inverter.serial_number
         return ""
     
+    @property
+    def device(self) -> Optional[Inverter]:
+        """Connected goodwe device (None until connected)."""
+        return self._inverter
+    
+    @property
+    def runtime_snapshot(self) -> Optional[RuntimeSnapshot]:
+        """Runtime data snapshot shared with every other consumer of the device."""
+        if not self._inverter:
+            return None
+        return snapshot_for(self._inverter, self._config.runtime_max_age if self._config else None)
+    
+    @property
+    def sensor_index(self) -> Optional[SensorIndex]:
+        """Sensor table of the connected inverter (built on the first read of a connection)."""
+        if self._sensor_index is None and self._inverter:
+            self._sensor_index = SensorIndex.from_sensors(self._inverter.sensors())
+        return self._sensor_index
+    
+    def begin_cycle(self) -> None:
+        """Start a collection cycle: the next runtime read goes to the inverter."""
+        if self._inverter:
+            self.runtime_snapshot.begin_cycle()
+    
+    def get_runtime_stats(self) -> Dict[str, Any]:
+        """Runtime read counters (device reads, avoided reads, snapshot age)."""
+        return self.runtime_snapshot.get_stats() if self._inverter else {}
+    
+    async def _read_runtime(self) -> Dict[str, Any]:
+        """Raw runtime data from the shared per-cycle snapshot."""
+        return await self.runtime_snapshot.read()
+    
+    async def read_sensors(self) -> RuntimeReading:
+        """
+        Compact reading of the current runtime snapshot.
+        
+        One values tuple and one timestamp instead of an object per sensor;
+        consumers of the same snapshot get the same reading.
+        """
+        runtime_data = await self._read_runtime()
+        if runtime_data is not self._last_runtime_data:
+            self._last_reading = self.sensor_index.reading(runtime_data)
+            self._last_runtime_data = runtime_data
+        return self._last_reading
+    
+    def _runtime_changed(self) -> None:
+        """A write changed the inverter state; drop the cached snapshot."""
+        if self._inverter:
+            self.runtime_snapshot.invalidate()
+    
     async def connect(self, config: InverterConfig) -> bool:
         """
         Connect to GoodWe inverter.
@@ -137,6 +193,9 @@ class GoodWeInverterAdapter(InverterPort):
         self._config = None
         self._is_charging = False
         self._charging_start_time = None
+        self._sensor_index = None
+        self._last_runtime_data = None
+        self._last_reading = None
         self.logger.info("Disconnected from inverter")
     
     def is_connected(self) -> bool:
@@ -149,19 +208,10 @@ class GoodWeInverterAdapter(InverterPort):
             raise RuntimeError("Inverter not connected")
         
         try:
-            runtime_data = await self._inverter.read_runtime_data()
-            
-            # Build sensor readings
-            sensors = {}
-            for sensor in self._inverter.sensors():
-                if sensor.id_ in runtime_data:
-                    sensors[sensor.id_] = SensorReading(
-                        sensor_id=sensor.id_,
-                        name=sensor.name,
-                        value=runtime_data[sensor.id_],
-                        unit=sensor.unit,
-                        timestamp=datetime.now()
-                    )
+            reading = await self.read_sensors()
+            
+            # Sensor readings are created lazily, all with the reading's timestamp
+            sensors = reading.sensor_readings()
             
             # Determine inverter state (simplified)
             state = InverterState.NORMAL if sensors else InverterState.UNKNOWN
@@ -172,7 +222,7 @@ class GoodWeInverterAdapter(InverterPort):
                 firmware_version=getattr(self._inverter, 'firmware', 'unknown'),
                 state=state,
                 is_connected=True,
-                timestamp=datetime.now(),
+                timestamp=reading.timestamp,
                 sensors=sensors
             )
             
@@ -186,7 +236,7 @@ class GoodWeInverterAdapter(InverterPort):
             raise RuntimeError("Inverter not connected")
         
         try:
-            runtime_data = await self._inverter.read_runtime_data()
+            runtime_data = await self._read_runtime()
             
             # Extract battery data from runtime
             soc = runtime_data.get('battery_soc', 0.0)
@@ -220,25 +270,14 @@ class GoodWeInverterAdapter(InverterPort):
         """
         Read all runtime data from inverter.
         
-        Returns raw sensor data for backward compatibility.
+        Returns the ``{sensor_id: {'name', 'value', 'unit'}}`` format for
+        backward compatibility, as a lazy view of a RuntimeReading.
         """
         if not self._inverter:
             raise RuntimeError("Inverter not connected")
         
         try:
-            runtime_data = await self._inverter.read_runtime_data()
-            
-            # Build status dict matching existing format
-            status = {}
-            for sensor in self._inverter.sensors():
-                if sensor.id_ in runtime_data:
-                    status[sensor.id_] = {
-                        'name': sensor.name,
-                        'value': runtime_data[sensor.id_],
-                        'unit': sensor.unit
-                    }
-            
-            return status
+            return await self.read_sensors()
             
         except Exception as e:
             self.logger.error(f"Failed to read runtime data: {e}")
@@ -255,7 +294,7 @@ class GoodWeInverterAdapter(InverterPort):
         issues = []
         
         try:
-            runtime_data = await self._inverter.read_runtime_data()
+            runtime_data = await self._read_runtime()
             
             # Check battery temperature
             battery_temp = runtime_data.get('battery_temperature', 0)
@@ -318,6 +357,7 @@ class GoodWeInverterAdapter(InverterPort):
                 min_soc if min_soc > 0 else None
             )
             
+            self._runtime_changed()
             self.logger.info(f"Operation mode set to {mode}")
             return True
             
@@ -350,6 +390,7 @@ class GoodWeInverterAdapter(InverterPort):
             
             self._is_charging = True
             self._charging_start_time = datetime.now()
+            self._runtime_changed()
             
             return True
             
@@ -368,6 +409,7 @@ class GoodWeInverterAdapter(InverterPort):
             
             self._is_charging = False
             self._charging_start_time = None
+            self._runtime_changed()
             
             self.logger.info("Charging stopped")
             return True
@@ -383,6 +425,7 @@ class GoodWeInverterAdapter(InverterPort):
         
         try:
             await self._inverter.set_grid_export_limit(power_w)
+            self._runtime_changed()
             self.logger.info(f"Grid export limit set to {power_w}W")
             return True
             
@@ -400,6 +443,7 @@ class GoodWeInverterAdapter(InverterPort):
         
         try:
             await self._inverter.set_ongrid_battery_dod(depth_pct)
+            self._runtime_changed()
             self.logger.info(f"Battery DoD set to {depth_pct}%")
             return True
             
@@ -422,6 +466,7 @@ class GoodWeInverterAdapter(InverterPort):
             # Stop charging
             if self._is_charging:
                 await self.stop_charging()
+            self._runtime_changed()
             
             self.logger.warning("Emergency stop executed")
             return True
@@ -438,7 +483,7 @@ class GoodWeInverterAdapter(InverterPort):
         
         # Get daily statistics if available
         try:
-            runtime_data = await self._inverter.read_runtime_data()
+            runtime_data = await self._read_runtime()
             daily_charge = runtime_data.get('e_bat_charge_total', 0.0)
             daily_discharge = runtime_data.get('e_bat_discharge_total', 0.0)
         except:
@@ -457,7 +502,7 @@ class GoodWeInverterAdapter(InverterPort):
             raise RuntimeError("Inverter not connected")
         
         try:
-            runtime_data = await self._inverter.read_runtime_data()
+            runtime_data = await self._read_runtime()
             
             # PV power
             ppv = runtime_data.get('ppv', 0.0)
@@ -495,7 +540,7 @@ class GoodWeInverterAdapter(InverterPort):
             raise RuntimeError("Inverter not connected")
         
         try:
-            runtime_data = await self._inverter.read_runtime_data()
+            runtime_data = await self._read_runtime()
             
             # Grid power (negative = export, positive = import)
             pgrid = runtime_data.get('pgrid', 0.0)
@@ -535,7 +580,7 @@ class GoodWeInverterAdapter(InverterPort):
             raise RuntimeError("Inverter not connected")
         
         try:
-            runtime_data = await self._inverter.read_runtime_data()
+            runtime_data = await self._read_runtime()
             
             # House consumption (calculated or direct sensor)
             house_consumption = runtime_data.get('house_consumption', 0.0)
@@ -556,13 +601,16 @@ class GoodWeInverterAdapter(InverterPort):
         if not self._inverter:
             raise RuntimeError("Inverter not connected")
         
+        # One inverter read serves all collectors below
+        self.begin_cycle()
+        
         try:
             # Collect all data types
             battery_data = await self.collect_battery_data()
             pv_data = await self.collect_pv_data()
             grid_data = await self.collect_grid_data()
             consumption_data = await self.collect_consumption_data()
-            runtime_data = await self._inverter.read_runtime_data()
+            runtime_data = await self._read_runtime()
             
             now = datetime.now()
             
@@ -0,0 +1,474 @@
+"""
+Inverter Group
+
+Drives the inverters of a multi-inverter site (e.g. two GoodWe units) as one:
+
+- Every device is its own InverterPort adapter with its own InverterConfig.
+- ``collect_comprehensive_data()`` collects all devices concurrently
+  (``asyncio.gather``), each bounded by its config's ``collect_timeout``, and
+  returns one aggregated ComprehensiveData whose ``devices`` field keeps the
+  per-device data and status.
+- Commands fan out to all online devices concurrently and return the result
+  per device. Site power values (discharge power, export limit) are split
+  evenly between the devices the command is sent to.
+- ``GroupDevice`` presents the group as one goodwe ``Inverter`` so that
+  GoodWeFastCharger and the battery selling engine drive every unit with
+  the code they use for a single inverter.
+
+A slow or offline unit never delays the others beyond its timeout: a device
+that times out or fails is marked offline and skipped for ``offline_retry``
+seconds, after which the next collection reconnects it.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..models.inverter_config import InverterConfig
+from ..models.operation_mode import OperationMode
+from ..ports.data_collector_port import ComprehensiveData
+from ..ports.inverter_port import InverterPort
+from .runtime_snapshot import snapshot_for
+
+# Seconds an offline device is skipped before it is retried
+DEFAULT_OFFLINE_RETRY = 60.0
+
+# Aggregation of per-device values that are not summed
+_MEAN_KEYS = frozenset({'voltage', 'frequency', 'efficiency_percent'})
+_MAX_KEYS = frozenset({'temperature'})
+_SECTIONS = ('battery', 'photovoltaic', 'grid', 'house_consumption', 'daily_totals')
+
+
+class GroupMember:
+    """One device of an InverterGroup and its health."""
+
+    def __init__(self, adapter: InverterPort, config: InverterConfig):
+        self.name = config.name
+        self.adapter = adapter
+        self.config = config
+        self.online = False
+        self.error: Optional[str] = None
+        self.retry_at = 0.0
+        self.failures = 0
+        self.last_duration_ms = 0.0
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values)
+
+
+def _aggregate_section(section: str, parts: List[Dict[str, Any]], weights: List[float]) -> Dict[str, Any]:
+    """Combine one section of several devices (sums unless the key says otherwise)"""
+    result: Dict[str, Any] = {}
+    for key in dict.fromkeys(key for part in parts for key in part):
+        present = [(part[key], weight) for part, weight in zip(parts, weights) if key in part]
+        values = [value for value, _ in present]
+        if all(isinstance(value, bool) for value in values):
+            result[key] = any(values)
+        elif not all(isinstance(value, (int, float)) for value in values):
+            result[key] = values
+        elif section == 'battery' and key == 'soc_percent':
+            total = sum(weight for _, weight in present)
+            result[key] = sum(value * weight for value, weight in present) / total
+        elif key in _MEAN_KEYS:
+            result[key] = _mean(values)
+        elif key in _MAX_KEYS:
+            result[key] = max(values)
+        else:
+            result[key] = sum(values)
+    return result
+
+
+class InverterGroup:
+    """Several inverter adapters collected and commanded concurrently."""
+
+    def __init__(self, members: Sequence[Tuple[InverterPort, InverterConfig]],
+                 offline_retry: float = DEFAULT_OFFLINE_RETRY,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize inverter group.
+
+        Args:
+            members: (adapter, config) per device; config names must be unique
+            offline_retry: Seconds a failed device is skipped before the next attempt
+            clock: Seconds clock for the retry backoff (``time.monotonic`` if None)
+
+        Raises:
+            ValueError: If there are no members or names repeat
+        """
+        if not members:
+            raise ValueError("An inverter group needs at least one inverter")
+        self.members = [GroupMember(adapter, config) for adapter, config in members]
+        names = [member.name for member in self.members]
+        if len(set(names)) != len(names) or not all(names):
+            raise ValueError(f"Inverter names must be unique and non-empty: {names}")
+        self.offline_retry = offline_retry
+        self._clock = clock or time.monotonic
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def names(self) -> List[str]:
+        """Device names in configuration order."""
+        return [member.name for member in self.members]
+
+    def adapter(self, name: str) -> InverterPort:
+        """Adapter of one device."""
+        for member in self.members:
+            if member.name == name:
+                return member.adapter
+        raise KeyError(name)
+
+    def is_connected(self) -> bool:
+        """True if at least one device is online."""
+        return any(member.online for member in self.members)
+
+    def _due(self, member: GroupMember) -> bool:
+        """Online, or offline long enough to be retried."""
+        return member.online or self._clock() >= member.retry_at
+
+    async def _run(self, member: GroupMember, operation: Callable[[], Awaitable[Any]]) -> Tuple[bool, Any]:
+        """
+        Run one device operation within the device's timeout.
+
+        A timeout or error marks the device offline until ``offline_retry``
+        has passed; it never raises.
+        """
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(operation(), timeout=member.config.collect_timeout)
+        except asyncio.TimeoutError:
+            error = f"no response within {member.config.collect_timeout:g}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        else:
+            member.last_duration_ms = (time.perf_counter() - started) * 1000
+            return True, value
+
+        member.last_duration_ms = (time.perf_counter() - started) * 1000
+        if member.online or member.error is None:
+            self.logger.warning(f"Inverter '{member.name}' offline: {error}")
+        member.online = False
+        member.error = error
+        member.failures += 1
+        member.retry_at = self._clock() + self.offline_retry
+        return False, None
+
+    async def _connect_member(self, member: GroupMember) -> bool:
+        connected = await member.adapter.connect(member.config)
+        if not connected:
+            raise ConnectionError("connect failed")
+        member.online = True
+        member.error = None
+        return True
+
+    async def connect(self) -> bool:
+        """
+        Connect all devices concurrently.
+
+        Returns:
+            True if at least one device connected
+        """
+        results = await asyncio.gather(*(
+            self._run(member, lambda member=member: self._connect_member(member))
+            for member in self.members
+        ))
+        online = sum(ok for ok, _ in results)
+        self.logger.info(f"Connected {online}/{len(self.members)} inverters")
+        return online > 0
+
+    async def disconnect(self) -> None:
+        """Disconnect all devices."""
+        await asyncio.gather(*(member.adapter.disconnect() for member in self.members),
+                             return_exceptions=True)
+        for member in self.members:
+            member.online = False
+
+    async def _collect_member(self, member: GroupMember) -> ComprehensiveData:
+        if not member.online:
+            await self._connect_member(member)
+        return await member.adapter.collect_comprehensive_data()
+
+    async def collect_comprehensive_data(self) -> ComprehensiveData:
+        """
+        Collect all devices concurrently and aggregate their data.
+
+        Offline devices inside their retry backoff are not contacted.
+
+        Returns:
+            Site totals with the per-device breakdown in ``devices``
+
+        Raises:
+            RuntimeError: If no device delivered data
+        """
+        due = [member for member in self.members if self._due(member)]
+        results = await asyncio.gather(*(
+            self._run(member, lambda member=member: self._collect_member(member))
+            for member in due
+        ))
+        collected = {member.name: data for member, (ok, data) in zip(due, results) if ok}
+        if not collected:
+            raise RuntimeError("No inverter delivered data")
+        return self._aggregate(collected)
+
+    def _aggregate(self, collected: Dict[str, ComprehensiveData]) -> ComprehensiveData:
+        """Site-level ComprehensiveData from the devices that responded."""
+        members = [member for member in self.members if member.name in collected]
+        parts = [collected[member.name] for member in members]
+        weights = [member.config.battery_capacity_kwh or 1.0 for member in members]
+
+        sections = {
+            section: _aggregate_section(section, [getattr(part, section) for part in parts], weights)
+            for section in _SECTIONS
+        }
+        devices: Dict[str, Any] = {}
+        for member in self.members:
+            if member.name in collected:
+                device = asdict(collected[member.name])
+                device.pop('devices', None)
+                devices[member.name] = {'online': True, 'duration_ms': round(member.last_duration_ms, 1),
+                                        **device}
+            else:
+                devices[member.name] = {'online': False, 'error': member.error}
+
+        now = datetime.now()
+        return ComprehensiveData(
+            timestamp=now.isoformat(),
+            date=now.strftime('%Y-%m-%d'),
+            time=now.strftime('%H:%M:%S'),
+            inverter={
+                'model': ' + '.join(part.inverter.get('model', '') for part in parts),
+                'serial': ', '.join(part.inverter.get('serial', '') for part in parts),
+                'temperature': max((part.inverter.get('temperature', 0.0) for part in parts), default=0.0),
+                'status': 'normal' if len(collected) == len(self.members) else 'degraded',
+                'online_devices': len(collected),
+                'total_devices': len(self.members)
+            },
+            devices=devices,
+            **sections
+        )
+
+    async def _command_member(self, member: GroupMember, command: Callable[[GroupMember, int], Awaitable[Any]],
+                              count: int) -> Any:
+        if not member.online:
+            await self._connect_member(member)
+        return await command(member, count)
+
+    async def send(self, command: Callable[[GroupMember, int], Awaitable[Any]],
+                   include_offline: bool = False) -> Dict[str, Tuple[bool, Any]]:
+        """
+        Run a command on the devices concurrently.
+
+        Offline devices past their retry backoff are reconnected first;
+        devices inside it are skipped unless include_offline is set.
+
+        Args:
+            command: Coroutine function (member, device count) -> result
+            include_offline: Also try devices inside their retry backoff
+
+        Returns:
+            (completed, result) per device the command was sent to
+        """
+        targets = [member for member in self.members if include_offline or self._due(member)]
+        results = await asyncio.gather(*(
+            self._run(member, lambda member=member: self._command_member(member, command, len(targets)))
+            for member in targets
+        ))
+        return {member.name: result for member, result in zip(targets, results)}
+
+    async def _fan_out(self, label: str, command: Callable[[GroupMember, int], Awaitable[bool]],
+                       include_offline: bool = False) -> Dict[str, bool]:
+        """
+        Send a command to the devices concurrently.
+
+        Args:
+            label: Command name for logging
+            command: Coroutine function (member, device count) -> success
+            include_offline: Also try devices inside their retry backoff
+
+        Returns:
+            Success per device name (False for devices that were skipped)
+        """
+        results = await self.send(command, include_offline)
+        outcome = {member.name: False for member in self.members}
+        outcome.update({name: bool(ok and value) for name, (ok, value) in results.items()})
+        failed = [name for name, ok in outcome.items() if not ok]
+        if failed:
+            self.logger.warning(f"{label} failed or skipped on: {', '.join(failed)}")
+        return outcome
+
+    async def start_charging(self, power_pct: int, target_soc: int) -> Dict[str, bool]:
+        """Start charging every online device at the same power percentage and target."""
+        return await self._fan_out(
+            'start_charging', lambda member, count: member.adapter.start_charging(power_pct, target_soc))
+
+    async def stop_charging(self) -> Dict[str, bool]:
+        """Stop charging on every online device."""
+        return await self._fan_out('stop_charging', lambda member, count: member.adapter.stop_charging())
+
+    async def set_operation_mode(self, mode: OperationMode, power_w: int = 0, min_soc: int = 0) -> Dict[str, bool]:
+        """Set the mode on every online device; power_w is the site total, split evenly."""
+        return await self._fan_out(
+            f'set_operation_mode({mode})',
+            lambda member, count: member.adapter.set_operation_mode(mode, power_w // count, min_soc))
+
+    async def set_grid_export_limit(self, power_w: int) -> Dict[str, bool]:
+        """Set the site export limit, split evenly between the online devices."""
+        return await self._fan_out(
+            'set_grid_export_limit', lambda member, count: member.adapter.set_grid_export_limit(power_w // count))
+
+    async def set_battery_dod(self, depth_pct: int) -> Dict[str, bool]:
+        """Set the same depth of discharge on every online device."""
+        return await self._fan_out(
+            'set_battery_dod', lambda member, count: member.adapter.set_battery_dod(depth_pct))
+
+    async def emergency_stop(self) -> Dict[str, bool]:
+        """Emergency stop on every device, including ones currently marked offline."""
+        return await self._fan_out(
+            'emergency_stop', lambda member, count: member.adapter.emergency_stop(), include_offline=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Health of each device."""
+        return {
+            member.name: {
+                'online': member.online,
+                'error': member.error,
+                'failures': member.failures,
+                'last_duration_ms': round(member.last_duration_ms, 1),
+                'retry_in_seconds': (round(max(0.0, member.retry_at - self._clock()), 1)
+                                     if not member.online else 0.0),
+            }
+            for member in self.members
+        }
+
+
+# Runtime sensor id prefixes combined across units (others: the first unit's value)
+_RUNTIME_MEAN_PREFIXES = ('v', 'fgrid', 'fload')
+_RUNTIME_SUM_PREFIXES = ('p', 'i', 'e_', 'meter_e', 'meter_active_power', 'house_consumption')
+
+
+def _combine_runtime(parts: List[Dict[str, Any]], weights: List[float]) -> Dict[str, Any]:
+    """Site runtime data from the units' runtime data (goodwe sensor ids)"""
+    result: Dict[str, Any] = {}
+    for key in dict.fromkeys(key for part in parts for key in part):
+        present = [(part[key], weight) for part, weight in zip(parts, weights) if key in part]
+        values = [value for value, _ in present]
+        if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            result[key] = values[0]
+        elif 'soc' in key:
+            total = sum(weight for _, weight in present)
+            result[key] = sum(value * weight for value, weight in present) / total
+        elif 'temperature' in key:
+            result[key] = max(values)
+        elif key.startswith(_RUNTIME_MEAN_PREFIXES):
+            result[key] = _mean(values)
+        elif key.startswith(_RUNTIME_SUM_PREFIXES):
+            result[key] = sum(values)
+        else:
+            # Modes, codes and other states: the first unit's value
+            result[key] = values[0]
+    return result
+
+
+class GroupDevice:
+    """
+    goodwe ``Inverter`` look-alike driving every unit of an InverterGroup.
+
+    - Writes (fast charging settings, operation mode, DOD) go to all units
+      concurrently. The grid export limit is split evenly. If any unit fails,
+      an error is raised, so callers retry as they would for one inverter.
+    - Reads are site values. Battery SOC is weighted by battery capacity,
+      temperatures are the maximum, voltages and frequencies the mean, powers,
+      currents and energies are summed. Each unit is read through its shared
+      runtime snapshot, so the group's adapters and this device share one
+      read per unit.
+    - ``read_setting`` returns the highest value among the units, so a flag
+      such as ``fast_charging`` reads as set while any unit still has it.
+    """
+
+    def __init__(self, group: InverterGroup):
+        self.group = group
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _device(member: GroupMember) -> Any:
+        device = getattr(member.adapter, 'device', None)
+        if device is None:
+            raise RuntimeError(f"Inverter '{member.name}' has no device connection")
+        return device
+
+    def _online_devices(self) -> List[Any]:
+        return [self._device(member) for member in self.group.members
+                if member.online and getattr(member.adapter, 'device', None) is not None]
+
+    @property
+    def model_name(self) -> str:
+        return ' + '.join(device.model_name for device in self._online_devices())
+
+    @property
+    def serial_number(self) -> str:
+        return ', '.join(device.serial_number for device in self._online_devices())
+
+    def sensors(self):
+        devices = self._online_devices()
+        if not devices:
+            raise RuntimeError("No inverter online")
+        return devices[0].sensors()
+
+    async def _command(self, label: str, command: Callable[[Any, int], Awaitable[Any]]) -> None:
+        """Run a write on every due unit; raise if any of them failed"""
+        async def run(member: GroupMember, count: int) -> Any:
+            device = self._device(member)
+            try:
+                return await command(device, count)
+            finally:
+                snapshot_for(device, member.config.runtime_max_age).invalidate()
+
+        results = await self.group.send(run)
+        failed = [name for name, (ok, _) in results.items() if not ok]
+        if not results or failed:
+            raise RuntimeError(f"{label} failed on: {', '.join(failed) or 'all inverters (none online)'}")
+
+    async def _read(self, read: Callable[[Any, GroupMember], Awaitable[Any]]) -> Tuple[List[Any], List[float]]:
+        """Read every due unit; values and battery capacity weights of the units that answered"""
+        results = await self.group.send(lambda member, count: read(self._device(member), member))
+        members = {member.name: member for member in self.group.members}
+        answered = [(value, members[name].config.battery_capacity_kwh or 1.0)
+                    for name, (ok, value) in results.items() if ok]
+        if not answered:
+            raise RuntimeError("No inverter delivered data")
+        return [value for value, _ in answered], [weight for _, weight in answered]
+
+    async def read_runtime_data(self) -> Dict[str, Any]:
+        parts, weights = await self._read(
+            lambda device, member: snapshot_for(device, member.config.runtime_max_age).read())
+        return _combine_runtime(parts, weights)
+
+    async def get_battery_soc(self) -> float:
+        values, weights = await self._read(lambda device, member: device.get_battery_soc())
+        return sum(value * weight for value, weight in zip(values, weights)) / sum(weights)
+
+    async def read_setting(self, setting_id: str) -> Any:
+        values, _ = await self._read(lambda device, member: device.read_setting(setting_id))
+        return max(values)
+
+    async def write_setting(self, setting_id: str, value: Any) -> None:
+        await self._command(f"write_setting({setting_id})",
+                            lambda device, count: device.write_setting(setting_id, value))
+
+    async def set_operation_mode(self, operation_mode: Any, eco_mode_power: Optional[int] = 100,
+                                 eco_mode_soc: Optional[int] = 100) -> None:
+        """Same mode on every unit (eco_mode_power is a percentage, so it is not split)"""
+        await self._command(f"set_operation_mode({getattr(operation_mode, 'name', operation_mode)})",
+                            lambda device, count: device.set_operation_mode(
+                                operation_mode, eco_mode_power, eco_mode_soc))
+
+    async def set_grid_export_limit(self, export_limit: int) -> None:
+        """Site export limit, split evenly between the units"""
+        await self._command("set_grid_export_limit",
+                            lambda device, count: device.set_grid_export_limit(int(export_limit) // count))
+
+    async def set_ongrid_battery_dod(self, dod: int) -> None:
+        await self._command("set_ongrid_battery_dod", lambda device, count: device.set_ongrid_battery_dod(dod))
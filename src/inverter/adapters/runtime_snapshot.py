@@ -0,0 +1,162 @@
+"""
+Per-cycle Runtime Data Snapshot
+
+Every ``read_runtime_data()`` is a UDP round trip to the inverter (300-900 ms
+on a Lynx-D setup). Within one coordinator cycle the data collector, the
+charging status, safety checks and the adapter's ``collect_*`` methods all
+need the same values, so they share one snapshot per device:
+
+- ``read()`` returns the cached runtime data while it is younger than
+  ``max_age`` seconds and reads the device otherwise. Concurrent callers wait
+  for the read in flight instead of starting their own.
+- ``begin_cycle()`` makes the next ``read()`` hit the device, so every
+  collection cycle starts from fresh data.
+- ``invalidate()`` is called after writes that change the inverter state.
+- ``get_stats()`` counts device reads and avoided reads.
+
+``snapshot_for(device)`` returns the snapshot shared by every consumer of
+the same device object (GoodWeFastCharger, GoodWeInverterAdapter, ...).
+The cached dict is shared between consumers and must not be modified.
+"""
+
+import asyncio
+import time
+import weakref
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# Seconds a snapshot is reused when no new cycle has started
+DEFAULT_MAX_AGE = 10.0
+
+_snapshots: 'weakref.WeakKeyDictionary[Any, RuntimeSnapshot]' = weakref.WeakKeyDictionary()
+
+
+class RuntimeSnapshot:
+    """Runtime data of one inverter device, read at most once per cycle or max_age."""
+
+    def __init__(self, device: Any, max_age: float = DEFAULT_MAX_AGE,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize runtime snapshot.
+
+        Args:
+            device: Object with an async ``read_runtime_data()`` (goodwe Inverter API)
+            max_age: Seconds a snapshot is reused within a cycle (0 disables reuse)
+            clock: Seconds clock used to age the snapshot (``time.monotonic`` if None)
+        """
+        # Weak reference: the registry is keyed by the device and must not keep it alive
+        self._device = weakref.ref(device)
+        self.max_age = max_age
+        self._clock = clock or time.monotonic
+        self._data: Optional[Dict[str, Any]] = None
+        self._read_at = 0.0
+        self._generation = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.timestamp: Optional[datetime] = None
+
+        self.reads = 0
+        self.avoided_reads = 0
+        self.cycles = 0
+        self.last_read_ms = 0.0
+
+    def _is_fresh(self) -> bool:
+        return self._data is not None and self._clock() - self._read_at < self.max_age
+
+    def _get_lock(self) -> asyncio.Lock:
+        # One lock per event loop (tests and simulations run several loops)
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def read(self) -> Dict[str, Any]:
+        """
+        Runtime data from the snapshot, reading the device if it is stale.
+
+        Raises:
+            RuntimeError: if the device no longer exists
+            Exception: whatever the device read raises (nothing is cached)
+        """
+        if self._is_fresh():
+            self.avoided_reads += 1
+            return self._data
+
+        async with self._get_lock():
+            # Another caller may have refreshed the snapshot while we waited
+            if self._is_fresh():
+                self.avoided_reads += 1
+                return self._data
+
+            device = self._device()
+            if device is None:
+                raise RuntimeError("Inverter device no longer available")
+
+            generation = self._generation
+            started = self._clock()
+            read_started = time.perf_counter()
+            data = await device.read_runtime_data()
+            self.reads += 1
+            self.last_read_ms = (time.perf_counter() - read_started) * 1000
+
+            # A write during the read may have changed the state, so only
+            # cache the data if nothing invalidated the snapshot meanwhile
+            if generation == self._generation:
+                self._data = data
+                self._read_at = started
+                self.timestamp = datetime.now()
+            return data
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """Cached runtime data if fresh, without reading the device."""
+        return self._data if self._is_fresh() else None
+
+    def invalidate(self) -> None:
+        """Drop the snapshot so the next read() hits the device."""
+        self._data = None
+        self._generation += 1
+
+    def begin_cycle(self) -> None:
+        """Start a new collection cycle: the first read() of the cycle is fresh."""
+        self.cycles += 1
+        self.invalidate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Read counters and the age of the current snapshot."""
+        total = self.reads + self.avoided_reads
+        return {
+            'reads': self.reads,
+            'avoided_reads': self.avoided_reads,
+            'hit_rate': round(self.avoided_reads / total, 3) if total else 0.0,
+            'cycles': self.cycles,
+            'max_age': self.max_age,
+            'age_seconds': round(self._clock() - self._read_at, 3) if self._data is not None else None,
+            'last_read_ms': round(self.last_read_ms, 1),
+        }
+
+
+def snapshot_for(device: Any, max_age: Optional[float] = None) -> RuntimeSnapshot:
+    """
+    Shared runtime snapshot of a device.
+
+    The first caller's max_age wins (``DEFAULT_MAX_AGE`` if None). Devices
+    driven by an injected clock (the simulated inverter's ``clock.now()``) age
+    their snapshot on that clock so accelerated simulations never see stale data.
+
+    Args:
+        device: Inverter device object
+        max_age: Seconds a snapshot is reused within a cycle
+
+    Returns:
+        RuntimeSnapshot shared by all consumers of ``device``
+    """
+    snapshot = _snapshots.get(device)
+    if snapshot is None:
+        device_clock = getattr(device, 'clock', None)
+        clock = None
+        if isinstance(getattr(device_clock, 'now', lambda: None)(), datetime):
+            clock = lambda: device_clock.now().timestamp()
+        snapshot = RuntimeSnapshot(device, DEFAULT_MAX_AGE if max_age is None else max_age, clock)
+        _snapshots[device] = snapshot
+    return snapshot
@@ -0,0 +1,565 @@
+"""
+Simulated Inverter Adapter
+
+Physics-lite stand-in for a GoodWe inverter, used to run the energy
+management system without hardware (soak tests, accelerated simulations).
+
+- ``SimulationScenario``: battery size, PV and house load profiles loaded from
+  a YAML/JSON scenario file.
+- ``BatteryModel``: SOC/grid-flow model shared with the offline backtest.
+- ``SimulatedInverter``: exposes the subset of the goodwe ``Inverter`` API the
+  system uses (runtime data, settings, operation mode, export limit, DOD) and
+  integrates the model lazily up to the current clock time on every call.
+- ``SimulatedInverterAdapter``: InverterPort implementation on top of it.
+
+Time comes from ``datetime.now()`` unless a clock object with a ``now()``
+method is injected, so a patched or virtual clock drives the physics.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from .goodwe_adapter import GoodWeInverterAdapter
+from ..models.operation_mode import OperationMode
+from ..models.inverter_config import InverterConfig
+
+logger = logging.getLogger(__name__)
+
+# Hourly PV output as a fraction of peak power (clear day)
+DEFAULT_PV_PROFILE = [
+    0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.02, 0.1, 0.25, 0.45, 0.65, 0.8,
+    0.85, 0.8, 0.65, 0.45, 0.25, 0.1, 0.02, 0.0, 0.0, 0.0, 0.0, 0.0
+]
+
+# Hourly average house load in watts
+DEFAULT_LOAD_PROFILE_W = [
+    400, 350, 350, 350, 350, 400, 700, 1100, 900, 700, 600, 650,
+    800, 700, 600, 650, 900, 1500, 2000, 1800, 1400, 1000, 700, 500
+]
+
+
+@dataclass
+class StepFlows:
+    """Energy flows of one simulation step (kWh)"""
+    grid_import_kwh: float = 0.0
+    grid_export_kwh: float = 0.0
+    grid_charge_kwh: float = 0.0
+    battery_export_kwh: float = 0.0
+
+
+class BatteryModel:
+    """Physics-lite battery/inverter energy balance.
+
+    Modes: ``general`` (self-consumption: PV surplus charges, deficit
+    discharges down to ``min_soc``), ``fast_charge`` (grid charging up to
+    ``charge_target_soc``) and ``eco_discharge`` (export at ``export_limit_w``
+    down to ``discharge_floor_soc``).
+    """
+
+    def __init__(self, capacity_kwh: float, max_power_w: float, soc_percent: float,
+                 min_soc: float = 10.0, efficiency: float = 0.95):
+        """
+        Initialize battery model.
+
+        Args:
+            capacity_kwh: Usable battery capacity
+            max_power_w: Maximum charge/discharge power
+            soc_percent: Initial state of charge
+            min_soc: Self-consumption discharge floor
+            efficiency: One-way charge/discharge efficiency
+        """
+        self.capacity_kwh = capacity_kwh
+        self.max_power_w = max_power_w
+        self.efficiency = efficiency
+        self.min_soc = min_soc
+
+        self.soc_percent = float(soc_percent)
+        self.mode = 'general'  # 'general', 'fast_charge' or 'eco_discharge'
+        self.charge_target_soc = 100
+        self.charge_power_w = max_power_w
+        self.discharge_floor_soc = min_soc
+        self.export_limit_w = 0
+        self.grid_power_w = 0.0  # GoodWe convention: positive = export
+        self.battery_power_w = 0.0  # Positive = discharge
+
+    def step(self, pv_power_w: float, house_consumption_w: float, hours: float) -> StepFlows:
+        """
+        Advance the battery by one step with constant PV and load.
+
+        Args:
+            pv_power_w: Average PV production over the step
+            house_consumption_w: Average house consumption over the step
+            hours: Step length in hours
+
+        Returns:
+            Energy flows during the step
+        """
+        stored_kwh = self.capacity_kwh * self.soc_percent / 100
+        initial_kwh = stored_kwh
+        max_kwh = self.max_power_w / 1000 * hours
+        surplus_kwh = (pv_power_w - house_consumption_w) / 1000 * hours
+        flows = StepFlows()
+
+        if self.mode == 'fast_charge' and self.soc_percent < self.charge_target_soc:
+            room_kwh = self.capacity_kwh * self.charge_target_soc / 100 - stored_kwh
+            charge_kwh = min(max_kwh, self.charge_power_w / 1000 * hours, room_kwh / self.efficiency)
+            stored_kwh += charge_kwh * self.efficiency
+            net_kwh = charge_kwh - surplus_kwh  # Positive = import
+            flows.grid_charge_kwh = min(charge_kwh, max(net_kwh, 0.0))
+        elif self.mode == 'eco_discharge':
+            floor_soc = max(self.discharge_floor_soc, self.min_soc)
+            available_kwh = max(stored_kwh - self.capacity_kwh * floor_soc / 100, 0.0)
+            demand_kwh = self.export_limit_w / 1000 * hours + max(-surplus_kwh, 0.0)
+            discharge_kwh = min(max_kwh, demand_kwh, available_kwh * self.efficiency)
+            stored_kwh -= discharge_kwh / self.efficiency
+            net_kwh = -surplus_kwh - discharge_kwh
+            flows.battery_export_kwh = min(discharge_kwh, max(-net_kwh, 0.0))
+        elif surplus_kwh > 0:
+            room_kwh = self.capacity_kwh - stored_kwh
+            charge_kwh = min(surplus_kwh, max_kwh, room_kwh / self.efficiency)
+            stored_kwh += charge_kwh * self.efficiency
+            net_kwh = charge_kwh - surplus_kwh
+        else:
+            available_kwh = max(stored_kwh - self.capacity_kwh * self.min_soc / 100, 0.0)
+            discharge_kwh = min(-surplus_kwh, max_kwh, available_kwh * self.efficiency)
+            stored_kwh -= discharge_kwh / self.efficiency
+            net_kwh = -surplus_kwh - discharge_kwh
+
+        self.soc_percent = min(max(stored_kwh / self.capacity_kwh * 100, 0.0), 100.0)
+        flows.grid_import_kwh = max(net_kwh, 0.0)
+        flows.grid_export_kwh = max(-net_kwh, 0.0)
+        self.grid_power_w = -net_kwh / hours * 1000 if hours > 0 else 0.0
+        self.battery_power_w = (initial_kwh - stored_kwh) / hours * 1000 if hours > 0 else 0.0
+        return flows
+
+
+@dataclass
+class SimulationScenario:
+    """Site description driving a SimulatedInverter"""
+    capacity_kwh: float = 20.0
+    initial_soc: float = 50.0
+    min_soc: float = 10.0
+    max_power_w: float = 10000.0
+    efficiency: float = 0.95
+    pv_peak_w: float = 8000.0
+    pv_profile: List[float] = field(default_factory=lambda: list(DEFAULT_PV_PROFILE))
+    load_profile_w: List[float] = field(default_factory=lambda: list(DEFAULT_LOAD_PROFILE_W))
+    # Per-day PV scaling, cycled (e.g. [1.0, 0.3, 0.7] for sunny/overcast/mixed days)
+    daily_pv_factors: List[float] = field(default_factory=lambda: [1.0])
+    battery_voltage: float = 400.0
+    battery_temperature: float = 25.0
+    grid_voltage: float = 230.0
+    grid_frequency: float = 50.0
+    # Longest physics step; longer gaps between reads are integrated in pieces
+    step_seconds: float = 60.0
+    model_name: str = 'GW10K-ET'
+    serial_number: str = 'SIM00000001'
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'SimulationScenario':
+        """
+        Create scenario from a dict, ignoring unknown keys.
+
+        Args:
+            data: Scenario values
+
+        Returns:
+            SimulationScenario instance
+        """
+        known = {f.name for f in fields(cls)}
+        data = data or {}
+        unknown = set(data) - known
+        if unknown:
+            logger.warning(f"Ignoring unknown scenario keys: {', '.join(sorted(unknown))}")
+        scenario = cls(**{key: value for key, value in data.items() if key in known})
+        for name in ('pv_profile', 'load_profile_w'):
+            if len(getattr(scenario, name)) != 24:
+                raise ValueError(f"Scenario {name} must have 24 hourly values")
+        if not scenario.daily_pv_factors:
+            scenario.daily_pv_factors = [1.0]
+        return scenario
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SimulationScenario':
+        """
+        Load scenario from a YAML or JSON file.
+
+        Args:
+            path: Scenario file path
+
+        Returns:
+            SimulationScenario instance
+        """
+        with open(path, 'r') as f:
+            if Path(path).suffix.lower() == '.json':
+                data = json.load(f)
+            else:
+                data = yaml.safe_load(f)
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_vendor_config(cls, vendor_config: Dict[str, Any]) -> 'SimulationScenario':
+        """Scenario from ``scenario_file`` or an inline ``scenario`` dict (defaults otherwise)"""
+        if vendor_config.get('scenario_file'):
+            return cls.from_file(vendor_config['scenario_file'])
+        return cls.from_dict(vendor_config.get('scenario'))
+
+    def pv_power_w(self, when: datetime) -> float:
+        """PV output at a point in time (hourly profile, linearly interpolated)"""
+        factor = self.daily_pv_factors[when.toordinal() % len(self.daily_pv_factors)]
+        return self.pv_peak_w * factor * self._interpolate(self.pv_profile, when)
+
+    def load_power_w(self, when: datetime) -> float:
+        """House load at a point in time (hourly profile, linearly interpolated)"""
+        return self._interpolate(self.load_profile_w, when)
+
+    @staticmethod
+    def _interpolate(profile: List[float], when: datetime) -> float:
+        position = when.hour + when.minute / 60 + when.second / 3600
+        hour = int(position) % 24
+        fraction = position - int(position)
+        return profile[hour] * (1 - fraction) + profile[(hour + 1) % 24] * fraction
+
+
+@dataclass
+class SimulatedSensor:
+    """Sensor descriptor matching goodwe's ``Sensor`` attributes"""
+    id_: str
+    name: str
+    unit: str
+
+
+# Runtime data keys published by SimulatedInverter (GoodWe ET sensor ids)
+SENSORS = [
+    SimulatedSensor('battery_soc', 'Battery State of Charge', '%'),
+    SimulatedSensor('vbattery1', 'Battery Voltage', 'V'),
+    SimulatedSensor('ibattery1', 'Battery Current', 'A'),
+    SimulatedSensor('pbattery1', 'Battery Power', 'W'),
+    SimulatedSensor('battery_temperature', 'Battery Temperature', 'C'),
+    SimulatedSensor('ppv', 'PV Power', 'W'),
+    SimulatedSensor('ppv1', 'PV1 Power', 'W'),
+    SimulatedSensor('ppv2', 'PV2 Power', 'W'),
+    SimulatedSensor('vpv1', 'PV1 Voltage', 'V'),
+    SimulatedSensor('ipv1', 'PV1 Current', 'A'),
+    SimulatedSensor('vpv2', 'PV2 Voltage', 'V'),
+    SimulatedSensor('ipv2', 'PV2 Current', 'A'),
+    SimulatedSensor('e_day', 'Today\'s PV Generation', 'kWh'),
+    SimulatedSensor('pgrid', 'On-grid Power', 'W'),
+    SimulatedSensor('meter_active_power_total', 'Meter Active Power Total', 'W'),
+    SimulatedSensor('vgrid', 'On-grid L1 Voltage', 'V'),
+    SimulatedSensor('fgrid', 'On-grid L1 Frequency', 'Hz'),
+    SimulatedSensor('igrid', 'On-grid L1 Current', 'A'),
+    SimulatedSensor('e_day_exp', 'Today Energy (export)', 'kWh'),
+    SimulatedSensor('e_day_imp', 'Today Energy (import)', 'kWh'),
+    SimulatedSensor('meter_e_total_exp', 'Meter Total Energy (export)', 'kWh'),
+    SimulatedSensor('meter_e_total_imp', 'Meter Total Energy (import)', 'kWh'),
+    SimulatedSensor('e_grid_out_total', 'Total Energy (export)', 'kWh'),
+    SimulatedSensor('e_grid_in_total', 'Total Energy (import)', 'kWh'),
+    SimulatedSensor('house_consumption', 'House Consumption', 'W'),
+    SimulatedSensor('e_load_day', 'Today Load', 'kWh'),
+    SimulatedSensor('e_load_total', 'Total Load', 'kWh'),
+    SimulatedSensor('e_bat_charge_total', 'Total Battery Charge', 'kWh'),
+    SimulatedSensor('e_bat_discharge_total', 'Total Battery Discharge', 'kWh'),
+    SimulatedSensor('temperature', 'Inverter Temperature', 'C'),
+]
+
+# Daily counters reset at midnight
+_DAILY_COUNTERS = ('e_day', 'e_day_exp', 'e_day_imp', 'e_load_day')
+
+
+class SimulatedInverter:
+    """goodwe ``Inverter`` look-alike driven by a BatteryModel and a scenario"""
+
+    firmware = 'simulated'
+
+    def __init__(self, scenario: Optional[SimulationScenario] = None, clock: Optional[Any] = None):
+        """
+        Initialize simulated inverter.
+
+        Args:
+            scenario: Site description (defaults if None)
+            clock: Object with ``now()`` (``datetime.now()`` if None)
+        """
+        self.scenario = scenario or SimulationScenario()
+        self.clock = clock
+        self.model_name = self.scenario.model_name
+        self.serial_number = self.scenario.serial_number
+        self.battery = BatteryModel(
+            capacity_kwh=self.scenario.capacity_kwh,
+            max_power_w=self.scenario.max_power_w,
+            soc_percent=self.scenario.initial_soc,
+            min_soc=self.scenario.min_soc,
+            efficiency=self.scenario.efficiency
+        )
+        self.settings: Dict[str, Any] = {
+            'fast_charging': 0,
+            'fast_charging_power': 100,
+            'fast_charging_soc': 100,
+            'grid_export_limit': 0,
+            'battery_discharge_depth': int(100 - self.scenario.min_soc),
+        }
+        self.counters: Dict[str, float] = {
+            'e_day': 0.0, 'e_day_exp': 0.0, 'e_day_imp': 0.0, 'e_load_day': 0.0,
+            'e_grid_out_total': 0.0, 'e_grid_in_total': 0.0, 'e_load_total': 0.0,
+            'e_bat_charge_total': 0.0, 'e_bat_discharge_total': 0.0,
+        }
+        self.pv_power_w = 0.0
+        self.load_power_w = 0.0
+        self._last_time: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        return self.clock.now() if self.clock is not None else datetime.now()
+
+    def sync(self) -> None:
+        """Integrate the model from the last update up to the current time"""
+        with self._lock:
+            now = self.now()
+            if self._last_time is None or now < self._last_time:
+                self._last_time = now
+                self._sample_inputs(now)
+                return
+
+            max_step = timedelta(seconds=self.scenario.step_seconds)
+            while self._last_time < now:
+                step_end = min(self._last_time + max_step, now)
+                if step_end.date() != self._last_time.date():
+                    # Split at midnight so daily counters land on the right day
+                    step_end = datetime.combine(step_end.date(), datetime.min.time())
+                self._integrate(self._last_time, step_end)
+                if step_end.date() != self._last_time.date():
+                    for name in _DAILY_COUNTERS:
+                        self.counters[name] = 0.0
+                self._last_time = step_end
+            self._sample_inputs(now)
+
+    def _sample_inputs(self, when: datetime) -> None:
+        self.pv_power_w = self.scenario.pv_power_w(when)
+        self.load_power_w = self.scenario.load_power_w(when)
+
+    def _integrate(self, start: datetime, end: datetime) -> None:
+        """Advance the model over one step using midpoint PV/load"""
+        hours = (end - start).total_seconds() / 3600
+        if hours <= 0:
+            return
+        midpoint = start + (end - start) / 2
+        pv_w = self.scenario.pv_power_w(midpoint)
+        load_w = self.scenario.load_power_w(midpoint)
+        flows = self.battery.step(pv_w, load_w, hours)
+
+        battery_kwh = self.battery.battery_power_w / 1000 * hours
+        self.counters['e_day'] += pv_w / 1000 * hours
+        self.counters['e_load_day'] += load_w / 1000 * hours
+        self.counters['e_load_total'] += load_w / 1000 * hours
+        self.counters['e_day_imp'] += flows.grid_import_kwh
+        self.counters['e_day_exp'] += flows.grid_export_kwh
+        self.counters['e_grid_in_total'] += flows.grid_import_kwh
+        self.counters['e_grid_out_total'] += flows.grid_export_kwh
+        if battery_kwh > 0:
+            self.counters['e_bat_discharge_total'] += battery_kwh
+        else:
+            self.counters['e_bat_charge_total'] -= battery_kwh
+
+    # goodwe Inverter API
+
+    def sensors(self) -> List[SimulatedSensor]:
+        return SENSORS
+
+    async def read_runtime_data(self) -> Dict[str, Any]:
+        self.sync()
+        battery = self.battery
+        scenario = self.scenario
+        battery_power = round(battery.battery_power_w)
+        grid_power = round(battery.grid_power_w)
+        pv_power = round(self.pv_power_w)
+        pv_string_voltage = 400.0 if pv_power > 0 else 0.0
+        data = {
+            'battery_soc': int(round(battery.soc_percent)),
+            'vbattery1': scenario.battery_voltage,
+            'ibattery1': round(battery_power / scenario.battery_voltage, 1),
+            'pbattery1': battery_power,
+            'battery_temperature': scenario.battery_temperature,
+            'ppv': pv_power,
+            'ppv1': pv_power // 2,
+            'ppv2': pv_power - pv_power // 2,
+            'vpv1': pv_string_voltage,
+            'ipv1': round(pv_power / 2 / pv_string_voltage, 1) if pv_string_voltage else 0.0,
+            'vpv2': pv_string_voltage,
+            'ipv2': round(pv_power / 2 / pv_string_voltage, 1) if pv_string_voltage else 0.0,
+            'pgrid': -grid_power,  # Negative = export
+            'meter_active_power_total': grid_power,  # Positive = export
+            'vgrid': scenario.grid_voltage,
+            'fgrid': scenario.grid_frequency,
+            'igrid': round(abs(grid_power) / scenario.grid_voltage, 1),
+            'meter_e_total_exp': round(self.counters['e_grid_out_total'], 2),
+            'meter_e_total_imp': round(self.counters['e_grid_in_total'], 2),
+            'house_consumption': round(self.load_power_w),
+            'temperature': 35.0,
+        }
+        for name, value in self.counters.items():
+            data[name] = round(value, 2)
+        return data
+
+    async def read_setting(self, setting_id: str) -> Any:
+        if setting_id not in self.settings:
+            raise ValueError(f"Unknown setting '{setting_id}'")
+        return self.settings[setting_id]
+
+    async def write_setting(self, setting_id: str, value: Any) -> None:
+        if setting_id not in self.settings:
+            raise ValueError(f"Unknown setting '{setting_id}'")
+        self.sync()
+        self.settings[setting_id] = value
+        battery = self.battery
+        if setting_id == 'fast_charging':
+            if value:
+                battery.mode = 'fast_charge'
+            elif battery.mode == 'fast_charge':
+                battery.mode = 'general'
+        elif setting_id == 'fast_charging_power':
+            battery.charge_power_w = battery.max_power_w * float(value) / 100
+        elif setting_id == 'fast_charging_soc':
+            battery.charge_target_soc = float(value)
+        elif setting_id == 'grid_export_limit':
+            battery.export_limit_w = value
+        elif setting_id == 'battery_discharge_depth':
+            battery.min_soc = 100 - value
+
+    async def get_battery_soc(self) -> float:
+        self.sync()
+        return round(self.battery.soc_percent, 1)
+
+    async def set_operation_mode(self, operation_mode: Any, eco_mode_power: Optional[int] = 100,
+                                 eco_mode_soc: Optional[int] = 100) -> None:
+        """Operation modes are matched by name so goodwe and generic enums both work"""
+        self.sync()
+        name = str(getattr(operation_mode, 'name', operation_mode)).upper()
+        if name == 'ECO_DISCHARGE':
+            self.battery.mode = 'eco_discharge'
+            if eco_mode_soc is not None:
+                self.battery.discharge_floor_soc = eco_mode_soc
+        elif name == 'FAST_CHARGE':
+            await self.write_setting('fast_charging', 1)
+        elif self.battery.mode == 'eco_discharge':
+            self.battery.mode = 'general'
+
+    async def set_grid_export_limit(self, export_limit: int) -> None:
+        await self.write_setting('grid_export_limit', export_limit)
+
+    async def set_ongrid_battery_dod(self, dod: int) -> None:
+        await self.write_setting('battery_discharge_depth', dod)
+
+
+# Process-wide devices keyed by serial number: every component that "connects"
+# to the same simulated inverter must see the same battery state
+_devices: Dict[str, SimulatedInverter] = {}
+_devices_lock = threading.Lock()
+
+
+def get_simulated_inverter(vendor_config: Dict[str, Any], clock: Optional[Any] = None) -> SimulatedInverter:
+    """
+    Get the shared simulated inverter for a vendor configuration.
+
+    The first caller's scenario and clock win; later callers share the device.
+
+    Args:
+        vendor_config: ``scenario_file`` or inline ``scenario`` settings
+        clock: Object with ``now()`` (``datetime.now()`` if None)
+
+    Returns:
+        Shared SimulatedInverter instance
+    """
+    scenario = SimulationScenario.from_vendor_config(vendor_config)
+    with _devices_lock:
+        device = _devices.get(scenario.serial_number)
+        if device is None:
+            device = SimulatedInverter(scenario, clock=clock)
+            _devices[scenario.serial_number] = device
+        return device
+
+
+def reset_simulated_inverters() -> None:
+    """Drop all shared simulated devices (used by tests and between simulations)"""
+    with _devices_lock:
+        _devices.clear()
+
+
+class SimulatedInverterAdapter(GoodWeInverterAdapter):
+    """
+    Simulated inverter adapter implementing the InverterPort interface.
+
+    Reuses the GoodWe adapter's data mapping on top of a SimulatedInverter,
+    so the same code paths run as against real hardware.
+    """
+
+    def __init__(self, clock: Optional[Any] = None):
+        """
+        Initialize simulated adapter.
+
+        Args:
+            clock: Object with ``now()`` driving the simulation (``datetime.now()`` if None)
+        """
+        super().__init__()
+        self._clock = clock
+
+    @property
+    def vendor_name(self) -> str:
+        """Get vendor name."""
+        return "simulated"
+
+    @property
+    def device(self) -> Optional[SimulatedInverter]:
+        """Underlying simulated device (None until connected)."""
+        return self._inverter
+
+    async def connect(self, config: InverterConfig) -> bool:
+        """
+        Connect to the simulated inverter described by the config's scenario.
+
+        Args:
+            config: Inverter configuration (``vendor_config`` holds the scenario)
+
+        Returns:
+            True if the scenario was loaded
+        """
+        if config.vendor.lower() != "simulated":
+            raise ValueError(f"Invalid vendor for simulated adapter: {config.vendor}")
+
+        self._config = config
+        try:
+            self._inverter = get_simulated_inverter(config.vendor_config, clock=self._clock)
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.error(f"Failed to load simulation scenario: {e}")
+            return False
+
+        self.logger.info(
+            f"Connected to simulated {self._inverter.model_name} "
+            f"(Serial: {self._inverter.serial_number})"
+        )
+        return True
+
+    async def set_operation_mode(
+        self,
+        mode: OperationMode,
+        power_w: int = 0,
+        min_soc: int = 0
+    ) -> bool:
+        """Set inverter operation mode (all generic modes are simulated)."""
+        if not self._inverter:
+            raise RuntimeError("Inverter not connected")
+
+        await self._inverter.set_operation_mode(
+            mode,
+            power_w if power_w > 0 else None,
+            min_soc if min_soc > 0 else None
+        )
+        self._runtime_changed()
+        self.logger.info(f"Operation mode set to {mode}")
+        return True
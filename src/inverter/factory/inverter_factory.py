@@ -1,15 +1,18 @@
 """
 Inverter Factory
 
-Creates inverter adapter instances based on vendor configuration.
+Creates inverter adapter instances based on vendor configuration, and
+inverter groups for sites with several inverters.
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
 
 from ..ports.inverter_port import InverterPort
 from ..models.inverter_config import InverterConfig
 from ..adapters.goodwe_adapter import GoodWeInverterAdapter
+from ..adapters.simulated_adapter import SimulatedInverterAdapter
+from ..adapters.inverter_group import DEFAULT_OFFLINE_RETRY, InverterGroup
 
 
 class InverterFactory:
@@ -23,6 +26,7 @@ class InverterFactory:
     # Registry of supported vendors and their adapter classes
     _ADAPTERS = {
         'goodwe': GoodWeInverterAdapter,
+        'simulated': SimulatedInverterAdapter,
         # Future adapters:
         # 'fronius': FroniusInverterAdapter,
         # 'sma': SMAInverterAdapter,
@@ -95,6 +99,48 @@ class InverterFactory:
         inverter_config = InverterConfig.from_yaml_config(config_dict)
         return cls.create_inverter(inverter_config)
     
+    @classmethod
+    def create_group(cls, configs: List[InverterConfig],
+                     offline_retry: float = DEFAULT_OFFLINE_RETRY) -> InverterGroup:
+        """
+        Create an inverter group with one adapter per device configuration.
+        
+        Args:
+            configs: Device configurations (unique names)
+            offline_retry: Seconds a failed device is skipped before the next attempt
+            
+        Returns:
+            InverterGroup (not connected yet)
+            
+        Raises:
+            ValueError: If a configuration is invalid, a vendor unsupported or names repeat
+        """
+        return InverterGroup([(cls.create_inverter(config), config) for config in configs],
+                             offline_retry=offline_retry)
+    
+    @classmethod
+    def create_group_from_yaml_config(cls, config_dict: Union[Dict[str, Any], List[Dict[str, Any]]]) -> InverterGroup:
+        """
+        Create an inverter group from the YAML ``inverter`` section.
+        
+        The section is a list of devices or a dict with a ``devices`` list
+        (its other keys are defaults for every device); a single-device
+        section gives a group of one.
+        
+        Args:
+            config_dict: Configuration from YAML (inverter section)
+            
+        Returns:
+            InverterGroup (not connected yet)
+            
+        Raises:
+            ValueError: If configuration is invalid or vendor unsupported
+        """
+        offline_retry = DEFAULT_OFFLINE_RETRY
+        if isinstance(config_dict, dict):
+            offline_retry = config_dict.get('offline_retry_seconds', DEFAULT_OFFLINE_RETRY)
+        return cls.create_group(InverterConfig.list_from_yaml_config(config_dict), offline_retry=offline_retry)
+    
     @classmethod
     def get_supported_vendors(cls) -> list[str]:
         """
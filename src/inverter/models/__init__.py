@@ -5,7 +5,9 @@ These models provide vendor-agnostic data structures for representing
 inverter state, battery status, and configuration.
 """
 
-from .inverter_data import InverterStatus, InverterCapabilities, SensorReading
+from .inverter_data import (
+    InverterStatus, InverterCapabilities, SensorReading, SensorIndex, RuntimeReading, SensorReadings
+)
 from .battery_status import BatteryStatus, BatteryData, BatteryCapabilities
 from .operation_mode import OperationMode
 from .inverter_config import InverterConfig, SafetyConfig
@@ -14,6 +16,9 @@ __all__ = [
     'InverterStatus',
     'InverterCapabilities',
     'SensorReading',
+    'SensorIndex',
+    'RuntimeReading',
+    'SensorReadings',
     'BatteryStatus',
     'BatteryData',
     'BatteryCapabilities',
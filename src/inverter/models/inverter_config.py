@@ -5,7 +5,7 @@ Data structures for inverter connection and safety configuration.
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 
 
 @dataclass
@@ -18,7 +18,7 @@ class InverterConfig:
     """
     
     # Vendor identification
-    vendor: str  # e.g., "goodwe", "fronius", "sma", "huawei"
+    vendor: str  # e.g., "goodwe", "fronius", "sma", "huawei", "simulated"
     
     # Common connection parameters
     ip_address: str
@@ -27,6 +27,15 @@ class InverterConfig:
     retries: int = 3
     retry_delay: float = 2.0
     
+    # Seconds one runtime data read is shared between consumers within a cycle
+    runtime_max_age: float = 10.0
+    
+    # Multi-inverter sites: device name, per-device collection/command timeout
+    # and battery capacity (weights the site SOC)
+    name: str = ''
+    collect_timeout: float = 5.0
+    battery_capacity_kwh: Optional[float] = None
+    
     # Vendor-specific parameters (stored as dict)
     vendor_config: Dict[str, Any] = field(default_factory=dict)
     
@@ -50,6 +59,10 @@ class InverterConfig:
         timeout = config_dict.get('timeout', 1.0)
         retries = config_dict.get('retries', 3)
         retry_delay = config_dict.get('retry_delay', 2.0)
+        runtime_max_age = config_dict.get('runtime_max_age', 10.0)
+        name = config_dict.get('name', '')
+        collect_timeout = config_dict.get('collect_timeout', 5.0)
+        battery_capacity_kwh = config_dict.get('battery_capacity_kwh')
         
         # Extract vendor-specific config
         vendor_config = {}
@@ -58,6 +71,11 @@ class InverterConfig:
                 'family': config_dict.get('family', 'ET'),
                 'comm_addr': config_dict.get('comm_addr', 0xf7),
             }
+        elif vendor == 'simulated':
+            vendor_config = {
+                'scenario_file': config_dict.get('scenario_file'),
+                'scenario': config_dict.get('scenario', {}),
+            }
         
         return cls(
             vendor=vendor,
@@ -66,9 +84,61 @@ class InverterConfig:
             timeout=timeout,
             retries=retries,
             retry_delay=retry_delay,
+            runtime_max_age=runtime_max_age,
+            name=name,
+            collect_timeout=collect_timeout,
+            battery_capacity_kwh=battery_capacity_kwh,
             vendor_config=vendor_config
         )
     
+    @staticmethod
+    def is_multi_config(config: Union[Dict[str, Any], List[Dict[str, Any]]]) -> bool:
+        """True if the inverter section lists several devices."""
+        return isinstance(config, list) or 'devices' in config
+    
+    @staticmethod
+    def device_dicts(config: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Per-device configuration dicts of an inverter section.
+        
+        The section is either a single device, a list of devices, or a dict
+        with a ``devices`` list whose other keys are defaults for every device.
+        Devices without a ``name`` are named ``inverter1``, ``inverter2``, ...
+        
+        Args:
+            config: ``inverter`` section from YAML
+            
+        Returns:
+            One merged dict per device
+        """
+        if isinstance(config, list):
+            defaults, devices = {}, config
+        elif 'devices' in config:
+            defaults = {key: value for key, value in config.items() if key != 'devices'}
+            devices = config['devices'] or []
+        else:
+            defaults, devices = {}, [config]
+        
+        result = []
+        for i, device in enumerate(devices, start=1):
+            merged = {**defaults, **device}
+            merged.setdefault('name', f"inverter{i}")
+            result.append(merged)
+        return result
+    
+    @classmethod
+    def list_from_yaml_config(cls, config: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List['InverterConfig']:
+        """
+        Create one InverterConfig per device of an inverter section.
+        
+        Args:
+            config: ``inverter`` section from YAML (see ``device_dicts``)
+            
+        Returns:
+            InverterConfig instances in configuration order
+        """
+        return [cls.from_yaml_config(device) for device in cls.device_dicts(config)]
+    
     def validate(self) -> tuple[bool, Optional[str]]:
         """
         Validate configuration.
@@ -79,7 +149,8 @@ class InverterConfig:
         if not self.vendor:
             return False, "Vendor must be specified"
         
-        if not self.ip_address:
+        # The simulated inverter has no network endpoint
+        if not self.ip_address and self.vendor.lower() != 'simulated':
             return False, "IP address must be specified"
         
         if self.port <= 0 or self.port > 65535:
@@ -91,6 +162,15 @@ class InverterConfig:
         if self.retries < 0:
             return False, f"Retries must be non-negative: {self.retries}"
         
+        if self.runtime_max_age < 0:
+            return False, f"Runtime max age must be non-negative: {self.runtime_max_age}"
+        
+        if self.collect_timeout <= 0:
+            return False, f"Collect timeout must be positive: {self.collect_timeout}"
+        
+        if self.battery_capacity_kwh is not None and self.battery_capacity_kwh <= 0:
+            return False, f"Battery capacity must be positive: {self.battery_capacity_kwh}"
+        
         return True, None
 
 
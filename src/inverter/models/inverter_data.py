@@ -4,11 +4,16 @@ Inverter Data Models
 Data structures for representing inverter state and sensor readings.
 """
 
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional, List
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, Optional, List, Sequence, Tuple
 from datetime import datetime
 from enum import Enum
 
+# Marks sensors the inverter did not report in a reading
+_MISSING = object()
+
 
 class InverterState(Enum):
     """Inverter operational state."""
@@ -51,6 +56,140 @@ class SensorReading:
         return f"{self.name}: {self.value} {self.unit}"
 
 
+class SensorIndex:
+    """
+    Immutable sensor table of a connected inverter.
+    
+    Built once at connect time from the vendor's sensor definitions, so reads
+    no longer walk the sensor objects: a reading is a values tuple aligned
+    with ``ids`` (sensor id -> position, name and unit).
+    """
+    
+    __slots__ = ('ids', 'names', 'units', 'positions')
+    
+    def __init__(self, ids: Sequence[str], names: Sequence[str], units: Sequence[str]):
+        self.ids = tuple(ids)
+        self.names = tuple(names)
+        self.units = tuple(units)
+        self.positions = MappingProxyType({sensor_id: i for i, sensor_id in enumerate(self.ids)})
+    
+    @classmethod
+    def from_sensors(cls, sensors: Iterable[Any]) -> 'SensorIndex':
+        """Build from goodwe-style sensor objects (``id_``, ``name``, ``unit``)."""
+        sensors = list(sensors)
+        return cls([s.id_ for s in sensors], [s.name for s in sensors], [s.unit for s in sensors])
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __contains__(self, sensor_id: object) -> bool:
+        return sensor_id in self.positions
+    
+    def entry(self, sensor_id: str) -> Tuple[int, str, str]:
+        """(position, name, unit) of a sensor; KeyError if unknown."""
+        i = self.positions[sensor_id]
+        return i, self.names[i], self.units[i]
+    
+    def reading(self, runtime_data: Dict[str, Any], timestamp: Optional[datetime] = None) -> 'RuntimeReading':
+        """Compact reading of raw runtime data (sensor id -> value)."""
+        get = runtime_data.get
+        return RuntimeReading(self, tuple([get(sensor_id, _MISSING) for sensor_id in self.ids]),
+                              timestamp or datetime.now())
+
+
+class RuntimeReading(Mapping):
+    """
+    One inverter read: a values tuple aligned with a SensorIndex and one timestamp.
+    
+    ``value(sensor_id)`` is the fast path. The Mapping interface is the legacy
+    ``{sensor_id: {'name', 'value', 'unit'}}`` view; its entries are built
+    only when accessed.
+    """
+    
+    __slots__ = ('index', 'values', 'timestamp')
+    
+    def __init__(self, index: SensorIndex, values: Tuple[Any, ...], timestamp: datetime):
+        self.index = index
+        self.values = values
+        self.timestamp = timestamp
+    
+    def value(self, sensor_id: str, default: Any = None) -> Any:
+        """Raw sensor value, or default if the sensor was not reported."""
+        i = self.index.positions.get(sensor_id)
+        if i is None:
+            return default
+        value = self.values[i]
+        return default if value is _MISSING else value
+    
+    def raw(self) -> Dict[str, Any]:
+        """Reported sensor values as a plain ``{sensor_id: value}`` dict."""
+        values = self.values
+        return {sensor_id: values[i] for sensor_id, i in self.index.positions.items() if values[i] is not _MISSING}
+    
+    def sensor_readings(self) -> 'SensorReadings':
+        """Lazy ``{sensor_id: SensorReading}`` view sharing this reading's timestamp."""
+        return SensorReadings(self)
+    
+    def _position(self, sensor_id: object) -> Optional[int]:
+        i = self.index.positions.get(sensor_id)
+        if i is None or self.values[i] is _MISSING:
+            return None
+        return i
+    
+    def __getitem__(self, sensor_id: str) -> Dict[str, Any]:
+        i = self._position(sensor_id)
+        if i is None:
+            raise KeyError(sensor_id)
+        return {'name': self.index.names[i], 'value': self.values[i], 'unit': self.index.units[i]}
+    
+    def get(self, sensor_id: str, default: Any = None) -> Any:
+        i = self._position(sensor_id)
+        if i is None:
+            return default
+        return {'name': self.index.names[i], 'value': self.values[i], 'unit': self.index.units[i]}
+    
+    def __contains__(self, sensor_id: object) -> bool:
+        return self._position(sensor_id) is not None
+    
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (sensor_id for sensor_id, i in self.index.positions.items() if values[i] is not _MISSING)
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __repr__(self) -> str:
+        return f"RuntimeReading({self.timestamp.isoformat()}, {len(self)} sensors)"
+
+
+class SensorReadings(Mapping):
+    """Lazy ``{sensor_id: SensorReading}`` view of a RuntimeReading."""
+    
+    __slots__ = ('reading',)
+    
+    def __init__(self, reading: RuntimeReading):
+        self.reading = reading
+    
+    def __getitem__(self, sensor_id: str) -> SensorReading:
+        entry = self.reading[sensor_id]
+        return SensorReading(
+            sensor_id=sensor_id,
+            name=entry['name'],
+            value=entry['value'],
+            unit=entry['unit'],
+            timestamp=self.reading.timestamp
+        )
+    
+    def __contains__(self, sensor_id: object) -> bool:
+        return sensor_id in self.reading
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.reading)
+    
+    def __len__(self) -> int:
+        return len(self.reading)
+
+
 @dataclass
 class InverterStatus:
     """
@@ -73,8 +212,8 @@ class InverterStatus:
     # Timestamp
     timestamp: datetime
     
-    # All sensor readings
-    sensors: Dict[str, SensorReading] = field(default_factory=dict)
+    # All sensor readings (a lazy SensorReadings view when read from an adapter)
+    sensors: Mapping = field(default_factory=dict)
     
     # Error/warning messages
     errors: List[str] = field(default_factory=list)
@@ -91,6 +230,8 @@ class InverterStatus:
         Returns:
             Sensor value or default
         """
+        if isinstance(self.sensors, SensorReadings):
+            return self.sensors.reading.value(sensor_id, default)
         if sensor_id in self.sensors:
             return self.sensors[sensor_id].value
         return default
@@ -5,7 +5,7 @@ Defines the interface for collecting data from inverters.
 """
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Any
 from datetime import datetime
 
@@ -61,6 +61,8 @@ class ComprehensiveData:
     house_consumption: Dict[str, Any]
     inverter: Dict[str, Any]
     daily_totals: Dict[str, Any]
+    # Per-device breakdown of multi-inverter sites (name -> device data/status)
+    devices: Dict[str, Any] = field(default_factory=dict)
 
 
 class DataCollectorPort(ABC):
@@ -45,6 +45,8 @@ except ImportError:
     StorageFactory = None
     logger.warning("StorageFactory not available - falling back to file-only mode")
 
+from database.coordinator_snapshots import current_data_from_snapshot
+
 def format_uptime_human_readable(seconds: float) -> str:
     """Convert seconds to human-readable uptime format"""
     if seconds < 60:
@@ -696,17 +698,9 @@ class LogWebServer:
             
             latest_state = query_result[0]
             
-            # Parse metrics JSON
-            metrics_json = latest_state.get('metrics')
-            if not metrics_json:
-                raise Exception("No metrics in system state")
-            
-            if isinstance(metrics_json, str):
-                metrics = json.loads(metrics_json)
-            else:
-                metrics = metrics_json
-            
-            current_data = metrics.get('current_data', {})
+            current_data = self._coordinator_current_data(latest_state, use_background=True)
+            if not current_data:
+                raise Exception("No coordinator snapshot in database")
             
             # Check data freshness
             state_timestamp = latest_state.get('timestamp')
@@ -748,6 +742,22 @@ class LogWebServer:
             with self._background_cache_lock:
                 self._background_cache['last_inverter_error'] = str(e)
     
+    def _coordinator_current_data(self, latest_state: Dict[str, Any], use_background: bool) -> Dict[str, Any]:
+        """Coordinator data for a system state row: legacy metrics blob, else the latest typed snapshot"""
+        metrics = latest_state.get('metrics') or {}
+        if isinstance(metrics, str):
+            metrics = json.loads(metrics)
+        if metrics.get('current_data'):
+            return metrics['current_data']
+        
+        storage = self._background_storage if use_background else self.storage
+        snapshot = self._run_async_storage_with_timeout(
+            storage.get_latest_coordinator_snapshot(),
+            timeout=5.0,
+            use_background=use_background
+        )
+        return current_data_from_snapshot(snapshot)
+    
     def _refresh_metrics_data(self):
         """Refresh metrics data from database (uses background storage instance)."""
         try:
@@ -821,6 +831,14 @@ class LogWebServer:
             logger.warning(f"Async storage operation failed: {e}")
             return None
         
+    @staticmethod
+    async def _first_chunk(stream) -> List[Dict[str, Any]]:
+        """First chunk of a storage iter_* stream (empty list when there is none)"""
+        async for chunk in stream:
+            await stream.aclose()
+            return chunk
+        return []
+
     def _setup_routes(self):
         """Setup Flask routes"""
         
@@ -3802,11 +3820,13 @@ class LogWebServer:
             # Try storage layer first using helper
             start_time = datetime.now() - timedelta(days=7)
             end_time = datetime.now()
+            # Only the first chunk is read instead of the whole week
             db_decisions = self._run_async_storage(
-                self.storage.get_decisions(start_time, end_time) if self.storage else None
+                self._first_chunk(self.storage.iter_decisions(start_time, end_time, chunk_size=50))
+                if self.storage else None
             )
             if db_decisions:
-                historical_decisions = db_decisions[:50]  # Limit to 50
+                historical_decisions = db_decisions
                 logger.debug(f"Loaded {len(historical_decisions)} historical decisions from storage")
                 return historical_decisions
             
@@ -4123,17 +4143,9 @@ class LogWebServer:
                     if query_result and len(query_result) > 0:
                         latest_state = query_result[0]
                         
-                        # Parse metrics JSON
-                        metrics_json = latest_state.get('metrics')
-                        if metrics_json:
-                            if isinstance(metrics_json, str):
-                                metrics = json.loads(metrics_json)
-                            else:
-                                metrics = metrics_json
-                            
-                            current_data = metrics.get('current_data', {})
-                            
-                            # Check data freshness
+                        current_data = self._coordinator_current_data(latest_state, use_background=False)
+                        if current_data:
+                            # Check data freshness (system_state is the per-minute heartbeat)
                             state_timestamp = latest_state.get('timestamp')
                             if isinstance(state_timestamp, str):
                                 state_time = datetime.fromisoformat(state_timestamp)
@@ -26,6 +26,8 @@ from enum import Enum
 import statistics
 from database.storage_factory import StorageFactory
 from database.storage_interface import DataStorageInterface
+from database.coordinator_snapshots import snapshot_from_current_data, snapshot_changed
+from sample_buffer import Sample, SampleRing, Sampler, clamp_interval
 
 # Import all the component modules
 import sys
@@ -48,6 +50,7 @@ from pv_trend_analyzer import PVTrendAnalyzer
 from multi_session_manager import MultiSessionManager
 from battery_selling_engine import BatterySellingEngine
 from battery_selling_monitor import BatterySellingMonitor
+from http_client import HttpClient, AIOHTTP_AVAILABLE
 from pse_price_forecast_collector import PSEPriceForecastCollector
 from pse_peak_hours_collector import PSEPeakHoursCollector
 
@@ -108,17 +111,30 @@ class MasterCoordinator:
         self.battery_selling_monitor = None
         self.forecast_collector = None
         self.peak_hours_collector = None
+        self.http_client = None
         
         # System data
         self.current_data = {}
-        self.historical_data = []
         self.decision_history = []
         self.performance_metrics = {}
         self.last_save_time = datetime.now() - timedelta(minutes=10)  # Trigger immediate save on startup
+        self._last_snapshot: Optional[Dict[str, Any]] = None
+        self._last_snapshot_decision: Optional[tuple] = None
+        self._last_snapshot_time: Optional[datetime] = None
         
         # Configuration
         self.config = self._load_config()
         
+        # Inverter samples of the last 24 hours: a fixed ring at the sampler
+        # cadence, so old samples are overwritten instead of trimmed
+        sampling_config = self.config.get('coordinator', {}).get('sampling', {})
+        self.sampling_enabled = sampling_config.get('enabled', True)
+        self.sample_interval = clamp_interval(sampling_config.get('interval_seconds', 20))
+        self.historical_data = SampleRing.for_horizon(
+            timedelta(hours=sampling_config.get('history_hours', 24)), self.sample_interval
+        )
+        self.sampler: Optional[Sampler] = None
+        
         # Initialize storage
         self.storage: Optional[DataStorageInterface] = None
         try:
@@ -148,6 +164,8 @@ class MasterCoordinator:
             config['coordinator'].setdefault('health_check_interval_minutes', 5)
             config['coordinator'].setdefault('data_retention_days', 30)
             config['coordinator'].setdefault('max_charging_sessions_per_day', 4)
+            config['coordinator'].setdefault('snapshot_interval_seconds', 300)
+            config['coordinator'].setdefault('snapshot_on_change', True)
             
             # Set emergency stop defaults only if not present
             if 'emergency_stop_conditions' not in config['coordinator']:
@@ -195,9 +213,13 @@ class MasterCoordinator:
             # Price analysis is now handled by AutomatedPriceCharger
             logger.info("Price analysis handled by AutomatedPriceCharger...")
             
+            # Shared pooled HTTP client for all external API collectors
+            if AIOHTTP_AVAILABLE:
+                self.http_client = HttpClient(self.config.get('http_client', {}))
+            
             # Initialize charging controller
             logger.info("Initializing Charging Controller...")
-            self.charging_controller = AutomatedPriceCharger(self.config_path)
+            self.charging_controller = AutomatedPriceCharger(self.config_path, http_client=self.http_client)
             if not await self.charging_controller.initialize():
                 logger.error("Failed to initialize charging controller")
                 return False
@@ -206,7 +228,7 @@ class MasterCoordinator:
             logger.info("Initializing Weather Data Collector...")
             weather_enabled = self.config.get('weather_integration', {}).get('enabled', True)
             if weather_enabled:
-                self.weather_collector = WeatherDataCollector(self.config)
+                self.weather_collector = WeatherDataCollector(self.config, http_client=self.http_client)
                 logger.info("Weather Data Collector initialized successfully")
             else:
                 logger.info("Weather integration disabled in configuration")
@@ -215,7 +237,7 @@ class MasterCoordinator:
             logger.info("Initializing PSE Price Forecast Collector...")
             forecast_enabled = self.config.get('pse_price_forecast', {}).get('enabled', True)
             if forecast_enabled:
-                self.forecast_collector = PSEPriceForecastCollector(self.config)
+                self.forecast_collector = PSEPriceForecastCollector(self.config, http_client=self.http_client)
                 logger.info("PSE Price Forecast Collector initialized successfully")
             else:
                 logger.info("PSE price forecast disabled in configuration")
@@ -224,7 +246,7 @@ class MasterCoordinator:
             logger.info("Initializing PSE Peak Hours Collector...")
             peak_enabled = self.config.get('pse_peak_hours', {}).get('enabled', False)
             if peak_enabled:
-                self.peak_hours_collector = PSEPeakHoursCollector(self.config)
+                self.peak_hours_collector = PSEPeakHoursCollector(self.config, http_client=self.http_client)
                 logger.info("PSE Peak Hours Collector initialized successfully")
             else:
                 logger.info("PSE peak hours disabled in configuration")
@@ -270,7 +292,9 @@ class MasterCoordinator:
             
             # Initialize multi-session manager with storage support
             logger.info("Initializing Multi-Session Manager...")
-            self.multi_session_manager = MultiSessionManager(self.config, storage=self.storage)
+            self.multi_session_manager = MultiSessionManager(
+                self.config, storage=self.storage, price_analyzer=self.charging_controller
+            )
             logger.info("Multi-Session Manager initialized successfully")
             
             # Initialize battery selling engine
@@ -333,6 +357,11 @@ class MasterCoordinator:
         
         self.is_running = True
         self.start_time = datetime.now()
+        if self.sampling_enabled:
+            self.sampler = Sampler(self.data_collector.collect_comprehensive_data, self.historical_data,
+                                   self.sample_interval)
+            self.data_collector.monitoring_interval = self.sampler.interval
+            self.sampler.start()
         logger.info("Master Coordinator started successfully")
         
         try:
@@ -350,21 +379,7 @@ class MasterCoordinator:
         
         while self.is_running:
             try:
-                # Collect current data
-                await self._collect_system_data()
-                
-                # Perform health checks
-                await self._perform_health_checks()
-                
-                # Make decisions if needed
-                if self._should_make_decision():
-                    await self._make_charging_decision()
-                
-                # Update system state
-                await self._update_system_state()
-                
-                # Log system status
-                self._log_system_status()
+                await self.run_iteration()
                 
                 # Wait before next iteration
                 await asyncio.sleep(60)  # Check every minute
@@ -373,6 +388,24 @@ class MasterCoordinator:
                 logger.error(f"Error in coordination loop: {e}")
                 await asyncio.sleep(30)  # Wait before retry
     
+    async def run_iteration(self):
+        """Run one pass of the coordination loop (also driven directly by accelerated simulations)"""
+        # Collect current data
+        await self._collect_system_data()
+        
+        # Perform health checks
+        await self._perform_health_checks()
+        
+        # Make decisions if needed
+        if self._should_make_decision():
+            await self._make_charging_decision()
+        
+        # Update system state
+        await self._update_system_state()
+        
+        # Log system status
+        self._log_system_status()
+    
     async def _collect_system_data(self):
         """Collect comprehensive system data including weather"""
         try:
@@ -388,9 +421,13 @@ class MasterCoordinator:
                 except Exception as e:
                     logger.error(f"Failed to collect weather data: {e}")
             
-            # Collect data from all sources
-            await self.data_collector.collect_comprehensive_data()
-            self.current_data.update(self.data_collector.get_current_data())
+            # Collect data from all sources; while the sampler task runs it
+            # collects every few seconds and the loop reads its latest sample
+            if not (self.sampler and self.sampler.running):
+                data = await self.data_collector.collect_comprehensive_data()
+                if data:
+                    self.historical_data.append(Sample.from_current_data(data))
+            self._read_latest_sample()
             
             # Save data to storage periodically (every 5 minutes)
             if (datetime.now() - self.last_save_time).total_seconds() >= 300:
@@ -406,22 +443,23 @@ class MasterCoordinator:
             if self.pv_consumption_analyzer:
                 self.pv_consumption_analyzer.update_consumption_history(self.current_data)
             
-            # Store historical data
-            self.historical_data.append({
-                'timestamp': datetime.now(),
-                'data': self.current_data.copy()
-            })
-            
-            # Keep only last 24 hours of data
-            cutoff_time = datetime.now() - timedelta(hours=24)
-            self.historical_data = [
-                entry for entry in self.historical_data 
-                if entry['timestamp'] > cutoff_time
-            ]
-            
         except Exception as e:
             logger.error(f"Failed to collect system data: {e}")
     
+    def _read_latest_sample(self):
+        """Update current data from the ring's latest sample (decision values) and the collector (other sections)"""
+        # The ring holds no device details or daily totals; take those from the
+        # collector and overlay the sample, so SOC, powers, temperature and
+        # voltages all come from one consistent reading
+        self.current_data.update(self.data_collector.get_current_data())
+        sample = self.historical_data.latest()
+        if sample is None:
+            return
+        sample.apply_to(self.current_data)
+        age = datetime.now().timestamp() - sample.ts
+        if self.sampler and self.sampler.running and age > 3 * self.sample_interval:
+            logger.warning(f"Latest inverter sample is {age:.0f}s old")
+    
     async def _perform_health_checks(self):
         """Perform system health checks (GoodWe Lynx-D compliant)"""
         try:
@@ -630,6 +668,7 @@ class MasterCoordinator:
             
             # Save decision to file for dashboard
             await self._save_decision_to_file(decision_record)
+            await self._save_coordinator_snapshot()
             
             self.last_decision_time = datetime.now()
             logger.info(f"Decision made: {decision.get('should_charge', False)} - {decision.get('reason', 'unknown')}")
@@ -676,14 +715,12 @@ class MasterCoordinator:
                         current_price = current_price / 1000
                     
                     # Find cheapest price using AutomatedPriceCharger
-                    prices = []
-                    for item in current_price_data['value']:
-                        market_price = float(item['csdac_pln'])
-                        item_time = datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
-                        final_price = self.charging_controller.calculate_final_price(market_price, item_time)
-                        # Always convert from PLN/MWh to PLN/kWh (removal of unreliable heuristic)
-                        final_price_kwh = final_price / 1000
-                        prices.append((final_price_kwh, item_time.hour))
+                    curve = self.charging_controller.get_price_curve(current_price_data)
+                    # Always convert from PLN/MWh to PLN/kWh (removal of unreliable heuristic)
+                    prices = [
+                        (final_price / 1000, item_time.hour)
+                        for item_time, _, final_price in curve
+                    ]
                     if prices:
                         cheapest_price, cheapest_hour = min(prices, key=lambda x: x[0])
                         # Calculate daily average for savings reference
@@ -829,13 +866,10 @@ class MasterCoordinator:
         try:
             now = datetime.now()
             
-            # Check if we need to create a daily plan
-            if not self.multi_session_manager.current_plan:
-                # Check if it's time to plan (default 06:00)
-                planning_time = self.multi_session_manager.daily_planning_time
-                if now.strftime('%H:%M') == planning_time:
-                    logger.info("Creating daily charging plan...")
-                    await self.multi_session_manager.create_daily_plan(now.date())
+            # Plan today and tomorrow once each, as soon as their prices are published
+            await self.multi_session_manager.update_plans(
+                current_soc=self.current_data.get('battery', {}).get('soc_percent')
+            )
             
             # Check for active session completion
             if self.multi_session_manager.active_session:
@@ -847,14 +881,19 @@ class MasterCoordinator:
                     if self.charging_controller.is_charging:
                         await self.charging_controller.stop_price_based_charging()
             
-            # Check for next session start
-            next_session = await self.multi_session_manager.get_next_session()
+            # Check for next session start (optimal plans are indexed per price slot)
+            if self.multi_session_manager.optimal_schedule is not None:
+                next_session = self.multi_session_manager.get_session_for_time(now)
+                if next_session and next_session.status != 'planned':
+                    next_session = None
+            else:
+                next_session = await self.multi_session_manager.get_next_session()
             if next_session and now >= next_session.start_time:
                 logger.info(f"Starting scheduled session {next_session.session_id}")
                 await self.multi_session_manager.start_session(next_session)
                 # Start charging if not already charging
                 if not self.charging_controller.is_charging:
-                    price_data = self.charging_controller.fetch_price_data_for_date(
+                    price_data = await self.charging_controller.fetch_price_data_for_date(
                         now.strftime('%Y-%m-%d')
                     )
                     if price_data:
@@ -1319,6 +1358,10 @@ class MasterCoordinator:
         logger.info("Shutting down Master Coordinator...")
         
         try:
+            # Stop sampling before the inverter and storage go away
+            if self.sampler:
+                await self.sampler.stop()
+            
             # Stop charging if active
             if self.state == SystemState.CHARGING:
                 await self.charging_controller.stop_price_based_charging()
@@ -1326,32 +1369,40 @@ class MasterCoordinator:
             
             # Save final data
             await self._save_system_state()
+            if self.charging_controller:
+                self.charging_controller.shutdown()
             
             # Disconnect storage
             if self.storage:
                 await self.storage.disconnect()
             
+            # Close pooled HTTP connections
+            if self.http_client:
+                await self.http_client.close()
+            
             logger.info("Master Coordinator shutdown complete")
             
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")
     
     async def _save_system_state(self):
-        """Save current system state to file"""
+        """Save current system state to storage (or to file without storage)"""
         try:
             state_data = {
                 'timestamp': datetime.now().isoformat(),
                 'state': self.state.value,
                 'uptime_seconds': (datetime.now() - self.start_time).total_seconds() if self.start_time else 0,
-                'current_data': self.current_data,
                 'performance_metrics': self.performance_metrics,
                 'decision_count': len(self.decision_history)
             }
             
             if self.storage:
+                # current_data goes to the typed coordinator_snapshots table instead
                 await self.storage.save_system_state(state_data)
+                await self._save_coordinator_snapshot()
                 logger.info("System state saved to storage")
             else:
+                state_data['current_data'] = self.current_data
                 state_file = project_root / "out" / f"coordinator_state_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                 state_file.parent.mkdir(exist_ok=True)
                 
@@ -1363,6 +1414,35 @@ class MasterCoordinator:
         except Exception as e:
             logger.error(f"Failed to save system state: {e}")
     
+    def _snapshot_decision(self) -> tuple:
+        """Latest decision and charging flag, compared by snapshot_on_change"""
+        decision = self.decision_history[-1]['decision'] if self.decision_history else {}
+        return (decision.get('should_charge'), decision.get('priority'),
+                getattr(self.charging_controller, 'is_charging', None))
+    
+    async def _save_coordinator_snapshot(self):
+        """Write a typed snapshot of current_data when the state changed or the cadence elapsed"""
+        if not self.current_data or not self.storage:
+            return
+        
+        coordinator_config = self.config.get('coordinator', {})
+        interval = coordinator_config.get('snapshot_interval_seconds', 300)
+        on_change = coordinator_config.get('snapshot_on_change', True)
+        
+        now = datetime.now()
+        snapshot = snapshot_from_current_data(self.current_data, self.state.value, now)
+        decision = self._snapshot_decision()
+        due = (self._last_snapshot_time is None or
+               (now - self._last_snapshot_time).total_seconds() >= interval)
+        changed = snapshot_changed(self._last_snapshot, snapshot) or decision != self._last_snapshot_decision
+        if not due and not (on_change and changed):
+            return
+        
+        if await self.storage.save_coordinator_snapshot(snapshot):
+            self._last_snapshot = snapshot
+            self._last_snapshot_decision = decision
+            self._last_snapshot_time = now
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current system status (GoodWe Lynx-D compliant)"""
         compliance = self._check_goodwe_lynx_d_compliance()
@@ -1389,6 +1469,9 @@ class MasterCoordinator:
         if self.multi_session_manager:
             status['multi_session_status'] = self.multi_session_manager.get_current_plan_status()
         
+        if self.sampler:
+            status['sampler'] = self.sampler.get_stats()
+        
         return status
     
 
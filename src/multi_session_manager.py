@@ -13,6 +13,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 
 from automated_price_charging import AutomatedPriceCharger
+from charging_schedule_optimizer import ChargingScheduleOptimizer, OptimalSchedule
+from price_data_service import PriceDataService, is_day_complete
 
 # Try to import storage layer
 try:
@@ -57,15 +59,21 @@ class DailyChargingPlan:
     created_at: datetime
     status: str  # 'planned', 'active', 'completed', 'cancelled'
 
+def _plan_date(plan: DailyChargingPlan):
+    """Calendar date of a plan (plans may carry a date or a datetime)"""
+    return plan.date.date() if isinstance(plan.date, datetime) else plan.date
+
 class MultiSessionManager:
     """Manages multiple charging sessions per day"""
     
-    def __init__(self, config: Dict[str, Any], storage: Optional[Any] = None):
+    def __init__(self, config: Dict[str, Any], storage: Optional[Any] = None,
+                 price_analyzer: Optional[AutomatedPriceCharger] = None):
         """Initialize the multi-session manager
         
         Args:
             config: Configuration dictionary
             storage: Optional storage interface for database persistence
+            price_analyzer: Optional AutomatedPriceCharger to share (a default one is created otherwise)
         """
         self.config = config
         self.multi_session_config = config.get('coordinator', {}).get('multi_session_charging', {})
@@ -79,23 +87,123 @@ class MultiSessionManager:
         self.min_savings_percent = self.multi_session_config.get('min_savings_percent', 15.0)
         self.session_gap_minutes = self.multi_session_config.get('session_gap_minutes', 30)
         self.daily_planning_time = self.multi_session_config.get('daily_planning_time', '06:00')
+        self.planning_mode = self.multi_session_config.get('planning_mode', 'heuristic')  # 'heuristic' or 'optimal'
+        self.target_soc = self.multi_session_config.get(
+            'target_soc', config.get('battery_management', {}).get('target_soc', 100.0)
+        )
         
         # State management
         self.current_plan: Optional[DailyChargingPlan] = None
         self.active_session: Optional[ChargingSession] = None
         self.session_history: List[ChargingSession] = []
+        self.optimal_schedule: Optional[OptimalSchedule] = None
+        
+        # Tomorrow's plan, made when the D+1 prices are published; current at midnight
+        self.upcoming_plan: Optional[DailyChargingPlan] = None
+        self._upcoming_schedule: Optional[OptimalSchedule] = None
+        self._published_days: set = set()  # Business dates (YYYY-MM-DD) with complete prices
+        self._planned_days: set = set()
         
         # Data directory for persistence
-        self.data_dir = Path("out/multi_session_data")
-        self.data_dir.mkdir(exist_ok=True)
+        self.data_dir = Path(self.multi_session_config.get('data_dir', 'out/multi_session_data'))
+        self.data_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize price analyzer
-        self.price_analyzer = AutomatedPriceCharger()
+        self.price_analyzer = price_analyzer or AutomatedPriceCharger()
+        self.schedule_optimizer = ChargingScheduleOptimizer(config)
+        
+        # Plan as soon as a day's prices are published
+        price_service = getattr(self.price_analyzer, 'price_data_service', None)
+        self.publication_start_hour = 12
+        if isinstance(price_service, PriceDataService):
+            self.publication_start_hour = price_service.publication_window[0]
+            price_service.add_publication_listener(self._on_prices_published)
+        
+        logger.info(f"Multi-session manager initialized: enabled={self.enabled}, max_sessions={self.max_sessions_per_day}, "
+                    f"planning_mode={self.planning_mode}")
+    
+    def _on_prices_published(self, date_str: str, price_data: Dict) -> None:
+        """PriceDataService listener: a business day's prices are complete"""
+        self._published_days.add(date_str)
+    
+    async def update_plans(self, current_soc: Optional[float] = None) -> None:
+        """Make the day's plans; called on every coordinator cycle
+        
+        The heuristic mode plans today once, at ``daily_planning_time``. The
+        optimal mode plans each day as soon as its prices are published:
+        tomorrow's plan is made when the D+1 prices are published, becomes the
+        current plan at midnight and is then re-planned from the actual SOC.
+        
+        Args:
+            current_soc: Battery SOC now, used by the optimal planning mode
+        """
+        if not self.enabled:
+            return
         
-        logger.info(f"Multi-session manager initialized: enabled={self.enabled}, max_sessions={self.max_sessions_per_day}")
+        now = datetime.now()
+        today = now.date()
+        self._roll_over(today)
+        
+        if self.planning_mode != 'optimal':
+            today_str = today.isoformat()
+            if (self.current_plan is None and today_str not in self._planned_days
+                    and now.strftime('%H:%M') >= self.daily_planning_time):
+                self._planned_days.add(today_str)
+                logger.info("Creating daily charging plan...")
+                await self.create_daily_plan(today)
+            return
+        
+        for day in (today, today + timedelta(days=1)):
+            day_str = day.isoformat()
+            if day_str in self._planned_days:
+                continue
+            if day > today and now.hour < self.publication_start_hour:
+                continue
+            if day_str not in self._published_days:
+                # Fetching through the price service announces a complete day
+                price_data = await self._fetch_price_data_for_date(day)
+                if is_day_complete(price_data, day):
+                    self._published_days.add(day_str)
+            if day_str in self._published_days:
+                self._planned_days.add(day_str)
+                logger.info(f"Prices for {day_str} are published, planning charging sessions")
+                await self.create_daily_plan(day, current_soc=current_soc)
+    
+    def _roll_over(self, today) -> None:
+        """Retire a past day's plan and promote tomorrow's plan at midnight
+        
+        The promoted plan stays current until ``update_plans`` re-plans the day.
+        """
+        if self.active_session is not None:
+            return
+        if self.current_plan is not None and _plan_date(self.current_plan) < today:
+            self.current_plan, self.optimal_schedule = None, None
+        if self.upcoming_plan is not None and _plan_date(self.upcoming_plan) <= today:
+            if self.current_plan is None and _plan_date(self.upcoming_plan) == today:
+                self.current_plan, self.optimal_schedule = self.upcoming_plan, self._upcoming_schedule
+                # Planned from the SOC at publication time: plan again from the SOC now
+                self._planned_days.discard(today.isoformat())
+            self.upcoming_plan, self._upcoming_schedule = None, None
+        cutoff = (today - timedelta(days=1)).isoformat()
+        self._planned_days = {day for day in self._planned_days if day >= cutoff}
+        self._published_days = {day for day in self._published_days if day >= cutoff}
     
-    async def create_daily_plan(self, date: datetime = None) -> Optional[DailyChargingPlan]:
-        """Create a daily charging plan for the specified date"""
+    def _install_plan(self, plan: DailyChargingPlan, schedule: Optional[OptimalSchedule]) -> None:
+        """Make a plan current, or upcoming if it is for a later day"""
+        if _plan_date(plan) > datetime.now().date():
+            self.upcoming_plan, self._upcoming_schedule = plan, schedule
+        else:
+            self.current_plan, self.optimal_schedule = plan, schedule
+    
+    async def create_daily_plan(self, date: datetime = None, current_soc: Optional[float] = None) -> Optional[DailyChargingPlan]:
+        """Create a daily charging plan for the specified date
+        
+        A plan for a later day becomes ``upcoming_plan`` until that day starts.
+        
+        Args:
+            date: Plan date (default: today)
+            current_soc: Battery SOC at planning time, used by the optimal planning mode
+        """
         if not self.enabled:
             logger.info("Multi-session charging is disabled")
             return None
@@ -112,11 +220,15 @@ class MultiSessionManager:
                 logger.warning(f"No price data available for {date}")
                 return None
             
-            # Find optimal charging windows
-            charging_windows = self.price_analyzer.analyze_charging_windows(
+            if self.planning_mode == 'optimal':
+                return await self._create_optimal_plan(date, price_data, current_soc)
+            
+            # Find optimal non-overlapping charging windows (single prefix-sum pass)
+            charging_windows = self.price_analyzer.find_best_charging_windows(
                 price_data=price_data,
-                target_hours=self.max_session_duration_hours
-            )
+                durations_hours=[self.max_session_duration_hours],
+                max_windows=self.max_sessions_per_day
+            ).get(self.max_session_duration_hours, [])
             
             if not charging_windows:
                 logger.info(f"No optimal charging windows found for {date}")
@@ -127,10 +239,10 @@ class MultiSessionManager:
             for i, window in enumerate(charging_windows):
                 session = ChargingSession(
                     session_id=f"{date.strftime('%Y%m%d')}_{i+1}",
-                    start_time=window.start_time,
-                    end_time=window.end_time,
-                    duration_hours=window.duration_minutes / 60.0,
-                    target_energy_kwh=self._estimate_energy_for_session(window.duration_minutes / 60.0),
+                    start_time=window['start_time'],
+                    end_time=window['end_time'],
+                    duration_hours=window['duration_minutes'] / 60.0,
+                    target_energy_kwh=self._estimate_energy_for_session(window['duration_minutes'] / 60.0),
                     status='planned',
                     priority=i + 1,
                     estimated_cost_pln=self._calculate_session_cost(window),
@@ -155,7 +267,7 @@ class MultiSessionManager:
             # Save plan to file
             await self._save_daily_plan(plan)
             
-            self.current_plan = plan
+            self._install_plan(plan, None)
             logger.info(f"Created daily plan with {len(sessions)} sessions, total savings: {plan.total_estimated_savings_pln:.2f} PLN")
             
             return plan
@@ -164,6 +276,76 @@ class MultiSessionManager:
             logger.error(f"Failed to create daily plan for {date}: {e}")
             return None
     
+    async def _create_optimal_plan(self, date, price_data: Dict, current_soc: Optional[float]) -> Optional[DailyChargingPlan]:
+        """Create a daily plan with the exact DP schedule solver (slots already started are skipped)"""
+        curve = self.price_analyzer.get_price_curve(price_data)
+        soc = current_soc if current_soc is not None else self.config.get('battery_management', {}).get(
+            'soc_thresholds', {}).get('critical', 12)
+        
+        schedule = self.schedule_optimizer.solve(curve, soc, self.target_soc, start_time=datetime.now())
+        if not schedule or not schedule.sessions:
+            logger.info(f"No optimal charging sessions needed for {date}")
+            return None
+        
+        overall_avg = float(curve.final_prices.mean())
+        sessions = []
+        for i, planned in enumerate(schedule.sessions):
+            duration_hours = (planned.end_time - planned.start_time).total_seconds() / 3600.0
+            sessions.append(ChargingSession(
+                session_id=f"{date.strftime('%Y%m%d')}_{i+1}",
+                start_time=planned.start_time,
+                end_time=planned.end_time,
+                duration_hours=duration_hours,
+                target_energy_kwh=planned.energy_kwh,
+                status='planned',
+                priority=i + 1,
+                estimated_cost_pln=planned.cost_pln,
+                estimated_savings_pln=planned.energy_kwh * (overall_avg - planned.avg_price_pln_mwh) / 1000.0,
+                created_at=datetime.now()
+            ))
+        
+        plan = DailyChargingPlan(
+            date=date,
+            total_sessions=len(sessions),
+            total_duration_hours=sum(s.duration_hours for s in sessions),
+            total_estimated_energy_kwh=sum(s.target_energy_kwh for s in sessions),
+            total_estimated_cost_pln=sum(s.estimated_cost_pln for s in sessions),
+            total_estimated_savings_pln=sum(s.estimated_savings_pln for s in sessions),
+            sessions=sessions,
+            created_at=datetime.now(),
+            status='planned'
+        )
+        
+        await self._save_daily_plan(plan)
+        
+        self._install_plan(plan, schedule)
+        logger.info(f"Created optimal daily plan with {len(sessions)} sessions, "
+                    f"estimated cost: {plan.total_estimated_cost_pln:.2f} PLN")
+        
+        return plan
+    
+    def get_session_for_time(self, when: Optional[datetime] = None) -> Optional[ChargingSession]:
+        """Get the planned session covering the given time
+        
+        Uses the per-slot index of the optimal schedule (O(1)) when available,
+        otherwise scans the current plan's sessions.
+        """
+        if not self.current_plan or not self.current_plan.sessions:
+            return None
+        
+        when = when or datetime.now()
+        if self.optimal_schedule is not None:
+            session_index = self.optimal_schedule.session_index_at(when)
+            if session_index < 0:
+                return None
+            session = self.current_plan.sessions[session_index]
+            return session if session.status in ('planned', 'active') else None
+        
+        for session in self.current_plan.sessions:
+            if session.status in ('planned', 'active') and session.start_time <= when < session.end_time:
+                return session
+        return None
+    
     async def get_next_session(self) -> Optional[ChargingSession]:
         """Get the next scheduled charging session"""
         if not self.current_plan or not self.current_plan.sessions:
@@ -300,8 +482,7 @@ class MultiSessionManager:
         """Fetch price data for a specific date"""
         try:
             # Use AutomatedPriceCharger for consistent price data fetching
-            price_data = self.price_analyzer.fetch_price_data_for_date(date.strftime('%Y-%m-%d'))
-            return price_data
+            return await self.price_analyzer.fetch_price_data_for_date(date.strftime('%Y-%m-%d'))
         except Exception as e:
             logger.error(f"Failed to fetch price data for {date}: {e}")
             return None
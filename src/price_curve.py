@@ -0,0 +1,373 @@
+"""
+Price Curve - Parse-once, array-backed representation of CSDAC price data.
+
+Raw CSDAC responses (``{'value': [{'dtime', 'csdac_pln', ...}]}``) are parsed a
+single time into NumPy arrays of slot start times, market prices and final
+(tariff-aware) prices. Every consumer in the decision pipeline can then look up
+prices in O(1) instead of re-running ``strptime``/``float`` on every row.
+
+Slot start times are stored as local wall-clock epoch seconds, i.e. the naive
+``dtime`` values interpreted as-is, which matches how naive datetimes are used
+throughout the decision code.
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Naive epoch used for wall-clock second arithmetic
+_EPOCH = datetime(1970, 1, 1)
+
+# Default CSDAC slot length (15 minutes)
+DEFAULT_SLOT_SECONDS = 900
+
+# SC component (składnik cenotwórczy) priced in without a tariff calculator (PLN/MWh)
+DEFAULT_SC_COMPONENT_MWH = 89.2
+
+# Number of curves kept by the memoization cache
+_CURVE_CACHE_SIZE = 16
+
+# Signature of a final-price function: (market PLN/MWh array, timestamps) -> final PLN/MWh array
+FinalPriceFn = Callable[[np.ndarray, Sequence[datetime]], np.ndarray]
+
+
+def to_wall_epoch(dt: datetime) -> int:
+    """Convert a datetime to local wall-clock epoch seconds (tzinfo is ignored)."""
+    return int((dt.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+def from_wall_epoch(seconds: int) -> datetime:
+    """Convert local wall-clock epoch seconds back to a naive datetime."""
+    return _EPOCH + timedelta(seconds=int(seconds))
+
+
+class PriceCurve:
+    """
+    Immutable, array-backed price curve for one fetch of CSDAC price data.
+
+    Prices are in PLN/MWh, matching the raw CSDAC ``csdac_pln`` field. The curve
+    also behaves like the source dict for legacy readers (``'value' in curve``,
+    ``curve['value']``, ``curve.get(...)``), so it can be passed anywhere raw
+    price data was accepted.
+    """
+
+    __slots__ = ('slot_starts', 'market_prices', 'final_prices', 'timestamps',
+                 'slot_seconds', 'business_date', '_uniform', '_source')
+
+    def __init__(
+        self,
+        slot_starts: np.ndarray,
+        market_prices: np.ndarray,
+        final_prices: np.ndarray,
+        timestamps: Sequence[datetime],
+        slot_seconds: int = DEFAULT_SLOT_SECONDS,
+        business_date: Optional[date] = None,
+        source: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize price curve from pre-built arrays.
+
+        Args:
+            slot_starts: Slot start times as wall-clock epoch seconds (int64, ascending)
+            market_prices: Market prices in PLN/MWh
+            final_prices: Final prices (market + SC + distribution) in PLN/MWh
+            timestamps: Slot start datetimes (same order as arrays)
+            slot_seconds: Length of a single price slot in seconds
+            business_date: Business date the prices belong to
+            source: Raw price data dict the curve was built from (for legacy readers)
+        """
+        self.slot_starts = slot_starts
+        self.market_prices = market_prices
+        self.final_prices = final_prices
+        self.timestamps = tuple(timestamps)
+        self.slot_seconds = slot_seconds
+        self.business_date = business_date
+        self._source = source if source is not None else {'value': []}
+
+        for array in (self.slot_starts, self.market_prices, self.final_prices):
+            array.setflags(write=False)
+
+        # Uniformly spaced curves get arithmetic O(1) lookups
+        n = len(self.slot_starts)
+        self._uniform = n < 2 or (
+            int(self.slot_starts[-1] - self.slot_starts[0]) == (n - 1) * slot_seconds
+            and bool(np.all(np.diff(self.slot_starts) == slot_seconds))
+        )
+
+    @classmethod
+    def from_price_data(
+        cls,
+        price_data: Dict[str, Any],
+        final_price_fn: Optional[FinalPriceFn] = None,
+        sc_component_mwh: float = DEFAULT_SC_COMPONENT_MWH
+    ) -> 'PriceCurve':
+        """
+        Parse raw CSDAC price data into a price curve.
+
+        Args:
+            price_data: Raw CSDAC response with a 'value' list
+            final_price_fn: Function returning final PLN/MWh prices for market PLN/MWh prices
+            sc_component_mwh: SC component added when no final_price_fn is given (PLN/MWh)
+
+        Returns:
+            PriceCurve sorted by slot start time
+        """
+        items = price_data.get('value', []) if price_data else []
+
+        timestamps: List[datetime] = []
+        market: List[float] = []
+        for item in items:
+            dtime = item.get('dtime')
+            if not dtime:
+                continue
+            try:
+                timestamps.append(datetime.fromisoformat(dtime))
+            except ValueError:
+                logger.error(f"Error parsing datetime: {dtime}")
+                continue
+            market.append(float(item.get('csdac_pln', 0)))
+
+        slot_starts = np.fromiter((to_wall_epoch(ts) for ts in timestamps), dtype=np.int64, count=len(timestamps))
+        market_prices = np.asarray(market, dtype=np.float64)
+
+        # Keep slots ordered by time so lookups can rely on it
+        if len(slot_starts) > 1 and np.any(np.diff(slot_starts) < 0):
+            order = np.argsort(slot_starts, kind='stable')
+            slot_starts = slot_starts[order]
+            market_prices = market_prices[order]
+            timestamps = [timestamps[i] for i in order]
+
+        if final_price_fn is not None and len(market_prices):
+            final_prices = np.asarray(final_price_fn(market_prices, timestamps), dtype=np.float64)
+        else:
+            final_prices = market_prices + sc_component_mwh
+
+        slot_seconds = DEFAULT_SLOT_SECONDS
+        if len(slot_starts) > 1:
+            slot_seconds = int(np.min(np.diff(slot_starts))) or DEFAULT_SLOT_SECONDS
+
+        return cls(
+            slot_starts=slot_starts,
+            market_prices=market_prices,
+            final_prices=final_prices,
+            timestamps=timestamps,
+            slot_seconds=slot_seconds,
+            business_date=_business_date(items, timestamps),
+            source=price_data
+        )
+
+    def __len__(self) -> int:
+        return len(self.slot_starts)
+
+    def __iter__(self) -> Iterator[Tuple[datetime, float, float]]:
+        """Iterate over (slot start, market price, final price) tuples."""
+        return zip(self.timestamps, self.market_prices.tolist(), self.final_prices.tolist())
+
+    # Legacy dict view -------------------------------------------------------
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._source
+
+    def __getitem__(self, key: str) -> Any:
+        return self._source[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access to the raw price data the curve was built from."""
+        return self._source.get(key, default)
+
+    # Lookups ----------------------------------------------------------------
+
+    def index_at(self, when: datetime) -> Optional[int]:
+        """
+        Get index of the slot containing the given time.
+
+        Args:
+            when: Time to look up (tzinfo is ignored, wall-clock semantics)
+
+        Returns:
+            Slot index or None if the time is outside the curve
+        """
+        n = len(self.slot_starts)
+        if n == 0:
+            return None
+
+        t = to_wall_epoch(when)
+        start = int(self.slot_starts[0])
+        if t < start:
+            return None
+
+        if self._uniform:
+            index = (t - start) // self.slot_seconds
+        else:
+            index = int(np.searchsorted(self.slot_starts, t, side='right')) - 1
+
+        if index >= n or t >= int(self.slot_starts[index]) + self.slot_seconds:
+            return None
+        return int(index)
+
+    def price_at(self, when: datetime, final: bool = True) -> Optional[float]:
+        """
+        Get price for the slot containing the given time.
+
+        Args:
+            when: Time to look up
+            final: Return final price (True) or raw market price (False)
+
+        Returns:
+            Price in PLN/MWh or None if the time is outside the curve
+        """
+        index = self.index_at(when)
+        if index is None:
+            return None
+        prices = self.final_prices if final else self.market_prices
+        return float(prices[index])
+
+    def slice(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> 'PriceCurve':
+        """
+        Get sub-curve of slots starting in [start, end).
+
+        Arrays in the returned curve are views, no price data is copied.
+
+        Args:
+            start: Inclusive start time (None = beginning of the curve)
+            end: Exclusive end time (None = end of the curve)
+
+        Returns:
+            PriceCurve with the selected slots
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.slot_starts, to_wall_epoch(start), side='left'))
+        hi = len(self.slot_starts) if end is None else int(np.searchsorted(self.slot_starts, to_wall_epoch(end), side='left'))
+        hi = max(lo, hi)
+        return PriceCurve(
+            slot_starts=self.slot_starts[lo:hi],
+            market_prices=self.market_prices[lo:hi],
+            final_prices=self.final_prices[lo:hi],
+            timestamps=self.timestamps[lo:hi],
+            slot_seconds=self.slot_seconds,
+            business_date=self.business_date,
+            source=self._source
+        )
+
+    def hourly_average(self) -> Dict[int, float]:
+        """Get average final price per hour of day (PLN/MWh)."""
+        if len(self.slot_starts) == 0:
+            return {}
+        hours = np.fromiter((ts.hour for ts in self.timestamps), dtype=np.intp, count=len(self.timestamps))
+        sums = np.bincount(hours, weights=self.final_prices, minlength=24)
+        counts = np.bincount(hours, minlength=24)
+        return {hour: float(sums[hour] / counts[hour]) for hour in np.nonzero(counts)[0].tolist()}
+
+    def percentile_threshold(self, percentile: float) -> Optional[float]:
+        """Get the final price at the given rank percentile (0-1), as used for charging thresholds."""
+        if len(self.final_prices) == 0:
+            return None
+        return float(np.sort(self.final_prices)[int(len(self.final_prices) * percentile)])
+
+
+def _business_date(items: List[Dict[str, Any]], timestamps: Sequence[datetime]) -> Optional[date]:
+    """Resolve business date from CSDAC items or fall back to the first slot date."""
+    if items:
+        business_date = items[0].get('business_date')
+        if business_date:
+            try:
+                return date.fromisoformat(str(business_date)[:10])
+            except ValueError:
+                pass
+    return timestamps[0].date() if timestamps else None
+
+
+def _fingerprint(items: List[Dict[str, Any]]) -> int:
+    """Cheap content fingerprint of raw price rows (no parsing)."""
+    return hash((
+        len(items),
+        tuple(item.get('dtime') for item in items),
+        tuple(item.get('csdac_pln') for item in items)
+    ))
+
+
+_curve_cache: 'OrderedDict[Tuple[Any, Any], Tuple[int, PriceCurve]]' = OrderedDict()
+
+
+def get_price_curve(
+    price_data: Any,
+    final_price_fn: Optional[FinalPriceFn] = None,
+    tariff_key: Any = None,
+    sc_component_mwh: float = DEFAULT_SC_COMPONENT_MWH
+) -> PriceCurve:
+    """
+    Get a price curve for raw price data, memoized by (business date, tariff config hash).
+
+    If price_data already is a PriceCurve it is returned unchanged. A cached curve
+    is reused only while the raw rows are unchanged, so a refetch of an
+    incomplete day produces a fresh curve.
+
+    Args:
+        price_data: Raw CSDAC price data dict or PriceCurve
+        final_price_fn: Function returning final PLN/MWh prices for market PLN/MWh prices
+        tariff_key: Hashable identifier of the pricing configuration
+        sc_component_mwh: SC component used when no final_price_fn is given (PLN/MWh)
+
+    Returns:
+        PriceCurve for the price data
+    """
+    if isinstance(price_data, PriceCurve):
+        return price_data
+
+    items = price_data.get('value', []) if price_data else []
+    if not items:
+        return PriceCurve.from_price_data(price_data or {'value': []}, final_price_fn, sc_component_mwh)
+
+    first = items[0]
+    key = (first.get('business_date') or str(first.get('dtime', ''))[:10], tariff_key)
+    fingerprint = _fingerprint(items)
+
+    cached = _curve_cache.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        _curve_cache.move_to_end(key)
+        return cached[1]
+
+    curve = PriceCurve.from_price_data(price_data, final_price_fn, sc_component_mwh)
+    _curve_cache[key] = (fingerprint, curve)
+    _curve_cache.move_to_end(key)
+    while len(_curve_cache) > _CURVE_CACHE_SIZE:
+        _curve_cache.popitem(last=False)
+    return curve
+
+
+def get_tariff_price_curve(
+    price_data: Any,
+    tariff_calculator: Any = None,
+    sc_component_mwh: float = DEFAULT_SC_COMPONENT_MWH
+) -> PriceCurve:
+    """
+    Get a memoized price curve priced by a tariff calculator.
+
+    Without a tariff calculator the final price is the market price plus the SC
+    component only.
+
+    Args:
+        price_data: Raw CSDAC price data dict or PriceCurve
+        tariff_calculator: TariffCalculator (prices in PLN/kWh), or None
+        sc_component_mwh: SC component used without a tariff calculator (PLN/MWh)
+
+    Returns:
+        PriceCurve with market and final prices in PLN/MWh
+    """
+    if tariff_calculator is None:
+        return get_price_curve(price_data, tariff_key=('sc-only', sc_component_mwh),
+                               sc_component_mwh=sc_component_mwh)
+
+    def final_prices(market_prices_mwh: np.ndarray, timestamps: Sequence[datetime]) -> np.ndarray:
+        return tariff_calculator.calculate_final_prices_batch(market_prices_mwh / 1000, timestamps) * 1000
+
+    return get_price_curve(price_data, final_prices, tariff_calculator.config_hash)
+
+
+def clear_price_curve_cache() -> None:
+    """Drop all memoized price curves."""
+    _curve_cache.clear()
@@ -0,0 +1,364 @@
+"""
+Price Data Service - Single-flight CSDAC price fetching with a day cache.
+
+A published CSDAC business day never changes, so once a day is complete it is
+kept in memory (and optionally on disk under ``data/``) and never fetched again.
+Days that are missing or incomplete are refetched at most once per refetch
+interval, more often around the D+1 publication window. Concurrent callers
+asking for the same day share one in-flight request (single-flight).
+Publication listeners are called once per day, when it first becomes complete.
+
+All components that fetch prices (AutomatedPriceCharger, MultiSessionManager,
+LogWebServer) share one service per API URL via ``get_price_data_service``.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pytz
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+WARSAW_TZ = pytz.timezone('Europe/Warsaw')
+
+# Default CSDAC slot length in minutes
+DEFAULT_SLOT_MINUTES = 15
+
+
+def expected_day_minutes(business_date: date) -> int:
+    """Length of a Warsaw business day in minutes (1380/1440/1500 on DST days)."""
+    start = WARSAW_TZ.localize(datetime.combine(business_date, datetime.min.time()))
+    end = WARSAW_TZ.localize(datetime.combine(business_date + timedelta(days=1), datetime.min.time()))
+    return int((end - start).total_seconds() // 60)
+
+
+def is_day_complete(price_data: Optional[Dict[str, Any]], business_date: date) -> bool:
+    """
+    Check whether price data covers the whole business day.
+
+    Args:
+        price_data: Raw CSDAC response
+        business_date: Business date the data was requested for
+
+    Returns:
+        True if every slot of the day is present
+
+    Slots are counted per period, not per distinct ``dtime``: on the autumn
+    DST day the 02:xx local times occur twice and each occurrence is a slot.
+    """
+    if not price_data or not price_data.get('value'):
+        return False
+
+    values = price_data['value']
+    slot_minutes = DEFAULT_SLOT_MINUTES
+    if len(values) >= 2:
+        try:
+            first = datetime.fromisoformat(values[0]['dtime'])
+            second = datetime.fromisoformat(values[1]['dtime'])
+            slot_minutes = max(1, int((second - first).total_seconds() // 60))
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    day_minutes = expected_day_minutes(business_date)
+    # A local time occurs twice only on the day clocks go back; repeats
+    # beyond that (or with the same period label) are duplicate rows
+    max_repeats = 2 if day_minutes > 24 * 60 else 1
+    periods = Counter((item.get('dtime'), item.get('period')) for item in values)
+    slots = sum(min(count, max_repeats) for count in periods.values())
+    return slots * slot_minutes >= day_minutes
+
+
+class PriceDataService:
+    """Fetches CSDAC price data per business day with caching and single-flight"""
+
+    def __init__(self, api_url: str, config: Optional[Dict[str, Any]] = None, http_client: Optional[Any] = None):
+        """
+        Initialize price data service.
+
+        Args:
+            api_url: CSDAC API endpoint
+            config: ``price_analysis.price_cache`` configuration section
+            http_client: Optional shared HttpClient (per-request sessions otherwise)
+        """
+        config = config or {}
+        self.api_url = api_url
+        self.http_client = http_client
+        self.enabled = config.get('enabled', True)
+        cache_dir = config.get('cache_dir')
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.timeout_seconds = config.get('timeout_seconds', 30)
+        self.refetch_interval_seconds = config.get('refetch_interval_minutes', 15) * 60
+        self.publication_refetch_seconds = config.get('publication_refetch_minutes', 2) * 60
+        self.publication_window = (
+            config.get('publication_window_start_hour', 12),
+            config.get('publication_window_end_hour', 15)
+        )
+
+        # business date -> (price data or None, monotonic fetch time, complete)
+        self._days: Dict[str, Tuple[Optional[Dict[str, Any]], float, bool]] = {}
+        # business date -> (event loop, in-flight task)
+        self._in_flight: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+        self._lock = threading.Lock()
+        # Called with (business date, price data) when a day first becomes complete
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._published: Set[str] = set()
+
+        self.stats = {'requests': 0, 'memory_hits': 0, 'disk_hits': 0, 'fetches': 0, 'shared_fetches': 0}
+
+        if self.cache_dir:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Price cache directory {self.cache_dir} unavailable: {e}")
+                self.cache_dir = None
+
+    async def get_price_data(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """
+        Get price data for a business day.
+
+        Returns the same dict object to every caller while it is cached, so
+        callers must treat it as read-only.
+
+        Args:
+            date_str: Business date (YYYY-MM-DD)
+
+        Returns:
+            Raw CSDAC response, or None if unavailable
+        """
+        if not self.enabled:
+            return await self._fetch(date_str)
+
+        self.stats['requests'] += 1
+        business_date = date.fromisoformat(date_str)
+
+        with self._lock:
+            cached = self._days.get(date_str)
+        if cached is not None:
+            if not self._needs_refetch(cached, business_date):
+                self.stats['memory_hits'] += 1
+                return cached[0]
+        else:
+            # Only complete days are persisted, so a disk hit never needs a refetch
+            cached = self._load_from_disk(date_str, business_date)
+            if cached is not None:
+                return cached[0]
+
+        data = await self._single_flight(date_str, business_date)
+        # Keep serving stale incomplete data when a refetch fails
+        if data is None and cached is not None:
+            return cached[0]
+        return data
+
+    def get_cached(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """Get cached price data for a business day without fetching"""
+        with self._lock:
+            cached = self._days.get(date_str)
+        return cached[0] if cached else None
+
+    def add_publication_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """
+        Call listener(date_str, price_data) once for every day that becomes complete.
+
+        Days already complete in the memory cache are announced immediately.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            complete = [(date_str, entry[0]) for date_str, entry in self._days.items() if entry[2]]
+        for date_str, data in complete:
+            self._notify(listener, date_str, data)
+
+    def remove_publication_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Stop calling a publication listener"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    @staticmethod
+    def _notify(listener: Callable[[str, Dict[str, Any]], None], date_str: str, data: Dict[str, Any]) -> None:
+        try:
+            listener(date_str, data)
+        except Exception as e:
+            logger.warning(f"Price publication listener failed for {date_str}: {e}")
+
+    def _publish(self, date_str: str, data: Dict[str, Any]) -> None:
+        """Announce a newly complete day to the listeners"""
+        with self._lock:
+            if date_str in self._published:
+                return
+            self._published.add(date_str)
+            listeners = list(self._listeners)
+        logger.info(f"Price data for {date_str} is complete")
+        for listener in listeners:
+            self._notify(listener, date_str, data)
+
+    def set_http_client(self, http_client: Any) -> None:
+        """Use a shared HttpClient for API requests"""
+        self.http_client = http_client
+
+    def clear(self) -> None:
+        """Drop the in-memory cache (on-disk days are kept)"""
+        with self._lock:
+            self._days.clear()
+            self._published.clear()
+
+    def _needs_refetch(self, cached: Tuple[Optional[Dict[str, Any]], float, bool], business_date: date) -> bool:
+        """Decide whether a cached day should be fetched again"""
+        _, fetched_at, complete = cached
+        if complete:
+            return False
+
+        age = time.monotonic() - fetched_at
+        now = datetime.now()
+        start_hour, end_hour = self.publication_window
+        if business_date == now.date() + timedelta(days=1) and start_hour <= now.hour < end_hour:
+            return age >= self.publication_refetch_seconds
+        return age >= self.refetch_interval_seconds
+
+    async def _single_flight(self, date_str: str, business_date: date) -> Optional[Dict[str, Any]]:
+        """Fetch a day, sharing one request between concurrent callers"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            in_flight = self._in_flight.get(date_str)
+            if in_flight is not None and in_flight[0] is loop and not in_flight[1].done():
+                task = in_flight[1]
+                shared = True
+            else:
+                task = loop.create_task(self._fetch_and_store(date_str, business_date))
+                self._in_flight[date_str] = (loop, task)
+                shared = False
+
+        if shared:
+            self.stats['shared_fetches'] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            with self._lock:
+                if task.done() and self._in_flight.get(date_str, (None, None))[1] is task:
+                    del self._in_flight[date_str]
+
+    async def _fetch_and_store(self, date_str: str, business_date: date) -> Optional[Dict[str, Any]]:
+        """Fetch a day and update the caches"""
+        self.stats['fetches'] += 1
+        data = await self._fetch(date_str)
+        if data is None:
+            # Back off until the next refetch interval, keeping any stale data
+            with self._lock:
+                previous = self._days.get(date_str)
+                self._days[date_str] = (previous[0] if previous else None, time.monotonic(), False)
+            return None
+
+        complete = is_day_complete(data, business_date)
+        with self._lock:
+            self._days[date_str] = (data, time.monotonic(), complete)
+        if complete:
+            self._save_to_disk(date_str, data)
+            self._publish(date_str, data)
+        logger.debug(f"Cached price data for {date_str}: {len(data.get('value', []))} slots, complete={complete}")
+        return data
+
+    async def _fetch(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """Fetch price data for a business day from the CSDAC API"""
+        try:
+            url = f"{self.api_url}?$filter=business_date%20eq%20'{date_str}'"
+
+            if self.http_client is not None:
+                return await self.http_client.get_json(url, endpoint='csdac', timeout_seconds=self.timeout_seconds)
+
+            # Use aiohttp if available, otherwise fallback to requests
+            if AIOHTTP_AVAILABLE:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)) as response:
+                        response.raise_for_status()
+                        return await response.json()
+            else:
+                import requests
+                response = await asyncio.to_thread(requests.get, url, timeout=self.timeout_seconds)
+                response.raise_for_status()
+                return response.json()
+        except Exception as e:
+            logger.error(f"Failed to fetch price data for {date_str}: {e}")
+            return None
+
+    def _cache_file(self, date_str: str) -> Optional[Path]:
+        """Path of the on-disk cache file for a business day"""
+        return self.cache_dir / f"csdac_{date_str}.json" if self.cache_dir else None
+
+    def _load_from_disk(self, date_str: str, business_date: date) -> Optional[Tuple[Optional[Dict[str, Any]], float, bool]]:
+        """Load a complete day from disk into the memory cache"""
+        path = self._cache_file(date_str)
+        if path is None or not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable price cache file {path}: {e}")
+            return None
+
+        if not is_day_complete(data, business_date):
+            return None
+
+        entry = (data, time.monotonic(), True)
+        with self._lock:
+            entry = self._days.setdefault(date_str, entry)
+        self.stats['disk_hits'] += 1
+        self._publish(date_str, entry[0])
+        return entry
+
+    def _save_to_disk(self, date_str: str, data: Dict[str, Any]) -> None:
+        """Persist a complete day atomically"""
+        path = self._cache_file(date_str)
+        if path is None:
+            return
+        try:
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Failed to persist price data for {date_str}: {e}")
+
+
+# Process-wide services keyed by API URL
+_services: Dict[str, PriceDataService] = {}
+_services_lock = threading.Lock()
+
+
+def get_price_data_service(api_url: str, config: Optional[Dict[str, Any]] = None) -> PriceDataService:
+    """
+    Get the shared price data service for an API URL.
+
+    The first caller's configuration wins; later callers share its cache.
+
+    Args:
+        api_url: CSDAC API endpoint
+        config: ``price_analysis.price_cache`` configuration section
+
+    Returns:
+        Shared PriceDataService instance
+    """
+    with _services_lock:
+        service = _services.get(api_url)
+        if service is None:
+            service = PriceDataService(api_url, config)
+            _services[api_url] = service
+        return service
+
+
+def reset_price_data_services() -> None:
+    """Drop all shared services (used by tests)"""
+    with _services_lock:
+        _services.clear()
@@ -6,19 +6,36 @@ calculates statistical measures (median, mean, percentiles), and persists data
 to enable adaptive price thresholds that automatically adjust to seasonal market conditions.
 """
 
+import heapq
 import json
 import logging
-from collections import deque
+import struct
+import time
+from bisect import bisect_left, insort
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from statistics import median, mean
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+from price_curve import from_wall_epoch, to_wall_epoch
 
 logger = logging.getLogger(__name__)
 
+# Binary cache format: magic, version, record count, then int64 timestamps and float64 prices
+_CACHE_MAGIC = b'PHST'
+_CACHE_VERSION = 1
+_CACHE_HEADER = struct.Struct('<4sHI')
+
 
 class PriceHistoryManager:
-    """Manages historical price data for adaptive threshold calculations."""
+    """Manages historical price data for adaptive threshold calculations.
+    
+    Prices live in a fixed-size ring buffer of wall-clock epoch seconds and
+    float64 prices. A sorted index of the in-window prices is maintained on
+    every insert/eviction, so percentile queries are direct index lookups
+    instead of a full sort.
+    """
     
     def __init__(self, config: Dict[str, Any]):
         """
@@ -28,18 +45,34 @@ class PriceHistoryManager:
             config: Configuration dict containing:
                 - lookback_days: Days of history to maintain (default: 7)
                 - min_samples: Minimum samples required for reliable stats (default: 24)
+                - persist_interval_seconds: Minimum time between cache writes (default: 300)
+                - cache_dir: Directory for the persisted cache (default: data)
+                - energy_data_dir: Decision files used for bootstrapping (default: out/energy_data)
         """
         self.lookback_days = config.get('lookback_days', 7)
         self.min_samples = config.get('min_samples', 24)
+        self.persist_interval_seconds = config.get('persist_interval_seconds', 300)
         
         # Calculate maximum cache size: 7 days * 24 hours * 4 (15-min intervals)
-        max_cache_size = self.lookback_days * 24 * 4
-        self.price_cache = deque(maxlen=max_cache_size)
+        self.max_cache_size = self.lookback_days * 24 * 4
+        self._timestamps = np.zeros(self.max_cache_size, dtype=np.int64)
+        self._prices = np.zeros(self.max_cache_size, dtype=np.float64)
+        self._indexed = np.zeros(self.max_cache_size, dtype=bool)  # Slot is in the sorted index
+        self._appended = 0  # Total points ever appended; next slot is _appended % size
+        
+        # Sorted prices inside the lookback window, with running sum for the mean
+        self._sorted_prices: List[float] = []
+        self._sorted_sum = 0.0
+        # Min-heap of (timestamp, sequence) for time-based eviction from the sorted index
+        self._expiry_heap: List[Tuple[int, int]] = []
         
         # Persistence configuration
-        self.data_dir = Path('data')
-        self.cache_file = self.data_dir / 'price_history.json'
-        self.energy_data_dir = Path('out/energy_data')
+        self.data_dir = Path(config.get('cache_dir', 'data'))
+        self.cache_file = self.data_dir / 'price_history.bin'
+        self.legacy_cache_file = self.data_dir / 'price_history.json'
+        self.energy_data_dir = Path(config.get('energy_data_dir', 'out/energy_data'))
+        self._dirty = False
+        self._last_save = time.monotonic()
         
         # Ensure data directory exists
         self.data_dir.mkdir(parents=True, exist_ok=True)
@@ -51,9 +84,22 @@ class PriceHistoryManager:
             f"PriceHistoryManager initialized: "
             f"lookback={self.lookback_days}d, "
             f"min_samples={self.min_samples}, "
-            f"cache_size={len(self.price_cache)}"
+            f"cache_size={len(self)}"
         )
     
+    def __len__(self) -> int:
+        """Number of points in the ring buffer"""
+        return min(self._appended, self.max_cache_size)
+    
+    @property
+    def price_cache(self) -> List[Tuple[str, float]]:
+        """Buffered points as (ISO timestamp, price) tuples, oldest first"""
+        timestamps, prices = self._ordered()
+        return [
+            (from_wall_epoch(ts).isoformat(), float(price))
+            for ts, price in zip(timestamps, prices)
+        ]
+    
     def add_price_point(self, timestamp: datetime, price_pln: float) -> None:
         """
         Add a price point to the history.
@@ -66,11 +112,16 @@ class PriceHistoryManager:
             logger.warning(f"Ignoring negative price: {price_pln} PLN/kWh at {timestamp}")
             return
         
-        # Store as tuple: (timestamp, price)
-        self.price_cache.append((timestamp.isoformat(), price_pln))
+        self._append(to_wall_epoch(timestamp), float(price_pln))
+        self._dirty = True
         
-        # Periodically persist cache (every 10 new points)
-        if len(self.price_cache) % 10 == 0:
+        # Debounced persistence
+        if time.monotonic() - self._last_save >= self.persist_interval_seconds:
+            self._save_cache()
+    
+    def flush(self) -> None:
+        """Persist pending changes immediately"""
+        if self._dirty:
             self._save_cache()
     
     def get_recent_prices(self, hours: Optional[int] = None) -> List[float]:
@@ -86,15 +137,9 @@ class PriceHistoryManager:
         if hours is None:
             hours = self.lookback_days * 24
         
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        prices = []
-        for timestamp_str, price in self.price_cache:
-            timestamp = datetime.fromisoformat(timestamp_str)
-            if timestamp >= cutoff_time:
-                prices.append(price)
-        
-        return prices
+        cutoff = to_wall_epoch(datetime.now() - timedelta(hours=hours))
+        timestamps, prices = self._ordered()
+        return prices[timestamps >= cutoff].tolist()
     
     def calculate_statistics(self) -> Dict[str, float]:
         """
@@ -110,9 +155,9 @@ class PriceHistoryManager:
                 - p90: 90th percentile
                 - sample_count: Number of samples used
         """
-        prices = self.get_recent_prices()
+        self._evict_expired(to_wall_epoch(datetime.now() - timedelta(hours=self.lookback_days * 24)))
         
-        if not prices:
+        if not self._sorted_prices:
             logger.warning("No price data available for statistics calculation")
             return {
                 'median': 0.0,
@@ -124,29 +169,14 @@ class PriceHistoryManager:
                 'sample_count': 0
             }
         
-        sorted_prices = sorted(prices)
-        n = len(sorted_prices)
-        
-        def percentile(data: List[float], p: float) -> float:
-            """Calculate percentile using linear interpolation."""
-            if not data:
-                return 0.0
-            k = (len(data) - 1) * p
-            f = int(k)
-            c = int(k) + 1
-            if c >= len(data):
-                return data[-1]
-            d0 = data[f] * (c - k)
-            d1 = data[c] * (k - f)
-            return d0 + d1
-        
+        n = len(self._sorted_prices)
         stats = {
-            'median': median(sorted_prices),
-            'mean': mean(sorted_prices),
-            'p25': percentile(sorted_prices, 0.25),
-            'p50': percentile(sorted_prices, 0.50),
-            'p75': percentile(sorted_prices, 0.75),
-            'p90': percentile(sorted_prices, 0.90),
+            'median': self.percentile(0.50),
+            'mean': self._sorted_sum / n,
+            'p25': self.percentile(0.25),
+            'p50': self.percentile(0.50),
+            'p75': self.percentile(0.75),
+            'p90': self.percentile(0.90),
             'sample_count': n
         }
         
@@ -159,6 +189,82 @@ class PriceHistoryManager:
         
         return stats
     
+    def percentile(self, p: float) -> float:
+        """
+        Percentile of in-window prices using linear interpolation (O(1)).
+        
+        Args:
+            p: Percentile as a fraction (0.0-1.0)
+        
+        Returns:
+            Interpolated price, 0.0 if there is no data
+        """
+        data = self._sorted_prices
+        if not data:
+            return 0.0
+        k = (len(data) - 1) * p
+        f = int(k)
+        c = f + 1
+        if c >= len(data):
+            return data[-1]
+        return data[f] * (c - k) + data[c] * (k - f)
+    
+    def _append(self, timestamp: int, price: float) -> None:
+        """Append a point, evicting the oldest slot when the ring is full"""
+        slot = self._appended % self.max_cache_size
+        if self._appended >= self.max_cache_size and self._indexed[slot]:
+            self._unindex(slot)
+        
+        self._timestamps[slot] = timestamp
+        self._prices[slot] = price
+        self._indexed[slot] = True
+        insort(self._sorted_prices, price)
+        self._sorted_sum += price
+        heapq.heappush(self._expiry_heap, (timestamp, self._appended))
+        self._appended += 1
+        
+        # Drop heap entries for overwritten slots once they dominate the heap
+        if len(self._expiry_heap) > 2 * self.max_cache_size:
+            self._rebuild_expiry_heap()
+    
+    def _unindex(self, slot: int) -> None:
+        """Remove a slot's price from the sorted index"""
+        price = float(self._prices[slot])
+        del self._sorted_prices[bisect_left(self._sorted_prices, price)]
+        self._sorted_sum -= price
+        self._indexed[slot] = False
+        if not self._sorted_prices:
+            self._sorted_sum = 0.0
+    
+    def _evict_expired(self, cutoff: int) -> None:
+        """Remove points older than cutoff from the sorted index"""
+        heap = self._expiry_heap
+        oldest_live_seq = self._appended - len(self)
+        while heap and heap[0][0] < cutoff:
+            _, seq = heapq.heappop(heap)
+            slot = seq % self.max_cache_size
+            # Skip entries whose slot has since been overwritten
+            if seq >= oldest_live_seq and self._indexed[slot]:
+                self._unindex(slot)
+    
+    def _rebuild_expiry_heap(self) -> None:
+        """Rebuild the expiry heap from indexed slots"""
+        start = self._appended - len(self)
+        self._expiry_heap = [
+            (int(self._timestamps[seq % self.max_cache_size]), seq)
+            for seq in range(start, self._appended)
+            if self._indexed[seq % self.max_cache_size]
+        ]
+        heapq.heapify(self._expiry_heap)
+    
+    def _ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Ring contents in insertion order (oldest first)"""
+        count = len(self)
+        if count < self.max_cache_size:
+            return self._timestamps[:count], self._prices[:count]
+        head = self._appended % self.max_cache_size
+        return np.roll(self._timestamps, -head), np.roll(self._prices, -head)
+    
     def load_historical_from_files(self) -> int:
         """
         Bootstrap price history from existing decision files in out/energy_data/.
@@ -202,7 +308,7 @@ class PriceHistoryManager:
                         price = float(data['current_price_pln_kwh'])
                     
                     if price is not None and price > 0:
-                        self.price_cache.append((timestamp.isoformat(), price))
+                        self._append(to_wall_epoch(timestamp), price)
                         loaded_count += 1
                 
                 except (json.JSONDecodeError, KeyError, ValueError) as e:
@@ -223,37 +329,58 @@ class PriceHistoryManager:
         return loaded_count
     
     def _save_cache(self) -> None:
-        """Persist price cache to JSON file."""
+        """Persist price cache in compact binary form (atomic replace)."""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(list(self.price_cache), f, indent=2)
-            logger.debug(f"Saved {len(self.price_cache)} price points to {self.cache_file}")
+            timestamps, prices = self._ordered()
+            tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, _CACHE_VERSION, len(timestamps)))
+                f.write(timestamps.astype('<i8').tobytes())
+                f.write(prices.astype('<f8').tobytes())
+            tmp_file.replace(self.cache_file)
+            self._dirty = False
+            self._last_save = time.monotonic()
+            logger.debug(f"Saved {len(timestamps)} price points to {self.cache_file}")
         except Exception as e:
             logger.error(f"Failed to save price cache: {e}")
     
     def _load_cache(self) -> None:
-        """Load persisted price cache from JSON file."""
-        if not self.cache_file.exists():
-            logger.debug(f"No existing cache file found at {self.cache_file}")
-            return
-        
+        """Load persisted price cache (binary, or legacy JSON on first run)."""
         try:
-            with open(self.cache_file, 'r') as f:
-                cached_data = json.load(f)
+            if self.cache_file.exists():
+                timestamps, prices = self._read_binary_cache()
+            elif self.legacy_cache_file.exists():
+                with open(self.legacy_cache_file, 'r') as f:
+                    cached_data = json.load(f)
+                timestamps = [to_wall_epoch(datetime.fromisoformat(ts)) for ts, _ in cached_data]
+                prices = [price for _, price in cached_data]
+                self._dirty = True  # Migrate to the binary format on next save
+            else:
+                logger.debug(f"No existing cache file found at {self.cache_file}")
+                return
             
             # Filter out old data beyond lookback window
-            cutoff_time = datetime.now() - timedelta(days=self.lookback_days)
-            
-            for timestamp_str, price in cached_data:
-                timestamp = datetime.fromisoformat(timestamp_str)
-                if timestamp >= cutoff_time:
-                    self.price_cache.append((timestamp_str, price))
+            cutoff = to_wall_epoch(datetime.now() - timedelta(days=self.lookback_days))
+            for timestamp, price in zip(timestamps, prices):
+                if timestamp >= cutoff:
+                    self._append(int(timestamp), float(price))
             
-            logger.info(f"Loaded {len(self.price_cache)} price points from cache")
+            logger.info(f"Loaded {len(self)} price points from cache")
         
         except Exception as e:
             logger.error(f"Failed to load price cache: {e}")
     
+    def _read_binary_cache(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Read timestamps and prices from the binary cache file"""
+        raw = self.cache_file.read_bytes()
+        magic, version, count = _CACHE_HEADER.unpack_from(raw)
+        if magic != _CACHE_MAGIC or version != _CACHE_VERSION:
+            raise ValueError(f"Unsupported price cache format in {self.cache_file}")
+        offset = _CACHE_HEADER.size
+        timestamps = np.frombuffer(raw, dtype='<i8', count=count, offset=offset)
+        prices = np.frombuffer(raw, dtype='<f8', count=count, offset=offset + 8 * count)
+        return timestamps, prices
+    
     def get_cache_info(self) -> Dict[str, Any]:
         """
         Get information about the current cache state.
@@ -261,7 +388,7 @@ class PriceHistoryManager:
         Returns:
             Dict with cache statistics
         """
-        if not self.price_cache:
+        if not len(self):
             return {
                 'count': 0,
                 'oldest': None,
@@ -269,12 +396,13 @@ class PriceHistoryManager:
                 'coverage_hours': 0
             }
         
-        oldest_ts = datetime.fromisoformat(self.price_cache[0][0])
-        newest_ts = datetime.fromisoformat(self.price_cache[-1][0])
+        timestamps, _ = self._ordered()
+        oldest_ts = from_wall_epoch(timestamps[0])
+        newest_ts = from_wall_epoch(timestamps[-1])
         coverage_hours = (newest_ts - oldest_ts).total_seconds() / 3600
         
         return {
-            'count': len(self.price_cache),
+            'count': len(self),
             'oldest': oldest_ts.isoformat(),
             'newest': newest_ts.isoformat(),
             'coverage_hours': coverage_hours
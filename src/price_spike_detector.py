@@ -15,6 +15,13 @@ from typing import List, Optional, Dict, Any
 from enum import Enum
 from collections import deque
 
+from rolling_stats import RollingQuantile, RollingVariance
+
+# Number of recent samples kept for detection
+HISTORY_SIZE = 100
+# Number of most recent samples used for the variance confidence factor
+VARIANCE_WINDOW = 10
+
 
 class SpikeLevel(Enum):
     """Classification of price spikes"""
@@ -69,7 +76,12 @@ class PriceSpikeDetector:
         self.min_confidence_threshold = spike_config.get('min_confidence_threshold', 0.7)
         
         # Price history buffer (stores recent prices for spike detection)
-        self.price_history = deque(maxlen=100)  # Last 100 price samples
+        self.price_history = deque(maxlen=HISTORY_SIZE)  # Last 100 price samples
+        
+        # Streaming statistics, updated per sample so detection can run on every inverter sample
+        self._window_median = RollingQuantile(max_samples=HISTORY_SIZE, max_age=timedelta(minutes=self.lookback_minutes))
+        self._history_median = RollingQuantile(max_samples=HISTORY_SIZE)
+        self._recent_variance = RollingVariance(VARIANCE_WINDOW)
         
         # Spike tracking
         self.last_spike = None
@@ -97,6 +109,9 @@ class PriceSpikeDetector:
             'price': price,
             'timestamp': timestamp
         })
+        self._window_median.add(price, timestamp)
+        self._history_median.add(price, timestamp)
+        self._recent_variance.add(price)
         
         # Reset daily spike counter at midnight
         today = datetime.now().date()
@@ -174,30 +189,13 @@ class PriceSpikeDetector:
         if not self.price_history:
             return 0.0
         
-        # Get prices from lookback window
-        cutoff_time = datetime.now() - timedelta(minutes=self.lookback_minutes)
-        recent_prices = [
-            sample['price']
-            for sample in self.price_history
-            if sample['timestamp'] >= cutoff_time
-        ]
-        
-        if len(recent_prices) < 2:
-            # Not enough data, use all available
-            recent_prices = [sample['price'] for sample in self.price_history]
-        
-        # Use median to avoid spike contamination
-        recent_prices.sort()
-        mid = len(recent_prices) // 2
-        
-        if len(recent_prices) % 2 == 0:
-            # Even number: average of two middle values
-            reference = (recent_prices[mid-1] + recent_prices[mid]) / 2
-        else:
-            # Odd number: middle value
-            reference = recent_prices[mid]
+        # Median of the lookback window (maintained incrementally)
+        self._window_median.evict(datetime.now())
+        if len(self._window_median) >= 2:
+            return self._window_median.median()
         
-        return reference
+        # Not enough data, use all available
+        return self._history_median.median()
     
     def _classify_spike(self, current_price: float, percent_increase: float) -> SpikeLevel:
         """
@@ -255,12 +253,8 @@ class PriceSpikeDetector:
         if len(self.price_history) < 3:
             return 0.5  # Medium confidence with limited data
         
-        prices = [sample['price'] for sample in list(self.price_history)[-10:]]
-        
-        # Calculate standard deviation
-        mean_price = sum(prices) / len(prices)
-        variance = sum((p - mean_price) ** 2 for p in prices) / len(prices)
-        std_dev = variance ** 0.5
+        # Standard deviation of the last 10 samples (rolling, O(1))
+        std_dev = self._recent_variance.std
         
         # Lower variance = higher confidence
         # Assume std_dev of 0.1 PLN/kWh or less is stable
@@ -356,5 +350,8 @@ class PriceSpikeDetector:
     def clear_history(self) -> None:
         """Clear price history (useful for testing)"""
         self.price_history.clear()
+        self._window_median.clear()
+        self._history_median.clear()
+        self._recent_variance.clear()
         self.last_spike = None
 
@@ -18,6 +18,7 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+from price_curve import get_tariff_price_curve
 
 try:
     from tariff_pricing import TariffPricingCalculator, PriceComponents
@@ -217,33 +218,13 @@ class PriceWindowAnalyzer:
         try:
             # Handle different price data formats
             if 'value' in price_data:
-                # Original format with detailed price data
-                for item in price_data['value']:
-                    # Handle different datetime formats
-                    dtime_str = item['dtime']
-                    try:
-                        if ':' in dtime_str and dtime_str.count(':') == 2:
-                            # Format: "2025-10-14 22:00:00"
-                            item_time = datetime.strptime(dtime_str, '%Y-%m-%d %H:%M:%S')
-                        else:
-                            # Format: "2025-10-14 22:00"
-                            item_time = datetime.strptime(dtime_str, '%Y-%m-%d %H:%M')
-                    except ValueError:
-                        logger.error(f"Error parsing datetime: {dtime_str}")
-                        continue
-                    
-                    # Check if current time falls within this 15-minute period
-                    if item_time <= current_time < item_time + timedelta(minutes=15):
-                        market_price = float(item['csdac_pln'])
-                        
-                        if self.tariff_calculator:
-                            # Use tariff-aware pricing
-                            market_price_kwh = market_price / 1000
-                            components = self.tariff_calculator.calculate_final_price(market_price_kwh, item_time, None)
-                            return components.final_price * 1000  # Convert back to PLN/MWh
-                        else:
-                            # Fallback: SC component only
-                            return market_price + 89.2
+                # Original format with detailed price data (parsed once into a price curve)
+                curve = get_tariff_price_curve(price_data, self.tariff_calculator)
+                index = curve.index_at(current_time)
+                
+                # Check if current time falls within a 15-minute period
+                if index is not None and current_time < curve.timestamps[index] + timedelta(minutes=15):
+                    return float(curve.final_prices[index])
             elif 'prices' in price_data:
                 # Simple format with just prices array (for testing)
                 prices = price_data['prices']
@@ -270,11 +251,8 @@ class PriceWindowAnalyzer:
             
             if 'value' in price_data:
                 # Original format with detailed price data
-                for item in price_data['value']:
-                    item_time = datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
-                    market_price = float(item['csdac_pln'])
-                    final_price = self._calculate_final_price_mwh(market_price, item_time)
-                    price_points.append((item_time, final_price))
+                curve = get_tariff_price_curve(price_data, self.tariff_calculator)
+                price_points = list(zip(curve.timestamps, curve.final_prices.tolist()))
             elif 'prices' in price_data:
                 # Simple format with just prices array - create time points
                 prices = price_data['prices']
@@ -342,11 +320,8 @@ class PriceWindowAnalyzer:
             
             if 'value' in price_data:
                 # Original format with detailed price data
-                for item in price_data['value']:
-                    item_time = datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')
-                    market_price = float(item['csdac_pln'])
-                    final_price = self._calculate_final_price_mwh(market_price, item_time)
-                    price_points.append((item_time, final_price))
+                curve = get_tariff_price_curve(price_data, self.tariff_calculator)
+                price_points = list(zip(curve.timestamps, curve.final_prices.tolist()))
             elif 'prices' in price_data:
                 # Simple format with just prices array - create time points
                 prices = price_data['prices']
@@ -936,7 +911,7 @@ class PriceWindowAnalyzer:
             if 'prices' in price_data:
                 prices = price_data['prices']
             else:
-                prices = [self._calculate_final_price_mwh(float(item['csdac_pln']), datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M')) for item in price_data['value']]  # Add SC component (0.0892 PLN/kWh = 89.2 PLN/MWh)
+                prices = get_tariff_price_curve(price_data, self.tariff_calculator).final_prices.tolist()  # Includes SC component and distribution
             
             if len(prices) < 2:
                 return {'trend': 'insufficient_data', 'trend_strength': 0.0, 'volatility': 0.0}
@@ -44,8 +44,10 @@ USAGE_CODE_TO_LABEL: Dict[int, str] = {
 class PSEPeakHoursCollector:
     """Collector for PSE Peak Hours (Kompas) via pdgsz endpoint."""
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], http_client: Optional[Any] = None):
         cfg = config.get("pse_peak_hours", {}) or {}
+        # Optional shared HttpClient; retries stay in this collector's loop
+        self.http_client = http_client
         self.enabled: bool = bool(cfg.get("enabled", False))
         self.api_url: str = cfg.get("api_url", "https://api.raporty.pse.pl/api/pdgsz")
         self.update_interval_minutes: int = int(cfg.get("update_interval_minutes", 60))
@@ -104,8 +106,12 @@ class PSEPeakHoursCollector:
         last_error: Optional[Exception] = None
         for attempt in range(self.retry_attempts):
             try:
-                # Use aiohttp if available, otherwise fallback to requests
-                if AIOHTTP_AVAILABLE:
+                # Use shared HTTP client if injected, else aiohttp, else requests
+                if self.http_client is not None:
+                    payload = await self.http_client.get_json(
+                        query, endpoint="pdgsz", timeout_seconds=15, retry_attempts=1
+                    )
+                elif AIOHTTP_AVAILABLE:
                     async with aiohttp.ClientSession() as session:
                         async with session.get(query, timeout=aiohttp.ClientTimeout(total=15)) as resp:
                             resp.raise_for_status()
@@ -35,9 +35,15 @@ class PriceForecastPoint:
 class PSEPriceForecastCollector:
     """Collects and manages electricity price forecasts from PSE API"""
     
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize the forecast collector"""
+    def __init__(self, config: Dict[str, Any], http_client: Optional[Any] = None):
+        """Initialize the forecast collector
+        
+        Args:
+            config: System configuration
+            http_client: Optional shared HttpClient (per-request sessions otherwise)
+        """
         self.config = config
+        self.http_client = http_client
         
         # Extract PSE price forecast configuration
         forecast_config = config.get('pse_price_forecast', {})
@@ -118,8 +124,12 @@ class PSEPriceForecastCollector:
                 
                 logger.debug(f"API URL: {api_url_with_filter}")
                 
-                # Fetch data from API using aiohttp
-                if AIOHTTP_AVAILABLE:
+                # Fetch data from API using shared client, aiohttp or requests
+                if self.http_client is not None:
+                    data = await self.http_client.get_json(
+                        api_url_with_filter, endpoint='energy-prices', timeout_seconds=30, retry_attempts=1
+                    )
+                elif AIOHTTP_AVAILABLE:
                     async with aiohttp.ClientSession() as session:
                         async with session.get(api_url_with_filter, timeout=aiohttp.ClientTimeout(total=30)) as response:
                             response.raise_for_status()
@@ -527,7 +537,11 @@ class PSEPriceForecastCollector:
             logger.debug(f"D+1 API URL: {api_url_with_filter}")
             
             # Fetch data from API
-            if AIOHTTP_AVAILABLE:
+            if self.http_client is not None:
+                data = await self.http_client.get_json(
+                    api_url_with_filter, endpoint='energy-prices', timeout_seconds=30, retry_attempts=1
+                )
+            elif AIOHTTP_AVAILABLE:
                 async with aiohttp.ClientSession() as session:
                     async with session.get(api_url_with_filter, timeout=aiohttp.ClientTimeout(total=30)) as response:
                         response.raise_for_status()
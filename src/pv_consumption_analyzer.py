@@ -16,6 +16,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
+from price_curve import DEFAULT_SC_COMPONENT_MWH, PriceCurve, get_tariff_price_curve
+
 try:
     from tariff_pricing import TariffPricingCalculator, PriceComponents
     TARIFF_PRICING_AVAILABLE = True
@@ -402,6 +406,19 @@ class PVConsumptionAnalyzer:
             sc_component = self.config.get('electricity_pricing', {}).get('sc_component_pln_kwh', 0.0892)
             return market_price_mwh + (sc_component * 1000)
     
+    def _price_curve(self, price_data: Dict) -> PriceCurve:
+        """Get parse-once price curve for raw price data"""
+        sc_component = self.config.get('electricity_pricing', {}).get('sc_component_pln_kwh', DEFAULT_SC_COMPONENT_MWH / 1000)
+        return get_tariff_price_curve(price_data, self.tariff_calculator, sc_component * 1000)
+    
+    @staticmethod
+    def _find_current_slot(curve: PriceCurve, current_time: datetime) -> Optional[int]:
+        """Find index of the first price point in the current hour within 15 minutes of now"""
+        for index, price_time in enumerate(curve.timestamps):
+            if price_time.hour == current_time.hour and abs(price_time.minute - current_time.minute) <= 15:
+                return index
+        return None
+    
     def _calculate_data_confidence(self, current_data: Dict[str, Any]) -> float:
         """Calculate confidence in current data quality"""
         confidence = 0.0
@@ -430,28 +447,19 @@ class PVConsumptionAnalyzer:
             if not price_data or 'value' not in price_data:
                 return False
             
-            # Get current time and find matching price
-            current_time = datetime.now()
-            current_hour = current_time.hour
-            current_minute = current_time.minute
-            
-            # Find the closest price point
-            for price_point in price_data['value']:
-                price_time = datetime.strptime(price_point['dtime'], '%Y-%m-%d %H:%M')
-                if price_time.hour == current_hour and abs(price_time.minute - current_minute) <= 15:
-                    # Calculate final price with tariff-aware pricing
-                    market_price = float(price_point['csdac_pln'])
-                    final_price = self._calculate_final_price(market_price, price_time)
-                    
-                    # Check if price is low (below 25th percentile)
-                    all_prices = [self._calculate_final_price(float(p['csdac_pln']), 
-                                                             datetime.strptime(p['dtime'], '%Y-%m-%d %H:%M'))
-                                for p in price_data['value']]
-                    threshold = sorted(all_prices)[int(len(all_prices) * 0.25)]
-                    
-                    return final_price <= threshold
+            # Get current time and find the closest price point
+            curve = self._price_curve(price_data)
+            index = self._find_current_slot(curve, datetime.now())
+            if index is None:
+                return False
             
-            return False
+            # Final price with tariff-aware pricing
+            final_price = float(curve.final_prices[index])
+            
+            # Check if price is low (below 25th percentile)
+            threshold = curve.percentile_threshold(0.25)
+            
+            return final_price <= threshold
             
         except Exception as e:
             logger.error(f"Failed to check low price window: {e}")
@@ -464,24 +472,16 @@ class PVConsumptionAnalyzer:
                 return 0.0
             
             # Calculate threshold with tariff-aware pricing
-            all_prices = [self._calculate_final_price(float(p['csdac_pln']), 
-                                                      datetime.strptime(p['dtime'], '%Y-%m-%d %H:%M'))
-                         for p in price_data['value']]
-            threshold = sorted(all_prices)[int(len(all_prices) * 0.25)]
+            curve = self._price_curve(price_data)
+            threshold = curve.percentile_threshold(0.25)
             
             # Find current position and count consecutive low prices
-            current_time = datetime.now()
-            current_hour = current_time.hour
-            current_minute = current_time.minute
+            current_hour = datetime.now().hour
             
             duration_hours = 0.0
             
-            for price_point in price_data['value']:
-                price_time = datetime.strptime(price_point['dtime'], '%Y-%m-%d %H:%M')
+            for price_time, _, final_price in curve:
                 if price_time.hour >= current_hour:
-                    market_price = float(price_point['csdac_pln'])
-                    final_price = self._calculate_final_price(market_price, price_time)
-                    
                     if final_price <= threshold:
                         duration_hours += 0.25  # 15-minute intervals
                     else:
@@ -800,28 +800,19 @@ class PVConsumptionAnalyzer:
             if not price_data or 'value' not in price_data:
                 return False
             
-            # Get current time and find matching price
-            current_time = datetime.now()
-            current_hour = current_time.hour
-            current_minute = current_time.minute
-            
-            # Find the closest price point
-            for price_point in price_data['value']:
-                price_time = datetime.strptime(price_point['dtime'], '%Y-%m-%d %H:%M')
-                if price_time.hour == current_hour and abs(price_time.minute - current_minute) <= 15:
-                    # Calculate final price with tariff-aware pricing
-                    market_price = float(price_point['csdac_pln'])
-                    final_price = self._calculate_final_price(market_price, price_time)
-                    
-                    # Check if price is high (above 75th percentile)
-                    all_prices = [self._calculate_final_price(float(p['csdac_pln']),
-                                                             datetime.strptime(p['dtime'], '%Y-%m-%d %H:%M'))
-                                for p in price_data['value']]
-                    threshold = sorted(all_prices)[int(len(all_prices) * self.high_price_threshold_percentile)]
-                    
-                    return final_price >= threshold
+            # Get current time and find the closest price point
+            curve = self._price_curve(price_data)
+            index = self._find_current_slot(curve, datetime.now())
+            if index is None:
+                return False
             
-            return False
+            # Final price with tariff-aware pricing
+            final_price = float(curve.final_prices[index])
+            
+            # Check if price is high (above 75th percentile)
+            threshold = curve.percentile_threshold(self.high_price_threshold_percentile)
+            
+            return final_price >= threshold
             
         except Exception as e:
             logger.error(f"Failed to check high price window: {e}")
@@ -991,29 +982,16 @@ class PVConsumptionAnalyzer:
                 }
             
             # Calculate price threshold with tariff-aware pricing
-            all_prices = [self._calculate_final_price(float(p['csdac_pln']),
-                                                      datetime.strptime(p['dtime'], '%Y-%m-%d %H:%M'))
-                         for p in price_data['value']]
-            high_price_threshold = sorted(all_prices)[int(len(all_prices) * self.high_price_threshold_percentile)]
+            curve = self._price_curve(price_data)
+            high_price_threshold = curve.percentile_threshold(self.high_price_threshold_percentile)
             
             # Count high price hours for tomorrow (assuming data covers next 24h)
-            high_price_hours = 0
-            total_hours = 0
-            
             current_time = datetime.now()
             tomorrow_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            tomorrow_prices = curve.slice(tomorrow_start, tomorrow_start + timedelta(days=1)).final_prices
             
-            for price_point in price_data['value']:
-                price_time = datetime.strptime(price_point['dtime'], '%Y-%m-%d %H:%M')
-                
-                # Check if this price point is for tomorrow
-                if price_time >= tomorrow_start and price_time < tomorrow_start + timedelta(days=1):
-                    market_price = float(price_point['csdac_pln'])
-                    final_price = self._calculate_final_price(market_price, price_time)
-                    
-                    if final_price >= high_price_threshold:
-                        high_price_hours += 1
-                    total_hours += 1
+            high_price_hours = int(np.count_nonzero(tomorrow_prices >= high_price_threshold))
+            total_hours = len(tomorrow_prices)
             
             has_high_prices = high_price_hours >= 4  # At least 4 hours of high prices
             
@@ -1063,31 +1041,23 @@ class PVConsumptionAnalyzer:
                 return 0.0
             
             # Get current high price
-            current_time = datetime.now()
-            current_hour = current_time.hour
-            current_minute = current_time.minute
-            
-            for price_point in price_data['value']:
-                price_time = datetime.strptime(price_point['dtime'], '%Y-%m-%d %H:%M')
-                if price_time.hour == current_hour and abs(price_time.minute - current_minute) <= 15:
-                    market_price = float(price_point['csdac_pln'])
-                    current_price = self._calculate_final_price(market_price, price_time)
-                    
-                    # Calculate average price for comparison with tariff-aware pricing
-                    all_prices = [self._calculate_final_price(float(p['csdac_pln']),
-                                                             datetime.strptime(p['dtime'], '%Y-%m-%d %H:%M'))
-                                for p in price_data['value']]
-                    avg_price = sum(all_prices) / len(all_prices)
-                    
-                    # Calculate savings per kWh
-                    savings_per_kwh = (current_price - avg_price) / 1000  # Convert to PLN/kWh
-                    
-                    # Calculate energy saved (assuming 1 hour of discharge)
-                    energy_saved_kwh = (deficit_power_w / 1000) * 1.0  # 1 hour
-                    
-                    return savings_per_kwh * energy_saved_kwh
+            curve = self._price_curve(price_data)
+            index = self._find_current_slot(curve, datetime.now())
+            if index is None:
+                return 0.0
             
-            return 0.0
+            current_price = float(curve.final_prices[index])
+            
+            # Calculate average price for comparison with tariff-aware pricing
+            avg_price = float(curve.final_prices.mean())
+            
+            # Calculate savings per kWh
+            savings_per_kwh = (current_price - avg_price) / 1000  # Convert to PLN/kWh
+            
+            # Calculate energy saved (assuming 1 hour of discharge)
+            energy_saved_kwh = (deficit_power_w / 1000) * 1.0  # 1 hour
+            
+            return savings_per_kwh * energy_saved_kwh
             
         except Exception as e:
             logger.error(f"Failed to calculate discharge savings: {e}")
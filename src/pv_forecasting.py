@@ -212,26 +212,22 @@ class PVForecaster:
                         end_date = datetime.now()
                         start_date = end_date - timedelta(days=self.historical_days)
                         
-                        # Fetch system states
-                        states = await self.storage.get_system_state_range(start_date, end_date)
+                        # Fetch typed coordinator snapshots
+                        snapshots = await self.storage.get_coordinator_snapshots(start_date, end_date)
                         await self.storage.disconnect()
                         
-                        for state in states:
+                        for snapshot in snapshots:
                             try:
-                                timestamp = datetime.fromisoformat(state['timestamp'])
-                                current_data = state.get('current_data', {})
-                                if isinstance(current_data, str):
-                                    current_data = json.loads(current_data)
-                                    
-                                if 'photovoltaic' in current_data:
-                                    pv_data = current_data['photovoltaic']
-                                    historical_data.append({
-                                        'date': timestamp.strftime('%Y-%m-%d'),
-                                        'hour': timestamp.hour,
-                                        'power_kw': pv_data.get('current_power_kw', 0) or (pv_data.get('current_power_w', 0) / 1000.0),
-                                        'daily_production_kwh': pv_data.get('daily_production_kwh', 0),
-                                        'efficiency_percent': pv_data.get('efficiency_percent', 0)
-                                    })
+                                if snapshot.get('pv_power_w') is None:
+                                    continue
+                                timestamp = datetime.fromisoformat(snapshot['timestamp'])
+                                historical_data.append({
+                                    'date': timestamp.strftime('%Y-%m-%d'),
+                                    'hour': timestamp.hour,
+                                    'power_kw': snapshot['pv_power_w'] / 1000.0,
+                                    'daily_production_kwh': snapshot.get('pv_daily_kwh') or 0,
+                                    'efficiency_percent': snapshot.get('pv_efficiency_percent') or 0
+                                })
                             except Exception as e:
                                 continue
                                 
@@ -0,0 +1,162 @@
+"""
+Rolling Statistics - Streaming quantiles and variance over sliding windows.
+
+Reusable building blocks for detectors that run on every inverter sample:
+
+- ``RollingQuantile``: median/quantiles over a window bounded by sample count
+  and/or age. A sorted index is kept on insert/evict (bisect), so queries are
+  direct index lookups.
+- ``RollingVariance``: mean/variance/std over the last N samples, updated in
+  O(1) per sample (Welford add/remove).
+
+Samples are expected in non-decreasing timestamp order, which holds for live
+price and inverter streams.
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, List, Optional, Tuple
+
+
+class RollingQuantile:
+    """Median and quantiles over a count- and/or time-bounded sliding window"""
+
+    def __init__(self, max_samples: Optional[int] = None, max_age: Optional[timedelta] = None):
+        """
+        Initialize rolling quantile window.
+
+        Args:
+            max_samples: Keep at most this many most recent samples (None = unbounded)
+            max_age: Evict samples older than this relative to the query/insert time
+        """
+        self.max_samples = max_samples
+        self.max_age = max_age
+        self._samples: Deque[Tuple[datetime, float]] = deque()
+        self._sorted: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add(self, value: float, timestamp: Optional[datetime] = None) -> None:
+        """
+        Add a sample.
+
+        Args:
+            value: Sample value
+            timestamp: Sample time (defaults to now)
+        """
+        timestamp = timestamp or datetime.now()
+        self._samples.append((timestamp, value))
+        insort(self._sorted, value)
+        if self.max_samples is not None and len(self._samples) > self.max_samples:
+            self._pop_oldest()
+        self.evict(timestamp)
+
+    def evict(self, now: Optional[datetime] = None) -> None:
+        """
+        Drop samples older than max_age.
+
+        Args:
+            now: Reference time (defaults to now)
+        """
+        if self.max_age is None:
+            return
+        cutoff = (now or datetime.now()) - self.max_age
+        while self._samples and self._samples[0][0] < cutoff:
+            self._pop_oldest()
+
+    def median(self) -> Optional[float]:
+        """Median of the window (mean of middle values for even counts), None if empty"""
+        data = self._sorted
+        n = len(data)
+        if n == 0:
+            return None
+        mid = n // 2
+        return data[mid] if n % 2 else (data[mid - 1] + data[mid]) / 2
+
+    def quantile(self, p: float) -> Optional[float]:
+        """
+        Quantile with linear interpolation, None if empty.
+
+        Args:
+            p: Quantile as a fraction (0.0-1.0)
+        """
+        data = self._sorted
+        if not data:
+            return None
+        k = (len(data) - 1) * p
+        f = int(k)
+        if f + 1 >= len(data):
+            return data[-1]
+        return data[f] * (f + 1 - k) + data[f + 1] * (k - f)
+
+    def clear(self) -> None:
+        """Remove all samples"""
+        self._samples.clear()
+        self._sorted.clear()
+
+    def _pop_oldest(self) -> None:
+        """Remove the oldest sample from the window and the sorted index"""
+        _, value = self._samples.popleft()
+        del self._sorted[bisect_left(self._sorted, value)]
+
+
+class RollingVariance:
+    """Mean and population variance over the last N samples in O(1) per update"""
+
+    def __init__(self, window: int):
+        """
+        Initialize rolling variance.
+
+        Args:
+            window: Number of most recent samples to include
+        """
+        self.window = window
+        self._values: Deque[float] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: float) -> None:
+        """Add a sample, dropping the oldest once the window is full"""
+        if len(self._values) == self.window:
+            self._remove(self._values.popleft())
+        self._values.append(value)
+        n = len(self._values)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self._values else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Population variance of the window"""
+        n = len(self._values)
+        return max(self._m2, 0.0) / n if n else 0.0
+
+    @property
+    def std(self) -> float:
+        return self.variance ** 0.5
+
+    def clear(self) -> None:
+        """Remove all samples"""
+        self._values.clear()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def _remove(self, value: float) -> None:
+        """Inverse Welford update for a sample leaving the window"""
+        n = len(self._values) + 1  # Count before removal (value already popped)
+        if n == 1:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        old_mean = self._mean
+        self._mean = (n * old_mean - value) / (n - 1)
+        self._m2 -= (value - old_mean) * (value - self._mean)
@@ -0,0 +1,322 @@
+"""
+Sample Buffer - Fixed-capacity ring of inverter samples and the sampler task.
+
+- ``Sample``: one reading of the values the decision loop looks at, stored in
+  ``__slots__`` (no per-sample dict, no nested copies of current_data).
+- ``SampleRing``: preallocated ring buffer. ``append`` is O(1) and overwrites
+  the oldest sample once full, so keeping "the last 24 hours" needs no trim;
+  ``window``/``since`` find time ranges by binary search.
+- ``Sampler``: asyncio task that collects a sample every ``interval`` seconds
+  (5-20 s), independent of the 60-second coordinator loop.
+
+Everything runs on one event loop: ``window``, ``since`` and ``latest`` copy
+references without awaiting, so the decision loop always sees a consistent
+view while the sampler keeps appending.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MIN_SAMPLE_INTERVAL = 5.0
+MAX_SAMPLE_INTERVAL = 20.0
+
+
+def clamp_interval(seconds: float) -> float:
+    """Sample interval limited to the supported 5-20 s range"""
+    return min(max(float(seconds), MIN_SAMPLE_INTERVAL), MAX_SAMPLE_INTERVAL)
+
+
+def _number(value: Any) -> Optional[float]:
+    """Float value, None for missing/'Unknown'/NaN"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+# Sample attribute -> (comprehensive data section, key)
+_FIELDS = {
+    'battery_soc': ('battery', 'soc_percent'),
+    'battery_power_w': ('battery', 'power_w'),
+    'battery_temperature': ('battery', 'temperature'),
+    'battery_voltage': ('battery', 'voltage'),
+    'pv_power_w': ('photovoltaic', 'current_power_w'),
+    'house_consumption_w': ('house_consumption', 'current_power_w'),
+    'grid_power_w': ('grid', 'power_w'),
+    'grid_voltage': ('grid', 'voltage'),
+}
+
+
+class Sample:
+    """One inverter sample (epoch seconds plus the decision-relevant values)"""
+
+    __slots__ = ('ts', 'battery_soc', 'battery_power_w', 'battery_temperature', 'battery_voltage',
+                 'pv_power_w', 'house_consumption_w', 'grid_power_w', 'grid_voltage')
+
+    def __init__(self, ts: float, battery_soc: Optional[float] = None, battery_power_w: Optional[float] = None,
+                 battery_temperature: Optional[float] = None, pv_power_w: Optional[float] = None,
+                 house_consumption_w: Optional[float] = None, grid_power_w: Optional[float] = None,
+                 grid_voltage: Optional[float] = None, battery_voltage: Optional[float] = None):
+        self.ts = ts
+        self.battery_soc = battery_soc
+        self.battery_power_w = battery_power_w
+        self.battery_temperature = battery_temperature
+        self.battery_voltage = battery_voltage
+        self.pv_power_w = pv_power_w
+        self.house_consumption_w = house_consumption_w
+        self.grid_power_w = grid_power_w
+        self.grid_voltage = grid_voltage
+
+    @classmethod
+    def from_current_data(cls, data: Dict[str, Any]) -> 'Sample':
+        """
+        Sample from EnhancedDataCollector's comprehensive data.
+
+        Args:
+            data: Comprehensive data dict (``timestamp`` ISO string, nested sections)
+
+        Returns:
+            Sample stamped with the data's timestamp (now if missing)
+        """
+        try:
+            ts = datetime.fromisoformat(data['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            ts = datetime.now().timestamp()
+        return cls(ts, **{name: _number((data.get(section) or {}).get(key))
+                          for name, (section, key) in _FIELDS.items()})
+
+    def apply_to(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Write the sample's values into comprehensive data (inverse of ``from_current_data``).
+
+        Sections that receive a value are replaced by copies, so dicts shared
+        with the collector are never modified. Missing values are skipped.
+
+        Args:
+            data: Comprehensive data dict, updated in place
+
+        Returns:
+            The same dict
+        """
+        copied = set()
+        for name, (section, key) in _FIELDS.items():
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if section not in copied:
+                data[section] = dict(data.get(section) or {})
+                copied.add(section)
+            data[section][key] = value
+        data['timestamp'] = self.timestamp.isoformat()
+        return data
+
+    @property
+    def timestamp(self) -> datetime:
+        """Sample time as a naive local datetime"""
+        return datetime.fromtimestamp(self.ts)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Plain dict (timestamp as ISO string)"""
+        result = {name: getattr(self, name) for name in self.__slots__ if name != 'ts'}
+        result['timestamp'] = self.timestamp.isoformat()
+        return result
+
+    def __repr__(self) -> str:
+        return f"Sample({self.timestamp.isoformat()}, soc={self.battery_soc}, pv={self.pv_power_w})"
+
+
+class SampleRing:
+    """Fixed-capacity ring buffer of samples in timestamp order"""
+
+    def __init__(self, capacity: int):
+        """
+        Initialize sample ring.
+
+        Args:
+            capacity: Number of samples kept (the oldest is overwritten when full)
+        """
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self._slots: List[Optional[Sample]] = [None] * capacity
+        self._start = 0  # Physical index of the oldest sample
+        self._count = 0
+        self.dropped_out_of_order = 0
+
+    @classmethod
+    def for_horizon(cls, horizon: timedelta, interval_seconds: float) -> 'SampleRing':
+        """Ring holding ``horizon`` worth of samples at ``interval_seconds`` cadence"""
+        return cls(max(1, math.ceil(horizon.total_seconds() / interval_seconds)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _at(self, i: int) -> Sample:
+        """Sample at logical index i (0 = oldest)"""
+        return self._slots[(self._start + i) % self.capacity]
+
+    def append(self, sample: Sample) -> bool:
+        """
+        Add a sample in O(1).
+
+        Returns:
+            False (and drops the sample) if it is older than the latest sample
+        """
+        if self._count and sample.ts < self._at(self._count - 1).ts:
+            self.dropped_out_of_order += 1
+            return False
+        if self._count < self.capacity:
+            self._slots[(self._start + self._count) % self.capacity] = sample
+            self._count += 1
+        else:
+            self._slots[self._start] = sample
+            self._start = (self._start + 1) % self.capacity
+        return True
+
+    def latest(self) -> Optional[Sample]:
+        """Most recent sample, None if empty"""
+        return self._at(self._count - 1) if self._count else None
+
+    def _bisect(self, ts: float) -> int:
+        """First logical index whose timestamp is >= ts"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._at(mid).ts < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Sample]:
+        """
+        Samples with start <= timestamp <= end, oldest first.
+
+        Args:
+            start: Window start (oldest sample if None)
+            end: Window end (latest sample if None)
+        """
+        first = self._bisect(start.timestamp()) if start is not None else 0
+        if end is not None:
+            # First index past end
+            last = self._bisect(math.nextafter(end.timestamp(), math.inf))
+        else:
+            last = self._count
+        return [self._at(i) for i in range(first, last)]
+
+    def since(self, duration: timedelta, now: Optional[datetime] = None) -> List[Sample]:
+        """Samples of the last ``duration`` (relative to now)"""
+        return self.window((now or datetime.now()) - duration)
+
+    def clear(self) -> None:
+        """Drop all samples"""
+        self._slots = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+
+
+class Sampler:
+    """Asyncio task collecting one sample per interval into a SampleRing"""
+
+    def __init__(self, collect: Callable[[], Awaitable[Dict[str, Any]]], ring: SampleRing,
+                 interval: float = MAX_SAMPLE_INTERVAL):
+        """
+        Initialize sampler.
+
+        Args:
+            collect: Coroutine returning comprehensive data (empty dict on failure)
+            ring: Buffer the samples are appended to
+            interval: Seconds between samples, clamped to 5-20
+        """
+        self.collect = collect
+        self.ring = ring
+        self.interval = clamp_interval(interval)
+        if self.interval != interval:
+            logger.warning(f"Sample interval {interval}s outside {MIN_SAMPLE_INTERVAL:g}-{MAX_SAMPLE_INTERVAL:g}s, "
+                           f"using {self.interval:g}s")
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+        self.samples = 0
+        self.failures = 0
+        self.overruns = 0
+        self.last_duration_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the sampling task (no-op if already running)"""
+        if self.running:
+            return
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name='sampler')
+        logger.info(f"Sampler started ({self.interval:g}s interval, {self.ring.capacity} samples)")
+
+    async def stop(self) -> None:
+        """Stop the sampling task after the sample in progress"""
+        if self._task is None:
+            return
+        self._stop_event.set()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def sample_once(self) -> Optional[Sample]:
+        """Collect and store one sample, None if collection failed"""
+        started = time.perf_counter()
+        try:
+            data = await self.collect()
+        except Exception as e:
+            logger.error(f"Sample collection failed: {e}")
+            data = None
+        self.last_duration_ms = (time.perf_counter() - started) * 1000
+        if not data:
+            self.failures += 1
+            return None
+        sample = Sample.from_current_data(data)
+        if self.ring.append(sample):
+            self.samples += 1
+        return sample
+
+    async def _run(self) -> None:
+        next_due = time.monotonic()
+        while not self._stop_event.is_set():
+            await self.sample_once()
+            next_due += self.interval
+            delay = next_due - time.monotonic()
+            if delay < 0:
+                # Collection took longer than the interval: skip the missed slots
+                self.overruns += 1
+                missed = math.ceil(-delay / self.interval)
+                next_due += missed * self.interval
+                delay = next_due - time.monotonic()
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sampler counters and buffer fill"""
+        latest = self.ring.latest()
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'samples': self.samples,
+            'failures': self.failures,
+            'overruns': self.overruns,
+            'last_duration_ms': round(self.last_duration_ms, 1),
+            'buffered': len(self.ring),
+            'capacity': self.ring.capacity,
+            'latest': latest.timestamp.isoformat() if latest else None,
+        }
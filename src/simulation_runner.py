@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Simulation Runner - MasterCoordinator in accelerated mode against a simulated inverter.
+
+The real coordinator (data collection, health checks, decisions, storage) runs
+against ``SimulatedInverterAdapter``'s device while a ``SimulatedClock`` stands
+in for ``datetime.now()``. Instead of sleeping between loop iterations the
+clock is advanced by one loop interval, so simulated weeks run in minutes.
+
+Everything is sandboxed: the SQLite database, multi-session and adaptive
+threshold files live in a temporary directory and prices are served from the
+price archive (``data/price_cache``) or, for days without an archive, from a
+synthetic day-ahead curve. No network or inverter is contacted.
+
+The report measures what long-running deployments care about:
+
+- loop latency (wall time per coordinator iteration: mean/p50/p95/p99/max)
+- memory growth per simulated day (RSS, optional tracemalloc heap, in-memory history sizes)
+- database write rates (rows added per table per simulated hour, database size)
+
+Usage:
+  python src/simulation_runner.py --start 2025-10-20 --days 7 --scenario scenario.yaml
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import signal
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+# Add current directory to path for imports
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from backtest import (
+    CLOCK_MODULES, SimulatedClock, load_archived_prices, offline_config, patched_clock
+)
+from inverter.adapters.simulated_adapter import reset_simulated_inverters
+from master_coordinator import MasterCoordinator
+from price_data_service import expected_day_minutes, reset_price_data_services
+
+logger = logging.getLogger(__name__)
+
+# Modules whose ``datetime`` follows the simulated clock in accelerated mode
+SIMULATION_CLOCK_MODULES = CLOCK_MODULES + (
+    'master_coordinator',
+    'enhanced_data_collector',
+    'fast_charge',
+    'battery_selling_monitor',
+    'price_data_service',
+    'inverter.adapters.simulated_adapter',
+)
+
+# Hourly day-ahead prices (PLN/MWh) used for days without an archived CSDAC file
+DEFAULT_PRICE_PROFILE_PLN_MWH = [
+    320, 300, 290, 285, 290, 320, 420, 520, 560, 500, 430, 380,
+    350, 340, 360, 420, 520, 680, 760, 720, 620, 520, 430, 360
+]
+
+DEFAULT_TICK_SECONDS = 60
+
+
+def synthetic_prices(day: str, profile: List[float] = DEFAULT_PRICE_PROFILE_PLN_MWH) -> Dict[str, Any]:
+    """
+    Build a complete CSDAC day from an hourly price profile.
+
+    Args:
+        day: Business date (YYYY-MM-DD)
+        profile: 24 hourly prices in PLN/MWh
+
+    Returns:
+        Raw CSDAC response with 15-minute slots
+    """
+    start = datetime.fromisoformat(day)
+    values = []
+    for slot in range(expected_day_minutes(date.fromisoformat(day)) // 15):
+        when = start + timedelta(minutes=15 * slot)
+        values.append({
+            'dtime': when.strftime('%Y-%m-%d %H:%M'),
+            'csdac_pln': profile[when.hour],
+            'business_date': day
+        })
+    return {'value': values}
+
+
+def write_price_days(price_dir: Path, start: date, days: int, archive_dir: Optional[str] = None) -> int:
+    """
+    Fill the sandbox price cache for the simulated days (plus D+1).
+
+    Args:
+        price_dir: Sandbox price cache directory
+        start: First simulated day
+        days: Number of simulated days
+        archive_dir: Archived price directory to copy real days from
+
+    Returns:
+        Number of days served from the archive
+    """
+    price_dir.mkdir(parents=True, exist_ok=True)
+    archived = 0
+    for offset in range(days + 1):
+        day = (start + timedelta(days=offset)).isoformat()
+        data = load_archived_prices(archive_dir, day) if archive_dir else None
+        if data:
+            archived += 1
+        else:
+            data = synthetic_prices(day)
+        with open(price_dir / f"csdac_{day}.json", 'w') as f:
+            json.dump(data, f)
+    return archived
+
+
+def simulation_config(base_config: Dict[str, Any], sandbox: Path, scenario_file: Optional[str] = None,
+                      log_level: str = 'WARNING') -> Dict[str, Any]:
+    """
+    Base config rewired to the simulated inverter with all side effects sandboxed.
+
+    Args:
+        base_config: System configuration
+        sandbox: Directory for the database and state files
+        scenario_file: Simulation scenario (inline ``inverter.scenario`` or defaults otherwise)
+        log_level: Root log level during the run
+
+    Returns:
+        Simulation configuration
+    """
+    config = offline_config(base_config, sandbox)
+    config['data_storage'] = {'database_storage': {'enabled': True, 'sqlite': {'path': str(sandbox / 'simulation.db')}}}
+    config.setdefault('price_analysis', {})['price_cache'] = {'enabled': True, 'cache_dir': str(sandbox / 'price_cache')}
+
+    inverter = {'vendor': 'simulated', 'scenario': config.get('inverter', {}).get('scenario', {})}
+    if scenario_file:
+        inverter['scenario_file'] = str(scenario_file)
+    config['inverter'] = inverter
+
+    # Offline: no dashboard, weather or PSE requests
+    config.setdefault('web_server', {})['enabled'] = False
+    config.setdefault('weather_integration', {})['enabled'] = False
+    config.setdefault('pse_price_forecast', {})['enabled'] = False
+    config.setdefault('pse_peak_hours', {})['enabled'] = False
+    config.setdefault('logging', {})['level'] = log_level
+    return config
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Loop latency statistics in milliseconds"""
+    if not latencies:
+        return {}
+    ms = [value * 1000 for value in latencies]
+    summary = {'mean': statistics.fmean(ms), 'max': max(ms)}
+    if len(ms) >= 2:
+        cuts = statistics.quantiles(ms, n=100, method='inclusive')
+        summary.update({'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]})
+    else:
+        summary.update({'p50': ms[0], 'p95': ms[0], 'p99': ms[0]})
+    return {key: round(value, 3) for key, value in summary.items()}
+
+
+async def _row_counts(coordinator: MasterCoordinator) -> Dict[str, int]:
+    """Row count per table of the simulation database"""
+    if not coordinator.storage:
+        return {}
+    stats = await coordinator.storage.get_database_stats()
+    return {
+        key[:-len('_count')]: value for key, value in stats.items()
+        if key.endswith('_count') and key != 'page_count'
+    }
+
+
+async def _close_component_storage(coordinator: MasterCoordinator) -> None:
+    """Disconnect the data collectors' own storage connections (shutdown only closes the coordinator's)"""
+    collectors = [coordinator.data_collector]
+    if coordinator.charging_controller is not None:
+        collectors.append(getattr(coordinator.charging_controller, 'data_collector', None))
+    for collector in collectors:
+        storage = getattr(collector, 'storage', None)
+        if storage is not None:
+            await storage.disconnect()
+
+
+async def _sample_day(coordinator: MasterCoordinator, day: date, iterations: int, latencies: List[float],
+                      previous_counts: Dict[str, int], hours: float,
+                      trace_memory: bool) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Metrics for one simulated day and the row counts at its end"""
+    counts = await _row_counts(coordinator)
+    rows_written = {table: counts.get(table, 0) - previous_counts.get(table, 0) for table in counts}
+    sample = {
+        'day': day.isoformat(),
+        'iterations': iterations,
+        'loop_latency_ms': latency_summary(latencies),
+        'rss_mb': round(_rss_mb(), 2),
+        'historical_data_entries': len(coordinator.historical_data),
+        'decision_history_entries': len(coordinator.decision_history),
+        'rows_written': rows_written,
+        'rows_per_hour': round(sum(rows_written.values()) / hours, 2) if hours else 0.0,
+        'battery_soc': coordinator.current_data.get('battery', {}).get('soc_percent'),
+    }
+    if trace_memory:
+        current, _ = tracemalloc.get_traced_memory()
+        sample['traced_mb'] = round(current / (1024 * 1024), 2)
+    if coordinator.storage:
+        stats = await coordinator.storage.get_database_stats()
+        sample['database_size_mb'] = stats.get('database_size_mb')
+    return sample, counts
+
+
+async def run_simulation(base_config: Dict[str, Any], start: datetime, days: int,
+                         tick_seconds: int = DEFAULT_TICK_SECONDS, scenario_file: Optional[str] = None,
+                         price_archive_dir: Optional[str] = None, trace_memory: bool = False,
+                         keep_dir: Optional[str] = None, log_level: str = 'WARNING') -> Dict[str, Any]:
+    """
+    Run MasterCoordinator against the simulated inverter on a virtual clock.
+
+    Args:
+        base_config: System configuration
+        start: Simulated start time
+        days: Number of simulated days
+        tick_seconds: Simulated time between coordinator iterations
+        scenario_file: Simulation scenario file (defaults otherwise)
+        price_archive_dir: Archived CSDAC days to replay (synthetic prices otherwise)
+        trace_memory: Track Python heap with tracemalloc (slower)
+        keep_dir: Copy the sandbox (database, config) here after the run
+        log_level: Root log level during the run
+
+    Returns:
+        Report with overall and per-day loop latency, memory and database write metrics
+    """
+    reset_price_data_services()
+    reset_simulated_inverters()
+    root_logger = logging.getLogger()
+    saved_level = root_logger.level
+    saved_handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+
+    with tempfile.TemporaryDirectory(prefix='simulation_') as sandbox_dir:
+        sandbox = Path(sandbox_dir)
+        config = simulation_config(base_config, sandbox, scenario_file, log_level)
+        archived_days = write_price_days(sandbox / 'price_cache', start.date(), days, price_archive_dir)
+        config_path = sandbox / 'simulation_config.yaml'
+        with open(config_path, 'w') as f:
+            yaml.safe_dump(config, f)
+
+        clock = SimulatedClock(start)
+        end = start + timedelta(days=days)
+        tick = timedelta(seconds=tick_seconds)
+        if trace_memory:
+            tracemalloc.start()
+
+        try:
+            with patched_clock(clock, SIMULATION_CLOCK_MODULES):
+                coordinator = MasterCoordinator(str(config_path))
+                if not await coordinator.initialize():
+                    raise RuntimeError("Coordinator failed to initialize against the simulated inverter")
+                coordinator.is_running = True
+                coordinator.start_time = clock.now()
+
+                counts = await _row_counts(coordinator)
+                initial_counts = dict(counts)
+                day_samples = []
+                all_latencies: List[float] = []
+                day_latencies: List[float] = []
+                day_start = clock.now()
+                wall_start = time.perf_counter()
+
+                while clock.now() < end:
+                    iteration_start = time.perf_counter()
+                    await coordinator.run_iteration()
+                    elapsed = time.perf_counter() - iteration_start
+                    day_latencies.append(elapsed)
+                    all_latencies.append(elapsed)
+                    clock.advance(tick)
+
+                    if clock.now().date() != day_start.date() or clock.now() >= end:
+                        hours = (clock.now() - day_start).total_seconds() / 3600
+                        sample, counts = await _sample_day(
+                            coordinator, day_start.date(), len(day_latencies), day_latencies,
+                            counts, hours, trace_memory
+                        )
+                        day_samples.append(sample)
+                        logger.info(f"Simulated {sample['day']}: {sample['iterations']} iterations, "
+                                    f"p95 {sample['loop_latency_ms'].get('p95')} ms, RSS {sample['rss_mb']} MB")
+                        day_latencies = []
+                        day_start = clock.now()
+
+                wall_seconds = time.perf_counter() - wall_start
+                final_counts = await _row_counts(coordinator)
+                device_soc = None
+                inverter = coordinator.charging_controller.goodwe_charger.inverter
+                if inverter is not None:
+                    device_soc = await inverter.get_battery_soc()
+                coordinator.is_running = False
+                await coordinator.shutdown()
+                await _close_component_storage(coordinator)
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            root_logger.setLevel(saved_level)
+            for sig, handler in saved_handlers.items():
+                signal.signal(sig, handler)
+
+        if keep_dir:
+            shutil.copytree(sandbox, keep_dir, dirs_exist_ok=True)
+
+    simulated_hours = days * 24
+    rows_written = {table: final_counts.get(table, 0) - initial_counts.get(table, 0) for table in final_counts}
+    first_rss = day_samples[0]['rss_mb'] if day_samples else 0.0
+    last_rss = day_samples[-1]['rss_mb'] if day_samples else 0.0
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'tick_seconds': tick_seconds,
+        'iterations': len(all_latencies),
+        'wall_seconds': round(wall_seconds, 2),
+        'speedup': round(days * 86400 / wall_seconds, 1) if wall_seconds else None,
+        'archived_price_days': archived_days,
+        'loop_latency_ms': latency_summary(all_latencies),
+        'memory_growth_mb': round(last_rss - first_rss, 2),
+        'rows_written': rows_written,
+        'rows_per_hour': {table: round(rows / simulated_hours, 2) for table, rows in rows_written.items()},
+        'final_battery_soc': device_soc,
+        'days': day_samples,
+    }
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Run the coordinator in accelerated mode against a simulated inverter')
+    parser.add_argument('--config', default=str(current_dir.parent / 'config' / 'master_coordinator_config.yaml'),
+                        help='Base configuration file')
+    parser.add_argument('--scenario', help='Simulation scenario file (YAML/JSON)')
+    parser.add_argument('--start', help='Simulated start (YYYY-MM-DD or ISO time, default: today 00:00)')
+    parser.add_argument('--days', type=int, default=7, help='Simulated days')
+    parser.add_argument('--tick-seconds', type=int, default=DEFAULT_TICK_SECONDS,
+                        help='Simulated time per coordinator iteration')
+    parser.add_argument('--prices', help='Archived price directory (synthetic prices for missing days)')
+    parser.add_argument('--trace-memory', action='store_true', help='Track Python heap with tracemalloc')
+    parser.add_argument('--keep-dir', help='Copy the simulation database and config here')
+    parser.add_argument('--log-level', default='WARNING', help='Log level during the run')
+    parser.add_argument('--output', default='out/simulation/simulation_report.json', help='Report JSON file')
+    return parser.parse_args()
+
+
+def main():
+    """Run an accelerated simulation from the command line and print a summary"""
+    args = parse_arguments()
+
+    with open(args.config, 'r') as f:
+        base_config = yaml.safe_load(f)
+    start = datetime.fromisoformat(args.start) if args.start else datetime.combine(date.today(), datetime.min.time())
+
+    report = asyncio.run(run_simulation(
+        base_config, start, args.days, tick_seconds=args.tick_seconds, scenario_file=args.scenario,
+        price_archive_dir=args.prices, trace_memory=args.trace_memory, keep_dir=args.keep_dir,
+        log_level=args.log_level
+    ))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    latency = report['loop_latency_ms']
+    print(f"\nSimulated {args.days} day(s) in {report['wall_seconds']}s ({report['speedup']}x), "
+          f"{report['iterations']} iterations")
+    print(f"Loop latency ms: mean {latency.get('mean')}, p95 {latency.get('p95')}, max {latency.get('max')}")
+    print(f"\n{'Day':<12} {'RSS MB':>8} {'History':>8} {'Decisions':>10} {'Rows/h':>8} {'p95 ms':>8} {'SOC':>6}")
+    for day in report['days']:
+        print(f"{day['day']:<12} {day['rss_mb']:>8.1f} {day['historical_data_entries']:>8} "
+              f"{day['decision_history_entries']:>10} {day['rows_per_hour']:>8.1f} "
+              f"{day['loop_latency_ms'].get('p95', 0):>8.2f} {str(day['battery_soc']):>6}")
+    print(f"\nMemory growth: {report['memory_growth_mb']} MB; rows written: {report['rows_written']}")
+    print(f"Report written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,12 +12,16 @@ Final Price = Market Price + SC Component + Distribution Price
 """
 
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, Any, Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Optional, Sequence, Tuple
+import json
 import logging
 import sys
 from pathlib import Path
 
+import numpy as np
+import pytz
+
 # Add parent directory to path for imports
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
@@ -26,6 +30,15 @@ from utils.polish_holidays import is_free_day
 
 logger = logging.getLogger(__name__)
 
+# Local market timezone used to resolve DST transitions for daily slot vectors
+WARSAW_TZ = pytz.timezone('Europe/Warsaw')
+
+# Number of 15-minute wall-clock slots in a regular day
+SLOTS_PER_DAY = 96
+
+# Number of per-day distribution vectors kept in memory (today, D+1 and a few past days)
+_DAY_CACHE_SIZE = 8
+
 
 @dataclass
 class PriceComponents:
@@ -53,6 +66,16 @@ class TariffPricingCalculator:
         self.sc_component = tariff_config.get('sc_component_pln_kwh', 0.0892)
         self.distribution_config = tariff_config.get('distribution_pricing', {})
         
+        # Stable identifier of the pricing configuration (used to memoize derived price data)
+        self.config_hash = hash(json.dumps(
+            [self.tariff_type, self.sc_component, self.distribution_config],
+            sort_keys=True,
+            default=str
+        ))
+        
+        # Per-day distribution price cache: date -> (wall-clock 96-slot vector, DST-aware slot vector)
+        self._day_vectors: Dict[Tuple[date, Optional[str]], Tuple[np.ndarray, np.ndarray]] = {}
+        
         logger.info(f"Tariff Pricing Calculator initialized: tariff={self.tariff_type}, SC={self.sc_component} PLN/kWh")
     
     def calculate_final_price(
@@ -84,6 +107,99 @@ class TariffPricingCalculator:
             timestamp=timestamp
         )
     
+    def calculate_final_prices_batch(
+        self,
+        market_prices: Sequence[float],
+        timestamps: Sequence[datetime],
+        kompas_status: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Calculate final prices for many periods at once.
+        
+        Distribution prices are looked up from a per-day vector that is resolved
+        once per business day (tariff type, season and free-day status), instead
+        of being re-resolved for every 15-minute period.
+        
+        Args:
+            market_prices: Market prices in PLN/kWh from CSDAC API
+            timestamps: Start time of each price period (same length as market_prices)
+            kompas_status: Kompas status for G14dynamic, applied to all periods
+        
+        Returns:
+            NumPy array of final prices in PLN/kWh
+        """
+        market = np.asarray(market_prices, dtype=np.float64)
+        if len(timestamps) != market.shape[0]:
+            raise ValueError(
+                f"market_prices and timestamps length mismatch: {market.shape[0]} != {len(timestamps)}"
+            )
+        
+        distribution = np.empty(market.shape[0], dtype=np.float64)
+        current_day = None
+        wall_vector = None
+        for i, ts in enumerate(timestamps):
+            day = ts.date()
+            if day != current_day:
+                current_day = day
+                wall_vector = self._get_day_vectors(day, kompas_status)[0]
+            distribution[i] = wall_vector[ts.hour * 4 + ts.minute // 15]
+        
+        return market + self.sc_component + distribution
+    
+    def get_daily_distribution_prices(self, day: date, kompas_status: Optional[str] = None) -> np.ndarray:
+        """
+        Get distribution prices for every 15-minute slot of a local (Europe/Warsaw) day.
+        
+        The vector follows the real clock, so it has 96 slots on regular days,
+        92 on the spring DST change and 100 on the autumn DST change.
+        
+        Args:
+            day: Local calendar day
+            kompas_status: Kompas status for G14dynamic
+        
+        Returns:
+            NumPy array of distribution prices in PLN/kWh (read-only)
+        """
+        return self._get_day_vectors(day, kompas_status)[1]
+    
+    def _get_day_vectors(self, day: date, kompas_status: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Build (or fetch from cache) the wall-clock and DST-aware distribution vectors for a day."""
+        key = (day, kompas_status)
+        vectors = self._day_vectors.get(key)
+        if vectors is not None:
+            return vectors
+        
+        # Wall-clock vector: distribution price only depends on local wall-clock time
+        midnight = datetime(day.year, day.month, day.day)
+        wall_vector = np.fromiter(
+            (
+                self._get_distribution_price(midnight + timedelta(minutes=15 * slot), kompas_status)
+                for slot in range(SLOTS_PER_DAY)
+            ),
+            dtype=np.float64,
+            count=SLOTS_PER_DAY
+        )
+        
+        # DST-aware vector: walk real 15-minute instants and map them back to wall-clock slots
+        start = WARSAW_TZ.localize(midnight)
+        next_day = day + timedelta(days=1)
+        end = WARSAW_TZ.localize(datetime(next_day.year, next_day.month, next_day.day))
+        slot_count = int((end - start).total_seconds() // 900)
+        utc_start = start.astimezone(pytz.utc)
+        wall_slots = np.empty(slot_count, dtype=np.intp)
+        for i in range(slot_count):
+            local = (utc_start + timedelta(minutes=15 * i)).astimezone(WARSAW_TZ)
+            wall_slots[i] = local.hour * 4 + local.minute // 15
+        slot_vector = wall_vector[wall_slots]
+        
+        wall_vector.setflags(write=False)
+        slot_vector.setflags(write=False)
+        
+        if len(self._day_vectors) >= _DAY_CACHE_SIZE:
+            self._day_vectors.pop(next(iter(self._day_vectors)))
+        self._day_vectors[key] = (wall_vector, slot_vector)
+        return wall_vector, slot_vector
+    
     def _get_distribution_price(
         self,
         timestamp: datetime,
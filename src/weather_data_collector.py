@@ -23,9 +23,15 @@ logger = logging.getLogger(__name__)
 class WeatherDataCollector:
     """Hybrid weather data collector using IMGW + Open-Meteo APIs"""
     
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize weather data collector"""
+    def __init__(self, config: Dict[str, Any], http_client: Optional[Any] = None):
+        """Initialize weather data collector
+        
+        Args:
+            config: System configuration
+            http_client: Optional shared HttpClient (per-request sessions otherwise)
+        """
         self.config = config
+        self.http_client = http_client
         self.weather_config = config.get('weather_integration', {})
         
         # Get global system timezone as fallback
@@ -122,6 +128,15 @@ class WeatherDataCollector:
     async def _fetch_imgw_data(self) -> Dict[str, Any]:
         """Fetch current weather conditions from IMGW"""
         try:
+            if self.http_client is not None:
+                try:
+                    data = await self.http_client.get_json(self.imgw_endpoint, endpoint='imgw', timeout_seconds=10)
+                except aiohttp.ClientResponseError as e:
+                    logger.warning(f"IMGW API returned status {e.status}")
+                    return {}
+                logger.debug(f"IMGW data fetched successfully from station {self.imgw_station}")
+                return self._parse_imgw_data(data)
+            
             async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
                 async with session.get(self.imgw_endpoint) as response:
                     if response.status == 200:
@@ -147,6 +162,17 @@ class WeatherDataCollector:
                 'timezone': self.location['timezone']
             }
             
+            if self.http_client is not None:
+                try:
+                    data = await self.http_client.get_json(
+                        self.openmeteo_endpoint, params=params, endpoint='openmeteo', timeout_seconds=15
+                    )
+                except aiohttp.ClientResponseError as e:
+                    logger.warning(f"Open-Meteo API returned status {e.status}")
+                    return {}
+                logger.debug(f"Open-Meteo data fetched successfully for {self.location['latitude']}, {self.location['longitude']}")
+                return self._parse_openmeteo_data(data)
+            
             async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
                 async with session.get(self.openmeteo_endpoint, params=params) as response:
                     if response.status == 200:
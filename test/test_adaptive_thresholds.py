@@ -138,6 +138,119 @@ class TestPriceHistoryManager(unittest.TestCase):
         self.assertGreater(info['coverage_hours'], 20)
 
 
+class TestPriceHistoryRingBuffer(unittest.TestCase):
+    """Test ring buffer, sorted index and binary persistence."""
+    
+    def setUp(self):
+        """Set up manager with an isolated data directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        with patch('price_history_manager.Path', side_effect=lambda p: Path(self.temp_dir) / p):
+            self.manager = PriceHistoryManager({'lookback_days': 1, 'min_samples': 4})
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _reference_stats(self, prices):
+        """Sort-based reference percentiles."""
+        data = sorted(prices)
+        
+        def percentile(p):
+            k = (len(data) - 1) * p
+            f = int(k)
+            if f + 1 >= len(data):
+                return data[-1]
+            return data[f] * (f + 1 - k) + data[f + 1] * (k - f)
+        
+        return {key: percentile(p) for key, p in (('p25', 0.25), ('p50', 0.5), ('p75', 0.75), ('p90', 0.9))}
+    
+    def test_statistics_match_sorted_reference(self):
+        """Incremental percentiles equal a full sort after ring wrap-around."""
+        now = datetime.now()
+        prices = [0.3 + ((i * 37) % 101) / 100 for i in range(250)]
+        for i, price in enumerate(prices):
+            self.manager.add_price_point(now - timedelta(minutes=5 * (250 - i)), price)
+        
+        # Ring holds 96 points; all are inside the 24h window
+        expected_prices = prices[-96:]
+        stats = self.manager.calculate_statistics()
+        
+        self.assertEqual(stats['sample_count'], 96)
+        self.assertAlmostEqual(stats['mean'], sum(expected_prices) / 96)
+        for key, value in self._reference_stats(expected_prices).items():
+            self.assertAlmostEqual(stats[key], value)
+        self.assertAlmostEqual(stats['median'], stats['p50'])
+        self.assertEqual(len(self.manager.price_cache), 96)
+        self.assertAlmostEqual(self.manager.price_cache[-1][1], prices[-1])
+    
+    def test_time_eviction_out_of_order(self):
+        """Points older than the lookback window leave the statistics."""
+        now = datetime.now()
+        self.manager.add_price_point(now - timedelta(hours=1), 0.5)
+        self.manager.add_price_point(now - timedelta(hours=30), 9.0)  # Expired, appended late
+        self.manager.add_price_point(now + timedelta(hours=5), 0.7)  # Future D+1 price
+        
+        stats = self.manager.calculate_statistics()
+        
+        self.assertEqual(stats['sample_count'], 2)
+        self.assertAlmostEqual(stats['median'], 0.6)
+        self.assertEqual(sorted(self.manager.get_recent_prices()), [0.5, 0.7])
+        # Ring still holds every point, like the previous deque
+        self.assertEqual(len(self.manager.price_cache), 3)
+    
+    def test_binary_round_trip(self):
+        """Binary cache restores the same points."""
+        now = datetime.now().replace(microsecond=0)
+        for i in range(20):
+            self.manager.add_price_point(now - timedelta(minutes=15 * i), 0.4 + i * 0.01)
+        self.manager.flush()
+        
+        restored = PriceHistoryManager.__new__(PriceHistoryManager)
+        with patch('price_history_manager.Path', side_effect=lambda p: Path(self.temp_dir) / p):
+            restored.__init__({'lookback_days': 1})
+        
+        self.assertEqual(restored.price_cache, self.manager.price_cache)
+        self.assertEqual(restored.calculate_statistics(), self.manager.calculate_statistics())
+        self.assertTrue(self.manager.cache_file.read_bytes().startswith(b'PHST'))
+    
+    def test_legacy_json_migration(self):
+        """Existing JSON history is loaded when no binary cache exists."""
+        now = datetime.now().replace(microsecond=0)
+        legacy = [((now - timedelta(hours=i)).isoformat(), 0.5 + i * 0.1) for i in range(3)]
+        with open(Path(self.temp_dir) / 'data' / 'price_history.json', 'w') as f:
+            json.dump(legacy, f)
+        
+        with patch('price_history_manager.Path', side_effect=lambda p: Path(self.temp_dir) / p):
+            manager = PriceHistoryManager({'lookback_days': 1})
+        manager.flush()
+        
+        self.assertEqual(manager.price_cache, legacy)
+        self.assertTrue(manager.cache_file.exists())
+    
+    def test_persistence_is_debounced(self):
+        """Adding points does not rewrite the cache file every few points."""
+        now = datetime.now()
+        with patch.object(self.manager, '_save_cache') as save:
+            for i in range(50):
+                self.manager.add_price_point(now - timedelta(minutes=i), 0.5)
+            save.assert_not_called()
+            
+            self.manager._last_save -= self.manager.persist_interval_seconds
+            self.manager.add_price_point(now, 0.5)
+            save.assert_called_once()
+    
+    def test_charger_shutdown_flushes_pending_points(self):
+        """AutomatedPriceCharger.shutdown persists points still waiting for the debounce."""
+        from automated_price_charging import AutomatedPriceCharger
+        charger = AutomatedPriceCharger.__new__(AutomatedPriceCharger)
+        charger.price_history = self.manager
+        self.manager.add_price_point(datetime.now(), 0.5)
+        self.assertFalse(self.manager.cache_file.exists())
+        
+        charger.shutdown()
+        self.assertTrue(self.manager.cache_file.exists())
+
+
 class TestAdaptiveThresholdCalculator(unittest.TestCase):
     """Test AdaptiveThresholdCalculator functionality."""
     
@@ -177,8 +177,8 @@ class TestAsyncHTTP:
 class TestDequeOptimization:
     """Test deque optimization in data collector"""
     
-    def test_deque_initialization(self):
-        """Test that EnhancedDataCollector uses deque"""
+    def test_collector_keeps_no_dict_history(self):
+        """Test that EnhancedDataCollector keeps only the latest data (history lives in the SampleRing)"""
         from enhanced_data_collector import EnhancedDataCollector
         
         config = {
@@ -192,10 +192,12 @@ class TestDequeOptimization:
         }
         
         collector = EnhancedDataCollector(config)
+        data = {'timestamp': datetime.now().isoformat(), 'battery': {'soc_percent': 50}}
+        collector._store_collected(data)
         
-        # Should be a deque with maxlen
-        assert isinstance(collector.historical_data, deque)
-        assert collector.historical_data.maxlen == 30240
+        # Only the latest data is kept, not a deque of nested dicts
+        assert collector.get_current_data() == data
+        assert not hasattr(collector, 'historical_data')
     
     def test_deque_auto_truncation(self):
         """Test that deque automatically limits size"""
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tests for the exact DP charging schedule solver and MultiSessionManager optimal mode
+"""
+
+import itertools
+import sys
+import time
+from pathlib import Path
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from backtest import SimulatedClock, patched_clock
+from charging_schedule_optimizer import ChargingScheduleOptimizer
+from price_curve import PriceCurve
+from price_data_service import PriceDataService
+from multi_session_manager import MultiSessionManager
+
+
+DAY = datetime(2025, 10, 20)
+
+
+def create_config(max_sessions=3, min_hours=1.0, max_hours=4.0, gap_minutes=30, capacity=20.0, max_power=10000):
+    """Multi-session configuration with optimal planning"""
+    return {
+        'battery_management': {'capacity_kwh': capacity},
+        'charging': {'max_power': max_power},
+        'data_storage': {
+            'database_storage': {'enabled': True, 'db_path': ':memory:'}
+        },
+        'coordinator': {
+            'multi_session_charging': {
+                'enabled': True,
+                'planning_mode': 'optimal',
+                'max_sessions_per_day': max_sessions,
+                'min_session_duration_hours': min_hours,
+                'max_session_duration_hours': max_hours,
+                'session_gap_minutes': gap_minutes,
+                'target_soc': 100.0
+            }
+        }
+    }
+
+
+def create_curve(prices, start=DAY):
+    """Curve with final prices equal to the given PLN/MWh values"""
+    price_data = {
+        'value': [
+            {'dtime': (start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M'), 'csdac_pln': price}
+            for i, price in enumerate(prices)
+        ]
+    }
+    return PriceCurve.from_price_data(price_data, sc_component_mwh=0.0)
+
+
+def create_price_data(prices, start=DAY):
+    """CSDAC-style response with 15-minute slots"""
+    return {
+        'value': [
+            {'dtime': (start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M'), 'csdac_pln': p}
+            for i, p in enumerate(prices)
+        ]
+    }
+
+
+def brute_force_cost(prices, slot_energy_kwh, steps_needed, max_sessions, min_len, max_len, gap):
+    """Enumerate every valid session set and return the minimum cost"""
+    n = len(prices)
+    best = float('inf')
+    candidates = [(t, length) for t in range(n) for length in range(min_len, max_len + 1) if t + length <= n]
+    for count in range(0, max_sessions + 1):
+        for combo in itertools.combinations(candidates, count):
+            if any(a[0] + a[1] + gap > b[0] for a, b in zip(combo, combo[1:])):
+                continue
+            if sum(length for _, length in combo) < steps_needed:
+                continue
+            cost = sum(sum(prices[t:t + length]) for t, length in combo) / 1000.0 * slot_energy_kwh
+            best = min(best, cost)
+    return best
+
+
+class TestChargingScheduleOptimizer:
+    """Solver correctness against exhaustive search"""
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_matches_brute_force(self, seed):
+        prices = [300.0 + ((i * 37 + seed * 11) % 17) * 20.0 for i in range(14)]
+        # 10 kW over 15 minutes = 2.5 kWh per slot; 5 kWh battery from 0% needs 2 slots
+        optimizer = ChargingScheduleOptimizer(create_config(max_sessions=2, min_hours=0.25, max_hours=0.75,
+                                                            gap_minutes=15, capacity=12.5))
+        schedule = optimizer.solve(create_curve(prices), current_soc=0.0, target_soc=100.0)
+
+        expected = brute_force_cost(prices, 2.5, 5, max_sessions=2, min_len=1, max_len=3, gap=1)
+        assert schedule.feasible
+        assert schedule.total_cost_pln == pytest.approx(expected)
+
+    def test_respects_constraints(self):
+        prices = [400.0 + 150.0 * ((i // 8) % 2) for i in range(96)]
+        optimizer = ChargingScheduleOptimizer(create_config())
+        schedule = optimizer.solve(create_curve(prices), current_soc=10.0, target_soc=90.0)
+
+        assert schedule.feasible
+        assert 1 <= len(schedule.sessions) <= 3
+        for session in schedule.sessions:
+            assert timedelta(hours=1) <= session.end_time - session.start_time <= timedelta(hours=4)
+        for earlier, later in zip(schedule.sessions, schedule.sessions[1:]):
+            assert later.start_time - earlier.end_time >= timedelta(minutes=30)
+        assert schedule.total_energy_kwh == pytest.approx(16.0)
+
+    def test_picks_cheapest_slots(self):
+        prices = [500.0] * 96
+        prices[40:44] = [100.0] * 4
+        optimizer = ChargingScheduleOptimizer(create_config())
+        schedule = optimizer.solve(create_curve(prices), current_soc=50.0, target_soc=100.0)
+
+        assert len(schedule.sessions) == 1
+        assert schedule.sessions[0].start_time == DAY + timedelta(hours=10)
+        assert schedule.total_cost_pln == pytest.approx(10.0 * 100.0 / 1000.0)
+
+    def test_partial_when_infeasible(self):
+        """Too little time to reach target charges as much as allowed"""
+        optimizer = ChargingScheduleOptimizer(create_config(max_sessions=1, max_hours=1.0, capacity=100.0))
+        schedule = optimizer.solve(create_curve([300.0] * 16), current_soc=0.0, target_soc=100.0)
+
+        assert not schedule.feasible
+        assert schedule.total_energy_kwh == pytest.approx(10.0)
+
+    def test_already_at_target(self):
+        optimizer = ChargingScheduleOptimizer(create_config())
+        schedule = optimizer.solve(create_curve([300.0] * 96), current_soc=100.0, target_soc=100.0)
+
+        assert schedule.feasible
+        assert schedule.sessions == []
+
+    def test_slot_lookup(self):
+        prices = [500.0] * 96
+        prices[8:12] = [100.0] * 4
+        optimizer = ChargingScheduleOptimizer(create_config())
+        schedule = optimizer.solve(create_curve(prices), current_soc=50.0, target_soc=100.0)
+
+        assert schedule.should_charge_at(DAY + timedelta(hours=2, minutes=30))
+        assert not schedule.should_charge_at(DAY + timedelta(hours=3))
+        assert schedule.session_at(DAY + timedelta(days=2)) is None
+
+    def test_solve_time(self):
+        """Two-day curve solves well under a second"""
+        prices = [300.0 + (i * 37) % 200 for i in range(192)]
+        optimizer = ChargingScheduleOptimizer(create_config())
+
+        started = time.perf_counter()
+        schedule = optimizer.solve(create_curve(prices), current_soc=5.0, target_soc=100.0)
+        assert time.perf_counter() - started < 1.0
+        assert schedule.feasible
+
+
+class TestMultiSessionOptimalMode:
+    """MultiSessionManager with planning_mode: optimal"""
+
+    @pytest.mark.asyncio
+    async def test_create_optimal_plan(self, tmp_path):
+        manager = MultiSessionManager(create_config())
+        manager.data_dir = tmp_path
+        prices = [500.0] * 96
+        prices[8:12] = [100.0] * 4
+        manager._fetch_price_data_for_date = AsyncMock(return_value=create_price_data(prices))
+
+        with patched_clock(SimulatedClock(DAY), ['multi_session_manager']):
+            plan = await manager.create_daily_plan(DAY, current_soc=50.0)
+
+        assert plan is not None
+        assert plan.total_sessions == 1
+        assert plan.total_estimated_energy_kwh == pytest.approx(10.0)
+        session = manager.get_session_for_time(DAY + timedelta(hours=2, minutes=10))
+        assert session is plan.sessions[0]
+        assert manager.get_session_for_time(DAY + timedelta(hours=5)) is None
+
+
+    @pytest.mark.asyncio
+    async def test_plan_skips_elapsed_slots(self, tmp_path):
+        manager = MultiSessionManager(create_config())
+        manager.data_dir = tmp_path
+        prices = [500.0] * 96
+        prices[8:12] = [100.0] * 4     # 02:00-03:00, already over at 06:00
+        prices[80:84] = [200.0] * 4    # 20:00-21:00
+        manager._fetch_price_data_for_date = AsyncMock(return_value=create_price_data(prices))
+
+        with patched_clock(SimulatedClock(DAY + timedelta(hours=6)), ['multi_session_manager']):
+            plan = await manager.create_daily_plan(DAY.date(), current_soc=50.0)
+
+        assert [s.start_time for s in plan.sessions] == [DAY + timedelta(hours=20)]
+
+
+class TestPublicationPlanning:
+    """Plans follow price publication instead of a fixed planning time"""
+
+    @pytest.mark.asyncio
+    async def test_today_and_tomorrow_planned_once_when_published(self, tmp_path):
+        tomorrow = DAY + timedelta(days=1)
+        prices = [500.0] * 96
+        prices[80:84] = [100.0] * 4
+        published = {DAY.date().isoformat(): create_price_data(prices)}
+
+        service = PriceDataService('http://test/csdac', {})
+        service._fetch = AsyncMock(side_effect=lambda date_str: published.get(date_str, {'value': []}))
+        analyzer = Mock()
+        analyzer.price_data_service = service
+        analyzer.fetch_price_data_for_date = service.get_price_data
+        analyzer.get_price_curve = lambda data: PriceCurve.from_price_data(data, sc_component_mwh=0.0)
+        manager = MultiSessionManager(create_config(), price_analyzer=analyzer)
+        manager.data_dir = tmp_path
+
+        clock = SimulatedClock(DAY + timedelta(hours=10))
+        with patched_clock(clock, ['multi_session_manager']):
+            await manager.update_plans(current_soc=50.0)
+            assert manager.current_plan.date == DAY.date()
+            assert manager.upcoming_plan is None
+
+            # D+1 prices arrive in the publication window
+            clock.set(DAY + timedelta(hours=13))
+            published[tomorrow.date().isoformat()] = create_price_data(prices, start=tomorrow)
+            await manager.update_plans(current_soc=60.0)
+            upcoming = manager.upcoming_plan
+            assert upcoming.date == tomorrow.date()
+            assert manager.current_plan.date == DAY.date()
+
+            # Each day is planned only once
+            fetches = service._fetch.await_count
+            await manager.update_plans(current_soc=60.0)
+            assert service._fetch.await_count == fetches
+            assert manager.upcoming_plan is upcoming
+
+            # At midnight the day is re-planned from the actual SOC
+            clock.set(tomorrow + timedelta(minutes=5))
+            await manager.update_plans(current_soc=30.0)
+            plan = manager.current_plan
+            assert plan is not upcoming
+            assert plan.date == tomorrow.date()
+            assert manager.upcoming_plan is None
+            assert plan.total_estimated_energy_kwh > upcoming.total_estimated_energy_kwh
+            assert manager.get_session_for_time(tomorrow + timedelta(hours=20, minutes=30)) is plan.sessions[0]
+
+            # ...once
+            await manager.update_plans(current_soc=20.0)
+            assert manager.current_plan is plan
+        manager.price_analyzer.price_data_service.remove_publication_listener(manager._on_prices_published)
+
+    @pytest.mark.asyncio
+    async def test_heuristic_mode_plans_at_daily_planning_time(self, tmp_path):
+        config = create_config()
+        config['coordinator']['multi_session_charging']['planning_mode'] = 'heuristic'
+        manager = MultiSessionManager(config, price_analyzer=Mock())
+        manager.data_dir = tmp_path
+        manager.create_daily_plan = AsyncMock(return_value=None)
+
+        clock = SimulatedClock(DAY + timedelta(hours=5, minutes=59))
+        with patched_clock(clock, ['multi_session_manager']):
+            await manager.update_plans(current_soc=50.0)
+            manager.create_daily_plan.assert_not_awaited()
+
+            clock.set(DAY + timedelta(hours=6))
+            await manager.update_plans(current_soc=50.0)
+            await manager.update_plans(current_soc=50.0)
+            manager.create_daily_plan.assert_awaited_once_with(DAY.date())
+
+            # No plan for tomorrow when its prices are published
+            clock.set(DAY + timedelta(hours=14))
+            await manager.update_plans(current_soc=50.0)
+            assert manager.create_daily_plan.await_count == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
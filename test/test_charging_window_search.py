@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for prefix-sum charging window search in AutomatedPriceCharger
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from automated_price_charging import AutomatedPriceCharger
+
+
+def create_config():
+    """Minimal G12w configuration"""
+    return {
+        'data_storage': {
+            'database_storage': {'enabled': True, 'db_path': ':memory:'}
+        },
+        'electricity_tariff': {
+            'tariff_type': 'g12w',
+            'sc_component_pln_kwh': 0.0892,
+            'distribution_pricing': {
+                'g12w': {
+                    'type': 'time_based',
+                    'peak_hours': {'start': 6, 'end': 22},
+                    'prices': {'peak': 0.3566, 'off_peak': 0.0749}
+                }
+            }
+        }
+    }
+
+
+def create_price_data(slots=192, start=datetime(2025, 10, 20)):
+    """Two days of 15-minute prices with a midday valley and evening peak"""
+    values = []
+    for i in range(slots):
+        hour = (i // 4) % 24
+        price = 400.0 + (250.0 if 17 <= hour < 21 else 0.0) - (200.0 if 10 <= hour < 15 else 0.0) + (i * 7) % 11
+        values.append({
+            'dtime': (start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M'),
+            'csdac_pln': price
+        })
+    return {'value': values}
+
+
+@pytest.fixture
+def charger():
+    return AutomatedPriceCharger(create_config())
+
+
+def brute_force_windows(charger, price_data, target_hours, threshold):
+    """Reference quadratic implementation using scalar pricing"""
+    items = price_data['value']
+    finals = [
+        charger.calculate_final_price(float(item['csdac_pln']), datetime.strptime(item['dtime'], '%Y-%m-%d %H:%M'))
+        for item in items
+    ]
+    window_size = int(target_hours * 60) // 15
+    overall_avg = sum(finals) / len(finals)
+    windows = []
+    for i in range(len(items) - window_size + 1):
+        avg_price = sum(finals[i:i + window_size]) / window_size
+        if avg_price <= threshold:
+            windows.append((datetime.strptime(items[i]['dtime'], '%Y-%m-%d %H:%M'), avg_price, overall_avg - avg_price))
+    windows.sort(key=lambda x: x[2], reverse=True)
+    return windows
+
+
+class TestAnalyzeChargingWindows:
+    """analyze_charging_windows must match the quadratic reference"""
+
+    @pytest.mark.parametrize('target_hours', [1.0, 2.0, 4.0])
+    def test_matches_brute_force(self, charger, target_hours):
+        price_data = create_price_data()
+        threshold = 500.0
+
+        windows = charger.analyze_charging_windows(price_data, target_hours=target_hours, max_price_threshold=threshold)
+        expected = brute_force_windows(charger, price_data, target_hours, threshold)
+
+        assert len(windows) == len(expected)
+        for window, (start, avg_price, savings) in zip(windows, expected):
+            assert window['avg_price'] == pytest.approx(avg_price)
+            assert window['savings'] == pytest.approx(savings)
+        assert {w['start_time'] for w in windows} == {start for start, _, _ in expected}
+
+    def test_default_threshold(self, charger):
+        """Default threshold uses the charging percentile without adaptive config"""
+        windows = charger.analyze_charging_windows(create_price_data(96), target_hours=1.0)
+
+        assert windows
+        assert all(w['end_time'] - w['start_time'] == timedelta(hours=1) for w in windows)
+        # G12w off-peak distribution makes the night cheaper than the midday market valley
+        assert windows[0]['start_time'].hour < 6 or windows[0]['start_time'].hour >= 22
+
+    def test_window_longer_than_data(self, charger):
+        assert charger.analyze_charging_windows(create_price_data(4), target_hours=4.0) == []
+
+
+class TestFindBestChargingWindows:
+    """Multi-duration, non-overlapping window search"""
+
+    def test_multiple_durations_single_call(self, charger):
+        results = charger.find_best_charging_windows(create_price_data(), durations_hours=[1.0, 2.0, 4.0])
+
+        assert set(results) == {1.0, 2.0, 4.0}
+        for duration, windows in results.items():
+            assert windows
+            assert all(w['duration_minutes'] == int(duration * 60) for w in windows)
+            savings = [w['savings'] for w in windows]
+            assert savings == sorted(savings, reverse=True)
+
+    def test_windows_do_not_overlap(self, charger):
+        results = charger.find_best_charging_windows(create_price_data(), durations_hours=[2.0], max_price_threshold=700.0)
+
+        windows = sorted(results[2.0], key=lambda w: w['start_time'])
+        for earlier, later in zip(windows, windows[1:]):
+            assert earlier['end_time'] <= later['start_time']
+
+    def test_max_windows(self, charger):
+        results = charger.find_best_charging_windows(create_price_data(), durations_hours=[1.0], max_windows=2)
+
+        assert len(results[1.0]) == 2
+        first, second = sorted(results[1.0], key=lambda w: w['start_time'])
+        assert first['end_time'] <= second['start_time']
+
+    def test_best_window_matches_analyze(self, charger):
+        price_data = create_price_data()
+        best = charger.find_best_charging_windows(price_data, durations_hours=[4.0])[4.0][0]
+        assert best == charger.analyze_charging_windows(price_data, target_hours=4.0)[0]
+
+    def test_no_price_data(self, charger):
+        assert charger.find_best_charging_windows({}, durations_hours=[1.0]) == {1.0: []}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
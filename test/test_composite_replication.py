@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Tests for asynchronous replication from CompositeStorage to its secondaries
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.composite_storage import CompositeStorage
+from database.file_storage import FileStorage
+from database.replication import ReplicaWriter, write_range
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+
+DAY = datetime(2025, 10, 20, 12, 0)
+
+
+def reading(i: int):
+    return {'timestamp': DAY + timedelta(minutes=i), 'battery_soc': 50.0, 'pv_power': 1000.0 + i}
+
+
+class RecordingSecondary:
+    """Secondary that records writes, optionally slowly or while 'down'"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.down = False
+        self.energy = []
+        self.decisions = []
+
+    async def connect(self):
+        return True
+
+    async def disconnect(self):
+        pass
+
+    async def health_check(self):
+        return not self.down
+
+    async def save_energy_data(self, data):
+        await asyncio.sleep(self.delay)
+        if self.down:
+            raise OSError("secondary unavailable")
+        self.energy.extend(row['pv_power'] for row in data)
+        return True
+
+    async def save_decision(self, decision):
+        if self.down:
+            return False
+        self.decisions.append(decision)
+        return True
+
+    def __getattr__(self, name):
+        if name.startswith('save_'):
+            async def _save(*args):
+                return not self.down
+            return _save
+        raise AttributeError(name)
+
+
+def replication_config(**overrides):
+    options = dict(retry_delay=0.001, max_retries=2, replication_probe_interval=0.01,
+                   replication_drain_timeout=2.0)
+    options.update(overrides)
+    return StorageConfig(**options)
+
+
+@pytest.fixture
+async def primary(tmp_path):
+    storage = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'primary.db')))
+    yield storage
+    await storage.disconnect()
+
+
+class TestAsyncReplication:
+    """Primary-first writes and queued secondaries"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_write_returns_before_slow_secondary(self, primary):
+        slow = RecordingSecondary(delay=0.2)
+        composite = CompositeStorage(primary, [slow], replication_config())
+        assert await composite.connect()
+
+        started = time.perf_counter()
+        assert await composite.save_energy_data([reading(0)])
+        assert time.perf_counter() - started < 0.15
+        assert slow.energy == []
+
+        await composite.flush()
+        assert slow.energy == [1000.0]
+        stats = composite.get_replication_stats()['RecordingSecondary#0']
+        assert stats['replicated'] == 1
+        assert stats['pending'] == 0
+        assert stats['last_replication_lag_ms'] >= 200
+        await composite.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_disconnect_drains_queue(self, primary):
+        secondary = RecordingSecondary(delay=0.01)
+        composite = CompositeStorage(primary, [secondary], replication_config())
+        assert await composite.connect()
+        for i in range(5):
+            await composite.save_energy_data([reading(i)])
+
+        await composite.disconnect()
+        assert len(secondary.energy) == 5
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_failed_primary_falls_back_synchronously(self, primary):
+        secondary = RecordingSecondary()
+        composite = CompositeStorage(primary, [secondary], replication_config())
+        # Primary never connected, so its writes fail
+        assert await composite.save_decision({'timestamp': DAY, 'decision_type': 'charging'})
+        assert len(secondary.decisions) == 1
+
+
+class TestCatchUp:
+    """Missed ranges are replayed from the primary"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_secondary_catches_up_after_outage(self, primary):
+        secondary = RecordingSecondary()
+        composite = CompositeStorage(primary, [secondary], replication_config())
+        assert await composite.connect()
+        await composite.save_energy_data([reading(0)])
+        await composite.flush()
+
+        secondary.down = True
+        for i in range(1, 4):
+            await composite.save_energy_data([reading(i)])
+        await composite.flush()
+        stats = composite.get_replication_stats()['RecordingSecondary#0']
+        assert stats['healthy'] is False
+        assert set(stats['missed_ranges']) == {'save_energy_data'}
+
+        secondary.down = False
+        deadline = asyncio.get_running_loop().time() + 5
+        while composite.get_replication_stats()['RecordingSecondary#0']['missed_ranges']:
+            assert asyncio.get_running_loop().time() < deadline
+            await asyncio.sleep(0.01)
+        await composite.flush()
+
+        assert sorted(set(secondary.energy)) == [1000.0, 1001.0, 1002.0, 1003.0]
+        stats = composite.get_replication_stats()['RecordingSecondary#0']
+        assert stats['healthy'] is True
+        assert stats['catch_ups'] == 1
+        assert stats['replayed_rows'] == 3
+        await composite.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_catch_up_replays_only_tables_with_missed_writes(self, primary):
+        secondary = RecordingSecondary()
+        composite = CompositeStorage(primary, [secondary], replication_config())
+        assert await composite.connect()
+        await composite.save_energy_data([reading(0)])
+        await composite.flush()
+
+        secondary.down = True
+        await composite.save_decision({'timestamp': DAY, 'decision_type': 'charging'})
+        await composite.flush()
+        assert set(composite.get_replication_stats()['RecordingSecondary#0']['missed_ranges']) == {'save_decision'}
+
+        secondary.down = False
+        deadline = asyncio.get_running_loop().time() + 5
+        while composite.get_replication_stats()['RecordingSecondary#0']['missed_ranges']:
+            assert asyncio.get_running_loop().time() < deadline
+            await asyncio.sleep(0.01)
+        await composite.flush()
+
+        assert secondary.energy == [1000.0]  # energy was not replayed
+        assert len(secondary.decisions) == 1
+        assert composite.get_replication_stats()['RecordingSecondary#0']['replayed_rows'] == 1
+        await composite.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_file_secondary_catch_up_does_not_duplicate(self, primary, tmp_path):
+        files = FileStorage(StorageConfig())
+        files.base_dir = str(tmp_path)
+        files.energy_data_dir = str(tmp_path / 'energy_data')
+        composite = CompositeStorage(primary, [files], replication_config())
+        assert await composite.connect()
+        await composite.save_energy_data([reading(0), reading(1)])
+        await composite.flush()
+
+        # Replaying a range the file secondary already holds (plus one new row)
+        await primary.save_energy_data([reading(2)])
+        assert await composite.replay_secondaries(DAY, DAY + timedelta(hours=1)) == {'FileStorage#0': 3}
+
+        stored = await files.get_energy_data(DAY, DAY + timedelta(hours=1))
+        assert [row['pv_power'] for row in stored] == [1000.0, 1001.0, 1002.0]
+        await composite.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_sqlite_secondary_replay_does_not_duplicate_unkeyed_rows(self, primary, tmp_path):
+        secondary = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'secondary.db')))
+        composite = CompositeStorage(primary, [secondary], replication_config())
+        assert await composite.connect()
+        await composite.save_system_state({'timestamp': DAY, 'state': 'monitoring'})
+        await composite.save_decision({'timestamp': DAY, 'action': 'wait', 'reason': 'price'})
+        await composite.flush()
+
+        # One new row per table on the primary only, then replay everything
+        await primary.save_system_state({'timestamp': DAY + timedelta(minutes=5), 'state': 'charging'})
+        await primary.save_decision({'timestamp': DAY + timedelta(minutes=5), 'action': 'charge', 'reason': 'price'})
+        await composite.replay_secondaries(DAY, DAY + timedelta(hours=1))
+        await composite.replay_secondaries(DAY, DAY + timedelta(hours=1))
+
+        assert len(await secondary.get_system_state_range(DAY, DAY + timedelta(hours=1))) == 2
+        assert len(await secondary.get_decisions(DAY, DAY + timedelta(hours=1))) == 2
+        await composite.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_manual_replay(self, primary):
+        assert await primary.connect()
+        await primary.save_energy_data([reading(i) for i in range(3)])
+        secondary = RecordingSecondary()
+        composite = CompositeStorage(primary, [secondary], replication_config())
+
+        assert await composite.replay_secondaries(DAY, DAY + timedelta(hours=1)) == {'RecordingSecondary#0': 3}
+        assert secondary.energy == [1000.0, 1001.0, 1002.0]
+
+
+class TestOverflow:
+    """Backpressure policies of the bounded queue"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_drop_oldest_records_missed_range(self, primary):
+        writer = ReplicaWriter('slow', RecordingSecondary(delay=0.05), primary, queue_size=2)
+        for i in range(5):
+            await writer.submit('save_energy_data', ([reading(i)],))
+
+        # The worker has not run yet, so the three oldest writes were dropped
+        stats = writer.get_stats()
+        assert stats['dropped'] == 3
+        assert stats['pending'] == 2
+        assert stats['missed_ranges'] == {
+            'save_energy_data': [DAY.isoformat(), (DAY + timedelta(minutes=2)).isoformat()]
+        }
+        assert stats['lag_seconds'] >= 0
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_block_waits_for_space(self, primary):
+        secondary = RecordingSecondary(delay=0.02)
+        writer = ReplicaWriter('blocking', secondary, primary, queue_size=1, overflow='block')
+        for i in range(4):
+            await writer.submit('save_energy_data', ([reading(i)],))
+        await writer.join()
+
+        assert secondary.energy == [1000.0, 1001.0, 1002.0, 1003.0]
+        assert writer.get_stats()['blocked'] >= 1
+        assert writer.get_stats()['dropped'] == 0
+        await writer.stop()
+
+    def test_unknown_policy_is_rejected(self, primary):
+        with pytest.raises(ValueError):
+            ReplicaWriter('bad', RecordingSecondary(), primary, overflow='spill')
+
+    def test_write_range_uses_row_timestamps(self):
+        start, end = write_range(([reading(5), reading(1)],))
+        assert (start, end) == (DAY + timedelta(minutes=1), DAY + timedelta(minutes=5))
+        start, end = write_range(({'start_time': DAY.isoformat()},))
+        assert start == end == DAY
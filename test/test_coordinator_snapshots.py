@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Tests for typed coordinator snapshots replacing current_data blobs in system_state
+"""
+
+import json
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from backtest import SimulatedClock, patched_clock
+from database.coordinator_snapshots import (
+    SNAPSHOT_COLUMNS, current_data_from_snapshot, snapshot_changed, snapshot_from_current_data
+)
+from database.schema import ALL_TABLES, CREATE_COORDINATOR_SNAPSHOTS_TABLE, MIGRATIONS
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+from master_coordinator import MasterCoordinator, SystemState
+
+NOON = datetime(2025, 10, 20, 12, 0)
+
+CURRENT_DATA = {
+    'battery': {'soc_percent': 64.5, 'power_w': -1200, 'temperature': 24.1, 'charging_status': True,
+                'voltage': 400.0},
+    'photovoltaic': {'current_power_w': 4200, 'daily_production_kwh': 12.3, 'efficiency_percent': 81.0},
+    'house_consumption': {'current_power_w': 900, 'daily_total_kwh': 6.4},
+    'grid': {'power_w': 2100, 'flow_direction': 'export', 'today_imported_kwh': 1.1,
+             'today_exported_kwh': 3.2, 'l1_current_a': 3.0, 'l2_current_a': 'Unknown', 'l3_current_a': 2.5},
+    'weather': {'forecast': [{'hour': h, 'cloud_cover': 50} for h in range(24)]}
+}
+
+
+class TestSnapshotMapping:
+    """current_data <-> typed snapshot row"""
+
+    def test_extracts_typed_fields(self):
+        snapshot = snapshot_from_current_data(CURRENT_DATA, 'monitoring', NOON)
+
+        assert set(snapshot) == set(SNAPSHOT_COLUMNS)
+        assert snapshot['timestamp'] == NOON.isoformat()
+        assert snapshot['battery_soc'] == 64.5
+        assert snapshot['battery_charging'] == 1
+        assert snapshot['pv_power_w'] == 4200
+        assert snapshot['grid_flow_direction'] == 'export'
+        # Placeholder strings are stored as NULL
+        assert snapshot['grid_l2_current_a'] is None
+
+    def test_falls_back_to_scaled_and_alias_sources(self):
+        snapshot = snapshot_from_current_data({
+            'photovoltaic': {'current_power_w': 'Unknown', 'current_power_kw': 1.25, 'daily_generation_kwh': 4.0},
+            'house_consumption': {'daily_consumption_kwh': 2.0}
+        })
+
+        assert snapshot['pv_power_w'] == 1250
+        assert snapshot['pv_daily_kwh'] == 4.0
+        assert snapshot['house_daily_kwh'] == 2.0
+
+    def test_round_trip_has_the_keys_readers_use(self):
+        data = current_data_from_snapshot(snapshot_from_current_data(CURRENT_DATA, 'monitoring', NOON))
+
+        assert data['battery']['soc_percent'] == 64.5
+        assert data['battery']['charging_status'] is True
+        assert data['photovoltaic']['current_power_kw'] == 4.2
+        # Dashboard and PV forecaster read different aliases of the same value
+        assert data['photovoltaic']['daily_production_kwh'] == data['photovoltaic']['daily_generation_kwh'] == 12.3
+        assert data['house_consumption']['daily_consumption_kwh'] == 6.4
+        assert data['grid']['today_exported_kwh'] == 3.2
+        assert 'l2_current_a' not in data['grid']
+        assert current_data_from_snapshot(None) == {}
+
+    def test_change_detection_compares_state_only(self):
+        first = snapshot_from_current_data(CURRENT_DATA, 'monitoring', NOON)
+        later = snapshot_from_current_data(CURRENT_DATA, 'monitoring', NOON + timedelta(minutes=1))
+        readings = snapshot_from_current_data(
+            {**CURRENT_DATA, 'battery': {**CURRENT_DATA['battery'], 'soc_percent': 65.0, 'power_w': -800}}, 'monitoring'
+        )
+        stopped = snapshot_from_current_data(
+            {**CURRENT_DATA, 'battery': {**CURRENT_DATA['battery'], 'charging_status': False}}, 'monitoring'
+        )
+
+        assert snapshot_changed(None, first)
+        assert not snapshot_changed(first, later)
+        assert not snapshot_changed(first, readings)
+        assert snapshot_changed(first, stopped)
+        assert snapshot_changed(first, snapshot_from_current_data(CURRENT_DATA, 'charging'))
+
+
+class TestSnapshotStorage:
+    """coordinator_snapshots table, migration and storage API"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_save_and_query(self, tmp_path):
+        storage = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'snap.db')))
+        assert await storage.connect()
+
+        for minute in range(3):
+            when = NOON + timedelta(minutes=minute)
+            assert await storage.save_coordinator_snapshot(snapshot_from_current_data(CURRENT_DATA, 'monitoring', when))
+
+        rows = await storage.get_coordinator_snapshots(NOON, NOON + timedelta(minutes=1))
+        latest = await storage.get_latest_coordinator_snapshot()
+        stats = await storage.get_database_stats()
+
+        assert len(rows) == 2
+        assert latest['timestamp'] == (NOON + timedelta(minutes=2)).isoformat()
+        assert stats['coordinator_snapshots_count'] == 3
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_migration_backfills_and_compacts(self, tmp_path):
+        db_path = str(tmp_path / 'legacy.db')
+        # A version 4 database with full current_data blobs in system_state
+        conn = sqlite3.connect(db_path)
+        for table_sql in ALL_TABLES:
+            if table_sql is not CREATE_COORDINATOR_SNAPSHOTS_TABLE:
+                conn.execute(table_sql)
+        for version, description, statements in MIGRATIONS:
+            if version <= 4:
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+        legacy_rows = [
+            (NOON.isoformat(), 'monitoring', {'uptime_seconds': 60, 'current_data': CURRENT_DATA}),
+            ((NOON + timedelta(minutes=1)).isoformat(), 'charging',
+             {'current_data': {'battery': {'soc_percent': 'Unknown'}, 'photovoltaic': {'current_power_kw': 0.5}}}),
+            ((NOON + timedelta(minutes=2)).isoformat(), 'monitoring', {'uptime_seconds': 180}),
+        ]
+        for ts, state, metrics in legacy_rows:
+            conn.execute("INSERT INTO system_state (timestamp, state, metrics) VALUES (?, ?, ?)",
+                         (ts, state, json.dumps(metrics)))
+        conn.commit()
+        conn.close()
+
+        storage = SQLiteStorage(StorageConfig(db_path=db_path))
+        assert await storage.connect()
+
+        snapshots = await storage.get_coordinator_snapshots(NOON - timedelta(hours=1), NOON + timedelta(hours=1))
+        states = await storage.get_system_state_range(NOON - timedelta(hours=1), NOON + timedelta(hours=1))
+        await storage.disconnect()
+
+        # SQL backfill matches the Python mapping exactly
+        assert len(snapshots) == 2
+        expected = snapshot_from_current_data(CURRENT_DATA, 'monitoring', NOON)
+        assert {column: snapshots[0][column] for column in SNAPSHOT_COLUMNS} == expected
+        assert snapshots[1]['battery_soc'] is None
+        assert snapshots[1]['pv_power_w'] == 500
+        # Blobs are gone from system_state, other metrics stay
+        assert all('current_data' not in state['metrics'] for state in states)
+        assert states[0]['metrics']['uptime_seconds'] == 60
+
+
+class TestCoordinatorSnapshotCadence:
+    """MasterCoordinator writes snapshots on change or at the configured cadence"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_written_on_change_or_interval(self):
+        coordinator = MasterCoordinator()
+        coordinator.config['coordinator']['snapshot_interval_seconds'] = 300
+        coordinator.storage = AsyncMock()
+        coordinator.storage.save_coordinator_snapshot.return_value = True
+        coordinator.state = SystemState.MONITORING
+        coordinator.current_data = json.loads(json.dumps(CURRENT_DATA))
+
+        clock = SimulatedClock(NOON)
+        with patched_clock(clock, ['master_coordinator']):
+            for _ in range(4):  # Unchanged readings for 4 minutes
+                await coordinator._save_system_state()
+                clock.advance(timedelta(minutes=1))
+            coordinator.current_data['battery']['soc_percent'] = 70.0  # Readings alone do not count
+            await coordinator._save_system_state()
+            coordinator.state = SystemState.CHARGING
+            await coordinator._save_system_state()
+            clock.advance(timedelta(minutes=5))
+            await coordinator._save_system_state()
+
+        saved = [c.args[0] for c in coordinator.storage.save_coordinator_snapshot.await_args_list]
+        assert [s['timestamp'] for s in saved] == [
+            NOON.isoformat(), (NOON + timedelta(minutes=4)).isoformat(), (NOON + timedelta(minutes=9)).isoformat()
+        ]
+        # system_state keeps its per-minute heartbeat without the blob
+        states = [c.args[0] for c in coordinator.storage.save_system_state.await_args_list]
+        assert len(states) == 7
+        assert all('current_data' not in state for state in states)
+
+    @pytest.mark.asyncio
+    async def test_snapshot_written_when_decision_changes(self):
+        coordinator = MasterCoordinator()
+        coordinator.storage = AsyncMock()
+        coordinator.storage.save_coordinator_snapshot.return_value = True
+        coordinator.state = SystemState.MONITORING
+        coordinator.current_data = json.loads(json.dumps(CURRENT_DATA))
+        coordinator.charging_controller = Mock(is_charging=False)
+        coordinator.charging_controller.fetch_price_data_for_date = AsyncMock(return_value={'value': []})
+        coordinator._check_d1_night_charging = AsyncMock()
+        coordinator._execute_smart_decision = AsyncMock()
+        coordinator._save_decision_to_file = AsyncMock()
+        decisions = iter([
+            {'should_charge': False, 'priority': 'low', 'reason': 'wait'},
+            {'should_charge': False, 'priority': 'low', 'reason': 'still waiting'},
+            {'should_charge': True, 'priority': 'high', 'reason': 'cheap'},
+        ])
+        coordinator.charging_controller.make_smart_charging_decision = lambda **kwargs: next(decisions)
+
+        clock = SimulatedClock(NOON)
+        with patched_clock(clock, ['master_coordinator']):
+            for _ in range(3):
+                await coordinator._make_charging_decision()
+                clock.advance(timedelta(minutes=1))
+
+        saved = [c.args[0] for c in coordinator.storage.save_coordinator_snapshot.await_args_list]
+        assert [s['timestamp'] for s in saved] == [NOON.isoformat(), (NOON + timedelta(minutes=2)).isoformat()]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked, per-table data retention in SQLiteStorage
+"""
+
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+from database.storage_factory import StorageFactory
+from database.retention import retention_periods
+
+
+def energy_rows(start: datetime, count: int):
+    return [
+        {'timestamp': start + timedelta(minutes=i), 'battery_soc': 50.0, 'pv_power': 1000.0 + i}
+        for i in range(count)
+    ]
+
+
+def pragma(db_path: str, name: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'retention.db')
+
+
+def retention_storage(db_path, **overrides):
+    options = dict(db_path=db_path, retention_days=7, retention_chunk_rows=100,
+                   retention_chunk_pause=0.0)
+    options.update(overrides)
+    return SQLiteStorage(StorageConfig(**options))
+
+
+class TestRetentionPeriods:
+    """Default days and per-table overrides"""
+
+    def test_overrides_and_keep_forever(self):
+        periods = retention_periods(30, {'coordinator_decisions': 0, 'energy_data': 90, 'unknown': 5})
+        assert periods['energy_data'] == 90
+        assert periods['system_state'] == 30
+        assert 'coordinator_decisions' not in periods
+        assert 'unknown' not in periods
+
+    def test_zero_default_keeps_everything_not_overridden(self):
+        assert retention_periods(0, {'weather_data': 3}) == {'weather_data': 3}
+
+
+class TestChunkedRetention:
+    """Chunked deletes, progress reporting and incremental vacuum"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(30)
+    async def test_deletes_in_chunks_and_reports_progress(self, db_path):
+        storage = retention_storage(db_path)
+        assert await storage.connect()
+        now = datetime.now()
+        assert await storage.save_energy_data(energy_rows(now - timedelta(days=20), 450))
+        assert await storage.save_energy_data(energy_rows(now - timedelta(days=1), 10))
+
+        progress = []
+        results = await storage.purge_old_data(on_progress=lambda table, rows: progress.append((table, rows)))
+
+        assert results == {'energy_data': 450}
+        assert progress == [('energy_data', 100), ('energy_data', 200), ('energy_data', 300),
+                            ('energy_data', 400), ('energy_data', 450)]
+        remaining = await storage.get_energy_data(now - timedelta(days=30), now)
+        assert len(remaining) == 10
+
+        stats = storage.get_retention_stats()
+        assert stats['running'] is False
+        assert stats['chunks'] == 5
+        assert stats['rows_deleted'] == 450
+        assert stats['last_results'] == {'energy_data': 450}
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(30)
+    async def test_per_table_retention(self, db_path):
+        storage = retention_storage(
+            db_path, retention_days=30,
+            table_retention_days={'coordinator_decisions': 0, 'energy_data': 90}
+        )
+        assert await storage.connect()
+        old = datetime.now() - timedelta(days=60)
+        await storage.save_energy_data(energy_rows(old, 3))
+        await storage.save_system_state({'timestamp': old, 'state': 'old', 'uptime': 1})
+        await storage.save_decision({'timestamp': old, 'decision_type': 'charging', 'action': 'charge'})
+
+        results = await storage.cleanup_old_data(30)
+
+        assert results == {'system_state': 1}
+        assert len(await storage.get_decisions(old - timedelta(days=1), datetime.now())) == 1
+        assert len(await storage.get_energy_data(old - timedelta(days=1), datetime.now())) == 3
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(30)
+    async def test_new_database_uses_incremental_vacuum(self, db_path):
+        storage = retention_storage(db_path, retention_chunk_rows=500)
+        assert await storage.connect()
+        assert storage.get_retention_stats()['incremental_vacuum'] is True
+        await storage.save_energy_data(energy_rows(datetime.now() - timedelta(days=20), 5000))
+        pages_before = pragma(db_path, 'page_count')
+
+        assert (await storage.purge_old_data())['energy_data'] == 5000
+
+        assert pragma(db_path, 'auto_vacuum') == 2
+        assert storage.get_retention_stats()['pages_freed'] > 0
+        assert pragma(db_path, 'page_count') < pages_before
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(30)
+    async def test_optimize_database_converts_legacy_database(self, db_path):
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE legacy (id INTEGER)")
+        assert pragma(db_path, 'auto_vacuum') == 0
+
+        storage = retention_storage(db_path)
+        assert await storage.connect()
+        assert storage.get_retention_stats()['incremental_vacuum'] is False
+        assert (await storage.optimize_database())['success']
+        assert storage.get_retention_stats()['incremental_vacuum'] is True
+        await storage.disconnect()
+        assert pragma(db_path, 'auto_vacuum') == 2
+
+
+class TestBackgroundRetention:
+    """The enable_auto_cleanup task"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_background_task_purges_and_stops_on_disconnect(self, db_path, monkeypatch):
+        monkeypatch.setattr(SQLiteStorage, 'RETENTION_START_DELAY', 0.01)
+        writer = retention_storage(db_path)
+        assert await writer.connect()
+        await writer.save_energy_data(energy_rows(datetime.now() - timedelta(days=20), 5))
+        await writer.disconnect()
+
+        storage = retention_storage(db_path, enable_auto_cleanup=True)
+        assert await storage.connect()
+
+        deadline = asyncio.get_running_loop().time() + 5
+        while storage.get_retention_stats()['runs'] == 0:
+            assert asyncio.get_running_loop().time() < deadline
+            await asyncio.sleep(0.01)
+
+        assert storage.get_retention_stats()['last_results'] == {'energy_data': 5}
+        assert 'retention' in await storage.get_database_stats()
+        await storage.disconnect()
+        assert storage._retention_task is None
+
+    def test_factory_reads_retention_config(self, db_path):
+        storage = StorageFactory.create_storage({
+            'database_storage': {
+                'enabled': True,
+                'sqlite': {
+                    'path': db_path,
+                    'retention': {
+                        'enabled': True,
+                        'default_days': 60,
+                        'tables': {'coordinator_decisions': 0},
+                        'chunk_rows': 250
+                    }
+                }
+            }
+        })
+        stats = storage.get_retention_stats()
+        assert stats['auto_cleanup'] is True
+        assert stats['periods']['energy_data'] == 60
+        assert 'coordinator_decisions' not in stats['periods']
+        assert storage.config.retention_chunk_rows == 250
@@ -570,7 +570,6 @@ class TestConnectionManager:
     @pytest.mark.asyncio
     @pytest.mark.timeout(10)
     @pytest.mark.timeout(5)
-    @pytest.mark.skip(reason="ConnectionManager tests hang - needs refactoring")
     async def test_connection_manager_lifecycle(self, temp_db):
         """Test connection manager initialization and shutdown"""
         manager = ConnectionManager(temp_db, max_connections=5, min_connections=2)
@@ -594,7 +593,6 @@ class TestConnectionManager:
     @pytest.mark.asyncio
     @pytest.mark.timeout(10)
     @pytest.mark.timeout(5)
-    @pytest.mark.skip(reason="ConnectionManager tests hang - needs refactoring")
     async def test_connection_pooling(self, temp_db):
         """Test connection pooling functionality"""
         manager = ConnectionManager(temp_db, max_connections=3, min_connections=1)
@@ -623,7 +621,6 @@ class TestConnectionManager:
     @pytest.mark.asyncio
     @pytest.mark.timeout(10)
     @pytest.mark.timeout(5)
-    @pytest.mark.skip(reason="ConnectionManager tests hang - needs refactoring")
     async def test_connection_manager_without_initialization(self, temp_db):
         """Test connection manager operations without initialization"""
         manager = ConnectionManager(temp_db)
@@ -655,8 +652,6 @@ class TestIntegration:
     
     @pytest.mark.asyncio
     @pytest.mark.timeout(10)
-    @pytest.mark.skip(reason="ConnectionManager in workflow causes hanging - needs refactoring")
-    @pytest.mark.skip(reason="Skipped to prevent hanging; optimize integration logic before re-enabling.")
     async def test_complete_workflow(self, temp_db):
         """Test complete database workflow"""
         # Create schema
@@ -915,7 +910,7 @@ class TestMigrations:
         
         expected_tables = [
             'schema_version',
-            'energy_data',
+            'energy_readings',
             'system_state',
             'coordinator_decisions',
             'charging_sessions',
@@ -934,6 +929,12 @@ class TestMigrations:
         for table in expected_tables:
             assert table in existing_tables, f"Table {table} not created"
         
+        # energy_data is a read-only view over energy_readings since v7
+        async with storage._connection.execute(
+            "SELECT type FROM sqlite_master WHERE name = 'energy_data'"
+        ) as cursor:
+            assert (await cursor.fetchone())[0] == 'view'
+        
         await storage.disconnect()
 
 
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
@@ -33,6 +34,7 @@ def charger(base_config):
                 charger = AutomatedPriceCharger(base_config)
                 charger.is_charging = False
                 charger.calculate_final_price = MagicMock(side_effect=lambda price, dt: price)
+                charger.calculate_final_prices_batch = MagicMock(side_effect=lambda prices, dts: np.asarray(prices, dtype=float))
                 return charger
 
 def test_e2e_critical_price_drop_transition(charger):
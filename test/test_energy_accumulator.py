@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming time-weighted energy accumulator
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+import pytz
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from energy_accumulator import EnergyAccumulator, split_trapezoid
+from enhanced_data_collector import EnhancedDataCollector
+from sample_buffer import Sample
+
+WARSAW = pytz.timezone('Europe/Warsaw')
+
+
+def at(*args) -> float:
+    """Epoch seconds of a Warsaw wall-clock time"""
+    return WARSAW.localize(datetime(*args)).timestamp()
+
+
+class TestIntegration:
+    """Trapezoidal integration over real timestamps"""
+
+    def test_split_trapezoid(self):
+        assert split_trapezoid(1000, 3000, 3600) == (2.0, 0.0)
+        assert split_trapezoid(-2000, -2000, 1800) == (0.0, 1.0)
+        # Ramp through zero: one triangle on each side
+        assert split_trapezoid(1000, -1000, 3600) == pytest.approx((0.25, 0.25))
+        assert split_trapezoid(-1000, 3000, 3600) == pytest.approx((1.125, 0.125))
+
+    def test_irregular_intervals(self):
+        acc = EnergyAccumulator()
+        start = at(2025, 10, 20, 12, 0)
+        for offset, pv in ((0, 0), (5, 1000), (25, 1000), (85, 4000)):
+            acc.add(Sample(start + offset, pv_power_w=pv, house_consumption_w=3600))
+
+        today = acc.today()
+        assert today['house_kwh'] == pytest.approx(3600 * 85 / 3_600_000)
+        assert today['pv_kwh'] == pytest.approx((500 * 5 + 1000 * 20 + 2500 * 60) / 3_600_000)
+        assert today['covered_seconds'] == 85
+        assert today['sample_count'] == 4
+        assert today['peak_pv_w'] == 4000
+
+    def test_grid_and_battery_sign_conventions(self):
+        acc = EnergyAccumulator()
+        start = at(2025, 10, 20, 12, 0)
+        # Grid < 0 import, > 0 export; battery < 0 charge, > 0 discharge
+        acc.add(Sample(start, grid_power_w=-3600, battery_power_w=-1800, battery_soc=40))
+        acc.add(Sample(start + 60, grid_power_w=-3600, battery_power_w=-1800, battery_soc=41))
+        acc.add(Sample(start + 120, grid_power_w=3600, battery_power_w=1800, battery_soc=41))
+
+        today = acc.today()
+        assert today['grid_import_kwh'] == pytest.approx(0.06 + 0.015)
+        assert today['grid_export_kwh'] == pytest.approx(0.015)
+        assert today['battery_charge_kwh'] == pytest.approx(0.03 + 0.0075)
+        assert today['battery_discharge_kwh'] == pytest.approx(0.0075)
+        assert (today['min_soc'], today['max_soc']) == (40, 41)
+        assert (today['peak_import_w'], today['peak_export_w']) == (3600, 3600)
+
+    def test_gaps_and_out_of_order_samples(self):
+        acc = EnergyAccumulator()
+        start = at(2025, 10, 20, 12, 0)
+        acc.add(Sample(start, house_consumption_w=1000))
+        acc.add(Sample(start + 3600, house_consumption_w=1000))  # Outage: not integrated
+        assert not acc.add(Sample(start + 1800, house_consumption_w=1000))
+        acc.add(Sample(start + 3636, house_consumption_w=1000))
+
+        assert acc.today()['house_kwh'] == pytest.approx(0.01)
+        assert acc.today()['covered_seconds'] == 36
+        assert acc.dropped_out_of_order == 1
+
+
+class TestDayRollover:
+    """Local midnight ends a day"""
+
+    def test_interval_across_midnight_is_split(self):
+        acc = EnergyAccumulator()
+        acc.add(Sample(at(2025, 10, 20, 23, 59, 50), house_consumption_w=3600))
+        acc.add(Sample(at(2025, 10, 21, 0, 0, 10), house_consumption_w=3600))
+
+        days = acc.daily_totals()
+        assert list(days) == ['2025-10-20', '2025-10-21']
+        assert days['2025-10-20']['house_kwh'] == pytest.approx(0.01)
+        assert days['2025-10-21']['house_kwh'] == pytest.approx(0.01)
+        assert acc.day == '2025-10-21'
+
+    def test_dst_day_has_25_hours(self):
+        acc = EnergyAccumulator()
+        start = at(2025, 10, 26, 0, 0)
+        for quarter in range(25 * 4 + 1):
+            acc.add(Sample(start + quarter * 900, house_consumption_w=1000))
+
+        assert acc.days['2025-10-26']['covered_seconds'] == 25 * 3600
+        assert acc.days['2025-10-26']['house_kwh'] == pytest.approx(25.0)
+        assert acc.day == '2025-10-27'
+
+    def test_retention_drops_old_days(self):
+        acc = EnergyAccumulator(retention_days=2)
+        for day in range(5):
+            acc.add(Sample(at(2025, 10, 20 + day, 12, 0), pv_power_w=100))
+
+        assert sorted(acc.days) == ['2025-10-22', '2025-10-23']
+
+
+class TestPersistence:
+    """State survives a restart"""
+
+    def test_restart_continues_the_day(self, tmp_path):
+        state_file = tmp_path / 'energy.json'
+        start = at(2025, 10, 20, 12, 0)
+        acc = EnergyAccumulator(state_file)
+        acc.add(Sample(at(2025, 10, 19, 23, 59, 50), pv_power_w=0))
+        acc.add(Sample(start, pv_power_w=1800))
+        acc.add(Sample(start + 60, pv_power_w=1800))
+        assert acc.save()
+
+        restarted = EnergyAccumulator(state_file)
+        restarted.add(Sample(start + 120, pv_power_w=1800))
+
+        assert restarted.day == '2025-10-20'
+        assert restarted.today()['pv_kwh'] == pytest.approx(0.06)
+        assert restarted.today()['sample_count'] == 3
+        assert '2025-10-19' in restarted.days
+
+    def test_unreadable_state_starts_fresh(self, tmp_path):
+        state_file = tmp_path / 'energy.json'
+        state_file.write_text('{not json')
+
+        acc = EnergyAccumulator(state_file)
+
+        assert acc.daily_totals() == {}
+        assert acc.today()['sample_count'] == 0
+
+
+def make_collector(tmp_path) -> EnhancedDataCollector:
+    return EnhancedDataCollector({'data_storage': {'database_storage': {
+        'enabled': True, 'sqlite': {'path': str(tmp_path / 'collector.db')}}}})
+
+
+class TestCollectorEnergy:
+    """EnhancedDataCollector on the accumulator"""
+
+    def test_daily_stats_from_collected_data(self, tmp_path):
+        collector = make_collector(tmp_path)
+        noon = datetime(2025, 10, 20, 12, 0)
+        for seconds in (0, 20, 40):
+            collector.energy.add_data({
+                'timestamp': (noon + timedelta(seconds=seconds)).isoformat(),
+                'photovoltaic': {'current_power_w': 3600},
+                'house_consumption': {'current_power_w': 'Unknown'},
+                'grid': {'power_w': 1800},
+            })
+
+        stats = collector.daily_stats
+        assert stats['pv_production']['total_kwh'] == pytest.approx(0.04)
+        assert stats['grid']['total_export_kwh'] == pytest.approx(0.02)
+        assert stats['house_consumption']['total_kwh'] == 0.0
+        assert collector._get_daily_pv_production() == 0.04
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_live_day_replaces_less_covered_rollup(self, tmp_path):
+        collector = make_collector(tmp_path)
+        # Warsaw days, as the rollups of a system running in Europe/Warsaw
+        today = datetime.combine(datetime.now(WARSAW).date(), datetime.min.time())
+        collector.storage = AsyncMock()
+        collector.storage.get_energy_rollups.return_value = [
+            {'bucket_start': (today - timedelta(days=1)).isoformat(), 'sample_count': 288,
+             'house_kwh': 12.0, 'covered_seconds': 86400},
+            {'bucket_start': today.isoformat(), 'sample_count': 2, 'house_kwh': 0.5, 'covered_seconds': 300},
+        ]
+        midnight = WARSAW.localize(today).timestamp()
+        for minute in range(0, 61):
+            collector.energy.add(Sample(midnight + 60 * minute, house_consumption_w=2000))
+
+        result = await collector.get_average_daily_consumption(days=7)
+
+        assert result['available']
+        assert result['days_with_data'] == 2
+        assert result['avg_daily_kwh'] == 7.0
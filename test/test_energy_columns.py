@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar get_energy_columns API
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.columnar import columns_from_records
+from database.composite_storage import CompositeStorage
+from database.epoch import to_epoch_ms
+from database.file_storage import FileStorage
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+
+DAY = datetime(2025, 10, 20)
+COLUMNS = ('battery_soc', 'pv_power', 'house_consumption')
+
+
+def readings(count: int, start: datetime = DAY):
+    return [
+        {'timestamp': start + timedelta(minutes=10 * i), 'battery_soc': 40.0 + i,
+         'pv_power': 1000 + i, 'house_consumption': None if i % 3 == 0 else 500.0}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+async def sqlite(tmp_path):
+    storage = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'columns.db')))
+    assert await storage.connect()
+    yield storage
+    await storage.disconnect()
+
+
+@pytest.fixture
+async def files(tmp_path):
+    storage = FileStorage(StorageConfig())
+    storage.base_dir = str(tmp_path)
+    storage.energy_data_dir = str(tmp_path / 'energy_data')
+    assert await storage.connect()
+    yield storage
+    await storage.disconnect()
+
+
+class TestEnergyColumns:
+    """Contiguous arrays straight from the storage backends"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_sqlite_returns_contiguous_arrays(self, sqlite):
+        # Saved out of order across midnight
+        rows = readings(200, DAY + timedelta(hours=20))
+        await sqlite.save_energy_data(rows[100:] + rows[:100])
+
+        result = await sqlite.get_energy_columns(DAY, DAY + timedelta(days=3), COLUMNS)
+
+        assert list(result) == ['ts_ms', *COLUMNS]
+        assert result['ts_ms'].dtype == np.int64
+        assert np.all(np.diff(result['ts_ms']) > 0)
+        assert result['ts_ms'][0] == to_epoch_ms(rows[0]['timestamp'])
+        for column in COLUMNS:
+            assert result[column].dtype == np.float64
+            assert result[column].flags['C_CONTIGUOUS']
+            assert len(result[column]) == 200
+        assert result['pv_power'][5] == 1005.0
+        assert np.isnan(result['house_consumption'][0])
+        assert result['house_consumption'][1] == 500.0
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_backends_agree_with_row_api(self, sqlite, files):
+        rows = readings(300)
+        await sqlite.save_energy_data(rows)
+        await files.save_energy_data(rows)
+        start, end = DAY + timedelta(hours=3), DAY + timedelta(hours=30)
+
+        expected = columns_from_records(await sqlite.get_energy_data(start, end), COLUMNS)
+        for storage in (sqlite, files):
+            result = await storage.get_energy_columns(start, end, COLUMNS)
+            for column in ('ts_ms',) + COLUMNS:
+                np.testing.assert_array_equal(result[column], expected[column])
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_empty_range_and_unknown_columns(self, sqlite, files):
+        for storage in (sqlite, files):
+            result = await storage.get_energy_columns(DAY, DAY + timedelta(hours=1), ['pv_power'])
+            assert len(result['ts_ms']) == 0
+            assert result['pv_power'].dtype == np.float64
+            with pytest.raises(ValueError):
+                await storage.get_energy_columns(DAY, DAY + timedelta(hours=1), ['pv_power; DROP TABLE x'])
+            with pytest.raises(ValueError):
+                await storage.get_energy_columns(DAY, DAY + timedelta(hours=1), ['tariff_zone'])
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_composite_falls_back_to_secondary(self, sqlite, files):
+        await files.save_energy_data(readings(6))
+        composite = CompositeStorage(sqlite, [files], StorageConfig())
+
+        result = await composite.get_energy_columns(DAY, DAY + timedelta(days=1), ['battery_soc'])
+
+        assert result['battery_soc'].tolist() == [40.0, 41.0, 42.0, 43.0, 44.0, 45.0]
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the epoch-keyed WITHOUT ROWID energy_readings layout (schema v7)
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.epoch import from_epoch_ms, to_epoch_ms
+from database.schema import ALL_TABLES, CREATE_ENERGY_READINGS_TABLE, MIGRATIONS
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+
+NOON = datetime(2025, 10, 20, 12, 0)
+
+
+@pytest.fixture
+async def storage(tmp_path):
+    storage = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'readings.db')))
+    assert await storage.connect()
+    yield storage
+    await storage.disconnect()
+
+
+class TestEpochKeys:
+    """Conversions between timestamps and epoch milliseconds"""
+
+    def test_round_trip_keeps_milliseconds(self):
+        ts = NOON.replace(microsecond=250000)
+        assert from_epoch_ms(to_epoch_ms(ts)) == ts
+        assert to_epoch_ms(ts.isoformat()) == to_epoch_ms(ts)
+
+    def test_aware_timestamps_use_their_offset(self):
+        utc = datetime(2025, 10, 20, 10, 0, tzinfo=timezone.utc)
+        assert to_epoch_ms('2025-10-20T12:00:00+02:00') == to_epoch_ms(utc)
+        assert to_epoch_ms('not a timestamp') is None
+
+
+class TestEnergyReadingsStorage:
+    """energy_data API on top of energy_readings"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_api_returns_iso_timestamps_in_time_order(self, storage):
+        local = datetime(2025, 10, 20, 10, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        await storage.save_energy_data([
+            {'timestamp': local + timedelta(minutes=30), 'battery_soc': 51.0},
+            {'timestamp': '2025-10-20T10:00:00+00:00', 'battery_soc': 50.0},  # same instant as `local`
+            {'timestamp': local + timedelta(minutes=45, milliseconds=500), 'battery_soc': 52.0, 'tariff_zone': 'T2'},
+        ])
+
+        rows = await storage.get_energy_data(local - timedelta(hours=1), local + timedelta(hours=1))
+
+        assert [row['timestamp'] for row in rows] == [
+            local.isoformat(), (local + timedelta(minutes=30)).isoformat(),
+            (local + timedelta(minutes=45, milliseconds=500)).isoformat()
+        ]
+        assert [row['battery_soc'] for row in rows] == [50.0, 51.0, 52.0]
+        assert rows[2]['tariff_zone'] == 'T2'
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_table_layout_and_compatibility_view(self, storage):
+        await storage.save_energy_data([{'timestamp': NOON, 'pv_power': 1500}])
+
+        async with storage._connection.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'energy_readings'"
+        ) as cursor:
+            assert 'WITHOUT ROWID' in (await cursor.fetchone())[0]
+        async with storage._connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_energy%'"
+        ) as cursor:
+            assert await cursor.fetchall() == []
+        async with storage._connection.execute("SELECT timestamp, pv_power FROM energy_data") as cursor:
+            assert tuple(await cursor.fetchone()) == (NOON.isoformat(), 1500)
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_migration_moves_legacy_rows(self, tmp_path):
+        db_path = str(tmp_path / 'legacy.db')
+        # A version 6 database with the TEXT-keyed energy_data table
+        conn = sqlite3.connect(db_path)
+        for table_sql in ALL_TABLES:
+            if table_sql is not CREATE_ENERGY_READINGS_TABLE:
+                conn.execute(table_sql)
+        for version, description, statements in MIGRATIONS:
+            if version <= 6:
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+        conn.execute("CREATE INDEX idx_energy_timestamp ON energy_data(timestamp)")
+        legacy = [(NOON + timedelta(minutes=5 * i)).isoformat() for i in range(12)] + ['garbage']
+        conn.executemany("INSERT INTO energy_data (timestamp, house_consumption, tariff_zone) VALUES (?, 1200, 'T1')",
+                         [(ts,) for ts in legacy])
+        conn.commit()
+        conn.close()
+
+        storage = SQLiteStorage(StorageConfig(db_path=db_path))
+        assert await storage.connect()
+        rows = await storage.get_energy_data(NOON, NOON + timedelta(hours=1))
+        version = await storage._get_current_schema_version()
+        await storage.disconnect()
+
+        assert version == 7
+        assert [row['timestamp'] for row in rows] == legacy[:12]
+        assert all(row['house_consumption'] == 1200 and row['tariff_zone'] == 'T1' for row in rows)
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_cleanup_uses_epoch_cutoff(self, storage):
+        now = datetime.now()
+        await storage.save_energy_data([
+            {'timestamp': now - timedelta(days=10), 'battery_soc': 40.0},
+            {'timestamp': (now - timedelta(days=1)).astimezone(timezone.utc).isoformat(), 'battery_soc': 60.0},
+        ])
+
+        assert (await storage.cleanup_old_data(7))['energy_data'] == 1
+        remaining = await storage.get_energy_data(now - timedelta(days=30), now)
+        assert [row['battery_soc'] for row in remaining] == [60.0]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
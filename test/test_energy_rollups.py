@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Tests for the incrementally maintained energy rollup tables
+"""
+
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.energy_rollups import RollupBuilder, bucket_start
+from database.file_storage import FileStorage
+from database.schema import ALL_TABLES, CREATE_ENERGY_ROLLUP_TABLES, MIGRATIONS
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+from daily_snapshot_manager import DailySnapshotManager
+from enhanced_data_collector import EnhancedDataCollector
+
+DAY = datetime(2025, 10, 20)
+
+
+def readings(start: datetime, count: int, step_minutes: int = 5, **overrides):
+    """Constant 1.2 kW house load, 600 W import, 0.05 kWh meter increase per reading"""
+    rows = []
+    for i in range(count):
+        row = {
+            'timestamp': start + timedelta(minutes=step_minutes * i),
+            'battery_soc': 40.0 + i % 20,
+            'pv_power': 0,
+            'house_consumption': 1200,
+            'grid_power': -600,
+            'battery_power': -300,
+            'grid_import_total_kwh': round(100 + 0.05 * i, 3),
+            'tariff_zone': 'T2' if (start + timedelta(minutes=step_minutes * i)).hour < 6 else 'T1'
+        }
+        row.update(overrides)
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+async def storage(tmp_path):
+    storage = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'rollups.db')))
+    assert await storage.connect()
+    yield storage
+    await storage.disconnect()
+
+
+class TestRollupBuilder:
+    """Time-weighted integration and bucketing"""
+
+    def test_bucket_start(self):
+        ts = datetime(2025, 10, 20, 13, 47, 12)
+        assert bucket_start(ts, timedelta(minutes=15)) == datetime(2025, 10, 20, 13, 45)
+        assert bucket_start(ts, timedelta(days=1)) == DAY
+
+    def test_interval_split_across_buckets_and_gaps_skipped(self):
+        builder = RollupBuilder().add_all([
+            {'timestamp': '2025-10-20T10:50:00', 'house_consumption': 3600, 'grid_power': 1000},
+            {'timestamp': '2025-10-20T11:10:00', 'house_consumption': 0},  # 20 min gap: not integrated
+            {'timestamp': '2025-10-20T11:20:00', 'house_consumption': 0},
+            {'timestamp': '2025-10-20T11:50:00', 'house_consumption': 3600},
+            {'timestamp': '2025-10-20T12:05:00', 'house_consumption': 0},
+        ])
+        hourly = {row['bucket_start'][11:16]: row for row in builder.rows('hourly')}
+
+        assert hourly['10:00']['house_kwh'] == 0
+        assert hourly['11:00']['house_kwh'] == pytest.approx(0.6)  # 10 of the 15 minutes at 3.6 kW
+        assert hourly['12:00']['house_kwh'] == pytest.approx(0.3)
+        assert hourly['10:00']['peak_export_w'] == 1000
+        assert builder.rows('daily')[0]['covered_seconds'] == 25 * 60
+
+
+class TestSQLiteRollups:
+    """Rollups maintained on every energy_data write"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_incremental_writes_match_full_day(self, storage):
+        rows = readings(DAY, 288)
+        for i in range(0, len(rows), 7):
+            assert await storage.save_energy_data(rows[i:i + 7])
+
+        daily = await storage.get_energy_rollups('daily', DAY, DAY)
+        quarters = await storage.get_energy_rollups('15min', DAY, DAY + timedelta(hours=1))
+
+        assert len(daily) == 1
+        day = daily[0]
+        assert day['sample_count'] == 288
+        # 287 closed 5-minute intervals; the last reading's interval is still open
+        assert day['house_kwh'] == pytest.approx(1.2 * 287 / 12)
+        assert day['grid_import_kwh'] == pytest.approx(0.6 * 287 / 12)
+        assert day['battery_charge_kwh'] == pytest.approx(0.3 * 287 / 12)
+        assert day['meter_import_kwh'] == pytest.approx(0.05 * 287)
+        assert day['meter_import_t2_kwh'] == pytest.approx(0.05 * 71)
+        assert (day['min_soc'], day['max_soc']) == (40.0, 59.0)
+        assert day['peak_import_w'] == 600
+        assert len(quarters) == 5 and quarters[0]['house_kwh'] == pytest.approx(0.3)
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_late_and_replaced_readings_rebuild_affected_days(self, storage):
+        await storage.save_energy_data(readings(DAY, 288))
+        # Replace a reading: 2.4 kW held for 5 minutes instead of 1.2 kW
+        await storage.save_energy_data([{**readings(DAY + timedelta(hours=3), 1)[0], 'house_consumption': 2400}])
+
+        day = (await storage.get_energy_rollups('daily', DAY, DAY))[0]
+        assert day['sample_count'] == 288
+        assert day['house_kwh'] == pytest.approx(1.2 * 287 / 12 + 0.1)
+
+        assert await storage.rebuild_energy_rollups()
+        assert (await storage.get_energy_rollups('daily', DAY, DAY))[0] == day
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_concurrent_saves_match_sequential_totals(self, storage):
+        start = DAY + timedelta(hours=10)
+        rows = readings(start, 11, step_minutes=1, pv_power=6000)
+        await storage.save_energy_data(rows[:1])
+
+        # Both saves integrate from the 10:00 reading unless they are serialized
+        assert all(await asyncio.gather(storage.save_energy_data(rows[1:6]),
+                                        storage.save_energy_data(rows[6:])))
+
+        day = (await storage.get_energy_rollups('daily', DAY, DAY))[0]
+        assert day['sample_count'] == 11
+        assert day['pv_kwh'] == pytest.approx(1.0)  # 10 closed minutes at 6 kW
+        assert day['covered_seconds'] == 600
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_write_behind_flush_updates_rollups(self, tmp_path):
+        storage = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'wb.db'), write_behind_enabled=True,
+                                              write_behind_flush_interval=60))
+        assert await storage.connect()
+        for row in readings(DAY, 12):
+            await storage.save_energy_data([row])
+
+        hourly = await storage.get_energy_rollups('hourly', DAY, DAY)
+        await storage.disconnect()
+
+        assert hourly[0]['sample_count'] == 12
+        assert hourly[0]['house_kwh'] == pytest.approx(1.1)  # 11 closed 5-minute intervals
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_migration_backfills_existing_readings(self, tmp_path):
+        db_path = str(tmp_path / 'legacy.db')
+        conn = sqlite3.connect(db_path)
+        for table_sql in ALL_TABLES:
+            if table_sql not in CREATE_ENERGY_ROLLUP_TABLES:
+                conn.execute(table_sql)
+        for version, description, statements in MIGRATIONS:
+            if version <= 5:
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+        for row in readings(DAY, 24, step_minutes=60 * 2):
+            conn.execute("INSERT INTO energy_data (timestamp, house_consumption) VALUES (?, ?)",
+                         (row['timestamp'].isoformat(), 1000))
+        conn.commit()
+        conn.close()
+
+        storage = SQLiteStorage(StorageConfig(db_path=db_path))
+        assert await storage.connect()
+        daily = await storage.get_energy_rollups('daily', DAY, DAY + timedelta(days=1))
+        await storage.disconnect()
+
+        # Two-hour spacing exceeds the gap limit: readings counted, no energy invented
+        assert [row['sample_count'] for row in daily] == [12, 12]
+        assert all(row['house_kwh'] == 0 for row in daily)
+
+
+class TestRollupConsumers:
+    """Readers use one rollup row per day instead of raw readings"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_file_storage_matches_sqlite(self, storage, tmp_path):
+        rows = readings(DAY, 300)
+        files = FileStorage(StorageConfig())
+        files.base_dir = str(tmp_path)
+        files.energy_data_dir = str(tmp_path / 'energy_data')
+        await files.connect()
+        await files.save_energy_data(rows)
+        await storage.save_energy_data(rows)
+
+        from_files = await files.get_energy_rollups('hourly', DAY, DAY + timedelta(days=1))
+        from_sqlite = await storage.get_energy_rollups('hourly', DAY, DAY + timedelta(days=1))
+
+        assert [row['bucket_start'] for row in from_files] == [row['bucket_start'] for row in from_sqlite]
+        for expected, actual in zip(from_sqlite, from_files):
+            assert actual['house_kwh'] == pytest.approx(expected['house_kwh'])
+            assert actual['meter_import_kwh'] == pytest.approx(expected['meter_import_kwh'])
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_average_daily_consumption_reads_daily_rollups(self, tmp_path):
+        collector = EnhancedDataCollector({'data_storage': {'database_storage': {
+            'enabled': True, 'sqlite': {'path': str(tmp_path / 'collector.db')}}}})
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        collector.storage = AsyncMock()
+        collector.storage.get_energy_rollups.return_value = [
+            {'bucket_start': (today - timedelta(days=d)).isoformat(), 'sample_count': 288, 'house_kwh': kwh}
+            for d, kwh in enumerate([10.0, 12.0, 14.0])
+        ]
+
+        result = await collector.get_average_daily_consumption(days=7)
+
+        assert result['available']
+        assert result['avg_daily_kwh'] == 12.0
+        assert result['days_with_data'] == 3
+        collector.storage.get_energy_data.assert_not_awaited()
+
+    def test_daily_snapshot_uses_rollup_meter_totals(self, tmp_path):
+        manager = DailySnapshotManager(project_root=tmp_path, config={})
+        summary = manager._calculate_daily_summary([], DAY.date(), [], {
+            'meter_import_kwh': 9.5, 'meter_import_t1_kwh': 4.0, 'meter_import_t2_kwh': 5.5
+        })
+
+        assert summary['real_grid_import_kwh'] == 9.5
+        assert (summary['grid_import_t1_kwh'], summary['grid_import_t2_kwh']) == (4.0, 5.5)
+        assert summary['grid_import_total_kwh'] == 9.5
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
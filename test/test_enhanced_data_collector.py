@@ -29,6 +29,16 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 from enhanced_data_collector import EnhancedDataCollector
 
 
+def _stream(rows, error=None):
+    """Stand-in for storage.iter_energy_data yielding rows in chunks"""
+    async def iter_energy_data(start_time, end_time, chunk_size=1000):
+        if error:
+            raise error
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+    return iter_energy_data
+
+
 class TestEnhancedDataCollector(unittest.TestCase):
     """Test enhanced data collector functionality"""
     
@@ -645,7 +655,7 @@ class TestAverageDailyConsumption(unittest.TestCase):
                     'house_consumption': 2000.0  # 2kW
                 })
         
-        mock_storage.get_energy_data = AsyncMock(return_value=entries)
+        mock_storage.iter_energy_data = _stream(entries)
         collector.storage = mock_storage
         
         result = await collector.get_average_daily_consumption(days=7)
@@ -679,7 +689,7 @@ class TestAverageDailyConsumption(unittest.TestCase):
         collector = EnhancedDataCollector(self.config_path)
         
         mock_storage = AsyncMock()
-        mock_storage.get_energy_data = AsyncMock(return_value=[])  # No data
+        mock_storage.iter_energy_data = _stream([])  # No data
         collector.storage = mock_storage
         
         result = await collector.get_average_daily_consumption(days=7)
@@ -707,7 +717,7 @@ class TestAverageDailyConsumption(unittest.TestCase):
                     'house_consumption': 1500.0
                 })
         
-        mock_storage.get_energy_data = AsyncMock(return_value=entries)
+        mock_storage.iter_energy_data = _stream(entries)
         collector.storage = mock_storage
         
         result = await collector.get_average_daily_consumption(days=7)
@@ -724,7 +734,7 @@ class TestAverageDailyConsumption(unittest.TestCase):
         collector = EnhancedDataCollector(self.config_path)
         
         mock_storage = AsyncMock()
-        mock_storage.get_energy_data = AsyncMock(side_effect=Exception("Storage error"))
+        mock_storage.iter_energy_data = _stream([], Exception("Storage error"))
         collector.storage = mock_storage
         
         result = await collector.get_average_daily_consumption(days=7)
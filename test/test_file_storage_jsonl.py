@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only JSONL energy files of FileStorage
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.file_storage import FileStorage
+from database.storage_interface import StorageConfig
+
+DAY = datetime(2025, 10, 20)
+
+
+def readings(start: datetime, count: int, step: timedelta = timedelta(minutes=10)):
+    return [{'timestamp': start + i * step, 'battery_soc': 50.0, 'pv_power': 100.0 + i} for i in range(count)]
+
+
+@pytest.fixture
+async def files(tmp_path):
+    storage = FileStorage(StorageConfig())
+    storage.base_dir = str(tmp_path)
+    storage.energy_data_dir = str(tmp_path / 'energy_data')
+    assert await storage.connect()
+    yield storage
+    await storage.disconnect()
+
+
+def energy_path(storage: FileStorage, day: datetime = DAY) -> str:
+    return os.path.join(storage.energy_data_dir, f"energy_data_{day.strftime('%Y-%m-%d')}.jsonl")
+
+
+class TestJsonlEnergyFiles:
+    """Append-only daily files and the hourly offset index"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_saves_append_one_line_per_reading(self, files):
+        rows = readings(DAY, 12)
+        await files.save_energy_data(rows[:6])
+        await files.save_energy_data(rows[6:])
+
+        with open(energy_path(files), 'rb') as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)['pv_power'] for line in lines] == [row['pv_power'] for row in rows]
+        assert len(await files.get_energy_data(DAY, DAY + timedelta(days=1))) == 12
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_range_read_uses_hour_offsets(self, files, monkeypatch):
+        await files.save_energy_data(readings(DAY, 144))
+        index = files._day_index(DAY.strftime('%Y-%m-%d'))
+        assert sorted(index['hours']) == list(range(24))
+
+        reads = []
+        real_open = open
+
+        def tracking_open(path, mode='r', *args, **kwargs):
+            handle = real_open(path, mode, *args, **kwargs)
+            if str(path).endswith('.jsonl') and 'r' in mode:
+                real_read = handle.read
+                handle.read = lambda size=-1: reads.append(size) or real_read(size)
+            return handle
+
+        monkeypatch.setattr('builtins.open', tracking_open)
+        rows = await files.get_energy_data(DAY + timedelta(hours=10), DAY + timedelta(hours=11, minutes=59))
+
+        assert len(rows) == 12
+        hours = index['hours']
+        assert reads == [hours[11][1] - hours[10][0]]
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_stale_index_and_torn_line_are_recovered(self, files):
+        await files.save_energy_data(readings(DAY, 6))
+        date_str = DAY.strftime('%Y-%m-%d')
+        # Crash mid-write: a torn line after the last indexed reading
+        with open(energy_path(files), 'ab') as f:
+            f.write(b'{"timestamp": "2025-10-20T05:0')
+        files._energy_indexes.clear()
+
+        assert len(await files.get_energy_data(DAY, DAY + timedelta(days=1))) == 6
+
+        await files.save_energy_data(readings(DAY + timedelta(hours=5), 2))
+        files._energy_indexes.clear()
+        os.remove(os.path.join(files.energy_data_dir, f"energy_data_{date_str}.idx"))
+
+        rows = await files.get_energy_data(DAY, DAY + timedelta(days=1))
+        assert len(rows) == 8
+        assert rows[-1]['timestamp'] == (DAY + timedelta(hours=5, minutes=10)).isoformat()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_fsync_is_batched(self, files, monkeypatch):
+        synced = []
+        monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd))
+        monkeypatch.setattr(FileStorage, 'FSYNC_INTERVAL', 3600.0)
+
+        for row in readings(DAY, FileStorage.FSYNC_ROWS - 1):
+            await files.save_energy_data([row])
+        assert synced == []
+
+        await files.save_energy_data(readings(DAY + timedelta(days=1), 1))
+        assert len(synced) == 2  # both days' files
+
+        await files.save_energy_data(readings(DAY + timedelta(hours=23), 1))
+        await files.disconnect()
+        assert len(synced) == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_rows_already_written_are_skipped(self, files):
+        rows = readings(DAY, 6)
+        await files.save_energy_data(rows[:4])
+        # A replay overlapping the rows already written
+        await files.save_energy_data(rows)
+        files._written_timestamps.clear()
+        await files.save_energy_data(rows[2:])
+
+        stored = await files.get_energy_data(DAY, DAY + timedelta(days=1))
+        assert [row['pv_power'] for row in stored] == [row['pv_power'] for row in rows]
+
+        decision = {'timestamp': DAY, 'decision_type': 'charging', 'action': 'wait'}
+        await files.save_decision(decision)
+        await files.save_decision(decision)
+        await files.save_decision({**decision, 'timestamp': DAY + timedelta(minutes=1)})
+        with open(os.path.join(files.base_dir, 'charging_decision_20251020.json')) as f:
+            assert len(f.read().splitlines()) == 2
+
+
+class TestLegacyConversion:
+    """One-time conversion of JSON array files"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_connect_converts_json_arrays(self, tmp_path):
+        energy_dir = tmp_path / 'energy_data'
+        energy_dir.mkdir()
+        rows = [{**row, 'timestamp': row['timestamp'].isoformat()} for row in readings(DAY, 5)]
+        (energy_dir / 'energy_data_2025-10-20.json').write_text(json.dumps(rows, indent=2))
+        (energy_dir / 'charging_decision_20251020_120000.json').write_text('{}')
+
+        storage = FileStorage(StorageConfig())
+        storage.base_dir = str(tmp_path)
+        storage.energy_data_dir = str(energy_dir)
+        assert await storage.connect()
+
+        assert not (energy_dir / 'energy_data_2025-10-20.json').exists()
+        assert (energy_dir / 'charging_decision_20251020_120000.json').exists()
+        assert await storage.get_energy_data(DAY, DAY + timedelta(days=1)) == rows
+        assert await storage.convert_legacy_energy_files() == {}
+        assert (await storage.get_database_stats())['energy_data_files'] == 1
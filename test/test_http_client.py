@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared pooled HttpClient against a local aiohttp server
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp import web, ClientResponseError
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from http_client import HttpClient
+from pse_peak_hours_collector import PSEPeakHoursCollector
+from weather_data_collector import WeatherDataCollector
+
+
+class LocalApi:
+    """Local stand-in for external JSON APIs"""
+
+    def __init__(self):
+        self.hits = {}
+        self.flaky_failures = 2
+        self.peers = set()
+        app = web.Application()
+        app.router.add_get('/ok', self.ok)
+        app.router.add_get('/flaky', self.flaky)
+        app.router.add_get('/missing', self.missing)
+        app.router.add_get('/slow', self.slow)
+        app.router.add_get('/pdgsz', self.pdgsz)
+        app.router.add_get('/imgw', self.missing)
+        self.runner = web.AppRunner(app)
+        self.base_url = None
+
+    async def start(self):
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{port}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def _hit(self, request):
+        self.hits[request.path] = self.hits.get(request.path, 0) + 1
+        self.peers.add(request.transport.get_extra_info('peername'))
+
+    async def ok(self, request):
+        self._hit(request)
+        return web.json_response({'value': [1, 2, 3], 'q': request.query.get('q')})
+
+    async def flaky(self, request):
+        self._hit(request)
+        if self.hits[request.path] <= self.flaky_failures:
+            return web.json_response({'error': 'busy'}, status=503)
+        return web.json_response({'value': 'recovered'})
+
+    async def missing(self, request):
+        self._hit(request)
+        return web.json_response({'error': 'not found'}, status=404)
+
+    async def slow(self, request):
+        self._hit(request)
+        await asyncio.sleep(1.0)
+        return web.json_response({})
+
+    async def pdgsz(self, request):
+        self._hit(request)
+        return web.json_response({'value': [{'dtime': '2025-10-20 18:00', 'usage_fcst': 3}]})
+
+
+@pytest.fixture
+async def api():
+    server = LocalApi()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture
+async def client():
+    http_client = HttpClient({'retry_backoff_seconds': 0.01, 'timeout_seconds': 5})
+    yield http_client
+    await http_client.close()
+
+
+class TestHttpClient:
+    """Pooling, retries and metrics"""
+
+    @pytest.mark.asyncio
+    async def test_get_json_with_params(self, api, client):
+        payload = await client.get_json(f'{api.base_url}/ok', params={'q': 'x'})
+        assert payload == {'value': [1, 2, 3], 'q': 'x'}
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_reuses_connection(self, api, client):
+        for _ in range(5):
+            await client.get_json(f'{api.base_url}/ok')
+
+        assert api.hits['/ok'] == 5
+        assert len(api.peers) == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self, api, client):
+        payload = await client.get_json(f'{api.base_url}/flaky', endpoint='flaky')
+
+        assert payload == {'value': 'recovered'}
+        stats = client.get_stats()['flaky']
+        assert stats['requests'] == 3
+        assert stats['errors'] == 2
+        assert stats['retries'] == 2
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self, api, client):
+        with pytest.raises(ClientResponseError) as exc_info:
+            await client.get_json(f'{api.base_url}/missing')
+
+        assert exc_info.value.status == 404
+        assert api.hits['/missing'] == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, api, client):
+        with pytest.raises(asyncio.TimeoutError):
+            await client.get_json(f'{api.base_url}/slow', timeout_seconds=0.1, retry_attempts=1)
+
+    @pytest.mark.asyncio
+    async def test_latency_metrics(self, api, client):
+        await client.get_json(f'{api.base_url}/ok')
+
+        stats = client.get_stats()[api.base_url.split('//')[1] + '/ok']
+        assert stats['requests'] == 1
+        assert stats['errors'] == 0
+        assert stats['avg_latency_ms'] > 0
+
+    @pytest.mark.asyncio
+    async def test_close(self, api, client):
+        await client.get_json(f'{api.base_url}/ok')
+        session = client._session
+        await client.close()
+
+        assert session.closed
+        # Client recreates its session on next use
+        assert await client.get_json(f'{api.base_url}/ok')
+
+    @pytest.mark.asyncio
+    async def test_other_event_loop_uses_one_off_session(self, api, client):
+        """Requests from a foreign loop never touch the pooled connector"""
+        await client.get_json(f'{api.base_url}/ok')
+        pooled_session = client._session
+
+        result = await asyncio.to_thread(asyncio.run, client.get_json(f'{api.base_url}/ok'))
+
+        assert result['value'] == [1, 2, 3]
+        assert client._session is pooled_session
+        assert client._session_loop is asyncio.get_running_loop()
+
+
+class TestCollectorInjection:
+    """Collectors use the injected client"""
+
+    @pytest.mark.asyncio
+    async def test_peak_hours_collector(self, api, client):
+        collector = PSEPeakHoursCollector(
+            {'pse_peak_hours': {'enabled': True, 'api_url': f'{api.base_url}/pdgsz'}}, http_client=client
+        )
+
+        statuses = await collector.fetch_peak_hours()
+
+        assert len(statuses) == 1
+        assert statuses[0].code == 3
+        assert client.get_stats()['pdgsz']['requests'] == 1
+
+    @pytest.mark.asyncio
+    async def test_weather_collector_http_error(self, api, client):
+        collector = WeatherDataCollector(
+            {'weather_integration': {'imgw': {'api_base_url': api.base_url, 'station': 'imgw'}}}, http_client=client
+        )
+        collector.imgw_endpoint = f'{api.base_url}/imgw'
+
+        assert await collector._fetch_imgw_data() == {}
+        assert client.get_stats()['imgw']['errors'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -272,7 +272,7 @@ class TestGoodWeAdapter:
         mock_inverter.model_name = "GW10K-ET"
         mock_inverter.serial_number = "12345678"
         
-        with patch('goodwe.connect', new_callable=AsyncMock) as mock_connect:
+        with patch('inverter.adapters.goodwe_adapter.goodwe.connect', new_callable=AsyncMock) as mock_connect:
             mock_connect.return_value = mock_inverter
             
             config = InverterConfig(
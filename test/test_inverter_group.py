@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-inverter sites: InverterGroup and the factory/collector wiring
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from backtest import SimulatedClock
+from enhanced_data_collector import EnhancedDataCollector
+from fast_charge import GoodWeFastCharger
+from inverter import InverterFactory, InverterGroup, OperationMode
+from inverter.adapters.inverter_group import GroupDevice
+from inverter.adapters.simulated_adapter import SimulatedInverterAdapter, reset_simulated_inverters
+from inverter.models.inverter_config import InverterConfig
+
+NOON = datetime(2025, 6, 21, 12, 0)
+
+
+class ScriptedAdapter(SimulatedInverterAdapter):
+    """Simulated adapter that can be slow or refuse to connect, recording mode commands"""
+
+    def __init__(self, clock=None, delay: float = 0.0, reachable: bool = True):
+        super().__init__(clock=clock)
+        self.delay = delay
+        self.reachable = reachable
+        self.collects = 0
+        self.modes = []
+
+    async def connect(self, config):
+        return self.reachable and await super().connect(config)
+
+    async def collect_comprehensive_data(self):
+        self.collects += 1
+        await asyncio.sleep(self.delay)
+        return await super().collect_comprehensive_data()
+
+    async def set_operation_mode(self, mode, power_w=0, min_soc=0):
+        await asyncio.sleep(self.delay)
+        self.modes.append((mode, power_w, min_soc))
+        return await super().set_operation_mode(mode, power_w, min_soc)
+
+
+class ManualClock:
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self):
+        return self.value
+
+
+def device(name: str, soc: float, capacity: float, timeout: float = 1.0) -> InverterConfig:
+    return InverterConfig.from_yaml_config({
+        'vendor': 'simulated', 'name': name, 'collect_timeout': timeout, 'battery_capacity_kwh': capacity,
+        'scenario': {'serial_number': f'SIM-{name}', 'initial_soc': soc, 'capacity_kwh': capacity},
+    })
+
+
+@pytest.fixture(autouse=True)
+def fresh_devices():
+    reset_simulated_inverters()
+    yield
+    reset_simulated_inverters()
+
+
+@pytest.fixture
+def site():
+    """Three simulated units; 'garage' answers after 5 s"""
+    clock = SimulatedClock(NOON)
+    backoff_clock = ManualClock()
+    adapters = {
+        'house': ScriptedAdapter(clock),
+        'barn': ScriptedAdapter(clock),
+        'garage': ScriptedAdapter(clock, delay=5.0),
+    }
+    configs = [device('house', 40, 10), device('barn', 80, 30), device('garage', 60, 10, timeout=0.1)]
+    group = InverterGroup([(adapters[config.name], config) for config in configs],
+                          offline_retry=60, clock=backoff_clock)
+    return group, adapters, backoff_clock
+
+
+class TestConfiguration:
+    """Device lists in the inverter section"""
+
+    def test_devices_inherit_section_defaults(self):
+        configs = InverterConfig.list_from_yaml_config({
+            'vendor': 'goodwe', 'port': 8899, 'collect_timeout': 3,
+            'devices': [{'ip_address': '192.168.1.10'}, {'name': 'roof', 'ip_address': '192.168.1.11', 'port': 502}],
+        })
+
+        assert [c.name for c in configs] == ['inverter1', 'roof']
+        assert [c.port for c in configs] == [8899, 502]
+        assert all(c.collect_timeout == 3 and c.vendor == 'goodwe' for c in configs)
+        assert InverterConfig.is_multi_config([{'vendor': 'goodwe'}])
+        assert not InverterConfig.is_multi_config({'vendor': 'goodwe', 'ip_address': '192.168.1.10'})
+
+    def test_factory_builds_one_adapter_per_device(self):
+        group = InverterFactory.create_group_from_yaml_config([
+            {'vendor': 'simulated', 'name': 'a'},
+            {'vendor': 'goodwe', 'name': 'b', 'ip_address': '192.168.1.11'},
+        ])
+
+        assert group.names == ['a', 'b']
+        assert group.adapter('a').vendor_name == 'simulated'
+        assert group.adapter('b').vendor_name == 'goodwe'
+        with pytest.raises(ValueError):
+            InverterFactory.create_group_from_yaml_config([{'vendor': 'simulated', 'name': 'a'}] * 2)
+
+
+class TestGroupCollection:
+    """Concurrent collection and aggregation"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_slow_unit_does_not_delay_the_others(self, site):
+        group, adapters, backoff_clock = site
+        assert await group.connect()
+
+        started = time.monotonic()
+        data = await group.collect_comprehensive_data()
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 1.0
+        assert data.inverter['online_devices'] == 2
+        assert data.inverter['status'] == 'degraded'
+        assert data.devices['garage'] == {'online': False, 'error': 'no response within 0.1s'}
+        house, barn = data.devices['house'], data.devices['barn']
+        assert data.photovoltaic['current_power_w'] == (
+            house['photovoltaic']['current_power_w'] + barn['photovoltaic']['current_power_w'])
+        assert data.battery['power_w'] == house['battery']['power_w'] + barn['battery']['power_w']
+        # SOC weighted by battery capacity: (40 * 10 + 80 * 30) / 40
+        assert data.battery['soc_percent'] == pytest.approx(70.0)
+
+        # The offline unit is skipped until its retry time
+        await group.collect_comprehensive_data()
+        assert adapters['garage'].collects == 1
+        backoff_clock.value = 61
+        adapters['garage'].delay = 0.0
+        data = await group.collect_comprehensive_data()
+        assert data.inverter['online_devices'] == 3
+        assert group.get_stats()['garage']['failures'] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_unreachable_unit_at_startup(self):
+        clock = SimulatedClock(NOON)
+        group = InverterGroup([
+            (ScriptedAdapter(clock), device('house', 50, 10)),
+            (ScriptedAdapter(clock, reachable=False), device('barn', 50, 10)),
+        ])
+
+        assert await group.connect()
+        data = await group.collect_comprehensive_data()
+
+        assert list(data.devices) == ['house', 'barn']
+        assert data.devices['barn']['online'] is False
+        assert data.battery['soc_percent'] == 50
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_no_unit_responding_raises(self):
+        group = InverterGroup([(ScriptedAdapter(reachable=False), device('house', 50, 10))])
+
+        assert not await group.connect()
+        with pytest.raises(RuntimeError):
+            await group.collect_comprehensive_data()
+
+
+class TestCommandFanOut:
+    """Charge and sell commands reach every online unit concurrently"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_discharge_power_is_split_between_units(self, site):
+        group, adapters, _ = site
+        adapters['garage'].delay = 0.0
+        assert await group.connect()
+
+        results = await group.set_operation_mode(OperationMode.ECO_DISCHARGE, power_w=6000, min_soc=20)
+
+        assert results == {'house': True, 'barn': True, 'garage': True}
+        assert [a.modes for a in adapters.values()] == [[(OperationMode.ECO_DISCHARGE, 2000, 20)]] * 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_charging_skips_offline_unit(self, site):
+        group, adapters, _ = site
+        assert await group.connect()
+        await group.collect_comprehensive_data()  # garage times out
+
+        results = await group.start_charging(power_pct=80, target_soc=90)
+
+        assert results == {'house': True, 'barn': True, 'garage': False}
+        assert adapters['house'].device.settings['fast_charging'] == 1
+        assert adapters['garage'].device.settings['fast_charging'] == 0
+        stopped = await group.stop_charging()
+        assert stopped['house'] and stopped['barn']
+
+
+class TestGroupDevice:
+    """The group as one goodwe inverter for the fast charger and the selling engine"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_fast_charger_charges_every_unit(self):
+        charger = GoodWeFastCharger({
+            'inverter': {'vendor': 'simulated', 'devices': [
+                {'name': 'house', 'battery_capacity_kwh': 10,
+                 'scenario': {'serial_number': 'SIM-house', 'initial_soc': 40, 'capacity_kwh': 10}},
+                {'name': 'barn', 'battery_capacity_kwh': 30,
+                 'scenario': {'serial_number': 'SIM-barn', 'initial_soc': 80, 'capacity_kwh': 30}},
+            ]},
+            'fast_charging': {'power_percentage': 50, 'target_soc': 95},
+        })
+        assert await charger.connect_inverter()
+        devices = [charger.inverter_group.adapter(name).device for name in ('house', 'barn')]
+
+        assert await charger.start_fast_charging()
+        assert [d.settings['fast_charging'] for d in devices] == [1, 1]
+        assert [d.settings['fast_charging_soc'] for d in devices] == [95, 95]
+
+        status = await charger.get_charging_status()
+        assert status['fast_charging_enabled']
+        assert status['current_battery_soc'] == pytest.approx(70.0)
+
+        assert await charger.stop_fast_charging()
+        assert [d.settings['fast_charging'] for d in devices] == [0, 0]
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_selling_commands_reach_every_unit(self, site):
+        group, adapters, _ = site
+        adapters['garage'].delay = 0.0
+        assert await group.connect()
+        device = GroupDevice(group)
+
+        await device.set_operation_mode(OperationMode.ECO_DISCHARGE, 100, 50)
+        await device.set_grid_export_limit(6000)
+
+        assert [a.device.battery.mode for a in adapters.values()] == ['eco_discharge'] * 3
+        assert [a.device.settings['grid_export_limit'] for a in adapters.values()] == [2000] * 3
+        # (40 * 10 + 80 * 30 + 60 * 10) / 50
+        assert await device.get_battery_soc() == pytest.approx(68.0)
+        runtime = await device.read_runtime_data()
+        assert runtime['ppv'] == sum([(await a.device.read_runtime_data())['ppv'] for a in adapters.values()])
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_failed_unit_raises(self, site):
+        group, adapters, _ = site
+        adapters['garage'].delay = 0.0
+        assert await group.connect()
+
+        async def broken(setting_id, value):
+            raise ConnectionError("no reply")
+
+        adapters['barn'].device.write_setting = broken
+        with pytest.raises(RuntimeError, match='barn'):
+            await GroupDevice(group).write_setting('fast_charging', 1)
+        assert adapters['house'].device.settings['fast_charging'] == 1
+        assert group.get_stats()['barn']['online'] is False
+
+
+class TestCollectorMultiInverter:
+    """EnhancedDataCollector with a device list in the inverter section"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_collects_site_totals_with_breakdown(self, tmp_path):
+        collector = EnhancedDataCollector({
+            'inverter': {'vendor': 'simulated', 'devices': [
+                {'name': 'house', 'scenario': {'serial_number': 'SIM-house', 'initial_soc': 30}},
+                {'name': 'barn', 'scenario': {'serial_number': 'SIM-barn', 'initial_soc': 70}},
+            ]},
+            'data_storage': {'database_storage': {'enabled': True, 'sqlite': {'path': str(tmp_path / 'site.db')}}},
+        })
+        assert collector.inverter_group.names == ['house', 'barn']
+
+        assert await collector.initialize()
+        data = await collector.collect_comprehensive_data()
+
+        assert data['battery']['soc_percent'] == 50.0
+        assert set(data['devices']) == {'house', 'barn'}
+        assert data['system']['connection_status'] == 'Connected'
+        # The fast charger shares the collector's connections and drives both units
+        assert collector.goodwe_charger.inverter_group is collector.inverter_group
+        assert await collector.goodwe_charger.start_fast_charging()
+        for name in ('house', 'barn'):
+            assert collector.inverter_group.adapter(name).device.settings['fast_charging'] == 1
+        await collector.storage.disconnect()
@@ -110,7 +110,7 @@ class TestMultiSessionManager(unittest.TestCase):
         mock_analyzer.analyze_charging_windows.return_value = mock_windows
         
         # Mock price data fetching
-        mock_analyzer.fetch_price_data_for_date = Mock(return_value={'value': []})
+        mock_analyzer.fetch_price_data_for_date = AsyncMock(return_value={'value': []})
         
         # Create plan
         date = datetime(2024, 1, 1).date()
@@ -461,7 +461,7 @@ class TestMultiSessionIntegration(unittest.TestCase):
         mock_data_collector.return_value.initialize = AsyncMock(return_value=True)
         mock_charger.return_value.initialize = AsyncMock(return_value=True)
         mock_charger.return_value.is_charging = False
-        mock_charger.return_value.fetch_price_data_for_date = Mock(return_value={'prices': []})
+        mock_charger.return_value.fetch_price_data_for_date = AsyncMock(return_value={'prices': []})
         mock_charger.return_value.make_smart_charging_decision = Mock(return_value={
             'should_charge': False,
             'reason': 'Test decision',
@@ -500,13 +500,14 @@ class TestMultiSessionIntegration(unittest.TestCase):
         mock_manager.daily_planning_time = '06:00'
         mock_manager.get_next_session = AsyncMock(return_value=None)
         mock_manager.create_daily_plan = AsyncMock()
+        mock_manager.update_plans = AsyncMock()
         mock_manager.start_session = AsyncMock()
         mock_manager.complete_session = AsyncMock()
         
         # Mock charging controller
         mock_charger = Mock()
         mock_charger.is_charging = False
-        mock_charger.fetch_price_data_for_date = Mock(return_value={'prices': []})
+        mock_charger.fetch_price_data_for_date = AsyncMock(return_value={'prices': []})
         mock_charger.start_price_based_charging = AsyncMock()
         mock_charger.stop_price_based_charging = AsyncMock()
         
@@ -525,8 +526,8 @@ class TestMultiSessionIntegration(unittest.TestCase):
             
             await coordinator._handle_multi_session_logic()
             
-            # Verify daily plan creation was called
-            mock_manager.create_daily_plan.assert_called_once()
+            # Verify planning was triggered
+            mock_manager.update_plans.assert_awaited_once()
 
 
 class TestChargingSession(unittest.TestCase):
@@ -437,7 +437,7 @@ class TestSchemaVersion:
         
         # Check schema version
         version = await storage._get_current_schema_version()
-        assert version == 4
+        assert version >= 4
         
         # Verify new indexes exist
         async with storage._connection.execute(
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for PriceCurve - parse-once, array-backed CSDAC price data
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from price_curve import PriceCurve, get_price_curve, get_tariff_price_curve, clear_price_curve_cache
+from tariff_pricing import TariffPricingCalculator
+
+
+def create_price_data(day=datetime(2025, 10, 17), slots=96, base=300.0):
+    """Create CSDAC-style price data with 15-minute slots"""
+    return {
+        'value': [
+            {
+                'dtime': (day + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M'),
+                'csdac_pln': base + i,
+                'business_date': day.strftime('%Y-%m-%d')
+            }
+            for i in range(slots)
+        ]
+    }
+
+
+def create_tariff_config():
+    """Create G12w tariff configuration"""
+    return {
+        'electricity_tariff': {
+            'tariff_type': 'g12w',
+            'sc_component_pln_kwh': 0.0892,
+            'distribution_pricing': {
+                'g12w': {
+                    'type': 'time_based',
+                    'peak_hours': {'start': 6, 'end': 22},
+                    'prices': {'peak': 0.3566, 'off_peak': 0.0749}
+                }
+            }
+        }
+    }
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    clear_price_curve_cache()
+    yield
+    clear_price_curve_cache()
+
+
+class TestPriceCurve:
+    """Test PriceCurve construction and lookups"""
+
+    def test_from_price_data_sc_only(self):
+        """Curve without pricing function adds SC component"""
+        curve = PriceCurve.from_price_data(create_price_data())
+
+        assert len(curve) == 96
+        assert curve.market_prices[0] == 300.0
+        assert curve.final_prices[0] == pytest.approx(389.2)
+        assert curve.business_date.isoformat() == '2025-10-17'
+        assert curve.slot_seconds == 900
+
+    def test_from_price_data_with_tariff(self):
+        """Final prices match the scalar tariff calculation"""
+        calc = TariffPricingCalculator(create_tariff_config())
+        curve = PriceCurve.from_price_data(
+            create_price_data(),
+            lambda market, ts: calc.calculate_final_prices_batch(market / 1000, ts) * 1000
+        )
+
+        expected = calc.calculate_final_price(0.3 + 0.032, datetime(2025, 10, 17, 8, 0)).final_price * 1000
+        assert curve.price_at(datetime(2025, 10, 17, 8, 7)) == pytest.approx(expected)
+
+    def test_price_at(self):
+        """O(1) lookup returns the slot containing the time"""
+        curve = PriceCurve.from_price_data(create_price_data())
+
+        assert curve.price_at(datetime(2025, 10, 17, 0, 0), final=False) == 300.0
+        assert curve.price_at(datetime(2025, 10, 17, 10, 14, 59), final=False) == 340.0
+        assert curve.price_at(datetime(2025, 10, 17, 23, 59), final=False) == 395.0
+        assert curve.price_at(datetime(2025, 10, 16, 23, 59)) is None
+        assert curve.price_at(datetime(2025, 10, 18, 0, 0)) is None
+
+    def test_price_at_non_uniform(self):
+        """Lookups fall back to binary search when slots are not uniform"""
+        data = create_price_data(slots=8)
+        del data['value'][3]
+        curve = PriceCurve.from_price_data(data)
+
+        assert curve.price_at(datetime(2025, 10, 17, 0, 50)) is None  # Missing slot
+        assert curve.price_at(datetime(2025, 10, 17, 1, 0), final=False) == 304.0
+        assert curve.price_at(datetime(2025, 10, 17, 0, 35), final=False) == 302.0
+
+    def test_slice(self):
+        """Slice selects slots starting in [start, end) without copying"""
+        curve = PriceCurve.from_price_data(create_price_data())
+        part = curve.slice(datetime(2025, 10, 17, 1, 0), datetime(2025, 10, 17, 2, 0))
+
+        assert len(part) == 4
+        assert part.timestamps[0] == datetime(2025, 10, 17, 1, 0)
+        assert np.shares_memory(part.market_prices, curve.market_prices)
+        assert len(curve.slice(datetime(2025, 10, 18), None)) == 0
+
+    def test_hourly_average(self):
+        """Hourly average groups four 15-minute slots"""
+        curve = PriceCurve.from_price_data(create_price_data())
+        hourly = curve.hourly_average()
+
+        assert len(hourly) == 24
+        assert hourly[0] == pytest.approx(301.5 + 89.2)
+
+    def test_legacy_dict_view(self):
+        """Curve can be passed where raw price data dicts are expected"""
+        data = create_price_data(slots=4)
+        curve = PriceCurve.from_price_data(data)
+
+        assert 'value' in curve
+        assert curve['value'] is data['value']
+        assert curve.get('missing', 'default') == 'default'
+
+    def test_arrays_read_only(self):
+        """Curve arrays cannot be modified by consumers"""
+        curve = PriceCurve.from_price_data(create_price_data(slots=4))
+        with pytest.raises(ValueError):
+            curve.final_prices[0] = 0.0
+
+
+class TestPriceCurveMemoization:
+    """Test get_price_curve memoization"""
+
+    def test_same_data_returns_same_curve(self):
+        """Repeated calls for the same fetch share one curve"""
+        data = create_price_data()
+        first = get_price_curve(data, tariff_key='g12w')
+        second = get_price_curve(create_price_data(), tariff_key='g12w')
+
+        assert first is second
+
+    def test_changed_rows_rebuild(self):
+        """A refetch with different rows produces a fresh curve"""
+        first = get_price_curve(create_price_data(slots=48), tariff_key='g12w')
+        second = get_price_curve(create_price_data(slots=96), tariff_key='g12w')
+
+        assert first is not second
+        assert len(second) == 96
+
+    def test_tariff_key_separates_curves(self):
+        """Different tariff configurations do not share curves"""
+        data = create_price_data()
+        assert get_price_curve(data, tariff_key='g12w') is not get_price_curve(data, tariff_key='g11')
+
+    def test_curve_passthrough(self):
+        """Passing a curve returns it unchanged"""
+        curve = PriceCurve.from_price_data(create_price_data(slots=4))
+        assert get_price_curve(curve) is curve
+
+
+class TestTariffPriceCurve:
+    """Test get_tariff_price_curve"""
+
+    def test_tariff_calculator_prices(self):
+        """Final prices come from the tariff calculator, converted to PLN/MWh"""
+        calculator = TariffPricingCalculator(create_tariff_config())
+        data = create_price_data(slots=96)
+        curve = get_tariff_price_curve(data, calculator)
+
+        noon = datetime(2025, 10, 17, 12, 0)
+        expected = calculator.calculate_final_price(curve.price_at(noon, final=False) / 1000, noon).final_price * 1000
+        assert curve.price_at(noon) == pytest.approx(expected)
+        assert get_tariff_price_curve(create_price_data(slots=96), calculator) is curve
+
+    def test_sc_only_fallback(self):
+        """Without a tariff calculator only the SC component is added"""
+        data = create_price_data(slots=4)
+        assert get_tariff_price_curve(data).final_prices.tolist() == [389.2, 390.2, 391.2, 392.2]
+        assert get_tariff_price_curve(data, sc_component_mwh=100.0).final_prices.tolist() == [400.0, 401.0, 402.0, 403.0]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
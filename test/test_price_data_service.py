@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Tests for PriceDataService - single-flight price fetching with day cache
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from price_data_service import (
+    PriceDataService, get_price_data_service, reset_price_data_services, is_day_complete
+)
+
+
+def create_price_data(day='2025-10-20', slots=96):
+    """CSDAC-style response with 15-minute slots"""
+    start = datetime.fromisoformat(day)
+    return {
+        'value': [
+            {
+                'dtime': (start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M'),
+                'csdac_pln': 400.0 + i,
+                'business_date': day
+            }
+            for i in range(slots)
+        ]
+    }
+
+
+class FakeApi:
+    """Counts fetches and returns configured responses"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+
+    async def __call__(self, date_str):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        response = self.responses[min(self.calls, len(self.responses)) - 1]
+        return response
+
+
+def create_service(responses, **config):
+    service = PriceDataService('http://test/csdac', config)
+    api = FakeApi(responses)
+    service._fetch = api
+    return service, api
+
+
+class TestDayCompleteness:
+    """Completeness is DST aware"""
+
+    def test_regular_day(self):
+        assert is_day_complete(create_price_data(slots=96), date(2025, 10, 20))
+        assert not is_day_complete(create_price_data(slots=48), date(2025, 10, 20))
+        assert not is_day_complete({'value': []}, date(2025, 10, 20))
+
+    def test_dst_days(self):
+        assert is_day_complete(create_price_data('2025-03-30', slots=92), date(2025, 3, 30))
+        assert not is_day_complete(create_price_data('2025-10-26', slots=96), date(2025, 10, 26))
+        assert is_day_complete(create_price_data('2025-10-26', slots=100), date(2025, 10, 26))
+
+    def test_autumn_dst_day_repeats_local_times(self):
+        day = datetime(2025, 10, 26)
+        times = [day + timedelta(minutes=15 * i) for i in range(12)]  # 00:00-02:45
+        times += times[8:]  # 02:00-02:45 again after clocks go back
+        times += [day + timedelta(hours=3, minutes=15 * i) for i in range(84)]
+        values = [{'dtime': t.strftime('%Y-%m-%d %H:%M'), 'csdac_pln': 400.0} for t in times]
+
+        assert len(values) == 100
+        assert is_day_complete({'value': values}, day.date())
+        assert not is_day_complete({'value': values[:-1]}, day.date())
+
+    def test_duplicate_rows_do_not_complete_a_regular_day(self):
+        values = create_price_data(slots=92)['value']
+        assert not is_day_complete({'value': values + values[:4]}, date(2025, 10, 20))
+
+    def test_hourly_data(self):
+        assert is_day_complete(
+            {'value': [{'dtime': f'2025-10-20 {h:02d}:00'} for h in range(24)]}, date(2025, 10, 20)
+        )
+
+
+class TestPriceDataService:
+    """Caching and single-flight behaviour"""
+
+    @pytest.mark.asyncio
+    async def test_single_flight(self):
+        """Concurrent callers share one request"""
+        service, api = create_service([create_price_data()])
+
+        results = await asyncio.gather(*(service.get_price_data('2025-10-20') for _ in range(5)))
+
+        assert api.calls == 1
+        assert all(result is results[0] for result in results)
+        assert service.stats['shared_fetches'] == 4
+
+    @pytest.mark.asyncio
+    async def test_complete_day_is_immutable(self):
+        """A complete day is never fetched again"""
+        service, api = create_service([create_price_data()], refetch_interval_minutes=0)
+
+        first = await service.get_price_data('2025-10-20')
+        second = await service.get_price_data('2025-10-20')
+
+        assert api.calls == 1
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_incomplete_day_refetched_after_interval(self):
+        service, api = create_service([create_price_data(slots=40), create_price_data()])
+
+        partial = await service.get_price_data('2025-10-20')
+        assert len((await service.get_price_data('2025-10-20'))['value']) == 40
+        assert api.calls == 1
+
+        service.refetch_interval_seconds = 0
+        full = await service.get_price_data('2025-10-20')
+
+        assert api.calls == 2
+        assert len(partial['value']) == 40
+        assert len(full['value']) == 96
+
+    @pytest.mark.asyncio
+    async def test_failed_refetch_serves_stale_data(self):
+        service, api = create_service([create_price_data(slots=40), None], refetch_interval_minutes=0)
+
+        await service.get_price_data('2025-10-20')
+        stale = await service.get_price_data('2025-10-20')
+
+        assert api.calls == 2
+        assert len(stale['value']) == 40
+
+    @pytest.mark.asyncio
+    async def test_publication_window_refetch(self):
+        """D+1 is refetched faster during the publication window"""
+        service, api = create_service([{'value': []}], refetch_interval_minutes=60, publication_refetch_minutes=0)
+        tomorrow = (datetime.now().date() + timedelta(days=1)).isoformat()
+
+        with patch('price_data_service.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime.combine(datetime.now().date(), datetime.min.time()).replace(hour=13)
+            mock_datetime.fromisoformat = datetime.fromisoformat
+            mock_datetime.combine = datetime.combine
+            mock_datetime.min = datetime.min
+            await service.get_price_data(tomorrow)
+            await service.get_price_data(tomorrow)
+        assert api.calls == 2
+
+        with patch('price_data_service.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime.combine(datetime.now().date(), datetime.min.time()).replace(hour=18)
+            mock_datetime.combine = datetime.combine
+            mock_datetime.min = datetime.min
+            await service.get_price_data(tomorrow)
+        assert api.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_disk_cache(self, tmp_path):
+        """Complete days survive a restart via the on-disk cache"""
+        service, api = create_service([create_price_data()], cache_dir=str(tmp_path))
+        await service.get_price_data('2025-10-20')
+        assert (tmp_path / 'csdac_2025-10-20.json').exists()
+
+        restarted, restarted_api = create_service([None], cache_dir=str(tmp_path))
+        data = await restarted.get_price_data('2025-10-20')
+
+        assert restarted_api.calls == 0
+        assert len(data['value']) == 96
+        assert restarted.stats['disk_hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_incomplete_day_not_persisted(self, tmp_path):
+        service, _ = create_service([create_price_data(slots=10)], cache_dir=str(tmp_path))
+        await service.get_price_data('2025-10-20')
+
+        assert not (tmp_path / 'csdac_2025-10-20.json').exists()
+
+
+    @pytest.mark.asyncio
+    async def test_publication_listener_called_once_per_day(self):
+        service, _ = create_service([create_price_data(slots=40), create_price_data()], refetch_interval_minutes=0)
+        published = []
+        service.add_publication_listener(lambda date_str, data: published.append((date_str, len(data['value']))))
+
+        await service.get_price_data('2025-10-20')
+        assert published == []
+        await service.get_price_data('2025-10-20')
+        await service.get_price_data('2025-10-20')
+        assert published == [('2025-10-20', 96)]
+
+        # A late listener hears about days that are already complete
+        late = []
+        service.add_publication_listener(lambda date_str, data: late.append(date_str))
+        assert late == ['2025-10-20']
+
+
+class TestSharedService:
+    """Process-wide service registry"""
+
+    def test_shared_per_api_url(self):
+        reset_price_data_services()
+        try:
+            assert get_price_data_service('http://a') is get_price_data_service('http://a', {'enabled': False})
+            assert get_price_data_service('http://a') is not get_price_data_service('http://b')
+        finally:
+            reset_price_data_services()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -5,7 +5,7 @@ Ensures all components use the same pricing methodology with correct SC componen
 """
 
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from datetime import datetime, timedelta
 import sys
 import os
@@ -214,7 +214,7 @@ class TestPricingConsistency(unittest.TestCase):
         
         # Mock AutomatedPriceCharger
         with patch.object(manager, 'price_analyzer') as mock_analyzer:
-            mock_analyzer.fetch_price_data_for_date.return_value = self.mock_price_data
+            mock_analyzer.fetch_price_data_for_date = AsyncMock(return_value=self.mock_price_data)
             
             # Test price data fetching (async method)
             import asyncio
@@ -442,7 +442,7 @@ class TestPricingIntegration(unittest.TestCase):
         manager = MultiSessionManager(self.mock_config)
         
         with patch.object(manager, 'price_analyzer') as mock_analyzer:
-            mock_analyzer.fetch_price_data_for_date.return_value = self.mock_price_data
+            mock_analyzer.fetch_price_data_for_date = AsyncMock(return_value=self.mock_price_data)
             mock_analyzer.analyze_charging_windows.return_value = []
             
             # Test price data fetching (async method)
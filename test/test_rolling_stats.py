@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming rolling quantile/variance and their use in PriceSpikeDetector
+"""
+
+import random
+import statistics
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from rolling_stats import RollingQuantile, RollingVariance
+from price_spike_detector import PriceSpikeDetector
+
+
+START = datetime(2025, 10, 20, 12, 0)
+
+
+class TestRollingQuantile:
+    """Rolling median/quantiles against brute force"""
+
+    def test_count_window_matches_brute_force(self):
+        rng = random.Random(7)
+        window = RollingQuantile(max_samples=25)
+        values = []
+        for i in range(300):
+            value = rng.uniform(0.2, 1.8)
+            values.append(value)
+            window.add(value, START + timedelta(seconds=20 * i))
+
+            recent = values[-25:]
+            assert window.median() == pytest.approx(statistics.median(recent))
+            assert len(window) == len(recent)
+
+    def test_quantiles(self):
+        window = RollingQuantile()
+        for value in [0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]:
+            window.add(value, START)
+
+        assert window.quantile(0.0) == pytest.approx(0.3)
+        assert window.quantile(0.25) == pytest.approx(0.475)
+        assert window.quantile(0.5) == pytest.approx(0.65)
+        assert window.quantile(1.0) == pytest.approx(1.0)
+
+    def test_time_eviction(self):
+        window = RollingQuantile(max_age=timedelta(minutes=10))
+        for i in range(30):
+            window.add(float(i), START + timedelta(minutes=i))
+
+        # Samples at minutes 19..29 remain (cutoff is inclusive)
+        assert len(window) == 11
+        assert window.median() == 24.0
+
+        window.evict(START + timedelta(minutes=100))
+        assert len(window) == 0
+        assert window.median() is None
+
+    def test_duplicate_values(self):
+        window = RollingQuantile(max_samples=3)
+        for value in [0.5, 0.5, 0.9, 0.5, 0.5]:
+            window.add(value, START)
+
+        assert window.median() == 0.5
+        assert len(window) == 3
+
+
+class TestRollingVariance:
+    """O(1) rolling variance against statistics.pvariance"""
+
+    def test_matches_population_variance(self):
+        rng = random.Random(3)
+        rolling = RollingVariance(10)
+        values = []
+        for _ in range(500):
+            value = rng.uniform(-0.2, 2.0)
+            values.append(value)
+            rolling.add(value)
+
+            recent = values[-10:]
+            assert rolling.mean == pytest.approx(statistics.mean(recent))
+            assert rolling.variance == pytest.approx(statistics.pvariance(recent), abs=1e-12)
+
+    def test_constant_values(self):
+        rolling = RollingVariance(10)
+        for _ in range(50):
+            rolling.add(0.5)
+
+        assert rolling.std == pytest.approx(0.0, abs=1e-9)
+
+    def test_empty(self):
+        rolling = RollingVariance(5)
+        assert rolling.mean == 0.0
+        assert rolling.variance == 0.0
+
+
+class TestSpikeDetectorStreaming:
+    """Spike detector uses streaming statistics"""
+
+    @staticmethod
+    def legacy_reference(history, lookback_minutes, now):
+        """Previous filter-and-sort reference price"""
+        cutoff = now - timedelta(minutes=lookback_minutes)
+        recent = [s['price'] for s in history if s['timestamp'] >= cutoff]
+        if len(recent) < 2:
+            recent = [s['price'] for s in history]
+        return statistics.median(recent)
+
+    def test_reference_matches_legacy(self):
+        detector = PriceSpikeDetector({
+            'battery_selling': {'smart_timing': {'spike_detection': {'lookback_minutes': 30}}}
+        })
+        rng = random.Random(11)
+        now = datetime.now()
+        # 20-second samples covering two hours, older ones outside the lookback
+        for i in range(360):
+            detector.add_price_sample(rng.uniform(0.4, 0.9), now - timedelta(seconds=20 * (360 - i)))
+
+        expected = self.legacy_reference(detector.price_history, 30, datetime.now())
+        assert detector._calculate_reference_price() == pytest.approx(expected)
+
+    def test_reference_falls_back_to_full_history(self):
+        detector = PriceSpikeDetector({})
+        old = datetime.now() - timedelta(hours=3)
+        for i, price in enumerate([0.5, 0.7, 0.9]):
+            detector.add_price_sample(price, old + timedelta(minutes=i))
+
+        assert detector._calculate_reference_price() == pytest.approx(0.7)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
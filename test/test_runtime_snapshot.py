@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-cycle inverter runtime snapshot
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from backtest import SimulatedClock
+from fast_charge import GoodWeFastCharger
+from inverter.adapters.runtime_snapshot import RuntimeSnapshot, snapshot_for
+from inverter.adapters.simulated_adapter import SimulatedInverterAdapter, reset_simulated_inverters
+from inverter.models.inverter_config import InverterConfig
+
+NOON = datetime(2025, 10, 20, 12, 0)
+
+
+class CountingDevice:
+    """Device whose runtime reads take a while and are counted"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.reads = 0
+
+    async def read_runtime_data(self):
+        self.reads += 1
+        await asyncio.sleep(self.delay)
+        return {'battery_soc': 50 + self.reads}
+
+
+class ManualClock:
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self):
+        return self.value
+
+
+@pytest.fixture(autouse=True)
+def fresh_devices():
+    reset_simulated_inverters()
+    yield
+    reset_simulated_inverters()
+
+
+class TestRuntimeSnapshot:
+    """Read coalescing, max age and invalidation"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_concurrent_readers_share_one_read(self):
+        device = CountingDevice(delay=0.05)
+        snapshot = RuntimeSnapshot(device)
+
+        results = await asyncio.gather(*(snapshot.read() for _ in range(5)))
+
+        assert device.reads == 1
+        assert all(result == {'battery_soc': 51} for result in results)
+        stats = snapshot.get_stats()
+        assert stats['reads'] == 1
+        assert stats['avoided_reads'] == 4
+        assert stats['last_read_ms'] >= 40
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_max_age_and_new_cycle_refresh(self):
+        device = CountingDevice()
+        clock = ManualClock()
+        snapshot = RuntimeSnapshot(device, max_age=10.0, clock=clock)
+
+        await snapshot.read()
+        clock.value = 9.0
+        assert (await snapshot.read())['battery_soc'] == 51
+        clock.value = 10.0
+        assert (await snapshot.read())['battery_soc'] == 52
+
+        snapshot.begin_cycle()
+        assert snapshot.peek() is None
+        assert (await snapshot.read())['battery_soc'] == 53
+        assert snapshot.get_stats()['cycles'] == 1
+        assert device.reads == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_invalidation_during_read_is_not_cached(self):
+        device = CountingDevice(delay=0.05)
+        snapshot = RuntimeSnapshot(device)
+
+        read = asyncio.ensure_future(snapshot.read())
+        await asyncio.sleep(0.01)
+        snapshot.invalidate()  # e.g. a charging command was written meanwhile
+        await read
+
+        await snapshot.read()
+        assert device.reads == 2
+
+    def test_snapshot_is_shared_per_device(self):
+        device = CountingDevice()
+        assert snapshot_for(device, max_age=3.0) is snapshot_for(device)
+        assert snapshot_for(device).max_age == 3.0
+        assert snapshot_for(CountingDevice()) is not snapshot_for(device)
+
+
+class TestSnapshotConsumers:
+    """Adapter and fast charger reading through the shared snapshot"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_adapter_collects_with_one_read(self):
+        clock = SimulatedClock(NOON)
+        adapter = SimulatedInverterAdapter(clock=clock)
+        assert await adapter.connect(InverterConfig.from_yaml_config(
+            {'vendor': 'simulated', 'scenario': {'initial_soc': 70}}
+        ))
+
+        await adapter.collect_comprehensive_data()
+        stats = adapter.get_runtime_stats()
+        assert stats['reads'] == 1
+        assert stats['avoided_reads'] >= 4
+
+        # Commands invalidate the snapshot; the virtual clock ages it
+        assert await adapter.start_charging(power_pct=100, target_soc=90)
+        assert adapter.runtime_snapshot.peek() is None
+        soc = (await adapter.get_battery_status()).soc_percent
+        clock.advance(timedelta(minutes=15))
+        assert (await adapter.get_battery_status()).soc_percent > soc
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_charger_and_adapter_share_the_device_snapshot(self):
+        config = {'inverter': {'vendor': 'simulated', 'scenario': {'initial_soc': 40}}}
+        charger = GoodWeFastCharger(config)
+        adapter = SimulatedInverterAdapter()
+        assert await charger.connect_inverter()
+        assert await adapter.connect(InverterConfig.from_yaml_config(config['inverter']))
+        assert charger.runtime_snapshot is adapter.runtime_snapshot
+
+        charger.begin_cycle()
+        await charger.get_charging_status()
+        await charger.get_inverter_status()
+        await charger.check_safety_conditions()
+        await adapter.get_battery_status()
+
+        stats = charger.runtime_snapshot.get_stats()
+        assert stats['reads'] == 1
+        assert stats['avoided_reads'] == 3
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tests for the sample ring buffer and the decoupled sampler task
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import sample_buffer
+from sample_buffer import Sample, SampleRing, Sampler, clamp_interval
+from master_coordinator import MasterCoordinator
+
+NOON = datetime(2025, 10, 20, 12, 0)
+
+
+def sample_at(when: datetime, soc: float = 50.0) -> Sample:
+    return Sample(when.timestamp(), battery_soc=soc)
+
+
+class FakeCollector:
+    """Comprehensive data with an advancing timestamp"""
+
+    def __init__(self):
+        self.calls = 0
+        self.current = {}
+
+    async def collect_comprehensive_data(self):
+        self.calls += 1
+        self.current = {
+            'timestamp': (NOON + timedelta(seconds=self.calls)).isoformat(),
+            'battery': {'soc_percent': 40 + self.calls, 'temperature': 'Unknown'},
+            'photovoltaic': {'current_power_w': 1500},
+        }
+        return self.current
+
+    def get_current_data(self):
+        return self.current
+
+
+class TestSampleRing:
+    """O(1) append, overwrite when full and time-indexed windows"""
+
+    def test_overwrites_oldest_when_full(self):
+        ring = SampleRing(3)
+        for minute in range(5):
+            assert ring.append(sample_at(NOON + timedelta(minutes=minute), soc=minute))
+
+        assert len(ring) == 3
+        assert [s.battery_soc for s in ring.window()] == [2, 3, 4]
+        assert ring.latest().battery_soc == 4
+
+    def test_window_and_since(self):
+        ring = SampleRing.for_horizon(timedelta(hours=1), 20)
+        assert ring.capacity == 180
+        for i in range(200):
+            ring.append(sample_at(NOON + timedelta(seconds=20 * i), soc=i))
+
+        window = ring.window(NOON + timedelta(minutes=50), NOON + timedelta(minutes=51))
+        assert [s.battery_soc for s in window] == [150, 151, 152, 153]
+        last = ring.since(timedelta(minutes=1), now=NOON + timedelta(seconds=20 * 199))
+        assert [s.battery_soc for s in last] == [196, 197, 198, 199]
+        assert ring.window(NOON - timedelta(days=1), NOON) == []
+
+    def test_window_is_a_consistent_copy(self):
+        ring = SampleRing(4)
+        for i in range(4):
+            ring.append(sample_at(NOON + timedelta(seconds=i), soc=i))
+        view = ring.window()
+
+        ring.append(sample_at(NOON + timedelta(seconds=10), soc=10))
+
+        assert [s.battery_soc for s in view] == [0, 1, 2, 3]
+
+    def test_out_of_order_samples_are_dropped(self):
+        ring = SampleRing(4)
+        ring.append(sample_at(NOON))
+        assert not ring.append(sample_at(NOON - timedelta(seconds=1)))
+        assert ring.dropped_out_of_order == 1
+        assert len(ring) == 1
+
+    def test_sample_from_current_data(self):
+        sample = Sample.from_current_data({
+            'timestamp': NOON.isoformat(),
+            'battery': {'soc_percent': 64, 'temperature': 'Unknown', 'power_w': '-1200'},
+            'grid': {'power_w': 300, 'voltage': 231.5},
+        })
+
+        assert sample.timestamp == NOON
+        assert sample.battery_soc == 64.0
+        assert sample.battery_temperature is None
+        assert sample.battery_power_w == -1200.0
+        assert sample.pv_power_w is None
+        assert sample.as_dict()['grid_voltage'] == 231.5
+        assert not hasattr(sample, '__dict__')
+
+    def test_apply_to_overlays_without_touching_shared_sections(self):
+        battery = {'soc_percent': 10, 'charging_status': True}
+        shared = {'battery': battery, 'pv': {'daily_energy_kwh': 3.0}}
+        data = dict(shared)
+        Sample(NOON.timestamp(), battery_soc=64, battery_voltage=400.0, pv_power_w=1200).apply_to(data)
+
+        assert data['battery'] == {'soc_percent': 64, 'charging_status': True, 'voltage': 400.0}
+        assert data['photovoltaic'] == {'current_power_w': 1200}
+        assert data['timestamp'] == NOON.isoformat()
+        assert battery == {'soc_percent': 10, 'charging_status': True}  # collector's dict untouched
+
+
+class TestSampler:
+    """Independent sampling task"""
+
+    def test_interval_is_clamped(self):
+        assert clamp_interval(1) == 5.0
+        assert clamp_interval(60) == 20.0
+        assert clamp_interval(10) == 10.0
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_samples_at_interval_until_stopped(self, monkeypatch):
+        monkeypatch.setattr(sample_buffer, 'MIN_SAMPLE_INTERVAL', 0.01)
+        collector = FakeCollector()
+        sampler = Sampler(collector.collect_comprehensive_data, SampleRing(100), interval=0.02)
+
+        sampler.start()
+        await asyncio.sleep(0.15)
+        await sampler.stop()
+
+        stats = sampler.get_stats()
+        assert stats['running'] is False
+        assert 4 <= stats['samples'] <= 10
+        assert stats['buffered'] == stats['samples'] == collector.calls
+        assert sampler.ring.latest().battery_soc == 40 + collector.calls
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_failed_collection_is_counted(self):
+        async def failing():
+            raise OSError("inverter timeout")
+
+        sampler = Sampler(failing, SampleRing(10))
+        assert await sampler.sample_once() is None
+        assert sampler.get_stats()['failures'] == 1
+
+
+class TestCoordinatorSampling:
+    """MasterCoordinator reads the sampler's latest data"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_loop_collects_inline_without_sampler(self):
+        coordinator = MasterCoordinator()
+        coordinator.data_collector = FakeCollector()
+
+        await coordinator._collect_system_data()
+        await coordinator._collect_system_data()
+
+        assert coordinator.data_collector.calls == 2
+        assert len(coordinator.historical_data) == 2
+        assert coordinator.historical_data.capacity == 24 * 3600 // 20
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_loop_reads_latest_sample_while_sampler_runs(self, monkeypatch):
+        monkeypatch.setattr(sample_buffer, 'MIN_SAMPLE_INTERVAL', 0.01)
+        coordinator = MasterCoordinator()
+        collector = coordinator.data_collector = FakeCollector()
+        coordinator.sampler = Sampler(collector.collect_comprehensive_data, coordinator.historical_data, 0.01)
+        coordinator.sampler.start()
+        await asyncio.sleep(0.05)
+
+        calls = collector.calls
+        await coordinator._collect_system_data()
+        await coordinator.sampler.stop()
+
+        assert collector.calls - calls <= 1  # only the sampler collected
+        assert coordinator.current_data['battery']['soc_percent'] == coordinator.historical_data.latest().battery_soc
+        assert coordinator.current_data['battery']['soc_percent'] >= 40 + calls
+        assert len(coordinator.historical_data) == collector.calls
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_loop_reads_values_from_ring(self):
+        coordinator = MasterCoordinator()
+        collector = coordinator.data_collector = FakeCollector()
+        await coordinator._collect_system_data()
+        coordinator.historical_data.append(
+            Sample((NOON + timedelta(minutes=1)).timestamp(), battery_soc=77, battery_voltage=410.0))
+
+        coordinator._read_latest_sample()
+
+        assert coordinator.current_data['battery']['soc_percent'] == 77
+        assert coordinator.current_data['battery']['voltage'] == 410.0
+        assert coordinator.current_data['photovoltaic'] == {'current_power_w': 1500}
+        assert collector.current['battery']['soc_percent'] == 41
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the precomputed sensor index and compact runtime readings
+"""
+
+import sys
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from fast_charge import GoodWeFastCharger
+from inverter.adapters.simulated_adapter import SimulatedInverterAdapter, reset_simulated_inverters
+from inverter.models.inverter_config import InverterConfig
+from inverter.models.inverter_data import InverterState, InverterStatus, SensorIndex
+
+Sensor = namedtuple('Sensor', 'id_ name unit')
+
+SENSORS = [
+    Sensor('ppv', 'PV Power', 'W'),
+    Sensor('battery_soc', 'Battery State of Charge', '%'),
+    Sensor('vgrid', 'On-grid L1 Voltage', 'V'),
+]
+RUNTIME = {'ppv': 2500, 'battery_soc': 64, 'unlisted': 1}
+
+
+def legacy_status(sensors, runtime_data):
+    """The per-sensor dicts the adapter used to build on every read"""
+    return {s.id_: {'name': s.name, 'value': runtime_data[s.id_], 'unit': s.unit}
+            for s in sensors if s.id_ in runtime_data}
+
+
+@pytest.fixture(autouse=True)
+def fresh_devices():
+    reset_simulated_inverters()
+    yield
+    reset_simulated_inverters()
+
+
+class TestRuntimeReading:
+    """Compact reading with a lazy legacy view"""
+
+    def test_legacy_view_matches_old_dicts(self):
+        reading = SensorIndex.from_sensors(SENSORS).reading(RUNTIME)
+
+        assert reading == legacy_status(SENSORS, RUNTIME)
+        assert list(reading) == ['ppv', 'battery_soc']
+        assert len(reading) == 2
+        assert reading['ppv'] == {'name': 'PV Power', 'value': 2500, 'unit': 'W'}
+        assert reading.get('vgrid', {}).get('value', 'Unknown') == 'Unknown'
+        assert 'vgrid' not in reading
+        with pytest.raises(KeyError):
+            reading['unlisted']
+
+    def test_values_and_raw(self):
+        index = SensorIndex.from_sensors(SENSORS)
+        reading = index.reading(RUNTIME)
+
+        assert reading.values[:2] == (2500, 64)
+        assert reading.value('battery_soc') == 64
+        assert reading.value('vgrid', 0) == 0
+        assert reading.raw() == {'ppv': 2500, 'battery_soc': 64}
+        assert index.entry('vgrid') == (2, 'On-grid L1 Voltage', 'V')
+        with pytest.raises(AttributeError):
+            index.extra = True
+
+    def test_sensor_readings_share_one_timestamp(self):
+        when = datetime(2025, 10, 20, 12, 0)
+        reading = SensorIndex.from_sensors(SENSORS).reading(RUNTIME, timestamp=when)
+        sensors = reading.sensor_readings()
+
+        assert {sensors[s].timestamp for s in sensors} == {when}
+        assert sensors['battery_soc'].unit == '%'
+        status = InverterStatus('GW10K-ET', '1', 'fw', InverterState.NORMAL, True, when, sensors)
+        assert status.get_sensor_value('ppv') == 2500
+        assert status.get_sensor_value('vgrid', -1) == -1
+
+
+class TestAdapterReadings:
+    """GoodWeInverterAdapter and GoodWeFastCharger on the sensor index"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_adapter_walks_sensors_once_per_connection(self, monkeypatch):
+        adapter = SimulatedInverterAdapter()
+        assert await adapter.connect(InverterConfig.from_yaml_config(
+            {'vendor': 'simulated', 'scenario': {'initial_soc': 55}}
+        ))
+        device = adapter.device
+        calls = []
+        real_sensors = device.sensors
+        monkeypatch.setattr(device, 'sensors', lambda: calls.append(1) or real_sensors())
+
+        for _ in range(3):
+            adapter.begin_cycle()
+            data = await adapter.read_runtime_data()
+            status = await adapter.get_status()
+
+        assert len(calls) == 1
+        assert data == legacy_status(real_sensors(), adapter.runtime_snapshot.peek())
+        assert data['battery_soc']['value'] == 55
+        assert status.get_sensor_value('battery_soc') == 55
+        assert status.timestamp == data.timestamp
+        # Readers of one snapshot share the reading
+        assert await adapter.read_sensors() is data
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_fast_charger_status_keeps_dict_access(self):
+        charger = GoodWeFastCharger({'inverter': {'vendor': 'simulated', 'scenario': {'initial_soc': 40}}})
+        assert await charger.connect_inverter()
+
+        status = await charger.get_inverter_status()
+
+        assert status.get('battery_soc', {}).get('value', 0) == 40
+        assert status['battery_soc']['unit'] == '%'
+        assert status.value('battery_soc') == 40
+        assert charger.sensor_index is charger.sensor_index
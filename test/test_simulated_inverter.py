@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for the simulated inverter adapter and the accelerated coordinator runner
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+import yaml
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from backtest import SimulatedClock
+from fast_charge import GoodWeFastCharger
+from inverter.factory.inverter_factory import InverterFactory
+from inverter.models.inverter_config import InverterConfig
+from inverter.models.operation_mode import OperationMode
+from inverter.adapters.simulated_adapter import (
+    SimulatedInverter, SimulatedInverterAdapter, SimulationScenario, get_simulated_inverter,
+    reset_simulated_inverters
+)
+from simulation_runner import run_simulation
+
+CONFIG_PATH = Path(__file__).parent.parent / 'config' / 'master_coordinator_config.yaml'
+NOON = datetime(2025, 10, 20, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def fresh_devices():
+    reset_simulated_inverters()
+    yield
+    reset_simulated_inverters()
+
+
+def device_at(when: datetime, **scenario):
+    clock = SimulatedClock(when)
+    return SimulatedInverter(SimulationScenario.from_dict(scenario), clock=clock), clock
+
+
+class TestSimulationScenario:
+    """Scenario loading and profiles"""
+
+    def test_profiles_interpolate_between_hours(self):
+        scenario = SimulationScenario(pv_peak_w=1000)
+
+        assert scenario.pv_power_w(datetime(2025, 10, 20, 12, 0)) == pytest.approx(850)
+        assert scenario.pv_power_w(datetime(2025, 10, 20, 12, 30)) == pytest.approx(825)
+        assert scenario.pv_power_w(datetime(2025, 10, 20, 2, 0)) == 0
+        assert scenario.load_power_w(datetime(2025, 10, 20, 18, 0)) == 2000
+
+    def test_from_file(self, tmp_path):
+        path = tmp_path / 'scenario.yaml'
+        path.write_text(yaml.safe_dump({'capacity_kwh': 10.0, 'initial_soc': 80, 'daily_pv_factors': [1.0, 0.0]}))
+
+        scenario = SimulationScenario.from_file(str(path))
+
+        assert scenario.capacity_kwh == 10.0
+        assert scenario.initial_soc == 80
+        # Factors cycle per day
+        assert scenario.pv_power_w(NOON) != scenario.pv_power_w(NOON + timedelta(days=1))
+
+    def test_invalid_profile_length(self):
+        with pytest.raises(ValueError):
+            SimulationScenario.from_dict({'load_profile_w': [500] * 12})
+
+
+class TestSimulatedInverter:
+    """Physics-lite device behind the goodwe Inverter API"""
+
+    @pytest.mark.asyncio
+    async def test_pv_surplus_charges_battery(self):
+        device, clock = device_at(NOON, initial_soc=50, capacity_kwh=20.0)
+        await device.read_runtime_data()
+        clock.advance(timedelta(hours=1))
+
+        data = await device.read_runtime_data()
+
+        assert device.battery.soc_percent > 50
+        assert data['ppv'] > data['house_consumption']
+        assert data['pbattery1'] < 0  # Charging
+        assert data['e_day'] == pytest.approx(8.0 * 0.825, rel=0.05)
+
+    @pytest.mark.asyncio
+    async def test_fast_charging_imports_from_grid(self):
+        device, clock = device_at(datetime(2025, 10, 20, 2, 0), initial_soc=20, capacity_kwh=10.0)
+        await device.write_setting('fast_charging_power', 50)
+        await device.write_setting('fast_charging_soc', 60)
+        await device.write_setting('fast_charging', 1)
+        clock.advance(timedelta(minutes=30))
+
+        data = await device.read_runtime_data()
+
+        # 5 kW for 30 minutes at 95% efficiency
+        assert device.battery.soc_percent == pytest.approx(20 + 2.5 * 0.95 * 10, abs=0.1)
+        assert data['meter_active_power_total'] < 0  # Import
+        assert data['ibattery1'] < 0
+        assert await device.read_setting('fast_charging') == 1
+
+        # Charging stops at the target, house load is then served from the battery
+        clock.advance(timedelta(hours=2))
+        assert await device.get_battery_soc() == pytest.approx(60.0, abs=0.5)
+
+    @pytest.mark.asyncio
+    async def test_eco_discharge_exports(self):
+        device, clock = device_at(datetime(2025, 10, 20, 2, 0), initial_soc=80, capacity_kwh=10.0)
+        await device.set_grid_export_limit(3000)
+        await device.set_operation_mode(OperationMode.ECO_DISCHARGE, 3000, 50)
+        clock.advance(timedelta(hours=2))
+
+        data = await device.read_runtime_data()
+
+        assert device.battery.soc_percent == pytest.approx(50.0)
+        assert data['e_day_exp'] > 0
+
+        await device.set_operation_mode(OperationMode.GENERAL)
+        assert device.battery.mode == 'general'
+
+    @pytest.mark.asyncio
+    async def test_daily_counters_reset_at_midnight(self):
+        device, clock = device_at(datetime(2025, 10, 20, 22, 0))
+        await device.read_runtime_data()
+        clock.advance(timedelta(hours=4))
+
+        data = await device.read_runtime_data()
+
+        # Only 00:00-02:00 counts towards today's load, totals keep the whole span
+        assert data['e_load_day'] == pytest.approx(0.73, abs=0.05)
+        assert data['e_load_total'] > data['e_load_day']
+
+    def test_devices_are_shared_per_serial(self):
+        first = get_simulated_inverter({'scenario': {'serial_number': 'SIM-A'}})
+        second = get_simulated_inverter({'scenario': {'serial_number': 'SIM-A'}})
+        other = get_simulated_inverter({'scenario': {'serial_number': 'SIM-B'}})
+
+        assert first is second
+        assert first is not other
+
+
+class TestSimulatedInverterAdapter:
+    """InverterPort implementation and factory registration"""
+
+    def test_factory_creates_simulated_adapter_without_ip(self):
+        config = InverterConfig.from_yaml_config({'vendor': 'simulated', 'scenario': {'initial_soc': 70}})
+
+        assert config.validate() == (True, None)
+        adapter = InverterFactory.create_inverter(config)
+        assert adapter.vendor_name == 'simulated'
+        assert 'simulated' in InverterFactory.get_supported_vendors()
+
+    @pytest.mark.asyncio
+    async def test_port_methods(self):
+        clock = SimulatedClock(NOON)
+        adapter = SimulatedInverterAdapter(clock=clock)
+        assert await adapter.connect(InverterConfig.from_yaml_config(
+            {'vendor': 'simulated', 'scenario': {'initial_soc': 70}}
+        ))
+
+        battery = await adapter.get_battery_status()
+        assert battery.soc_percent == 70
+
+        assert await adapter.start_charging(power_pct=100, target_soc=90)
+        clock.advance(timedelta(minutes=15))
+        data = await adapter.collect_comprehensive_data()
+        assert data.battery['soc_percent'] > 70
+        assert data.inverter['serial'] == 'SIM00000001'
+
+        assert await adapter.set_operation_mode(OperationMode.ECO_DISCHARGE, power_w=2000, min_soc=40)
+        assert adapter.device.battery.mode == 'eco_discharge'
+
+    @pytest.mark.asyncio
+    async def test_fast_charger_connects_to_simulated_inverter(self):
+        charger = GoodWeFastCharger({'inverter': {'vendor': 'simulated', 'scenario': {'initial_soc': 40}},
+                                     'fast_charging': {'power_percentage': 50, 'target_soc': 90}})
+
+        assert await charger.connect_inverter()
+        assert await charger.start_fast_charging()
+        status = await charger.get_inverter_status()
+
+        assert status['battery_soc']['value'] == 40
+        assert await charger.inverter.read_setting('fast_charging_soc') == 90
+
+
+class TestAcceleratedCoordinator:
+    """MasterCoordinator driven on a virtual clock"""
+
+    @pytest.mark.asyncio
+    async def test_run_simulation_reports_metrics(self, tmp_path):
+        with open(CONFIG_PATH, 'r') as f:
+            base_config = yaml.safe_load(f)
+
+        report = await run_simulation(base_config, datetime(2025, 10, 20), days=1, tick_seconds=900,
+                                      keep_dir=str(tmp_path / 'sim'))
+
+        assert report['iterations'] == 96
+        assert len(report['days']) == 1
+        assert report['loop_latency_ms']['p95'] > 0
+        # Energy data is saved every 5 simulated minutes, i.e. every 15-minute tick
+        assert report['rows_written']['energy_data'] == 96
+        assert report['rows_written']['coordinator_decisions'] == 96
+        assert report['days'][0]['rss_mb'] > 0
+        assert 0 <= report['final_battery_soc'] <= 100
+        assert (tmp_path / 'sim' / 'simulation.db').exists()
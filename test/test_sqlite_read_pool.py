@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLiteStorage writer + read-only connection pool
+"""
+
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.connection_manager import ConnectionPool
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+
+START = datetime(2025, 10, 20, 12, 0)
+
+
+def energy_rows(count: int, offset: int = 0):
+    return [{'timestamp': START + timedelta(minutes=offset + i), 'battery_soc': 50.0} for i in range(count)]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'pool.db')
+
+
+class TestConnectionPool:
+    """Read-only pool mechanics"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_connections_are_read_only_and_reused(self, db_path):
+        sqlite3.connect(db_path).execute("CREATE TABLE t (x INTEGER)").connection.close()
+        pool = ConnectionPool(db_path, max_connections=2, min_connections=1)
+        await pool.start()
+
+        async with pool.connection() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                await conn.execute("INSERT INTO t VALUES (1)")
+        async with pool.connection() as again:
+            assert again is conn
+
+        stats = pool.get_stats()
+        assert stats['total_connections'] == 1
+        assert stats['acquisitions'] == 2
+        assert stats['active_connections'] == 0
+        await pool.stop()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_checkout_waits_when_exhausted(self, db_path):
+        sqlite3.connect(db_path).close()
+        pool = ConnectionPool(db_path, max_connections=1, min_connections=0)
+        await pool.start()
+        first = await pool.get_connection()
+
+        waiter = asyncio.create_task(pool.get_connection())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        await pool.return_connection(first)
+        assert await waiter is first
+        assert pool.get_stats()['waits'] == 1
+        await pool.return_connection(first)
+        await pool.stop()
+
+
+class TestStorageReadPool:
+    """SQLiteStorage reads through the pool"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_reads_use_pool_and_see_committed_writes(self, db_path):
+        storage = SQLiteStorage(StorageConfig(db_path=db_path, connection_pool_size=3))
+        assert await storage.connect()
+
+        await storage.save_energy_data(energy_rows(10))
+        await storage.save_system_state({'timestamp': START, 'state': 'monitoring'})
+        window = (START - timedelta(hours=1), START + timedelta(hours=1))
+
+        energy = await storage.get_energy_data(*window)
+        states = await storage.get_system_state_range(*window)
+
+        assert len(energy) == 10
+        assert len(states) == 1
+        assert storage.get_read_pool_stats()['acquisitions'] == 2
+        await storage.disconnect()
+        assert storage.get_read_pool_stats() == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(20)
+    async def test_concurrent_reads_during_writes(self, db_path):
+        storage = SQLiteStorage(StorageConfig(db_path=db_path, connection_pool_size=4))
+        assert await storage.connect()
+        await storage.save_energy_data(energy_rows(500))
+
+        async def writer():
+            for i in range(50):
+                assert await storage.save_energy_data(energy_rows(1, offset=500 + i))
+
+        async def reader():
+            counts = []
+            for _ in range(20):
+                rows = await storage.get_energy_data(START, START + timedelta(days=1))
+                counts.append(len(rows))
+            return counts
+
+        _, *reads = await asyncio.gather(writer(), *(reader() for _ in range(4)))
+
+        # Readers see a growing, never partial, committed snapshot
+        for counts in reads:
+            assert counts == sorted(counts)
+            assert 500 <= counts[0] and counts[-1] <= 550
+        assert len(await storage.get_energy_data(START, START + timedelta(days=1))) == 550
+        assert storage.get_read_pool_stats()['total_connections'] <= 4
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_pool_disabled_uses_writer(self, db_path):
+        storage = SQLiteStorage(StorageConfig(db_path=db_path, connection_pool_size=0))
+        assert await storage.connect()
+
+        await storage.save_energy_data(energy_rows(3))
+
+        assert len(await storage.get_energy_data(START, START + timedelta(hours=1))) == 3
+        assert storage.get_read_pool_stats() == {}
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_writer_runs_one_transaction_at_a_time(self, db_path):
+        storage = SQLiteStorage(StorageConfig(db_path=db_path))
+        assert await storage.connect()
+
+        async with storage._write_lock:
+            writes = asyncio.gather(
+                storage.save_charging_session({'session_id': 's1', 'start_time': START, 'status': 'active'}),
+                storage.save_system_state({'timestamp': START, 'state': 'charging'}),
+                storage.save_energy_data(energy_rows(2)),
+            )
+            await asyncio.sleep(0.05)
+            assert not writes.done()  # no writer shares the connection with the lock holder
+
+        assert await writes == [True, True, True]
+        assert len(await storage.get_charging_sessions(START, START + timedelta(hours=1))) == 1
+        await storage.disconnect()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for the iter_* streaming range queries of the storage backends
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.composite_storage import CompositeStorage
+from database.file_storage import FileStorage
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+from enhanced_data_collector import EnhancedDataCollector
+
+DAY = datetime(2025, 10, 20)
+
+
+def readings(start: datetime, count: int, step: timedelta = timedelta(minutes=5)):
+    return [{'timestamp': start + i * step, 'battery_soc': 50.0 + i % 40, 'house_consumption': 1000.0 + i}
+            for i in range(count)]
+
+
+class RawOnlyFileStorage(FileStorage):
+    """File storage without rollups, so consumers fall back to raw readings"""
+
+    async def get_energy_rollups(self, resolution, start_time, end_time):
+        return []
+
+
+async def collect(stream):
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+    return chunks
+
+
+@pytest.fixture
+async def storage(tmp_path):
+    storage = SQLiteStorage(StorageConfig(db_path=str(tmp_path / 'stream.db')))
+    assert await storage.connect()
+    yield storage
+    await storage.disconnect()
+
+
+class TestSQLiteStreaming:
+    """Keyset-paginated iter_* queries"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_energy_chunks_match_list_query(self, storage):
+        await storage.save_energy_data(readings(DAY, 250))
+        end = DAY + timedelta(hours=12)
+
+        chunks = await collect(storage.iter_energy_data(DAY, end, chunk_size=40))
+
+        assert [len(chunk) for chunk in chunks] == [40] * 3 + [25]  # 12 hours inclusive
+        assert [row for chunk in chunks for row in chunk] == await storage.get_energy_data(DAY, end)
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_decisions_with_equal_timestamps_are_not_skipped(self, storage):
+        for i in range(7):
+            await storage.save_decision({'timestamp': DAY + timedelta(minutes=i // 3), 'decision_type': 'charging',
+                                         'action': 'wait', 'reason': str(i), 'parameters': {'confidence': i / 10}})
+
+        chunks = await collect(storage.iter_decisions(DAY, DAY + timedelta(hours=1), chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 2, 1]
+        assert [row['reason'] for chunk in chunks for row in chunk] == [str(i) for i in range(7)]
+        assert chunks[0][1]['confidence'] == 0.1
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_system_state_range_stream(self, storage):
+        for i in range(5):
+            await storage.save_system_state({'timestamp': DAY + timedelta(minutes=i), 'state': 'running',
+                                             'metrics': {'n': i}})
+
+        chunks = await collect(storage.iter_system_state_range(DAY, DAY + timedelta(minutes=3), chunk_size=3))
+
+        assert [[row['metrics']['n'] for row in chunk] for chunk in chunks] == [[0, 1, 2], [3]]
+
+
+class TestFileAndCompositeStreaming:
+    """File-backed streaming and composite fallback"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_file_storage_streams_days_in_time_order(self, tmp_path):
+        files = FileStorage(StorageConfig())
+        files.energy_data_dir = str(tmp_path)
+        rows = readings(DAY, 400)
+        # Appended out of order within the days
+        await files.save_energy_data(rows[200:] + rows[:200])
+
+        chunks = await collect(files.iter_energy_data(DAY, DAY + timedelta(days=2), chunk_size=100))
+
+        streamed = [row['timestamp'] for chunk in chunks for row in chunk]
+        assert streamed == [row['timestamp'].isoformat() for row in rows]
+        assert max(len(chunk) for chunk in chunks) == 100
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_composite_falls_back_when_primary_is_empty(self, storage, tmp_path):
+        files = FileStorage(StorageConfig())
+        files.energy_data_dir = str(tmp_path)
+        await files.save_energy_data(readings(DAY, 10))
+        composite = CompositeStorage(storage, [files], StorageConfig())
+
+        chunks = await collect(composite.iter_energy_data(DAY, DAY + timedelta(hours=1), chunk_size=4))
+
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_average_consumption_streams_raw_readings(self, tmp_path):
+        files = RawOnlyFileStorage(StorageConfig())
+        files.energy_data_dir = str(tmp_path)
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        # 20-second samples at 1.8 kW spanning one hour: 0.01 kWh per interval
+        await files.save_energy_data([
+            {'timestamp': today - timedelta(days=1) + timedelta(seconds=20 * i), 'house_consumption': 1800.0}
+            for i in range(181)
+        ])
+        collector = EnhancedDataCollector({'data_storage': {'database_storage': {
+            'enabled': True, 'sqlite': {'path': str(tmp_path / 'collector.db')}}}})
+        collector.storage = files
+
+        result = await collector.get_average_daily_consumption(days=7)
+
+        assert result['available']
+        assert result['avg_daily_kwh'] == 1.8
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -12,7 +12,7 @@ Tests tariff-aware electricity pricing for Polish market tariffs:
 import pytest
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
@@ -330,6 +330,56 @@ class TestRealWorldScenarios:
         assert components.final_price < 0.45  # Should encourage charging
 
 
+class TestBatchPricing:
+    """Test vectorized calculate_final_prices_batch and per-day distribution vectors"""
+    
+    @pytest.mark.parametrize('tariff_type', ['g12w', 'g14dynamic', 'g11'])
+    def test_batch_matches_scalar(self, tariff_type):
+        """Batch prices should equal the scalar calculation for every period"""
+        calc = TariffPricingCalculator(create_test_config(tariff_type))
+        start = datetime(2025, 10, 17, 0, 0)
+        timestamps = [start + timedelta(minutes=15 * i) for i in range(192)]  # Two days
+        market_prices = [0.2 + 0.001 * i for i in range(192)]
+        
+        batch = calc.calculate_final_prices_batch(market_prices, timestamps, 'ZALECANE OSZCZĘDZANIE')
+        
+        expected = [
+            calc.calculate_final_price(p, ts, 'ZALECANE OSZCZĘDZANIE').final_price
+            for p, ts in zip(market_prices, timestamps)
+        ]
+        assert batch.shape == (192,)
+        assert batch.tolist() == pytest.approx(expected)
+    
+    def test_batch_length_mismatch(self):
+        """Mismatched inputs should raise ValueError"""
+        calc = TariffPricingCalculator(create_test_config('g12w'))
+        with pytest.raises(ValueError):
+            calc.calculate_final_prices_batch([0.3, 0.4], [datetime(2025, 10, 17, 0, 0)])
+    
+    def test_daily_vector_dst_aware(self):
+        """Daily distribution vector should have 92/96/100 slots depending on DST"""
+        calc = TariffPricingCalculator(create_test_config('g12w'))
+        
+        assert len(calc.get_daily_distribution_prices(date(2025, 3, 30))) == 92
+        assert len(calc.get_daily_distribution_prices(date(2025, 10, 17))) == 96
+        assert len(calc.get_daily_distribution_prices(date(2025, 10, 26))) == 100
+        
+        # Autumn change repeats 02:00-02:59, which is off-peak in G12w
+        autumn = calc.get_daily_distribution_prices(date(2025, 10, 26))
+        assert autumn[0] == pytest.approx(0.0749)
+        assert autumn[8:16].tolist() == pytest.approx([0.0749] * 8)
+        assert autumn[-1] == pytest.approx(0.0749)
+        assert autumn[7 * 4 + 4] == pytest.approx(0.3566)  # 07:00 local (after the repeated hour)
+    
+    def test_daily_vector_cached(self):
+        """The per-day vector should be built once and reused"""
+        calc = TariffPricingCalculator(create_test_config('g12w'))
+        first = calc.get_daily_distribution_prices(date(2025, 10, 17))
+        second = calc.get_daily_distribution_prices(date(2025, 10, 17))
+        assert first is second
+        assert not first.flags.writeable
+
+
 class TestGetTariffInfo:
     """Test get_tariff_info method"""
     
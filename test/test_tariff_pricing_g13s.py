@@ -8,7 +8,7 @@ for the Polish G13s electricity tariff.
 
 import sys
 from pathlib import Path
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 import pytest
 
@@ -437,6 +437,25 @@ class TestG13sEdgeCases:
         assert components_holiday.distribution_price == 0.110
 
 
+class TestG13sBatchPricing:
+    """Test vectorized G13s pricing against the scalar calculation."""
+    
+    def test_batch_matches_scalar_across_season_and_holiday(self):
+        """Batch prices match scalar prices over season change, weekend and holiday."""
+        calc = TariffPricingCalculator(create_g13s_config())
+        days = [date(2024, 3, 29), date(2024, 4, 1), date(2024, 6, 17), date(2024, 11, 11), date(2024, 12, 21)]
+        timestamps = [
+            datetime(d.year, d.month, d.day) + timedelta(minutes=15 * slot)
+            for d in days for slot in range(96)
+        ]
+        market_prices = [0.30] * len(timestamps)
+        
+        batch = calc.calculate_final_prices_batch(market_prices, timestamps)
+        expected = [calc.calculate_final_price(0.30, ts).final_price for ts in timestamps]
+        
+        assert batch.tolist() == pytest.approx(expected)
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
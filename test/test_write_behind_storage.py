@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Tests for the opt-in write-behind batching mode of SQLiteStorage
+"""
+
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.storage_interface import StorageConfig
+from database.sqlite_storage import SQLiteStorage
+from database.storage_factory import StorageFactory
+
+START = datetime(2025, 10, 20, 12, 0)
+
+
+def committed_count(db_path: str, table: str) -> int:
+    """Row count as seen by an independent connection (committed rows only)"""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def energy_row(i: int):
+    return {'timestamp': START + timedelta(minutes=i), 'battery_soc': 50.0 + i, 'pv_power': 1000.0}
+
+
+async def wait_for(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'write_behind.db')
+
+
+def write_behind_storage(db_path, **overrides):
+    options = dict(db_path=db_path, batch_size=100, write_behind_enabled=True,
+                   write_behind_flush_interval=60.0, write_behind_max_queue=1000)
+    options.update(overrides)
+    return SQLiteStorage(StorageConfig(**options))
+
+
+class TestWriteBehind:
+    """Queued writes, flush triggers and metrics"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_writes_are_coalesced_into_one_flush(self, db_path):
+        storage = write_behind_storage(db_path)
+        assert await storage.connect()
+
+        assert await storage.save_energy_data([energy_row(0), energy_row(1)])
+        assert await storage.save_system_state({'timestamp': START, 'state': 'monitoring'})
+        assert await storage.save_decision({'timestamp': START, 'decision_type': 'charging', 'action': 'wait'})
+
+        assert committed_count(db_path, 'energy_data') == 0
+        assert storage.get_write_behind_stats()['pending_rows'] == 4
+
+        assert await storage.flush()
+
+        assert committed_count(db_path, 'energy_data') == 2
+        assert committed_count(db_path, 'system_state') == 1
+        assert committed_count(db_path, 'coordinator_decisions') == 1
+        stats = storage.get_write_behind_stats()
+        assert stats['flushes'] == 1
+        assert stats['rows_flushed'] == 4
+        assert stats['pending_rows'] == 0
+        assert stats['max_flush_ms'] >= stats['avg_flush_ms'] > 0
+
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_row_threshold_triggers_background_flush(self, db_path):
+        storage = write_behind_storage(db_path, batch_size=5)
+        assert await storage.connect()
+
+        for i in range(5):
+            await storage.save_energy_data([energy_row(i)])
+        await wait_for(lambda: storage.get_write_behind_stats()['rows_flushed'] == 5)
+
+        assert committed_count(db_path, 'energy_data') == 5
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_interval_triggers_background_flush(self, db_path):
+        storage = write_behind_storage(db_path, write_behind_flush_interval=0.05)
+        assert await storage.connect()
+
+        await storage.save_energy_data([energy_row(0)])
+        await wait_for(lambda: storage.get_write_behind_stats()['rows_flushed'] == 1)
+
+        assert committed_count(db_path, 'energy_data') == 1
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_queue_is_bounded(self, db_path):
+        storage = write_behind_storage(db_path, batch_size=10, write_behind_max_queue=10)
+        assert await storage.connect()
+
+        for i in range(25):
+            await storage.save_energy_data([energy_row(i)])
+            assert storage.get_write_behind_stats()['pending_rows'] <= 10
+
+        stats = storage.get_write_behind_stats()
+        assert stats['rows_flushed'] + stats['pending_rows'] == 25
+        await storage.disconnect()
+        assert committed_count(db_path, 'energy_data') == 25
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_disconnect_flushes_pending_rows(self, db_path):
+        storage = write_behind_storage(db_path)
+        assert await storage.connect()
+        await storage.save_energy_data([energy_row(i) for i in range(3)])
+
+        await storage.disconnect()
+
+        assert committed_count(db_path, 'energy_data') == 3
+        assert storage.get_write_behind_stats()['pending_rows'] == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_reads_see_pending_writes(self, db_path):
+        storage = write_behind_storage(db_path)
+        assert await storage.connect()
+        await storage.save_energy_data([energy_row(0)])
+        await storage.save_decision({'timestamp': START, 'decision_type': 'charging', 'action': 'wait'})
+
+        energy = await storage.get_energy_data(START - timedelta(hours=1), START + timedelta(hours=1))
+        decisions = await storage.get_decisions(START - timedelta(hours=1), START + timedelta(hours=1))
+        stats = await storage.get_database_stats()
+
+        assert len(energy) == 1
+        assert len(decisions) == 1
+        assert stats['write_behind']['rows_flushed'] == 2
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_flush_waits_for_flush_in_progress(self, db_path):
+        storage = write_behind_storage(db_path)
+        assert await storage.connect()
+        release = asyncio.Event()
+        execute = storage._execute_with_retry
+
+        async def slow_execute(operation, *args, **kwargs):
+            await release.wait()
+            return await execute(operation, *args, **kwargs)
+
+        storage._execute_with_retry = slow_execute
+        await storage.save_energy_data([energy_row(0)])
+        background = asyncio.create_task(storage.flush())
+        await wait_for(lambda: storage._write_queue.empty())
+
+        caller = asyncio.create_task(storage.flush())
+        await asyncio.sleep(0.05)
+        assert not caller.done()
+
+        release.set()
+        assert await caller
+        assert committed_count(db_path, 'energy_data') == 1
+        await background
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_failed_flush_keeps_rows_for_retry(self, db_path):
+        storage = write_behind_storage(db_path)
+        assert await storage.connect()
+        execute = storage._execute_with_retry
+
+        async def failing_execute(operation, *args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+        await storage.save_energy_data([energy_row(0), energy_row(1)])
+        storage._execute_with_retry = failing_execute
+        assert not await storage.flush()
+        assert storage.get_write_behind_stats()['pending_rows'] == 2
+
+        storage._execute_with_retry = execute
+        await storage.save_energy_data([energy_row(2)])
+        assert await storage.flush()
+
+        assert committed_count(db_path, 'energy_data') == 3
+        stats = storage.get_write_behind_stats()
+        assert (stats['failed_flushes'], stats['rows_dropped'], stats['pending_rows']) == (1, 0, 0)
+        await storage.disconnect()
+
+    @pytest.mark.asyncio
+    @pytest.mark.timeout(10)
+    async def test_disabled_by_default(self, db_path):
+        storage = SQLiteStorage(StorageConfig(db_path=db_path))
+        assert await storage.connect()
+
+        await storage.save_energy_data([energy_row(0)])
+
+        assert committed_count(db_path, 'energy_data') == 1
+        assert storage.get_write_behind_stats()['enabled'] is False
+        assert 'write_behind' not in await storage.get_database_stats()
+        await storage.disconnect()
+
+    def test_factory_reads_write_behind_config(self, db_path):
+        storage = StorageFactory.create_storage({
+            'database_storage': {
+                'enabled': True,
+                'sqlite': {
+                    'path': db_path,
+                    'batch_size': 50,
+                    'write_behind': {'enabled': True, 'flush_interval_seconds': 2.0, 'max_queue_rows': 200}
+                }
+            }
+        })
+
+        stats = storage.get_write_behind_stats()
+        assert stats['enabled'] is True
+        assert stats['flush_rows'] == 50
+        assert stats['flush_interval_seconds'] == 2.0
+        assert stats['max_queue_rows'] == 200
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])